@@ -22,6 +22,7 @@ from open_webui.env import (
     ENV,
     REDIS_URL,
     REDIS_KEY_PREFIX,
+    REDIS_CONFIG_SYNC_INTERVAL,
     REDIS_SENTINEL_HOSTS,
     REDIS_SENTINEL_PORT,
     FRONTEND_BUILD_DIR,
@@ -33,7 +34,7 @@ from open_webui.env import (
     log,
 )
 from open_webui.internal.db import Base, get_db
-from open_webui.utils.redis import get_redis_connection
+from open_webui.utils.redis import RedisVersion, get_redis_connection
 
 
 class EndpointFilter(logging.Filter):
@@ -222,11 +223,22 @@ class PersistentConfig(Generic[T]):
 
 
 class AppConfig:
+    """
+    Config values shared by all workers.
+
+    Reads are served from the local `_state`. With Redis, every update bumps a
+    `RedisVersion` and the other workers re-sync lazily on their next read.
+    """
+
     _redis: Union[redis.Redis, redis.cluster.RedisCluster] = None
     _redis_key_prefix: str
+    _redis_version: RedisVersion = None
 
     _state: dict[str, PersistentConfig]
 
+    # Redis config version the local state was last synced at
+    _version: Optional[str] = None
+
     def __init__(
         self,
         redis_url: Optional[str] = None,
@@ -245,40 +257,74 @@ class AppConfig:
                     decode_responses=True,
                 ),
             )
+            super().__setattr__(
+                "_redis_version",
+                RedisVersion(
+                    self._redis,
+                    f"{redis_key_prefix}:config",
+                    REDIS_CONFIG_SYNC_INTERVAL,
+                ),
+            )
 
         super().__setattr__("_state", {})
 
+    def _get_redis_key(self, key: str) -> str:
+        return f"{self._redis_key_prefix}:config:{key}"
+
+    def _sync(self):
+        version = self._redis_version.get()
+        if version == self._version:
+            return
+
+        try:
+            keys = list(self._state)
+            pipe = self._redis.pipeline()
+            for key in keys:
+                pipe.get(self._get_redis_key(key))
+            redis_values = pipe.execute()
+        except redis.exceptions.RedisError as e:
+            log.warning(f"Failed to sync config from Redis: {e}")
+            return
+
+        for key, redis_value in zip(keys, redis_values):
+            if redis_value is None:
+                continue
+
+            try:
+                decoded_value = json.loads(redis_value)
+
+                # Update the in-memory value if different
+                if self._state[key].value != decoded_value:
+                    self._state[key].value = decoded_value
+                    log.info(f"Updated {key} from Redis: {decoded_value}")
+
+            except json.JSONDecodeError:
+                log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
+
+        super().__setattr__("_version", version)
+
     def __setattr__(self, key, value):
         if isinstance(value, PersistentConfig):
             self._state[key] = value
+
+            # Load the Redis value of the new key on the next read
+            super().__setattr__("_version", None)
         else:
             self._state[key].value = value
             self._state[key].save()
 
             if self._redis:
-                redis_key = f"{self._redis_key_prefix}:config:{key}"
+                redis_key = self._get_redis_key(key)
                 self._redis.set(redis_key, json.dumps(self._state[key].value))
+                self._redis_version.bump(key)
 
     def __getattr__(self, key):
         if key not in self._state:
             raise AttributeError(f"Config key '{key}' not found")
 
-        # If Redis is available, check for an updated value
+        # If Redis is available, pick up values updated by other workers
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:config:{key}"
-            redis_value = self._redis.get(redis_key)
-
-            if redis_value is not None:
-                try:
-                    decoded_value = json.loads(redis_value)
-
-                    # Update the in-memory value if different
-                    if self._state[key].value != decoded_value:
-                        self._state[key].value = decoded_value
-                        log.info(f"Updated {key} from Redis: {decoded_value}")
-
-                except json.JSONDecodeError:
-                    log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
+            self._sync()
 
         return self._state[key].value
 
@@ -952,6 +998,24 @@ UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 CACHE_DIR = DATA_DIR / "cache"
 CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
+# Local read-through cache of files downloaded from S3, GCS or Azure storage
+ENABLE_STORAGE_CACHE = os.environ.get("ENABLE_STORAGE_CACHE", "true").lower() == "true"
+STORAGE_CACHE_DIR = os.environ.get("STORAGE_CACHE_DIR", f"{CACHE_DIR}/storage")
+
+STORAGE_CACHE_MAX_SIZE = os.environ.get("STORAGE_CACHE_MAX_SIZE", "")
+try:
+    # Bytes, defaults to 5 GiB
+    STORAGE_CACHE_MAX_SIZE = int(STORAGE_CACHE_MAX_SIZE)
+except ValueError:
+    STORAGE_CACHE_MAX_SIZE = 5 * 1024**3
+
+STORAGE_CACHE_TTL = os.environ.get("STORAGE_CACHE_TTL", "")
+try:
+    # Seconds since last access, 0 keeps files until the size limit is reached
+    STORAGE_CACHE_TTL = int(STORAGE_CACHE_TTL)
+except ValueError:
+    STORAGE_CACHE_TTL = 7 * 24 * 60 * 60
+
 
 ####################################
 # DIRECT CONNECTIONS
@@ -2150,6 +2214,41 @@ Ensure that the tools are effectively utilized to achieve the highest-quality an
 
 VECTOR_DB = os.environ.get("VECTOR_DB", "chroma")
 
+# Persistent BM25 index per collection, used by hybrid search. With several
+# replicas, set REDIS_URL so writes through one replica outdate the others' indexes
+ENABLE_RAG_BM25_INDEX = (
+    os.environ.get("ENABLE_RAG_BM25_INDEX", "true").lower() == "true"
+)
+RAG_BM25_INDEX_DIR = os.environ.get("RAG_BM25_INDEX_DIR", f"{CACHE_DIR}/bm25")
+
+# Threads per vector DB backend for RAG queries, and how long a query may take
+RAG_VECTOR_DB_MAX_WORKERS = os.environ.get("RAG_VECTOR_DB_MAX_WORKERS", "8")
+
+try:
+    RAG_VECTOR_DB_MAX_WORKERS = max(int(RAG_VECTOR_DB_MAX_WORKERS), 1)
+except ValueError:
+    RAG_VECTOR_DB_MAX_WORKERS = 8
+
+RAG_VECTOR_DB_QUERY_TIMEOUT = os.environ.get("RAG_VECTOR_DB_QUERY_TIMEOUT", "30")
+
+try:
+    RAG_VECTOR_DB_QUERY_TIMEOUT = float(RAG_VECTOR_DB_QUERY_TIMEOUT) or None
+except ValueError:
+    RAG_VECTOR_DB_QUERY_TIMEOUT = 30.0
+
+# How results of several collections and queries are merged: "max" keeps the
+# best distance of every chunk, "rrf" ranks chunks by reciprocal rank fusion
+RAG_RESULT_FUSION = os.environ.get("RAG_RESULT_FUSION", "max").lower()
+if RAG_RESULT_FUSION not in ["max", "rrf"]:
+    RAG_RESULT_FUSION = "max"
+
+RAG_RRF_K = os.environ.get("RAG_RRF_K", "60")
+
+try:
+    RAG_RRF_K = int(RAG_RRF_K)
+except ValueError:
+    RAG_RRF_K = 60
+
 # Chroma
 CHROMA_DATA_PATH = f"{DATA_DIR}/vector_db"
 
@@ -2755,6 +2854,22 @@ RAG_EMBEDDING_PREFIX_FIELD_NAME = os.environ.get(
     "RAG_EMBEDDING_PREFIX_FIELD_NAME", None
 )
 
+# Computed embeddings kept in memory, and optionally on disk, so identical
+# texts aren't embedded again
+RAG_EMBEDDING_CACHE_SIZE = os.environ.get("RAG_EMBEDDING_CACHE_SIZE", "10000")
+
+try:
+    RAG_EMBEDDING_CACHE_SIZE = int(RAG_EMBEDDING_CACHE_SIZE)
+except ValueError:
+    RAG_EMBEDDING_CACHE_SIZE = 10000
+
+ENABLE_RAG_EMBEDDING_DISK_CACHE = (
+    os.environ.get("ENABLE_RAG_EMBEDDING_DISK_CACHE", "false").lower() == "true"
+)
+RAG_EMBEDDING_CACHE_DIR = os.environ.get(
+    "RAG_EMBEDDING_CACHE_DIR", f"{CACHE_DIR}/embeddings"
+)
+
 RAG_RERANKING_ENGINE = PersistentConfig(
     "RAG_RERANKING_ENGINE",
     "rag.reranking_engine",
@@ -2779,6 +2894,28 @@ RAG_RERANKING_MODEL_TRUST_REMOTE_CODE = (
     os.environ.get("RAG_RERANKING_MODEL_TRUST_REMOTE_CODE", "True").lower() == "true"
 )
 
+RAG_RERANKING_BATCH_SIZE = os.environ.get("RAG_RERANKING_BATCH_SIZE", "64")
+
+try:
+    RAG_RERANKING_BATCH_SIZE = max(int(RAG_RERANKING_BATCH_SIZE), 1)
+except ValueError:
+    RAG_RERANKING_BATCH_SIZE = 64
+
+# Milliseconds to wait for more rerank requests to join a batch
+RAG_RERANKING_BATCH_WAIT = os.environ.get("RAG_RERANKING_BATCH_WAIT", "5")
+
+try:
+    RAG_RERANKING_BATCH_WAIT = max(float(RAG_RERANKING_BATCH_WAIT), 0) / 1000
+except ValueError:
+    RAG_RERANKING_BATCH_WAIT = 0.005
+
+RAG_RERANKING_CACHE_SIZE = os.environ.get("RAG_RERANKING_CACHE_SIZE", "10000")
+
+try:
+    RAG_RERANKING_CACHE_SIZE = int(RAG_RERANKING_CACHE_SIZE)
+except ValueError:
+    RAG_RERANKING_CACHE_SIZE = 10000
+
 RAG_EXTERNAL_RERANKER_URL = PersistentConfig(
     "RAG_EXTERNAL_RERANKER_URL",
     "rag.external_reranker_url",
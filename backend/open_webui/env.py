@@ -60,13 +60,15 @@ if USE_CUDA.lower() == "true":
 else:
     DEVICE_TYPE = "cpu"
 
-try:
-    import torch
+# MPS only exists on macOS, don't pay for importing torch anywhere else
+if sys.platform == "darwin":
+    try:
+        import torch
 
-    if torch.backends.mps.is_available() and torch.backends.mps.is_built():
-        DEVICE_TYPE = "mps"
-except Exception:
-    pass
+        if torch.backends.mps.is_available() and torch.backends.mps.is_built():
+            DEVICE_TYPE = "mps"
+    except Exception:
+        pass
 
 ####################################
 # LOGGING
@@ -372,6 +374,18 @@ ENABLE_REALTIME_CHAT_SAVE = (
     os.environ.get("ENABLE_REALTIME_CHAT_SAVE", "False").lower() == "true"
 )
 
+# Store chat messages as rows in the chat_message table instead of inside the
+# chat JSON, so that updating a single message doesn't rewrite the whole chat
+ENABLE_CHAT_MESSAGE_TABLE = (
+    os.environ.get("ENABLE_CHAT_MESSAGE_TABLE", "False").lower() == "true"
+)
+
+# Keep a counter of unread messages on each channel membership, updated when
+# messages are sent or read, instead of counting them when channels are listed
+ENABLE_CHANNEL_UNREAD_COUNTER = (
+    os.environ.get("ENABLE_CHANNEL_UNREAD_COUNTER", "False").lower() == "true"
+)
+
 ENABLE_QUERIES_CACHE = os.environ.get("ENABLE_QUERIES_CACHE", "False").lower() == "true"
 
 ####################################
@@ -395,6 +409,72 @@ try:
 except ValueError:
     REDIS_SENTINEL_MAX_RETRY_COUNT = 2
 
+# Maximum time in seconds a worker serves state shared through Redis (config
+# values, group memberships) without checking for updates, in case an
+# invalidation message from another worker was missed
+REDIS_CONFIG_SYNC_INTERVAL = os.environ.get("REDIS_CONFIG_SYNC_INTERVAL", "5")
+try:
+    REDIS_CONFIG_SYNC_INTERVAL = float(REDIS_CONFIG_SYNC_INTERVAL)
+    if REDIS_CONFIG_SYNC_INTERVAL < 0:
+        REDIS_CONFIG_SYNC_INTERVAL = 5.0
+except ValueError:
+    REDIS_CONFIG_SYNC_INTERVAL = 5.0
+
+# File processing status streams are woken up when the status changes and only
+# read it from the database every this many seconds in case an update was missed
+FILE_PROCESSING_STATUS_POLL_INTERVAL = os.environ.get(
+    "FILE_PROCESSING_STATUS_POLL_INTERVAL", "10"
+)
+try:
+    FILE_PROCESSING_STATUS_POLL_INTERVAL = float(FILE_PROCESSING_STATUS_POLL_INTERVAL)
+    if FILE_PROCESSING_STATUS_POLL_INTERVAL <= 0:
+        FILE_PROCESSING_STATUS_POLL_INTERVAL = 10.0
+except ValueError:
+    FILE_PROCESSING_STATUS_POLL_INTERVAL = 10.0
+
+# Per-user group memberships and permissions are cached for at most this many
+# seconds, and invalidated earlier on group changes; 0 disables the cache
+USER_ACCESS_CACHE_TTL = os.environ.get("USER_ACCESS_CACHE_TTL", "60")
+try:
+    USER_ACCESS_CACHE_TTL = float(USER_ACCESS_CACHE_TTL)
+except ValueError:
+    USER_ACCESS_CACHE_TTL = 60.0
+
+USER_ACCESS_CACHE_SIZE = os.environ.get("USER_ACCESS_CACHE_SIZE", "10000")
+try:
+    USER_ACCESS_CACHE_SIZE = int(USER_ACCESS_CACHE_SIZE)
+except ValueError:
+    USER_ACCESS_CACHE_SIZE = 10000
+
+# Chat completions running at once per model and per user on each worker, 0 is
+# unlimited. Tasks over a limit wait for a slot, title/tag/follow-up generation
+# behind interactive completions
+TASKS_MODEL_CONCURRENCY_LIMIT = os.environ.get("TASKS_MODEL_CONCURRENCY_LIMIT", "0")
+try:
+    TASKS_MODEL_CONCURRENCY_LIMIT = int(TASKS_MODEL_CONCURRENCY_LIMIT)
+except ValueError:
+    TASKS_MODEL_CONCURRENCY_LIMIT = 0
+
+TASKS_USER_CONCURRENCY_LIMIT = os.environ.get("TASKS_USER_CONCURRENCY_LIMIT", "0")
+try:
+    TASKS_USER_CONCURRENCY_LIMIT = int(TASKS_USER_CONCURRENCY_LIMIT)
+except ValueError:
+    TASKS_USER_CONCURRENCY_LIMIT = 0
+
+# Background generation is dropped when this many tasks are already waiting, or
+# after waiting this many seconds
+TASKS_BACKGROUND_QUEUE_SIZE = os.environ.get("TASKS_BACKGROUND_QUEUE_SIZE", "100")
+try:
+    TASKS_BACKGROUND_QUEUE_SIZE = int(TASKS_BACKGROUND_QUEUE_SIZE)
+except ValueError:
+    TASKS_BACKGROUND_QUEUE_SIZE = 100
+
+TASKS_BACKGROUND_QUEUE_TIMEOUT = os.environ.get("TASKS_BACKGROUND_QUEUE_TIMEOUT", "30")
+try:
+    TASKS_BACKGROUND_QUEUE_TIMEOUT = float(TASKS_BACKGROUND_QUEUE_TIMEOUT)
+except ValueError:
+    TASKS_BACKGROUND_QUEUE_TIMEOUT = 30.0
+
 ####################################
 # UVICORN WORKERS
 ####################################
@@ -608,6 +688,47 @@ else:
         CHAT_STREAM_RESPONSE_CHUNK_MAX_BUFFER_SIZE = None
 
 
+# Coalesce message/replace/embeds/files/source events emitted during a response
+# into a single chat write instead of rewriting the chat blob per event. Status
+# events are still written as they arrive.
+ENABLE_CHAT_MESSAGE_WRITE_BUFFER = (
+    os.environ.get("ENABLE_CHAT_MESSAGE_WRITE_BUFFER", "True").lower() == "true"
+)
+
+CHAT_MESSAGE_WRITE_BUFFER_INTERVAL = os.environ.get(
+    "CHAT_MESSAGE_WRITE_BUFFER_INTERVAL", "1"
+)
+
+try:
+    CHAT_MESSAGE_WRITE_BUFFER_INTERVAL = float(CHAT_MESSAGE_WRITE_BUFFER_INTERVAL)
+    if CHAT_MESSAGE_WRITE_BUFFER_INTERVAL <= 0:
+        CHAT_MESSAGE_WRITE_BUFFER_INTERVAL = 1.0
+except Exception:
+    CHAT_MESSAGE_WRITE_BUFFER_INTERVAL = 1.0
+
+CHAT_MESSAGE_WRITE_BUFFER_MAX_EVENTS = os.environ.get(
+    "CHAT_MESSAGE_WRITE_BUFFER_MAX_EVENTS", "64"
+)
+
+try:
+    CHAT_MESSAGE_WRITE_BUFFER_MAX_EVENTS = int(CHAT_MESSAGE_WRITE_BUFFER_MAX_EVENTS)
+    if CHAT_MESSAGE_WRITE_BUFFER_MAX_EVENTS < 1:
+        CHAT_MESSAGE_WRITE_BUFFER_MAX_EVENTS = 64
+except Exception:
+    CHAT_MESSAGE_WRITE_BUFFER_MAX_EVENTS = 64
+
+# Number of Yjs updates kept per collaborative document before they are
+# merged into its snapshot
+YDOC_COMPACT_THRESHOLD = os.environ.get("YDOC_COMPACT_THRESHOLD", "100")
+
+try:
+    YDOC_COMPACT_THRESHOLD = int(YDOC_COMPACT_THRESHOLD)
+    if YDOC_COMPACT_THRESHOLD < 1:
+        YDOC_COMPACT_THRESHOLD = 100
+except Exception:
+    YDOC_COMPACT_THRESHOLD = 100
+
+
 ####################################
 # WEBSOCKET SUPPORT
 ####################################
@@ -642,6 +763,17 @@ try:
 except ValueError:
     WEBSOCKET_REDIS_LOCK_TIMEOUT = 60
 
+# Seconds each worker keeps session records read from Redis, 0 disables it.
+# Workers may see a disconnected session for up to this long.
+WEBSOCKET_SESSION_POOL_CACHE_TTL = os.environ.get(
+    "WEBSOCKET_SESSION_POOL_CACHE_TTL", "0"
+)
+
+try:
+    WEBSOCKET_SESSION_POOL_CACHE_TTL = float(WEBSOCKET_SESSION_POOL_CACHE_TTL)
+except ValueError:
+    WEBSOCKET_SESSION_POOL_CACHE_TTL = 0
+
 WEBSOCKET_SENTINEL_HOSTS = os.environ.get("WEBSOCKET_SENTINEL_HOSTS", "")
 WEBSOCKET_SENTINEL_PORT = os.environ.get("WEBSOCKET_SENTINEL_PORT", "26379")
 WEBSOCKET_SERVER_LOGGING = (
@@ -711,6 +843,39 @@ AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL = (
     os.environ.get("AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL", "True").lower() == "true"
 )
 
+# Connection pools of the shared OpenAI and Ollama upstream sessions, 0 is unlimited
+AIOHTTP_CLIENT_POOL_LIMIT = os.environ.get("AIOHTTP_CLIENT_POOL_LIMIT", "0")
+
+try:
+    AIOHTTP_CLIENT_POOL_LIMIT = int(AIOHTTP_CLIENT_POOL_LIMIT)
+except ValueError:
+    AIOHTTP_CLIENT_POOL_LIMIT = 0
+
+AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = os.environ.get(
+    "AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST", "0"
+)
+
+try:
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = int(AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST)
+except ValueError:
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = 0
+
+AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = os.environ.get(
+    "AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT", "30"
+)
+
+try:
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = float(AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT)
+except ValueError:
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT = 30.0
+
+AIOHTTP_CLIENT_DNS_CACHE_TTL = os.environ.get("AIOHTTP_CLIENT_DNS_CACHE_TTL", "300")
+
+try:
+    AIOHTTP_CLIENT_DNS_CACHE_TTL = int(AIOHTTP_CLIENT_DNS_CACHE_TTL)
+except ValueError:
+    AIOHTTP_CLIENT_DNS_CACHE_TTL = 300
+
 
 ####################################
 # SENTENCE TRANSFORMERS
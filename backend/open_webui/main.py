@@ -70,6 +70,8 @@ from open_webui.utils.logger import start_logger
 from open_webui.socket.main import (
     app as socket_app,
     periodic_usage_pool_cleanup,
+    periodic_message_write_buffer_flush,
+    MESSAGE_WRITE_BUFFER,
     get_event_emitter,
     get_models_in_use,
     get_active_user_ids,
@@ -114,6 +116,7 @@ from open_webui.internal.db import Session, engine
 from open_webui.models.functions import Functions
 from open_webui.models.models import Models
 from open_webui.models.users import UserModel, Users
+from open_webui.models.channels import Channels
 from open_webui.models.chats import Chats
 
 from open_webui.config import (
@@ -471,6 +474,8 @@ from open_webui.env import (
     ENABLE_WEBSOCKET_SUPPORT,
     BYPASS_MODEL_ACCESS_CONTROL,
     RESET_CONFIG_ON_START,
+    ENABLE_CHAT_MESSAGE_TABLE,
+    ENABLE_CHANNEL_UNREAD_COUNTER,
     ENABLE_VERSION_UPDATE_CHECK,
     ENABLE_OTEL,
     EXTERNAL_PWA_MANIFEST_URL,
@@ -512,10 +517,14 @@ from open_webui.utils.oauth import (
 )
 from open_webui.utils.security_headers import SecurityHeadersMiddleware
 from open_webui.utils.redis import get_redis_connection
+from open_webui.utils.http_client import UPSTREAM_SESSIONS
+from open_webui.retrieval.vector.factory import VECTOR_DB_EXECUTOR
 
 from open_webui.tasks import (
     redis_task_command_listener,
+    redis_report_task_queue,
     list_task_ids_by_item_id,
+    list_task_queue,
     create_task,
     stop_task,
     list_tasks,
@@ -579,6 +588,14 @@ async def lifespan(app: FastAPI):
     if LICENSE_KEY:
         get_license_data(app, LICENSE_KEY)
 
+    if not ENABLE_CHAT_MESSAGE_TABLE:
+        folded = Chats.fold_message_rows()
+        if folded:
+            log.info(f"Moved the chat_message rows of {folded} chats back into chats")
+
+    if not ENABLE_CHANNEL_UNREAD_COUNTER:
+        Channels.clear_unread_counters()
+
     # This should be blocking (sync) so functions are not deactivated on first /get_models calls
     # when the first user lands on the / route.
     log.info("Installing external dependencies of functions and tools...")
@@ -597,12 +614,18 @@ async def lifespan(app: FastAPI):
         app.state.redis_task_command_listener = asyncio.create_task(
             redis_task_command_listener(app)
         )
+        app.state.redis_task_queue_reporter = asyncio.create_task(
+            redis_report_task_queue(app.state.redis)
+        )
 
     if THREAD_POOL_SIZE and THREAD_POOL_SIZE > 0:
         limiter = anyio.to_thread.current_default_thread_limiter()
         limiter.total_tokens = THREAD_POOL_SIZE
 
     asyncio.create_task(periodic_usage_pool_cleanup())
+    app.state.message_write_buffer_flush = asyncio.create_task(
+        periodic_message_write_buffer_flush()
+    )
 
     if app.state.config.ENABLE_BASE_MODELS_CACHE:
         await get_all_models(
@@ -630,6 +653,16 @@ async def lifespan(app: FastAPI):
     if hasattr(app.state, "redis_task_command_listener"):
         app.state.redis_task_command_listener.cancel()
 
+    if hasattr(app.state, "redis_task_queue_reporter"):
+        app.state.redis_task_queue_reporter.cancel()
+
+    if hasattr(app.state, "message_write_buffer_flush"):
+        app.state.message_write_buffer_flush.cancel()
+        await MESSAGE_WRITE_BUFFER.flush_all()
+
+    await UPSTREAM_SESSIONS.close()
+    VECTOR_DB_EXECUTOR.shutdown()
+
 
 app = FastAPI(
     title="Open WebUI",
@@ -1548,7 +1581,7 @@ async def chat_completion(
                 user.role != "admin" or not BYPASS_ADMIN_ACCESS_CONTROL
             ):
                 try:
-                    check_model_access(user, model)
+                    check_model_access(user, model, model_info=model_info)
                 except Exception as e:
                     raise e
         else:
@@ -1567,6 +1600,7 @@ async def chat_completion(
             "stream_delta_chunk_size"
         )
         reasoning_tags = form_data.get("params", {}).get("reasoning_tags")
+        stream_content_delta = form_data.get("params", {}).get("stream_content_delta")
 
         # Model Params
         if model_info_params.get("stream_response") is not None:
@@ -1594,6 +1628,7 @@ async def chat_completion(
             "params": {
                 "stream_delta_chunk_size": stream_delta_chunk_size,
                 "reasoning_tags": reasoning_tags,
+                "stream_content_delta": stream_content_delta,
                 "function_calling": (
                     "native"
                     if (
@@ -1634,7 +1669,7 @@ async def chat_completion(
             if metadata.get("chat_id") and metadata.get("message_id"):
                 try:
                     if not metadata["chat_id"].startswith("local:"):
-                        Chats.upsert_message_to_chat_by_id_and_message_id(
+                        Chats.upsert_message_by_id_and_message_id(
                             metadata["chat_id"],
                             metadata["message_id"],
                             {
@@ -1666,7 +1701,7 @@ async def chat_completion(
                 # Update the chat message with the error
                 try:
                     if not metadata["chat_id"].startswith("local:"):
-                        Chats.upsert_message_to_chat_by_id_and_message_id(
+                        Chats.upsert_message_by_id_and_message_id(
                             metadata["chat_id"],
                             metadata["message_id"],
                             {
@@ -1706,6 +1741,8 @@ async def chat_completion(
             request.app.state.redis,
             process_chat(request, form_data, user, metadata, model),
             id=metadata["chat_id"],
+            model_id=model_id,
+            user_id=user.id,
         )
         return {"status": True, "task_id": task_id}
     else:
@@ -1771,6 +1808,11 @@ async def list_tasks_endpoint(request: Request, user=Depends(get_verified_user))
     return {"tasks": await list_tasks(request.app.state.redis)}
 
 
+@app.get("/api/tasks/queue")
+async def list_task_queue_endpoint(request: Request, user=Depends(get_admin_user)):
+    return await list_task_queue(request.app.state.redis)
+
+
 @app.get("/api/tasks/chat/{chat_id}")
 async def list_tasks_by_chat_id_endpoint(
     request: Request, chat_id: str, user=Depends(get_verified_user)
@@ -2021,7 +2063,10 @@ async def get_current_usage(user=Depends(get_verified_user)):
     This is an experimental endpoint and subject to change.
     """
     try:
-        return {"model_ids": get_models_in_use(), "user_ids": get_active_user_ids()}
+        return {
+            "model_ids": await get_models_in_use(),
+            "user_ids": get_active_user_ids(),
+        }
     except Exception as e:
         log.error(f"Error getting usage statistics: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
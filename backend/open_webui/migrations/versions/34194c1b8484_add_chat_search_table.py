@@ -0,0 +1,172 @@
+"""Add chat_search table
+
+Revision ID: 34194c1b8484
+Revises: e3d125d6cb46
+Create Date: 2026-10-18 11:02:17.482935
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+import json
+
+# revision identifiers, used by Alembic.
+revision: str = "34194c1b8484"
+down_revision: Union[str, None] = "e3d125d6cb46"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+SQLITE_STATEMENTS = [
+    "CREATE VIRTUAL TABLE chat_search_fts USING fts5("
+    "content, content='chat_search', content_rowid='id')",
+    "CREATE TRIGGER chat_search_ai AFTER INSERT ON chat_search BEGIN "
+    "INSERT INTO chat_search_fts(rowid, content) VALUES (new.id, new.content); "
+    "END",
+    "CREATE TRIGGER chat_search_ad AFTER DELETE ON chat_search BEGIN "
+    "INSERT INTO chat_search_fts(chat_search_fts, rowid, content) "
+    "VALUES ('delete', old.id, old.content); "
+    "END",
+    "CREATE TRIGGER chat_search_au AFTER UPDATE ON chat_search BEGIN "
+    "INSERT INTO chat_search_fts(chat_search_fts, rowid, content) "
+    "VALUES ('delete', old.id, old.content); "
+    "INSERT INTO chat_search_fts(rowid, content) VALUES (new.id, new.content); "
+    "END",
+]
+
+POSTGRESQL_STATEMENTS = [
+    "ALTER TABLE chat_search ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(content, ''))) STORED",
+    "CREATE INDEX chat_search_vector_idx ON chat_search USING GIN (search_vector)",
+]
+
+
+def get_content(message):
+    content = message.get("content") if isinstance(message, dict) else None
+    if not isinstance(content, str):
+        return ""
+    return content.replace("\x00", "")
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+
+    chat_search_table = op.create_table(
+        "chat_search",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("chat_id", sa.Text(), nullable=False),
+        sa.Column("message_id", sa.Text(), nullable=False),
+        sa.Column("user_id", sa.Text(), nullable=True),
+        sa.Column("content", sa.Text(), nullable=True),
+    )
+    op.create_index(
+        "chat_search_chat_id_message_id_idx",
+        "chat_search",
+        ["chat_id", "message_id"],
+        unique=True,
+    )
+
+    if connection.dialect.name == "sqlite":
+        statements = SQLITE_STATEMENTS
+    elif connection.dialect.name == "postgresql":
+        statements = POSTGRESQL_STATEMENTS
+    else:
+        statements = []
+    for statement in statements:
+        op.execute(statement)
+
+    # Index the existing chats, shared copies are never searched
+    chat_table = sa.Table(
+        "chat",
+        sa.MetaData(),
+        sa.Column("id", sa.String()),
+        sa.Column("user_id", sa.String()),
+        sa.Column("title", sa.Text()),
+        sa.Column("chat", sa.JSON()),
+    )
+    chat_message_table = sa.Table(
+        "chat_message",
+        sa.MetaData(),
+        sa.Column("chat_id", sa.Text()),
+        sa.Column("id", sa.Text()),
+        sa.Column("message", sa.JSON()),
+    )
+
+    chat_ids = [
+        chat_id
+        for (chat_id,) in connection.execute(
+            sa.select(chat_table.c.id).where(
+                sa.not_(chat_table.c.user_id.like("shared-%"))
+            )
+        )
+    ]
+
+    for idx in range(0, len(chat_ids), BATCH_SIZE):
+        batch = chat_ids[idx : idx + BATCH_SIZE]
+
+        contents = {}
+        users = {}
+        for chat_id, user_id, title, chat in connection.execute(
+            sa.select(
+                chat_table.c.id,
+                chat_table.c.user_id,
+                chat_table.c.title,
+                chat_table.c.chat,
+            ).where(chat_table.c.id.in_(batch))
+        ):
+            if isinstance(chat, str):
+                chat = json.loads(chat)
+            chat = chat or {}
+
+            history = chat.get("history") or {}
+            messages = history.get("messages") or {
+                message["id"]: message
+                for message in chat.get("messages", [])
+                if isinstance(message, dict) and message.get("id")
+            }
+
+            users[chat_id] = user_id
+            contents[chat_id] = {"": (title or "").replace("\x00", "")}
+            for message_id, message in messages.items():
+                contents[chat_id][message_id] = get_content(message)
+
+        for chat_id, message_id, message in connection.execute(
+            sa.select(
+                chat_message_table.c.chat_id,
+                chat_message_table.c.id,
+                chat_message_table.c.message,
+            ).where(chat_message_table.c.chat_id.in_(batch))
+        ):
+            if isinstance(message, str):
+                message = json.loads(message)
+            if chat_id in contents:
+                contents[chat_id][message_id] = get_content(message)
+
+        rows = [
+            {
+                "chat_id": chat_id,
+                "message_id": message_id,
+                "user_id": users[chat_id],
+                "content": content,
+            }
+            for chat_id, messages in contents.items()
+            for message_id, content in messages.items()
+        ]
+        if rows:
+            connection.execute(chat_search_table.insert(), rows)
+
+
+def downgrade() -> None:
+    connection = op.get_bind()
+
+    if connection.dialect.name == "sqlite":
+        for trigger in ("chat_search_ai", "chat_search_ad", "chat_search_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS chat_search_fts")
+
+    op.drop_index("chat_search_chat_id_message_id_idx", table_name="chat_search")
+    op.drop_table("chat_search")
@@ -0,0 +1,44 @@
+"""Add channel list indexes and unread counter
+
+Revision ID: 8b2e4f6a1c93
+Revises: 34194c1b8484
+Create Date: 2026-10-18 12:41:05.318204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "8b2e4f6a1c93"
+down_revision: Union[str, None] = "34194c1b8484"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "message_channel_id_created_at_idx", "message", ["channel_id", "created_at"]
+    )
+    op.create_index(
+        "channel_member_user_id_channel_id_idx",
+        "channel_member",
+        ["user_id", "channel_id"],
+    )
+    op.create_index("channel_member_channel_id_idx", "channel_member", ["channel_id"])
+
+    # Counters start untracked and are counted from the messages until the
+    # member next reads the channel with ENABLE_CHANNEL_UNREAD_COUNTER set
+    with op.batch_alter_table("channel_member") as batch_op:
+        batch_op.add_column(sa.Column("unread_count", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("channel_member") as batch_op:
+        batch_op.drop_column("unread_count")
+
+    op.drop_index("channel_member_channel_id_idx", table_name="channel_member")
+    op.drop_index("channel_member_user_id_channel_id_idx", table_name="channel_member")
+    op.drop_index("message_channel_id_created_at_idx", table_name="message")
@@ -0,0 +1,86 @@
+"""Add chat_message table
+
+Revision ID: e3d125d6cb46
+Revises: 3e0e00844bb0
+Create Date: 2026-10-18 09:12:41.220573
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+import json
+
+# revision identifiers, used by Alembic.
+revision: str = "e3d125d6cb46"
+down_revision: Union[str, None] = "3e0e00844bb0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Messages are only moved out of the chat JSON once a chat is written with
+    # ENABLE_CHAT_MESSAGE_TABLE set, existing chats are read as they are
+    op.create_table(
+        "chat_message",
+        sa.Column("chat_id", sa.Text(), nullable=False),
+        sa.Column("id", sa.Text(), nullable=False),
+        sa.Column("message", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("chat_id", "id"),
+    )
+
+
+def downgrade() -> None:
+    connection = op.get_bind()
+
+    chat_table = sa.Table(
+        "chat",
+        sa.MetaData(),
+        sa.Column("id", sa.String()),
+        sa.Column("chat", sa.JSON()),
+    )
+    chat_message_table = sa.Table(
+        "chat_message",
+        sa.MetaData(),
+        sa.Column("chat_id", sa.Text()),
+        sa.Column("id", sa.Text()),
+        sa.Column("message", sa.JSON()),
+    )
+
+    # Move the messages back into the chat JSON
+    chat_ids = connection.execute(
+        sa.select(chat_message_table.c.chat_id).distinct()
+    ).fetchall()
+
+    for (chat_id,) in chat_ids:
+        chat = connection.execute(
+            sa.select(chat_table.c.chat).where(chat_table.c.id == chat_id)
+        ).scalar()
+        if chat is None:
+            continue
+
+        if isinstance(chat, str):
+            chat = json.loads(chat)
+
+        messages = connection.execute(
+            sa.select(chat_message_table.c.id, chat_message_table.c.message).where(
+                chat_message_table.c.chat_id == chat_id
+            )
+        ).fetchall()
+
+        history = chat.get("history", {})
+        history["messages"] = {
+            **history.get("messages", {}),
+            **{message_id: message for message_id, message in messages},
+        }
+        chat["history"] = history
+
+        connection.execute(
+            chat_table.update().where(chat_table.c.id == chat_id).values(chat=chat)
+        )
+
+    op.drop_table("chat_message")
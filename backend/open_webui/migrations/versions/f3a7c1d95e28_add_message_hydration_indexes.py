@@ -0,0 +1,29 @@
+"""Add message thread and reaction indexes
+
+Revision ID: f3a7c1d95e28
+Revises: 8b2e4f6a1c93
+Create Date: 2026-10-18 13:26:48.906157
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f3a7c1d95e28"
+down_revision: Union[str, None] = "8b2e4f6a1c93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("message_parent_id_idx", "message", ["parent_id"])
+    op.create_index(
+        "message_reaction_message_id_idx", "message_reaction", ["message_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("message_reaction_message_id_idx", table_name="message_reaction")
+    op.drop_index("message_parent_id_idx", table_name="message")
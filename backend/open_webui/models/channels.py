@@ -5,12 +5,24 @@ from typing import Optional
 
 from open_webui.internal.db import Base, get_db
 from open_webui.models.groups import Groups
+from open_webui.env import ENABLE_CHANNEL_UNREAD_COUNTER
 
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy.dialects.postgresql import JSONB
 
 
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON, case, cast
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    Index,
+    Integer,
+    String,
+    Text,
+    JSON,
+    case,
+    cast,
+)
 from sqlalchemy import or_, func, select, and_, text
 from sqlalchemy.sql import exists
 
@@ -102,10 +114,17 @@ class ChannelMember(Base):
     left_at = Column(BigInteger, nullable=True)
 
     last_read_at = Column(BigInteger, nullable=True)
+    # Maintained with ENABLE_CHANNEL_UNREAD_COUNTER, NULL when not tracked
+    unread_count = Column(Integer, nullable=True)
 
     created_at = Column(BigInteger)
     updated_at = Column(BigInteger)
 
+    __table_args__ = (
+        Index("channel_member_user_id_channel_id_idx", "user_id", "channel_id"),
+        Index("channel_member_channel_id_idx", "channel_id"),
+    )
+
 
 class ChannelMemberModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -132,6 +151,7 @@ class ChannelMemberModel(BaseModel):
     left_at: Optional[int] = None  # timestamp in epoch (time_ns)
 
     last_read_at: Optional[int] = None  # timestamp in epoch (time_ns)
+    unread_count: Optional[int] = None
 
     created_at: Optional[int] = None  # timestamp in epoch (time_ns)
     updated_at: Optional[int] = None  # timestamp in epoch (time_ns)
@@ -249,6 +269,7 @@ class ChannelTable:
                     "joined_at": now,
                     "left_at": None,
                     "last_read_at": now,
+                    "unread_count": 0 if ENABLE_CHANNEL_UNREAD_COUNTER else None,
                     "created_at": now,
                     "updated_at": now,
                 }
@@ -509,6 +530,7 @@ class ChannelTable:
                     "joined_at": int(time.time_ns()),
                     "left_at": None,
                     "last_read_at": int(time.time_ns()),
+                    "unread_count": 0 if ENABLE_CHANNEL_UNREAD_COUNTER else None,
                     "created_at": int(time.time_ns()),
                     "updated_at": int(time.time_ns()),
                 }
@@ -566,6 +588,25 @@ class ChannelTable:
                 for membership in memberships
             ]
 
+    def get_members_by_channel_ids(
+        self, channel_ids: list[str]
+    ) -> dict[str, list[ChannelMemberModel]]:
+        members = {channel_id: [] for channel_id in channel_ids}
+        if not channel_ids:
+            return members
+
+        with get_db() as db:
+            memberships = (
+                db.query(ChannelMember)
+                .filter(ChannelMember.channel_id.in_(channel_ids))
+                .all()
+            )
+            for membership in memberships:
+                members[membership.channel_id].append(
+                    ChannelMemberModel.model_validate(membership)
+                )
+            return members
+
     def pin_channel(self, channel_id: str, user_id: str, is_pinned: bool) -> bool:
         with get_db() as db:
             membership = (
@@ -599,11 +640,27 @@ class ChannelTable:
                 return False
 
             membership.last_read_at = int(time.time_ns())
+            membership.unread_count = 0 if ENABLE_CHANNEL_UNREAD_COUNTER else None
             membership.updated_at = int(time.time_ns())
 
             db.commit()
             return True
 
+    def clear_unread_counters(self) -> int:
+        """
+        Clear the unread counters left from when ENABLE_CHANNEL_UNREAD_COUNTER
+        was set, run on startup while it's unset. Counters aren't maintained
+        then and would be stale once the flag is set again.
+        """
+        with get_db() as db:
+            count = (
+                db.query(ChannelMember)
+                .filter(ChannelMember.unread_count.isnot(None))
+                .update({ChannelMember.unread_count: None}, synchronize_session=False)
+            )
+            db.commit()
+            return count
+
     def update_member_active_status(
         self, channel_id: str, user_id: str, is_active: bool
     ) -> bool:
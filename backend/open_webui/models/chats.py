@@ -2,15 +2,28 @@ import logging
 import json
 import time
 import uuid
-from typing import Optional
+from typing import Callable, Optional
 
 from open_webui.internal.db import Base, get_db
 from open_webui.models.tags import TagModel, Tag, Tags
 from open_webui.models.folders import Folders
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import ENABLE_CHAT_MESSAGE_TABLE, SRC_LOG_LEVELS
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON, Index
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    Boolean,
+    Column,
+    Float,
+    Integer,
+    String,
+    Text,
+    JSON,
+    Index,
+    PrimaryKeyConstraint,
+    event,
+)
 from sqlalchemy import or_, func, select, and_, text
 from sqlalchemy.sql import exists
 from sqlalchemy.sql.expression import bindparam
@@ -56,6 +69,91 @@ class Chat(Base):
     )
 
 
+class ChatMessage(Base):
+    """
+    A message of `Chat.chat["history"]["messages"]`, stored as its own row when
+    ENABLE_CHAT_MESSAGE_TABLE is set. The chat JSON then keeps an empty messages
+    map and the messages are merged back in when a chat is read. Rows left over
+    once the flag is unset are folded back into the JSON on startup.
+    """
+
+    __tablename__ = "chat_message"
+
+    chat_id = Column(Text, nullable=False)
+    id = Column(Text, nullable=False)
+    message = Column(JSON)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+    __table_args__ = (PrimaryKeyConstraint("chat_id", "id"),)
+
+
+class ChatSearch(Base):
+    """
+    Full-text search index of chats, with one row holding the title (empty
+    message_id) and one row per message content. Matching is done by an FTS5
+    table on SQLite and a tsvector column on PostgreSQL, which the database
+    keeps in sync with the content column.
+    """
+
+    __tablename__ = "chat_search"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    chat_id = Column(Text, nullable=False)
+    message_id = Column(Text, nullable=False)
+    user_id = Column(Text)
+    content = Column(Text)
+
+    __table_args__ = (
+        Index(
+            "chat_search_chat_id_message_id_idx", "chat_id", "message_id", unique=True
+        ),
+    )
+
+
+CHAT_SEARCH_DDL = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE chat_search_fts USING fts5("
+        "content, content='chat_search', content_rowid='id')",
+        "CREATE TRIGGER chat_search_ai AFTER INSERT ON chat_search BEGIN "
+        "INSERT INTO chat_search_fts(rowid, content) VALUES (new.id, new.content); "
+        "END",
+        "CREATE TRIGGER chat_search_ad AFTER DELETE ON chat_search BEGIN "
+        "INSERT INTO chat_search_fts(chat_search_fts, rowid, content) "
+        "VALUES ('delete', old.id, old.content); "
+        "END",
+        "CREATE TRIGGER chat_search_au AFTER UPDATE ON chat_search BEGIN "
+        "INSERT INTO chat_search_fts(chat_search_fts, rowid, content) "
+        "VALUES ('delete', old.id, old.content); "
+        "INSERT INTO chat_search_fts(rowid, content) VALUES (new.id, new.content); "
+        "END",
+    ],
+    "postgresql": [
+        "ALTER TABLE chat_search ADD COLUMN search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(content, ''))) STORED",
+        "CREATE INDEX chat_search_vector_idx ON chat_search USING GIN (search_vector)",
+    ],
+}
+
+# Tables created from the metadata get the same setup as the migration
+for _dialect, _statements in CHAT_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(
+            ChatSearch.__table__,
+            "after_create",
+            DDL(_statement).execute_if(dialect=_dialect),
+        )
+event.listen(
+    ChatSearch.__table__,
+    "after_drop",
+    DDL("DROP TABLE IF EXISTS chat_search_fts").execute_if(dialect="sqlite"),
+)
+
+# Search words that filter chats instead of matching their content
+SEARCH_FILTER_PREFIXES = ("tag:", "folder:", "pinned:", "archived:", "shared:")
+
+
 class ChatModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -124,6 +222,7 @@ class ChatTitleIdResponse(BaseModel):
     title: str
     updated_at: int
     created_at: int
+    snippet: Optional[str] = None
 
 
 class ChatTable:
@@ -164,6 +263,311 @@ class ChatTable:
 
         return changed
 
+    ####################
+    # Message rows
+    ####################
+
+    def _get_message_rows(self, db, chat_ids: list[str]) -> dict[str, dict]:
+        """Return the stored messages of each chat by chat id and message id."""
+        messages = {}
+        # Keep the number of bound parameters within database limits
+        for idx in range(0, len(chat_ids), 500):
+            rows = (
+                db.query(ChatMessage.chat_id, ChatMessage.id, ChatMessage.message)
+                .filter(ChatMessage.chat_id.in_(chat_ids[idx : idx + 500]))
+                .all()
+            )
+            for chat_id, message_id, message in rows:
+                messages.setdefault(chat_id, {})[message_id] = message
+        return messages
+
+    def _merge_message_rows(self, chat: dict, messages: dict) -> dict:
+        history = chat.get("history", {})
+        return {
+            **chat,
+            "history": {
+                **history,
+                "messages": {**history.get("messages", {}), **messages},
+            },
+        }
+
+    def _to_chat_models(self, db, chat_items) -> list[ChatModel]:
+        chats = [ChatModel.model_validate(chat_item) for chat_item in chat_items]
+        if not chats or not ENABLE_CHAT_MESSAGE_TABLE:
+            return chats
+
+        messages = self._get_message_rows(db, [chat.id for chat in chats])
+        for chat in chats:
+            if chat.id in messages:
+                chat.chat = self._merge_message_rows(chat.chat, messages[chat.id])
+        return chats
+
+    def fold_message_rows(self) -> int:
+        """
+        Move the chat_message rows back into the chat JSON, run on startup
+        while ENABLE_CHAT_MESSAGE_TABLE is unset so reads and writes don't have
+        to look for rows. Returns the number of chats that had rows.
+        """
+        with get_db() as db:
+            chat_ids = [
+                chat_id for (chat_id,) in db.query(ChatMessage.chat_id).distinct()
+            ]
+            for idx in range(0, len(chat_ids), 500):
+                batch = chat_ids[idx : idx + 500]
+                messages = self._get_message_rows(db, batch)
+                for chat_item in db.query(Chat).filter(Chat.id.in_(batch)):
+                    chat_item.chat = self._merge_message_rows(
+                        chat_item.chat, messages[chat_item.id]
+                    )
+                # Rows of deleted chats are dropped as well
+                db.query(ChatMessage).filter(ChatMessage.chat_id.in_(batch)).delete(
+                    synchronize_session=False
+                )
+                db.commit()
+            return len(chat_ids)
+
+    def _to_chat_model(self, db, chat_item) -> Optional[ChatModel]:
+        if chat_item is None:
+            return None
+        return self._to_chat_models(db, [chat_item])[0]
+
+    def _set_chat(self, db, chat_item, chat: dict):
+        """
+        Store `chat` as the content of `chat_item`, writing its messages to the
+        chat_message table when enabled and only updating the rows that changed.
+        """
+        chat = self._clean_null_bytes(chat)
+        self._index_chat(db, chat_item, chat)
+
+        if not ENABLE_CHAT_MESSAGE_TABLE:
+            chat_item.chat = chat
+            return
+
+        rows = db.query(ChatMessage).filter_by(chat_id=chat_item.id)
+        history = chat.get("history", {})
+        messages = history.get("messages") or {}
+        chat_item.chat = {**chat, "history": {**history, "messages": {}}}
+
+        now = int(time.time())
+        stored_ids = set()
+        for row in rows.all():
+            stored_ids.add(row.id)
+            if row.id not in messages:
+                db.delete(row)
+            elif row.message != messages[row.id]:
+                row.message = messages[row.id]
+                row.updated_at = now
+
+        db.add_all(
+            [
+                ChatMessage(
+                    chat_id=chat_item.id,
+                    id=message_id,
+                    message=message,
+                    created_at=now,
+                    updated_at=now,
+                )
+                for message_id, message in messages.items()
+                if message_id not in stored_ids
+            ]
+        )
+
+    ####################
+    # Search index
+    ####################
+
+    def _get_search_content(self, message) -> str:
+        content = message.get("content") if isinstance(message, dict) else None
+        return content if isinstance(content, str) else ""
+
+    def _index_chat(self, db, chat_item, chat: dict):
+        """Update the search rows of `chat_item` to its title and `chat` messages."""
+        history = chat.get("history", {})
+        messages = history.get("messages") or {
+            message["id"]: message
+            for message in chat.get("messages", [])
+            if isinstance(message, dict) and message.get("id")
+        }
+
+        contents = {"": chat_item.title or ""}
+        for message_id, message in messages.items():
+            contents[message_id] = self._get_search_content(message)
+
+        stored_ids = set()
+        for row in db.query(ChatSearch).filter_by(chat_id=chat_item.id).all():
+            stored_ids.add(row.message_id)
+            if row.message_id not in contents:
+                db.delete(row)
+            elif row.content != contents[row.message_id]:
+                row.content = contents[row.message_id]
+
+        db.add_all(
+            [
+                ChatSearch(
+                    chat_id=chat_item.id,
+                    message_id=message_id,
+                    user_id=chat_item.user_id,
+                    content=content,
+                )
+                for message_id, content in contents.items()
+                if message_id not in stored_ids
+            ]
+        )
+
+    def _index_message(self, db, chat_item, message_id: str, message: dict):
+        content = self._get_search_content(message)
+        row = (
+            db.query(ChatSearch)
+            .filter_by(chat_id=chat_item.id, message_id=message_id)
+            .first()
+        )
+        if row is None:
+            db.add(
+                ChatSearch(
+                    chat_id=chat_item.id,
+                    message_id=message_id,
+                    user_id=chat_item.user_id,
+                    content=content,
+                )
+            )
+        elif row.content != content:
+            row.content = content
+
+    def _get_search_query(self, dialect_name: str, words: list[str]) -> str:
+        """Build a query matching all `words` as prefixes for the index of the dialect."""
+        if dialect_name == "sqlite":
+            return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+        elif dialect_name == "postgresql":
+            return " & ".join(
+                "'" + word.replace("\\", "\\\\").replace("'", "''") + "':*"
+                for word in words
+            )
+        raise NotImplementedError(f"Unsupported dialect: {dialect_name}")
+
+    def _get_search_matches(self, db, user_id: str, words: list[str]):
+        """
+        Return a subquery of the ids of the chats of `user_id` matching all
+        `words` in their title or a message, and a rank where lower is better.
+        """
+        dialect_name = db.bind.dialect.name
+        if dialect_name == "sqlite":
+            sql = """
+            SELECT chat_search.chat_id AS chat_id, MIN(fts_match.rank) AS rank
+            FROM (
+                SELECT rowid, rank FROM chat_search_fts
+                WHERE chat_search_fts MATCH :search_query
+            ) AS fts_match
+            JOIN chat_search ON chat_search.id = fts_match.rowid
+            WHERE chat_search.user_id = :search_user_id
+            GROUP BY chat_search.chat_id
+            """
+        else:
+            sql = """
+            SELECT chat_id, -MAX(ts_rank(search_vector, search_query)) AS rank
+            FROM chat_search, to_tsquery('simple', :search_query) AS search_query
+            WHERE search_vector @@ search_query
+            AND user_id = :search_user_id
+            GROUP BY chat_id
+            """
+
+        return (
+            text(sql)
+            .bindparams(
+                search_query=self._get_search_query(dialect_name, words),
+                search_user_id=user_id,
+            )
+            .columns(chat_id=Text, rank=Float)
+            .subquery("search_matches")
+        )
+
+    def _update_message(
+        self,
+        id: str,
+        message_id: str,
+        update: Callable[[Optional[dict]], Optional[dict]],
+        set_current: bool = False,
+    ) -> Optional[dict]:
+        """
+        Replace a single message by `update(message)`, which receives None for
+        messages that don't exist yet and may return None to leave it unchanged.
+
+        With the chat_message table only the message row is written, otherwise
+        the whole chat JSON is rewritten. Returns the updated message.
+        """
+        with get_db() as db:
+            chat_item = db.get(Chat, id)
+            if chat_item is None:
+                return None
+
+            if not ENABLE_CHAT_MESSAGE_TABLE:
+                # Build new dicts, changes made in place aren't detected
+                chat = self._to_chat_model(db, chat_item).chat
+                history = chat.get("history", {})
+                messages = history.get("messages", {})
+
+                message = update(messages.get(message_id))
+                if message is None:
+                    return None
+
+                history = {**history, "messages": {**messages, message_id: message}}
+                if set_current:
+                    history["currentId"] = message_id
+
+                self._set_chat(db, chat_item, {**chat, "history": history})
+                chat_item.updated_at = int(time.time())
+                db.commit()
+                return message
+
+            history = chat_item.chat.get("history", {})
+            if history.get("messages"):
+                # Move the messages of chats stored before the table was enabled
+                self._set_chat(db, chat_item, self._to_chat_model(db, chat_item).chat)
+                db.flush()
+                history = chat_item.chat.get("history", {})
+
+            now = int(time.time())
+            row = db.get(ChatMessage, (id, message_id))
+
+            message = update(row.message if row else None)
+            if message is None:
+                return None
+            message = self._clean_null_bytes(message)
+
+            if row:
+                row.message = message
+                row.updated_at = now
+            else:
+                db.add(
+                    ChatMessage(
+                        chat_id=id,
+                        id=message_id,
+                        message=message,
+                        created_at=now,
+                        updated_at=now,
+                    )
+                )
+            self._index_message(db, chat_item, message_id, message)
+
+            if set_current and history.get("currentId") != message_id:
+                chat_item.chat = {
+                    **chat_item.chat,
+                    "history": {**history, "currentId": message_id},
+                }
+            chat_item.updated_at = now
+            db.commit()
+            return message
+
+    def _delete_chat_rows(self, db, chat_query):
+        """Delete the message and search rows of the chats of `chat_query`."""
+        chat_ids = chat_query.with_entities(Chat.id).scalar_subquery()
+        if ENABLE_CHAT_MESSAGE_TABLE:
+            db.query(ChatMessage).filter(ChatMessage.chat_id.in_(chat_ids)).delete(
+                synchronize_session=False
+            )
+        db.query(ChatSearch).filter(ChatSearch.chat_id.in_(chat_ids)).delete(
+            synchronize_session=False
+        )
+
     def insert_new_chat(self, user_id: str, form_data: ChatForm) -> Optional[ChatModel]:
         with get_db() as db:
             id = str(uuid.uuid4())
@@ -184,10 +588,11 @@ class ChatTable:
             )
 
             chat_item = Chat(**chat.model_dump())
+            self._set_chat(db, chat_item, chat.chat)
             db.add(chat_item)
             db.commit()
             db.refresh(chat_item)
-            return ChatModel.model_validate(chat_item) if chat_item else None
+            return self._to_chat_model(db, chat_item)
 
     def _chat_import_form_to_chat_model(
         self, user_id: str, form_data: ChatImportForm
@@ -222,29 +627,31 @@ class ChatTable:
 
             for form_data in chat_import_forms:
                 chat = self._chat_import_form_to_chat_model(user_id, form_data)
-                chats.append(Chat(**chat.model_dump()))
+                chat_item = Chat(**chat.model_dump())
+                self._set_chat(db, chat_item, chat.chat)
+                chats.append(chat_item)
 
             db.add_all(chats)
             db.commit()
-            return [ChatModel.model_validate(chat) for chat in chats]
+            return self._to_chat_models(db, chats)
 
     def update_chat_by_id(self, id: str, chat: dict) -> Optional[ChatModel]:
         try:
             with get_db() as db:
                 chat_item = db.get(Chat, id)
-                chat_item.chat = self._clean_null_bytes(chat)
                 chat_item.title = (
                     self._clean_null_bytes(chat["title"])
                     if "title" in chat
                     else "New Chat"
                 )
+                self._set_chat(db, chat_item, chat)
 
                 chat_item.updated_at = int(time.time())
 
                 db.commit()
                 db.refresh(chat_item)
 
-                return ChatModel.model_validate(chat_item)
+                return self._to_chat_model(db, chat_item)
         except Exception:
             return None
 
@@ -295,77 +702,73 @@ class ChatTable:
     def get_message_by_id_and_message_id(
         self, id: str, message_id: str
     ) -> Optional[dict]:
+        if ENABLE_CHAT_MESSAGE_TABLE:
+            with get_db() as db:
+                row = db.get(ChatMessage, (id, message_id))
+                if row:
+                    return row.message
+
         chat = self.get_chat_by_id(id)
         if chat is None:
             return None
 
         return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
 
-    def upsert_message_to_chat_by_id_and_message_id(
+    def upsert_message_by_id_and_message_id(
         self, id: str, message_id: str, message: dict
-    ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
-
+    ) -> Optional[dict]:
+        """
+        Like `upsert_message_to_chat_by_id_and_message_id`, but returns the
+        updated message instead of reading back the whole chat.
+        """
         # Sanitize message content for null characters before upserting
         if isinstance(message.get("content"), str):
             message["content"] = message["content"].replace("\x00", "")
 
-        chat = chat.chat
-        history = chat.get("history", {})
-
-        if message_id in history.get("messages", {}):
-            history["messages"][message_id] = {
-                **history["messages"][message_id],
-                **message,
-            }
-        else:
-            history["messages"][message_id] = message
-
-        history["currentId"] = message_id
+        return self._update_message(
+            id,
+            message_id,
+            lambda existing: {**existing, **message} if existing else message,
+            set_current=True,
+        )
 
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+    def upsert_message_to_chat_by_id_and_message_id(
+        self, id: str, message_id: str, message: dict
+    ) -> Optional[ChatModel]:
+        if self.upsert_message_by_id_and_message_id(id, message_id, message) is None:
+            return None
+        return self.get_chat_by_id(id)
 
     def add_message_status_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, status: dict
     ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
-
-        chat = chat.chat
-        history = chat.get("history", {})
-
-        if message_id in history.get("messages", {}):
-            status_history = history["messages"][message_id].get("statusHistory", [])
-            status_history.append(status)
-            history["messages"][message_id]["statusHistory"] = status_history
-
-        chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+        self._update_message(
+            id,
+            message_id,
+            lambda existing: (
+                {
+                    **existing,
+                    "statusHistory": existing.get("statusHistory", []) + [status],
+                }
+                if existing is not None
+                else None
+            ),
+        )
+        return self.get_chat_by_id(id)
 
     def add_message_files_by_id_and_message_id(
         self, id: str, message_id: str, files: list[dict]
     ) -> list[dict]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
-
-        chat = chat.chat
-        history = chat.get("history", {})
-
-        message_files = []
-
-        if message_id in history.get("messages", {}):
-            message_files = history["messages"][message_id].get("files", [])
-            message_files = message_files + files
-            history["messages"][message_id]["files"] = message_files
-
-        chat["history"] = history
-        self.update_chat_by_id(id, chat)
-        return message_files
+        message = self._update_message(
+            id,
+            message_id,
+            lambda existing: (
+                {**existing, "files": existing.get("files", []) + files}
+                if existing is not None
+                else None
+            ),
+        )
+        return message["files"] if message else []
 
     def insert_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         with get_db() as db:
@@ -380,7 +783,7 @@ class ChatTable:
                     "id": str(uuid.uuid4()),
                     "user_id": f"shared-{chat_id}",
                     "title": chat.title,
-                    "chat": chat.chat,
+                    "chat": self._to_chat_model(db, chat).chat,
                     "meta": chat.meta,
                     "pinned": chat.pinned,
                     "folder_id": chat.folder_id,
@@ -414,7 +817,7 @@ class ChatTable:
                     return self.insert_shared_chat_by_chat_id(chat_id)
 
                 shared_chat.title = chat.title
-                shared_chat.chat = chat.chat
+                shared_chat.chat = self._to_chat_model(db, chat).chat
                 shared_chat.meta = chat.meta
                 shared_chat.pinned = chat.pinned
                 shared_chat.folder_id = chat.folder_id
@@ -422,7 +825,7 @@ class ChatTable:
                 db.commit()
                 db.refresh(shared_chat)
 
-                return ChatModel.model_validate(shared_chat)
+                return self._to_chat_model(db, shared_chat)
         except Exception:
             return None
 
@@ -454,7 +857,7 @@ class ChatTable:
                 chat.share_id = share_id
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -466,7 +869,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -479,7 +882,7 @@ class ChatTable:
                 chat.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -530,7 +933,7 @@ class ChatTable:
                 query = query.limit(limit)
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chat_list_by_user_id(
         self,
@@ -569,7 +972,7 @@ class ChatTable:
                 query = query.limit(limit)
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chat_title_id_list_by_user_id(
         self,
@@ -627,7 +1030,7 @@ class ChatTable:
                 .order_by(Chat.updated_at.desc())
                 .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chat_by_id(self, id: str) -> Optional[ChatModel]:
         try:
@@ -640,7 +1043,7 @@ class ChatTable:
                     db.commit()
                     db.refresh(chat_item)
 
-                return ChatModel.model_validate(chat_item)
+                return self._to_chat_model(db, chat_item)
         except Exception:
             return None
 
@@ -662,7 +1065,7 @@ class ChatTable:
         try:
             with get_db() as db:
                 chat = db.query(Chat).filter_by(id=id, user_id=user_id).first()
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -673,7 +1076,7 @@ class ChatTable:
                 # .limit(limit).offset(skip)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -682,7 +1085,7 @@ class ChatTable:
                 .filter_by(user_id=user_id)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -691,7 +1094,7 @@ class ChatTable:
                 .filter_by(user_id=user_id, pinned=True, archived=False)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_archived_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -700,7 +1103,7 @@ class ChatTable:
                 .filter_by(user_id=user_id, archived=True)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_user_id_and_search_text(
         self,
@@ -761,17 +1164,9 @@ class ChatTable:
         search_text_words = [
             word
             for word in search_text_words
-            if (
-                not word.startswith("tag:")
-                and not word.startswith("folder:")
-                and not word.startswith("pinned:")
-                and not word.startswith("archived:")
-                and not word.startswith("shared:")
-            )
+            if word and not word.startswith(SEARCH_FILTER_PREFIXES)
         ]
 
-        search_text = " ".join(search_text_words)
-
         with get_db() as db:
             query = db.query(Chat).filter(Chat.user_id == user_id)
 
@@ -792,26 +1187,18 @@ class ChatTable:
             if folder_ids:
                 query = query.filter(Chat.folder_id.in_(folder_ids))
 
-            query = query.order_by(Chat.updated_at.desc())
+            if search_text_words:
+                # Rank chats matching the words in the full-text index
+                matches = self._get_search_matches(db, user_id, search_text_words)
+                query = query.join(matches, matches.c.chat_id == Chat.id).order_by(
+                    matches.c.rank, Chat.updated_at.desc()
+                )
+            else:
+                query = query.order_by(Chat.updated_at.desc())
 
             # Check if the database dialect is either 'sqlite' or 'postgresql'
             dialect_name = db.bind.dialect.name
             if dialect_name == "sqlite":
-                # SQLite case: using JSON1 extension for JSON searching
-                sqlite_content_sql = (
-                    "EXISTS ("
-                    "    SELECT 1 "
-                    "    FROM json_each(Chat.chat, '$.messages') AS message "
-                    "    WHERE LOWER(message.value->>'content') LIKE '%' || :content_key || '%'"
-                    ")"
-                )
-                sqlite_content_clause = text(sqlite_content_sql)
-                query = query.filter(
-                    or_(
-                        Chat.title.ilike(bindparam("title_key")), sqlite_content_clause
-                    ).params(title_key=f"%{search_text}%", content_key=search_text)
-                )
-
                 # Check if there are any tags to filter, it should have all the tags
                 if "none" in tag_ids:
                     query = query.filter(
@@ -843,33 +1230,6 @@ class ChatTable:
                     )
 
             elif dialect_name == "postgresql":
-                # PostgreSQL doesn't allow null bytes in text. We filter those out by checking
-                # the JSON representation for \u0000 before attempting text extraction
-
-                # Safety filter: JSON field must not contain \u0000
-                query = query.filter(text("Chat.chat::text NOT LIKE '%\\\\u0000%'"))
-
-                # Safety filter: title must not contain actual null bytes
-                query = query.filter(text("Chat.title::text NOT LIKE '%\\x00%'"))
-
-                postgres_content_sql = """
-                EXISTS (
-                    SELECT 1
-                    FROM json_array_elements(Chat.chat->'messages') AS message
-                    WHERE json_typeof(message->'content') = 'string'
-                    AND LOWER(message->>'content') LIKE '%' || :content_key || '%'
-                )
-                """
-
-                postgres_content_clause = text(postgres_content_sql)
-
-                query = query.filter(
-                    or_(
-                        Chat.title.ilike(bindparam("title_key")),
-                        postgres_content_clause,
-                    )
-                ).params(title_key=f"%{search_text}%", content_key=search_text.lower())
-
                 # Check if there are any tags to filter, it should have all the tags
                 if "none" in tag_ids:
                     query = query.filter(
@@ -910,7 +1270,64 @@ class ChatTable:
             log.info(f"The number of chats: {len(all_chats)}")
 
             # Validate and return chats
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
+
+    def get_chat_snippets_by_user_id_and_search_text(
+        self, user_id: str, search_text: str, chat_ids: list[str]
+    ) -> dict[str, str]:
+        """
+        Return the best matching message excerpt of each of `chat_ids` for a
+        search of `get_chats_by_user_id_and_search_text`, with the matched
+        words in bold.
+        """
+        words = [
+            word
+            for word in search_text.replace("\u0000", "").lower().strip().split(" ")
+            if word and not word.startswith(SEARCH_FILTER_PREFIXES)
+        ]
+        if not words or not chat_ids:
+            return {}
+
+        with get_db() as db:
+            dialect_name = db.bind.dialect.name
+            if dialect_name == "sqlite":
+                sql = """
+                SELECT chat_search.chat_id,
+                    snippet(chat_search_fts, 0, '**', '**', '...', 16) AS snippet
+                FROM chat_search_fts
+                JOIN chat_search ON chat_search.id = chat_search_fts.rowid
+                WHERE chat_search_fts MATCH :search_query
+                AND chat_search.user_id = :search_user_id
+                AND chat_search.chat_id IN :chat_ids
+                AND chat_search.message_id != ''
+                ORDER BY bm25(chat_search_fts)
+                """
+            else:
+                sql = """
+                SELECT chat_id,
+                    ts_headline('simple', content, search_query,
+                        'StartSel=**, StopSel=**, MaxWords=16, MinWords=8') AS snippet
+                FROM chat_search, to_tsquery('simple', :search_query) AS search_query
+                WHERE search_vector @@ search_query
+                AND user_id = :search_user_id
+                AND chat_id IN :chat_ids
+                AND message_id != ''
+                ORDER BY ts_rank(search_vector, search_query) DESC
+                """
+
+            rows = db.execute(
+                text(sql).bindparams(bindparam("chat_ids", expanding=True)),
+                {
+                    "search_query": self._get_search_query(dialect_name, words),
+                    "search_user_id": user_id,
+                    "chat_ids": chat_ids,
+                },
+            ).all()
+
+            snippets = {}
+            for chat_id, snippet in rows:
+                snippets.setdefault(chat_id, snippet)
+            return snippets
 
     def get_chats_by_folder_id_and_user_id(
         self, folder_id: str, user_id: str, skip: int = 0, limit: int = 60
@@ -928,7 +1345,7 @@ class ChatTable:
                 query = query.limit(limit)
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def get_chats_by_folder_ids_and_user_id(
         self, folder_ids: list[str], user_id: str
@@ -943,7 +1360,7 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def update_chat_folder_id_by_id_and_user_id(
         self, id: str, user_id: str, folder_id: str
@@ -956,7 +1373,7 @@ class ChatTable:
                 chat.pinned = False
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -995,7 +1412,7 @@ class ChatTable:
 
             all_chats = query.all()
             log.debug(f"all_chats: {all_chats}")
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(db, all_chats)
 
     def add_chat_tag_by_id_and_user_id_and_tag_name(
         self, id: str, user_id: str, tag_name: str
@@ -1016,7 +1433,7 @@ class ChatTable:
 
                 db.commit()
                 db.refresh(chat)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(db, chat)
         except Exception:
             return None
 
@@ -1102,7 +1519,9 @@ class ChatTable:
     def delete_chat_by_id(self, id: str) -> bool:
         try:
             with get_db() as db:
-                db.query(Chat).filter_by(id=id).delete()
+                query = db.query(Chat).filter_by(id=id)
+                self._delete_chat_rows(db, query)
+                query.delete()
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -1112,7 +1531,9 @@ class ChatTable:
     def delete_chat_by_id_and_user_id(self, id: str, user_id: str) -> bool:
         try:
             with get_db() as db:
-                db.query(Chat).filter_by(id=id, user_id=user_id).delete()
+                query = db.query(Chat).filter_by(id=id, user_id=user_id)
+                self._delete_chat_rows(db, query)
+                query.delete()
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -1124,7 +1545,9 @@ class ChatTable:
             with get_db() as db:
                 self.delete_shared_chats_by_user_id(user_id)
 
-                db.query(Chat).filter_by(user_id=user_id).delete()
+                query = db.query(Chat).filter_by(user_id=user_id)
+                self._delete_chat_rows(db, query)
+                query.delete()
                 db.commit()
 
                 return True
@@ -1136,7 +1559,9 @@ class ChatTable:
     ) -> bool:
         try:
             with get_db() as db:
-                db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id).delete()
+                query = db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id)
+                self._delete_chat_rows(db, query)
+                query.delete()
                 db.commit()
 
                 return True
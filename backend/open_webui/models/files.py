@@ -3,13 +3,40 @@ import time
 from typing import Optional
 
 from open_webui.internal.db import Base, JSONField, get_db
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    REDIS_URL,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+)
+from open_webui.utils.redis import (
+    RedisNotifier,
+    get_redis_connection,
+    get_sentinels_from_env,
+)
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Column, String, Text, JSON
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
+# Notified with the file id whenever the processing status of a file changes
+FILE_STATUS_NOTIFIER = RedisNotifier(
+    (
+        get_redis_connection(
+            REDIS_URL,
+            get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+            REDIS_CLUSTER,
+            decode_responses=True,
+        )
+        if REDIS_URL
+        else None
+    ),
+    f"{REDIS_KEY_PREFIX}:files:status",
+)
+
 ####################
 # Files DB Schema
 ####################
@@ -250,6 +277,8 @@ class FilesTable:
                 file = db.query(File).filter_by(id=id).first()
                 file.data = {**(file.data if file.data else {}), **data}
                 db.commit()
+                if "status" in data:
+                    FILE_STATUS_NOTIFIER.notify(id)
                 return FileModel.model_validate(file)
             except Exception as e:
 
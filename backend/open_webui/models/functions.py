@@ -104,6 +104,12 @@ class FunctionValves(BaseModel):
 
 
 class FunctionsTable:
+    def bump_version(self, id: str = ""):
+        # Invalidate the snapshots of functions and their valves of all workers
+        from open_webui.utils.plugin import PLUGIN_REGISTRY
+
+        PLUGIN_REGISTRY.bump(id)
+
     def insert_new_function(
         self, user_id: str, type: str, form_data: FunctionForm
     ) -> Optional[FunctionModel]:
@@ -123,6 +129,7 @@ class FunctionsTable:
                 db.add(result)
                 db.commit()
                 db.refresh(result)
+                self.bump_version(result.id)
                 if result:
                     return FunctionModel.model_validate(result)
                 else:
@@ -170,6 +177,7 @@ class FunctionsTable:
                         db.delete(func)
 
                 db.commit()
+                self.bump_version()
 
                 return [
                     FunctionModel.model_validate(func)
@@ -283,6 +291,7 @@ class FunctionsTable:
                 function.updated_at = int(time.time())
                 db.commit()
                 db.refresh(function)
+                self.bump_version(id)
                 return self.get_function_by_id(id)
             except Exception:
                 return None
@@ -303,6 +312,7 @@ class FunctionsTable:
                     function.updated_at = int(time.time())
                     db.commit()
                     db.refresh(function)
+                    self.bump_version(id)
                     return self.get_function_by_id(id)
                 else:
                     return None
@@ -345,6 +355,7 @@ class FunctionsTable:
 
             # Update the user settings in the database
             Users.update_user_by_id(user_id, {"settings": user_settings})
+            self.bump_version(id)
 
             return user_settings["functions"]["valves"][id]
         except Exception as e:
@@ -363,6 +374,7 @@ class FunctionsTable:
                     }
                 )
                 db.commit()
+                self.bump_version(id)
                 return self.get_function_by_id(id)
             except Exception:
                 return None
@@ -377,6 +389,7 @@ class FunctionsTable:
                     }
                 )
                 db.commit()
+                self.bump_version()
                 return True
             except Exception:
                 return None
@@ -386,6 +399,7 @@ class FunctionsTable:
             try:
                 db.query(Function).filter_by(id=id).delete()
                 db.commit()
+                self.bump_version(id)
 
                 return True
             except Exception:
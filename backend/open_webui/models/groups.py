@@ -5,7 +5,12 @@ from typing import Optional
 import uuid
 
 from open_webui.internal.db import Base, get_db
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import (
+    REDIS_CONFIG_SYNC_INTERVAL,
+    REDIS_KEY_PREFIX,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.redis import RedisVersion, get_redis_client
 
 from open_webui.models.files import FileMetadataResponse
 
@@ -121,6 +126,15 @@ class GroupListResponse(BaseModel):
 
 
 class GroupTable:
+    def __init__(self):
+        # Bumped on membership and permission changes to invalidate the
+        # per-user access cache in utils/access_control
+        self.version = RedisVersion(
+            get_redis_client(),
+            f"{REDIS_KEY_PREFIX}:groups",
+            REDIS_CONFIG_SYNC_INTERVAL,
+        )
+
     def insert_new_group(
         self, user_id: str, form_data: GroupForm
     ) -> Optional[GroupModel]:
@@ -296,6 +310,7 @@ class GroupTable:
 
             db.add_all(new_members)
             db.commit()
+            self.version.bump()
 
     def get_group_member_count_by_id(self, id: str) -> int:
         with get_db() as db:
@@ -318,6 +333,7 @@ class GroupTable:
                     }
                 )
                 db.commit()
+                self.version.bump()
                 return self.get_group_by_id(id=id)
         except Exception as e:
             log.exception(e)
@@ -328,6 +344,7 @@ class GroupTable:
             with get_db() as db:
                 db.query(Group).filter_by(id=id).delete()
                 db.commit()
+                self.version.bump()
                 return True
         except Exception:
             return False
@@ -337,6 +354,7 @@ class GroupTable:
             try:
                 db.query(Group).delete()
                 db.commit()
+                self.version.bump()
 
                 return True
             except Exception:
@@ -364,6 +382,7 @@ class GroupTable:
                     )
 
                 db.commit()
+                self.version.bump()
                 return True
 
             except Exception:
@@ -455,6 +474,8 @@ class GroupTable:
                     )
 
                 db.commit()
+                if groups_to_add or groups_to_remove:
+                    self.version.bump()
                 return True
 
             except Exception as e:
@@ -493,6 +514,7 @@ class GroupTable:
                 group.updated_at = now
                 db.commit()
                 db.refresh(group)
+                self.version.bump()
 
                 return GroupModel.model_validate(group)
 
@@ -523,6 +545,7 @@ class GroupTable:
 
                 db.commit()
                 db.refresh(group)
+                self.version.bump()
                 return GroupModel.model_validate(group)
 
         except Exception as e:
@@ -5,12 +5,13 @@ from typing import Optional
 
 from open_webui.internal.db import Base, get_db
 from open_webui.models.tags import TagModel, Tag, Tags
-from open_webui.models.users import Users, User, UserNameResponse
+from open_webui.models.users import Users, User, UserModel, UserNameResponse
 from open_webui.models.channels import Channels, ChannelMember
+from open_webui.env import ENABLE_CHANNEL_UNREAD_COUNTER
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Boolean, Column, Index, String, Text, JSON
 from sqlalchemy import or_, func, select, and_, text
 from sqlalchemy.sql import exists
 
@@ -27,6 +28,8 @@ class MessageReaction(Base):
     name = Column(Text)
     created_at = Column(BigInteger)
 
+    __table_args__ = (Index("message_reaction_message_id_idx", "message_id"),)
+
 
 class MessageReactionModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -60,6 +63,11 @@ class Message(Base):
     created_at = Column(BigInteger)  # time_ns
     updated_at = Column(BigInteger)  # time_ns
 
+    __table_args__ = (
+        Index("message_channel_id_created_at_idx", "channel_id", "created_at"),
+        Index("message_parent_id_idx", "parent_id"),
+    )
+
 
 class MessageModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -123,6 +131,27 @@ class MessageResponse(MessageReplyToResponse):
 
 
 class MessageTable:
+    def _update_unread_counters(self, db, message: Message, delta: int):
+        """
+        Add `delta` to the unread counters of the members of the message's
+        channel who haven't read it, with ENABLE_CHANNEL_UNREAD_COUNTER set.
+        """
+        if not ENABLE_CHANNEL_UNREAD_COUNTER:
+            return
+        if message.parent_id is not None:
+            # Only top-level messages are counted
+            return
+
+        db.query(ChannelMember).filter(
+            ChannelMember.channel_id == message.channel_id,
+            ChannelMember.user_id != message.user_id,
+            func.coalesce(ChannelMember.last_read_at, 0) < message.created_at,
+            ChannelMember.unread_count + delta >= 0,
+        ).update(
+            {ChannelMember.unread_count: ChannelMember.unread_count + delta},
+            synchronize_session=False,
+        )
+
     def insert_new_message(
         self, form_data: MessageForm, channel_id: str, user_id: str
     ) -> Optional[MessageModel]:
@@ -152,6 +181,7 @@ class MessageTable:
             result = Message(**message.model_dump())
 
             db.add(result)
+            self._update_unread_counters(db, result, 1)
             db.commit()
             db.refresh(result)
             return MessageModel.model_validate(result) if result else None
@@ -169,7 +199,9 @@ class MessageTable:
             )
 
             reactions = self.get_reactions_by_message_id(id)
-            thread_replies = self.get_thread_replies_by_message_id(id)
+            reply_count, latest_reply_at = self.get_reply_stats_by_message_ids(
+                [id]
+            ).get(id, (0, None))
 
             user = Users.get_user_by_id(message.user_id)
             return MessageResponse.model_validate(
@@ -179,14 +211,71 @@ class MessageTable:
                     "reply_to_message": (
                         reply_to_message.model_dump() if reply_to_message else None
                     ),
-                    "latest_reply_at": (
-                        thread_replies[0].created_at if thread_replies else None
-                    ),
-                    "reply_count": len(thread_replies),
+                    "latest_reply_at": latest_reply_at,
+                    "reply_count": reply_count,
                     "reactions": reactions,
                 }
             )
 
+    def _get_reply_to_responses(
+        self, db, messages: list[Message]
+    ) -> list[MessageReplyToResponse]:
+        # Read the messages replied to and their authors in one query
+        reply_to_ids = {message.reply_to_id for message in messages}
+        reply_to_ids.discard(None)
+
+        reply_to_messages = {}
+        if reply_to_ids:
+            results = (
+                db.query(Message, User)
+                .outerjoin(User, Message.user_id == User.id)
+                .filter(Message.id.in_(reply_to_ids))
+                .all()
+            )
+            for reply_to_message, user in results:
+                reply_to_messages[reply_to_message.id] = {
+                    **MessageModel.model_validate(reply_to_message).model_dump(),
+                    "user": (
+                        UserModel.model_validate(user).model_dump() if user else None
+                    ),
+                }
+
+        return [
+            MessageReplyToResponse.model_validate(
+                {
+                    **MessageModel.model_validate(message).model_dump(),
+                    "reply_to_message": reply_to_messages.get(message.reply_to_id),
+                }
+            )
+            for message in messages
+        ]
+
+    def _paginate(
+        self,
+        db,
+        query,
+        skip: int,
+        before: Optional[str],
+        before_created_at: Optional[int],
+    ):
+        # Keyset pagination: messages sent before the message `before`, in
+        # (created_at, id) order so messages sent meanwhile don't shift pages.
+        # The cursor's own message may have been deleted since, so its
+        # created_at is passed along; `skip` is only used without a cursor.
+        if before and before_created_at is None:
+            before_created_at = (
+                db.query(Message.created_at).filter_by(id=before).scalar()
+            )
+        if not before or before_created_at is None:
+            return query.offset(skip)
+
+        return query.filter(
+            or_(
+                Message.created_at < before_created_at,
+                and_(Message.created_at == before_created_at, Message.id < before),
+            )
+        )
+
     def get_thread_replies_by_message_id(self, id: str) -> list[MessageReplyToResponse]:
         with get_db() as db:
             all_messages = (
@@ -196,26 +285,7 @@ class MessageTable:
                 .all()
             )
 
-            messages = []
-            for message in all_messages:
-                reply_to_message = (
-                    self.get_message_by_id(message.reply_to_id)
-                    if message.reply_to_id
-                    else None
-                )
-                messages.append(
-                    MessageReplyToResponse.model_validate(
-                        {
-                            **MessageModel.model_validate(message).model_dump(),
-                            "reply_to_message": (
-                                reply_to_message.model_dump()
-                                if reply_to_message
-                                else None
-                            ),
-                        }
-                    )
-                )
-            return messages
+            return self._get_reply_to_responses(db, all_messages)
 
     def get_reply_user_ids_by_message_id(self, id: str) -> list[str]:
         with get_db() as db:
@@ -225,41 +295,33 @@ class MessageTable:
             ]
 
     def get_messages_by_channel_id(
-        self, channel_id: str, skip: int = 0, limit: int = 50
+        self,
+        channel_id: str,
+        skip: int = 0,
+        limit: int = 50,
+        before: Optional[str] = None,
+        before_created_at: Optional[int] = None,
     ) -> list[MessageReplyToResponse]:
         with get_db() as db:
-            all_messages = (
+            query = (
                 db.query(Message)
                 .filter_by(channel_id=channel_id, parent_id=None)
-                .order_by(Message.created_at.desc())
-                .offset(skip)
-                .limit(limit)
-                .all()
+                .order_by(Message.created_at.desc(), Message.id.desc())
             )
+            query = self._paginate(db, query, skip, before, before_created_at)
 
-            messages = []
-            for message in all_messages:
-                reply_to_message = (
-                    self.get_message_by_id(message.reply_to_id)
-                    if message.reply_to_id
-                    else None
-                )
-                messages.append(
-                    MessageReplyToResponse.model_validate(
-                        {
-                            **MessageModel.model_validate(message).model_dump(),
-                            "reply_to_message": (
-                                reply_to_message.model_dump()
-                                if reply_to_message
-                                else None
-                            ),
-                        }
-                    )
-                )
-            return messages
+            all_messages = query.limit(limit).all()
+
+            return self._get_reply_to_responses(db, all_messages)
 
     def get_messages_by_parent_id(
-        self, channel_id: str, parent_id: str, skip: int = 0, limit: int = 50
+        self,
+        channel_id: str,
+        parent_id: str,
+        skip: int = 0,
+        limit: int = 50,
+        before: Optional[str] = None,
+        before_created_at: Optional[int] = None,
     ) -> list[MessageReplyToResponse]:
         with get_db() as db:
             message = db.get(Message, parent_id)
@@ -267,39 +329,20 @@ class MessageTable:
             if not message:
                 return []
 
-            all_messages = (
+            query = (
                 db.query(Message)
                 .filter_by(channel_id=channel_id, parent_id=parent_id)
-                .order_by(Message.created_at.desc())
-                .offset(skip)
-                .limit(limit)
-                .all()
+                .order_by(Message.created_at.desc(), Message.id.desc())
             )
+            query = self._paginate(db, query, skip, before, before_created_at)
+
+            all_messages = query.limit(limit).all()
 
             # If length of all_messages is less than limit, then add the parent message
             if len(all_messages) < limit:
                 all_messages.append(message)
 
-            messages = []
-            for message in all_messages:
-                reply_to_message = (
-                    self.get_message_by_id(message.reply_to_id)
-                    if message.reply_to_id
-                    else None
-                )
-                messages.append(
-                    MessageReplyToResponse.model_validate(
-                        {
-                            **MessageModel.model_validate(message).model_dump(),
-                            "reply_to_message": (
-                                reply_to_message.model_dump()
-                                if reply_to_message
-                                else None
-                            ),
-                        }
-                    )
-                )
-            return messages
+            return self._get_reply_to_responses(db, all_messages)
 
     def get_last_message_by_channel_id(self, channel_id: str) -> Optional[MessageModel]:
         with get_db() as db:
@@ -369,6 +412,78 @@ class MessageTable:
                 query = query.filter(Message.user_id != user_id)
             return query.count()
 
+    def get_last_message_at_by_channel_ids(
+        self, channel_ids: list[str]
+    ) -> dict[str, int]:
+        if not channel_ids:
+            return {}
+
+        with get_db() as db:
+            rows = (
+                db.query(Message.channel_id, func.max(Message.created_at))
+                .filter(Message.channel_id.in_(channel_ids))
+                .group_by(Message.channel_id)
+                .all()
+            )
+            return {channel_id: created_at for channel_id, created_at in rows}
+
+    def get_unread_message_counts(
+        self, channel_ids: list[str], user_id: str
+    ) -> dict[str, int]:
+        """
+        Unread top-level messages of other users in each of `channel_ids` the
+        user is a member of. Uses the counters of the memberships where they
+        are tracked and counts the messages of the others in one query.
+        """
+        if not channel_ids:
+            return {}
+
+        with get_db() as db:
+            memberships = (
+                db.query(ChannelMember.channel_id, ChannelMember.unread_count)
+                .filter(
+                    ChannelMember.channel_id.in_(channel_ids),
+                    ChannelMember.user_id == user_id,
+                )
+                .all()
+            )
+
+            counts = {}
+            for channel_id, unread_count in memberships:
+                counts[channel_id] = (
+                    unread_count
+                    if ENABLE_CHANNEL_UNREAD_COUNTER and unread_count is not None
+                    else None
+                )
+
+            uncounted_channel_ids = [
+                channel_id for channel_id, count in counts.items() if count is None
+            ]
+            if uncounted_channel_ids:
+                rows = (
+                    db.query(Message.channel_id, func.count(Message.id))
+                    .join(
+                        ChannelMember,
+                        and_(
+                            ChannelMember.channel_id == Message.channel_id,
+                            ChannelMember.user_id == user_id,
+                        ),
+                    )
+                    .filter(
+                        Message.channel_id.in_(uncounted_channel_ids),
+                        Message.parent_id.is_(None),
+                        Message.user_id != user_id,
+                        Message.created_at
+                        > func.coalesce(ChannelMember.last_read_at, 0),
+                    )
+                    .group_by(Message.channel_id)
+                    .all()
+                )
+                counts.update({channel_id: 0 for channel_id in uncounted_channel_ids})
+                counts.update({channel_id: count for channel_id, count in rows})
+
+            return counts
+
     def add_reaction_to_message(
         self, id: str, user_id: str, name: str
     ) -> Optional[MessageReactionModel]:
@@ -397,34 +512,111 @@ class MessageTable:
             return MessageReactionModel.model_validate(result) if result else None
 
     def get_reactions_by_message_id(self, id: str) -> list[Reactions]:
+        return self.get_reactions_by_message_ids([id]).get(id, [])
+
+    def get_reactions_by_message_ids(
+        self, ids: list[str]
+    ) -> dict[str, list[Reactions]]:
+        if not ids:
+            return {}
+
         with get_db() as db:
             # JOIN User so all user info is fetched in one query
             results = (
                 db.query(MessageReaction, User)
                 .join(User, MessageReaction.user_id == User.id)
-                .filter(MessageReaction.message_id == id)
+                .filter(MessageReaction.message_id.in_(ids))
                 .all()
             )
 
             reactions = {}
 
             for reaction, user in results:
-                if reaction.name not in reactions:
-                    reactions[reaction.name] = {
+                message_reactions = reactions.setdefault(reaction.message_id, {})
+                if reaction.name not in message_reactions:
+                    message_reactions[reaction.name] = {
                         "name": reaction.name,
                         "users": [],
                         "count": 0,
                     }
 
-                reactions[reaction.name]["users"].append(
+                message_reactions[reaction.name]["users"].append(
                     {
                         "id": user.id,
                         "name": user.name,
                     }
                 )
-                reactions[reaction.name]["count"] += 1
+                message_reactions[reaction.name]["count"] += 1
+
+            return {
+                message_id: [
+                    Reactions(**reaction) for reaction in message_reactions.values()
+                ]
+                for message_id, message_reactions in reactions.items()
+            }
 
-            return [Reactions(**reaction) for reaction in reactions.values()]
+    def get_reply_stats_by_message_ids(
+        self, ids: list[str]
+    ) -> dict[str, tuple[int, int]]:
+        """
+        Number of thread replies and when the latest was sent, by the id of
+        the message replied to. Messages without replies are left out.
+        """
+        if not ids:
+            return {}
+
+        with get_db() as db:
+            rows = (
+                db.query(
+                    Message.parent_id,
+                    func.count(Message.id),
+                    func.max(Message.created_at),
+                )
+                .filter(Message.parent_id.in_(ids))
+                .group_by(Message.parent_id)
+                .all()
+            )
+            return {
+                parent_id: (reply_count, latest_reply_at)
+                for parent_id, reply_count, latest_reply_at in rows
+            }
+
+    def get_message_responses(
+        self, messages: list[MessageModel], include_replies: bool = True
+    ) -> list[MessageResponse]:
+        """
+        `messages` with their authors, reactions and, with `include_replies`,
+        the number of thread replies and when the latest was sent. Reads them
+        for all messages at once instead of per message.
+        """
+        ids = [message.id for message in messages]
+        reply_stats = (
+            self.get_reply_stats_by_message_ids(ids) if include_replies else {}
+        )
+        reactions = self.get_reactions_by_message_ids(ids)
+
+        user_ids = list({message.user_id for message in messages})
+        users = {
+            user.id: user
+            for user in (Users.get_users_by_user_ids(user_ids) if user_ids else [])
+        }
+
+        responses = []
+        for message in messages:
+            reply_count, latest_reply_at = reply_stats.get(message.id, (0, None))
+            user = users.get(message.user_id)
+            responses.append(
+                MessageResponse.model_validate(
+                    {
+                        **message.model_dump(),
+                        "user": user.model_dump() if user else None,
+                        "latest_reply_at": latest_reply_at,
+                        "reply_count": reply_count,
+                        "reactions": reactions.get(message.id, []),
+                    }
+                )
+            )
+        return responses
 
     def remove_reaction_by_id_and_user_id_and_name(
         self, id: str, user_id: str, name: str
@@ -450,6 +642,10 @@ class MessageTable:
 
     def delete_message_by_id(self, id: str) -> bool:
         with get_db() as db:
+            if ENABLE_CHANNEL_UNREAD_COUNTER:
+                message = db.get(Message, id)
+                if message:
+                    self._update_unread_counters(db, message, -1)
             db.query(Message).filter_by(id=id).delete()
 
             # Delete all reactions to this message
@@ -4,13 +4,12 @@ from typing import Optional
 
 from open_webui.internal.db import Base, JSONField, get_db
 from open_webui.models.users import Users, UserResponse
-from open_webui.models.groups import Groups
 
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Column, String, Text, JSON
 
-from open_webui.utils.access_control import has_access
+from open_webui.utils.access_control import has_access, get_user_group_ids
 
 
 log = logging.getLogger(__name__)
@@ -111,6 +110,12 @@ class ToolValves(BaseModel):
 
 
 class ToolsTable:
+    def bump_version(self, id: str = ""):
+        # Invalidate the snapshots of tools and their valves of all workers
+        from open_webui.utils.plugin import PLUGIN_REGISTRY
+
+        PLUGIN_REGISTRY.bump(id)
+
     def insert_new_tool(
         self, user_id: str, form_data: ToolForm, specs: list[dict]
     ) -> Optional[ToolModel]:
@@ -130,6 +135,7 @@ class ToolsTable:
                 db.add(result)
                 db.commit()
                 db.refresh(result)
+                self.bump_version(result.id)
                 if result:
                     return ToolModel.model_validate(result)
                 else:
@@ -172,7 +178,7 @@ class ToolsTable:
         self, user_id: str, permission: str = "write"
     ) -> list[ToolUserModel]:
         tools = self.get_tools()
-        user_group_ids = {group.id for group in Groups.get_groups_by_member_id(user_id)}
+        user_group_ids = get_user_group_ids(user_id)
 
         return [
             tool
@@ -197,6 +203,7 @@ class ToolsTable:
                     {"valves": valves, "updated_at": int(time.time())}
                 )
                 db.commit()
+                self.bump_version(id)
                 return self.get_tool_by_id(id)
         except Exception:
             return None
@@ -253,6 +260,7 @@ class ToolsTable:
                     {**updated, "updated_at": int(time.time())}
                 )
                 db.commit()
+                self.bump_version(id)
 
                 tool = db.query(Tool).get(id)
                 db.refresh(tool)
@@ -265,6 +273,7 @@ class ToolsTable:
             with get_db() as db:
                 db.query(Tool).filter_by(id=id).delete()
                 db.commit()
+                self.bump_version(id)
 
                 return True
         except Exception:
@@ -0,0 +1,832 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+import redis
+
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.retrieval.vector.main import (
+    GetResult,
+    SearchResult,
+    VectorDBBase,
+    VectorItem,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Okapi BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Small segments are merged once a collection has more segments than this
+MAX_SEGMENTS = 8
+
+FIELDS = ("text", "enriched")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def get_metadata_text(metadata: dict) -> str:
+    metadata = metadata or {}
+    metadata_parts = []
+
+    # Add filename (repeat twice for extra weight in BM25 scoring)
+    if metadata.get("name"):
+        filename = metadata["name"]
+        filename_tokens = filename.replace("_", " ").replace("-", " ").replace(".", " ")
+        metadata_parts.append(
+            f"Filename: {filename} {filename_tokens} {filename_tokens}"
+        )
+
+    # Add title if available
+    if metadata.get("title"):
+        metadata_parts.append(f"Title: {metadata['title']}")
+
+    # Add document section headings if available (from markdown splitter)
+    if metadata.get("headings") and isinstance(metadata["headings"], list):
+        headings = " > ".join(str(h) for h in metadata["headings"])
+        metadata_parts.append(f"Section: {headings}")
+
+    # Add source URL/path if available
+    if metadata.get("source"):
+        metadata_parts.append(f"Source: {metadata['source']}")
+
+    # Add snippet for web search results
+    if metadata.get("snippet"):
+        metadata_parts.append(f"Snippet: {metadata['snippet']}")
+
+    return " ".join(metadata_parts)
+
+
+def get_enriched_text(text: str, metadata: dict) -> str:
+    metadata_text = get_metadata_text(metadata)
+    return f"{text} {metadata_text}" if metadata_text else text
+
+
+def get_records_from_items(items: List[Union[VectorItem, dict]]) -> list[dict]:
+    records = []
+    for item in items:
+        if not isinstance(item, dict):
+            item = item.model_dump()
+        records.append(
+            {
+                "id": str(item["id"]),
+                "text": item.get("text") or "",
+                "metadata": item.get("metadata") or {},
+            }
+        )
+    return records
+
+
+def get_records_from_result(result: GetResult) -> list[dict]:
+    if not result or not result.ids:
+        return []
+
+    ids = result.ids[0]
+    documents = result.documents[0] if result.documents else [""] * len(ids)
+    metadatas = result.metadatas[0] if result.metadatas else [{}] * len(ids)
+    return [
+        {"id": str(id), "text": text or "", "metadata": metadata or {}}
+        for id, text, metadata in zip(ids, documents, metadatas)
+    ]
+
+
+def matches_filter(metadata: dict, filter: dict) -> bool:
+    return all(metadata.get(key) == value for key, value in filter.items())
+
+
+class BM25Segment:
+    """
+    Immutable on-disk segment of a BM25 index.
+
+    Documents are stored as JSON records in `docs.bin`, addressed by
+    `offsets.npy`. Every field has a term dictionary mapping each term to a
+    slice of the memory-mapped `postings_docs.npy`/`postings_tfs.npy` arrays,
+    so a query only touches the postings of its own terms.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+        with open(path / "ids.json") as f:
+            self.ids = json.load(f)
+
+        self.offsets = np.load(path / "offsets.npy", mmap_mode="r")
+        self.docs = np.memmap(path / "docs.bin", dtype=np.uint8, mode="r")
+
+        self.fields = {}
+        for field in FIELDS:
+            field_path = path / field
+            with open(field_path / "terms.json") as f:
+                terms = json.load(f)
+
+            lengths = np.load(field_path / "lengths.npy", mmap_mode="r")
+            self.fields[field] = {
+                "terms": terms,
+                "postings_docs": np.load(
+                    field_path / "postings_docs.npy", mmap_mode="r"
+                ),
+                "postings_tfs": np.load(field_path / "postings_tfs.npy", mmap_mode="r"),
+                "lengths": lengths,
+                "total_length": int(lengths.sum()),
+            }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get_record(self, idx: int) -> dict:
+        start, end = int(self.offsets[idx]), int(self.offsets[idx + 1])
+        return json.loads(self.docs[start:end].tobytes().decode("utf-8"))
+
+    @staticmethod
+    def write(path: Path, records: list[dict]) -> None:
+        path.mkdir(parents=True, exist_ok=True)
+
+        offsets = [0]
+        with open(path / "docs.bin", "wb") as f:
+            for record in records:
+                data = json.dumps(record, ensure_ascii=False, default=str).encode(
+                    "utf-8"
+                )
+                f.write(data)
+                offsets.append(offsets[-1] + len(data))
+        np.save(path / "offsets.npy", np.asarray(offsets, dtype=np.int64))
+
+        with open(path / "ids.json", "w") as f:
+            json.dump([record["id"] for record in records], f)
+
+        vocabulary = {}
+
+        def get_token_ids(text: str) -> list[int]:
+            tokens = tokenize(text)
+            for token in set(tokens).difference(vocabulary):
+                vocabulary[token] = len(vocabulary)
+            return list(map(vocabulary.__getitem__, tokens))
+
+        # The enriched field is the text followed by its metadata text, so the
+        # text is tokenized once and metadata once per distinct metadata text
+        token_ids = {field: [] for field in FIELDS}
+        lengths = {field: [] for field in FIELDS}
+        metadata_token_ids = {}
+        for record in records:
+            text_token_ids = get_token_ids(record["text"])
+            metadata_text = get_metadata_text(record["metadata"])
+            if metadata_text not in metadata_token_ids:
+                metadata_token_ids[metadata_text] = get_token_ids(metadata_text)
+
+            for field, field_token_ids in (
+                ("text", text_token_ids),
+                ("enriched", text_token_ids + metadata_token_ids[metadata_text]),
+            ):
+                token_ids[field].extend(field_token_ids)
+                lengths[field].append(len(field_token_ids))
+
+        num_docs = len(records)
+        for field in FIELDS:
+            # Count (term, doc) pairs at once; the result is sorted by term and
+            # then by document, which is the postings layout
+            keys, tfs = np.unique(
+                np.asarray(token_ids[field], dtype=np.int64) * num_docs
+                + np.repeat(np.arange(num_docs, dtype=np.int64), lengths[field]),
+                return_counts=True,
+            )
+            bounds = np.searchsorted(
+                keys // num_docs, np.arange(len(vocabulary) + 1)
+            ).tolist()
+            terms = {
+                term: [bounds[term_id], bounds[term_id + 1]]
+                for term, term_id in vocabulary.items()
+                if bounds[term_id] < bounds[term_id + 1]
+            }
+
+            field_path = path / field
+            field_path.mkdir(exist_ok=True)
+            with open(field_path / "terms.json", "w") as f:
+                json.dump(terms, f, ensure_ascii=False)
+            np.save(
+                field_path / "postings_docs.npy",
+                (keys % num_docs).astype(np.int32),
+            )
+            np.save(
+                field_path / "postings_tfs.npy",
+                tfs.astype(np.int32),
+            )
+            np.save(
+                field_path / "lengths.npy",
+                np.asarray(lengths[field], dtype=np.int32),
+            )
+
+
+class BM25Index:
+    """
+    Persistent, segmented BM25 index of a single vector collection.
+
+    New documents are written to new immutable segments and deleted documents
+    are tombstoned in `manifest.json`, so updates never rewrite the whole
+    index. Small segments are merged once there are more than MAX_SEGMENTS.
+
+    `version` is the version of the collection the index was last synced with,
+    see BM25IndexStore.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.manifest_path = path / "manifest.json"
+
+        self._lock = threading.RLock()
+        self._manifest_stat = None
+        self._segments: list[BM25Segment] = []
+        self._deleted: list[np.ndarray] = []
+        self.version: Optional[str] = None
+
+    def exists(self) -> bool:
+        return self.manifest_path.exists()
+
+    @contextmanager
+    def lock(self):
+        """Serialize writers across threads and worker processes on this host."""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(f"{self.path}.lock", "a") as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    ####################
+    # Reading
+    ####################
+
+    def _read_manifest(self) -> Optional[dict]:
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def load(self) -> bool:
+        """(Re)load the manifest and its segments if they changed on disk."""
+        with self._lock:
+            try:
+                stat = self.manifest_path.stat()
+            except FileNotFoundError:
+                self._manifest_stat = None
+                self._segments, self._deleted = [], []
+                self.version = None
+                return False
+
+            stat_key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            if stat_key == self._manifest_stat:
+                return True
+
+            manifest = self._read_manifest()
+            if manifest is None:
+                return self.load()
+
+            loaded = {segment.path.name: segment for segment in self._segments}
+            segments = []
+            deleted = []
+            for name in manifest["segments"]:
+                segment = loaded.get(name) or BM25Segment(self.path / name)
+                mask = np.zeros(len(segment), dtype=bool)
+                mask[manifest["deleted"].get(name, [])] = True
+                segments.append(segment)
+                deleted.append(mask)
+
+            self._segments, self._deleted = segments, deleted
+            self.version = manifest.get("version")
+            self._manifest_stat = stat_key
+            return True
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(int((~mask).sum()) for mask in self._deleted)
+
+    def search(self, query: str, k: int, field: str = "text") -> list[dict]:
+        """
+        Return the top `k` records for `query`, best first, each with a
+        `score` key. Only the postings of the query terms are scored.
+        """
+        try:
+            if not self.load():
+                return []
+        except FileNotFoundError:
+            # A concurrent compaction removed a segment we had not loaded yet
+            self._manifest_stat = None
+            if not self.load():
+                return []
+
+        with self._lock:
+            segments, deleted = self._segments, self._deleted
+
+        terms = set(tokenize(query))
+        if not segments or not terms or k <= 0:
+            return []
+
+        num_docs = sum(len(segment) for segment in segments)
+        num_live_docs = sum(int((~mask).sum()) for mask in deleted)
+        avg_length = (
+            sum(segment.fields[field]["total_length"] for segment in segments)
+            / num_docs
+        ) or 1.0
+
+        document_frequencies = Counter()
+        for segment in segments:
+            segment_terms = segment.fields[field]["terms"]
+            for term in terms:
+                if term in segment_terms:
+                    start, end = segment_terms[term]
+                    document_frequencies[term] += end - start
+
+        doc_ids = []
+        doc_scores = []
+        base = 0
+        for segment in segments:
+            segment_field = segment.fields[field]
+            for term in terms:
+                if term not in segment_field["terms"]:
+                    continue
+
+                df = document_frequencies[term]
+                idf = math.log(1 + (num_live_docs - df + 0.5) / (df + 0.5))
+
+                start, end = segment_field["terms"][term]
+                docs = np.asarray(segment_field["postings_docs"][start:end])
+                tfs = np.asarray(segment_field["postings_tfs"][start:end], np.float64)
+                lengths = np.asarray(segment_field["lengths"][docs], np.float64)
+
+                doc_ids.append(docs.astype(np.int64) + base)
+                doc_scores.append(
+                    idf
+                    * tfs
+                    * (BM25_K1 + 1)
+                    / (tfs + BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_length))
+                )
+            base += len(segment)
+
+        if not doc_ids:
+            return []
+
+        candidates, inverse = np.unique(np.concatenate(doc_ids), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(doc_scores))
+
+        live = ~np.concatenate(deleted)[candidates]
+        candidates, scores = candidates[live], scores[live]
+
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            candidates, scores = candidates[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+
+        segment_bases = np.cumsum([0] + [len(segment) for segment in segments])
+        results = []
+        for doc_id, score in zip(candidates[order], scores[order]):
+            segment_idx = int(np.searchsorted(segment_bases, doc_id, side="right")) - 1
+            record = segments[segment_idx].get_record(
+                int(doc_id - segment_bases[segment_idx])
+            )
+            record["score"] = float(score)
+            results.append(record)
+        return results
+
+    ####################
+    # Writing (callers must hold `lock()`)
+    ####################
+
+    def _write_manifest(self, manifest: dict) -> None:
+        tmp_path = self.path / f"manifest.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _new_segment(self, manifest: dict, records: list[dict]) -> str:
+        name = f"segment-{uuid.uuid4().hex}"
+        BM25Segment.write(self.path / name, records)
+        manifest["counts"][name] = len(records)
+        return name
+
+    def _tombstone(self, manifest: dict, match: Callable[[int, dict], bool]) -> int:
+        """Tombstone live documents for which `match(segment, idx)` is true."""
+        count = 0
+        for segment, mask in zip(self._segments, self._deleted):
+            name = segment.path.name
+            for idx in np.flatnonzero(~mask):
+                if match(segment, int(idx)):
+                    manifest["deleted"].setdefault(name, []).append(int(idx))
+                    count += 1
+        return count
+
+    def _compact(self, manifest: dict) -> None:
+        def get_live_count(name):
+            return manifest["counts"][name] - len(manifest["deleted"].get(name, []))
+
+        # Drop segments without live documents
+        segments = [name for name in manifest["segments"] if get_live_count(name) > 0]
+
+        if len(segments) > MAX_SEGMENTS:
+            # Merge the smallest segments, leaving the large ones untouched
+            merged = sorted(segments, key=get_live_count)[
+                : len(segments) - MAX_SEGMENTS // 2 + 1
+            ]
+
+            loaded = {segment.path.name: segment for segment in self._segments}
+            records = []
+            for name in merged:
+                segment = loaded.get(name) or BM25Segment(self.path / name)
+                removed = set(manifest["deleted"].get(name, []))
+                records.extend(
+                    segment.get_record(idx)
+                    for idx in range(len(segment))
+                    if idx not in removed
+                )
+
+            segments = [name for name in segments if name not in merged]
+            segments.append(self._new_segment(manifest, records))
+
+        manifest["segments"] = segments
+        manifest["counts"] = {name: manifest["counts"][name] for name in segments}
+        manifest["deleted"] = {
+            name: manifest["deleted"][name]
+            for name in segments
+            if name in manifest["deleted"]
+        }
+
+    def _commit(self, manifest: dict) -> None:
+        previous = self._read_manifest()
+        self._compact(manifest)
+        self._write_manifest(manifest)
+
+        if previous:
+            for name in set(previous["segments"]) - set(manifest["segments"]):
+                shutil.rmtree(self.path / name, ignore_errors=True)
+
+        self._manifest_stat = None
+        self.load()
+
+    def create(self, records: list[dict], version: Optional[str] = None) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._segments, self._deleted = [], []
+        self._manifest_stat = None
+
+        manifest = {"segments": [], "counts": {}, "deleted": {}, "version": version}
+        if records:
+            manifest["segments"].append(self._new_segment(manifest, records))
+        self._commit(manifest)
+
+    def add(self, records: list[dict], version: Optional[str] = None) -> None:
+        """Add records, replacing any live documents with the same ids."""
+        self._manifest_stat = None
+        if not self.load():
+            return
+
+        manifest = self._read_manifest()
+        manifest["version"] = version
+        ids = {record["id"] for record in records}
+        self._tombstone(manifest, lambda segment, idx: segment.ids[idx] in ids)
+
+        if records:
+            manifest["segments"].append(self._new_segment(manifest, records))
+        self._commit(manifest)
+
+    def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+        version: Optional[str] = None,
+    ) -> None:
+        self._manifest_stat = None
+        if not self.load():
+            return
+
+        manifest = self._read_manifest()
+        if ids is not None:
+            ids = set(ids)
+            count = self._tombstone(
+                manifest, lambda segment, idx: segment.ids[idx] in ids
+            )
+        else:
+            count = self._tombstone(
+                manifest,
+                lambda segment, idx: matches_filter(
+                    segment.get_record(idx)["metadata"], filter
+                ),
+            )
+
+        if count or manifest.get("version") != version:
+            manifest["version"] = version
+            self._commit(manifest)
+
+    def drop(self) -> None:
+        try:
+            os.remove(self.manifest_path)
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(self.path, ignore_errors=True)
+
+        self._manifest_stat = None
+        self._segments, self._deleted = [], []
+        self.version = None
+
+
+class BM25IndexStore:
+    """
+    BM25 indexes of all vector collections, stored under `path`.
+
+    Indexes are kept on the local disk and only updated by the writes of this
+    host. With `redis`, each write also bumps a version of the collection
+    shared by all hosts, and an index that is not at the current version is
+    rebuilt from the vector DB before it is used, so writes made through other
+    hosts are never missed. Without Redis, all writes are assumed to go
+    through this host.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        redis=None,
+        redis_key_prefix: str = "open-webui",
+    ):
+        self.path = Path(path)
+        self.redis = redis
+        self.redis_key = f"{redis_key_prefix}:bm25"
+        self._indexes: dict[str, BM25Index] = {}
+        self._lock = threading.Lock()
+
+    def get_index(self, collection_name: str) -> BM25Index:
+        with self._lock:
+            if collection_name not in self._indexes:
+                name = hashlib.sha256(collection_name.encode()).hexdigest()
+                self._indexes[collection_name] = BM25Index(self.path / name)
+            return self._indexes[collection_name]
+
+    ####################
+    # Versions shared by all hosts
+    ####################
+
+    def _get_version_keys(self, collection_name: str) -> tuple[str, str]:
+        name = hashlib.sha256(collection_name.encode()).hexdigest()
+        # Resets of the vector DB bump the version of all collections at once
+        return f"{self.redis_key}:_reset", f"{self.redis_key}:{name}"
+
+    def get_version(self, collection_name: str) -> Optional[str]:
+        """Current version of a collection, raises RedisError if unknown."""
+        if not self.redis:
+            return None
+        pipe = self.redis.pipeline(transaction=False)
+        for key in self._get_version_keys(collection_name):
+            pipe.get(key)
+        reset, version = pipe.execute()
+        return f"{reset or 0}.{version or 0}"
+
+    def bump_version(self, collection_name: str) -> tuple[Optional[str], Optional[str]]:
+        """
+        Bump the version of a collection after a write, returning the versions
+        before and after it. Raises RedisError if it can't be bumped.
+        """
+        if not self.redis:
+            return None, None
+        reset_key, version_key = self._get_version_keys(collection_name)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.get(reset_key)
+        pipe.incr(version_key)
+        reset, version = pipe.execute()
+        return f"{reset or 0}.{int(version) - 1}", f"{reset or 0}.{version}"
+
+    ####################
+    # Indexes
+    ####################
+
+    def get_or_build(
+        self,
+        collection_name: str,
+        loader: Callable[[], Optional[GetResult]],
+    ) -> Optional[BM25Index]:
+        """
+        Return the index of a collection, building it from `loader` if it does
+        not exist yet or is outdated. Returns None if the collection does not
+        exist.
+        """
+        index = self.get_index(collection_name)
+        try:
+            version = self.get_version(collection_name)
+            valid = True
+        except redis.exceptions.RedisError as e:
+            log.warning(f"Failed to get BM25 version of {collection_name}: {e}")
+            version, valid = None, False
+
+        if valid and index.load() and index.version == version:
+            return index
+
+        with index.lock():
+            index.load()
+            if not valid or not index.exists() or index.version != version:
+                # Read before loading, so writes meanwhile outdate the index
+                result = loader()
+                if result is None:
+                    index.drop()
+                    return None
+
+                log.info(f"Building BM25 index for collection {collection_name}")
+                index.create(get_records_from_result(result), version=version)
+
+        index.load()
+        return index
+
+    def add(
+        self,
+        collection_name: str,
+        items: List[Union[VectorItem, dict]],
+        create: bool = False,
+    ) -> None:
+        """
+        Add items written to a collection to its index. Without `create`,
+        collections that have no index yet are skipped and indexed lazily when
+        queried.
+        """
+        index = self.get_index(collection_name)
+        with index.lock():
+            previous, version = self.bump_version(collection_name)
+            index.load()
+            if index.exists() and index.version == previous:
+                index.add(get_records_from_items(items), version=version)
+            elif (
+                create
+                and not index.exists()
+                # No other host wrote to the collection before
+                and (previous is None or previous.endswith(".0"))
+            ):
+                index.create(get_records_from_items(items), version=version)
+            else:
+                # Missed writes of other hosts, rebuilt when queried
+                index.drop()
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+    ) -> None:
+        index = self.get_index(collection_name)
+        with index.lock():
+            previous, version = self.bump_version(collection_name)
+            index.load()
+            if not index.exists():
+                return
+
+            operator_filter = ids is None and (
+                not filter
+                or any(str(key).startswith("$") for key in filter)
+                or any(isinstance(value, dict) for value in filter.values())
+            )
+            if operator_filter or index.version != previous:
+                # Operator filters and outdated indexes are rebuilt from the
+                # vector DB instead
+                index.drop()
+            else:
+                index.delete(ids=ids, filter=filter, version=version)
+
+    def drop(self, collection_name: str) -> None:
+        index = self.get_index(collection_name)
+        with index.lock():
+            index.drop()
+            self.bump_version(collection_name)
+
+    def drop_all(self) -> None:
+        with self._lock:
+            self._indexes = {}
+        shutil.rmtree(self.path, ignore_errors=True)
+        if self.redis:
+            self.redis.incr(self._get_version_keys("")[0])
+
+
+class BM25IndexedVectorDB(VectorDBBase):
+    """
+    Vector DB client that keeps the BM25 index of every collection in sync
+    with the writes going through it. Index maintenance never fails a write:
+    on error the index is dropped and rebuilt on the next hybrid search.
+    """
+
+    def __init__(self, client: VectorDBBase, indexes: BM25IndexStore):
+        self.client = client
+        self.indexes = indexes
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def _drop_index(self, collection_name: str, e: Exception) -> None:
+        log.exception(f"Failed to update BM25 index of {collection_name}: {e}")
+        try:
+            self.indexes.drop(collection_name)
+        except Exception as e:
+            log.exception(f"Failed to drop BM25 index of {collection_name}: {e}")
+
+    def has_collection(self, collection_name: str) -> bool:
+        return self.client.has_collection(collection_name=collection_name)
+
+    def delete_collection(self, collection_name: str) -> None:
+        try:
+            return self.client.delete_collection(collection_name=collection_name)
+        finally:
+            try:
+                self.indexes.drop(collection_name)
+            except Exception as e:
+                log.exception(f"Failed to drop BM25 index of {collection_name}: {e}")
+
+    def _write(self, method: str, collection_name: str, items: List[VectorItem]):
+        # A collection created by this write gets its index right away; other
+        # collections without an index are indexed lazily on first search
+        try:
+            create = not self.indexes.get_index(
+                collection_name
+            ).exists() and not self.client.has_collection(
+                collection_name=collection_name
+            )
+        except Exception:
+            create = False
+
+        result = getattr(self.client, method)(
+            collection_name=collection_name, items=items
+        )
+
+        try:
+            self.indexes.add(collection_name, items, create=create)
+        except Exception as e:
+            self._drop_index(collection_name, e)
+        return result
+
+    def insert(self, collection_name: str, items: List[VectorItem]) -> None:
+        return self._write("insert", collection_name, items)
+
+    def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        return self._write("upsert", collection_name, items)
+
+    def search(
+        self, collection_name: str, vectors: List[List[Union[float, int]]], limit: int
+    ) -> Optional[SearchResult]:
+        return self.client.search(
+            collection_name=collection_name, vectors=vectors, limit=limit
+        )
+
+    def query(
+        self, collection_name: str, filter: Dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        return self.client.query(
+            collection_name=collection_name, filter=filter, limit=limit
+        )
+
+    def get(self, collection_name: str) -> Optional[GetResult]:
+        return self.client.get(collection_name=collection_name)
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+        **kwargs,
+    ) -> None:
+        result = self.client.delete(
+            collection_name=collection_name, ids=ids, filter=filter, **kwargs
+        )
+
+        try:
+            if kwargs:
+                self.indexes.drop(collection_name)
+            else:
+                self.indexes.delete(collection_name, ids=ids, filter=filter)
+        except Exception as e:
+            self._drop_index(collection_name, e)
+        return result
+
+    def reset(self) -> None:
+        try:
+            return self.client.reset()
+        finally:
+            try:
+                self.indexes.drop_all()
+            except Exception as e:
+                log.exception(f"Failed to drop BM25 indexes: {e}")
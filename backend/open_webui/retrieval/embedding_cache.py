@@ -0,0 +1,218 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class EmbeddingCache:
+    """
+    Cache of computed embeddings, keyed by engine, model, prefix and a hash of
+    the text.
+
+    Recent vectors are kept in an in-process LRU of `max_entries` float32
+    arrays. With `path`, every vector is also written to a SQLite database as
+    packed float16, so unchanged chunks aren't embedded again when a file is
+    re-uploaded or a knowledge base re-indexed, even after a restart. Vectors
+    read back from disk lose precision past float16, which doesn't change the
+    ranking of search results in practice.
+    """
+
+    def __init__(self, max_entries: int = 10000, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.path = path
+
+        # (namespace, digest) -> float32 vector
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 or self.path is not None
+
+    def _get_db(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embedding ("
+                "namespace TEXT NOT NULL, digest BLOB NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (namespace, digest)) WITHOUT ROWID"
+            )
+        return self._db
+
+    @staticmethod
+    def get_namespace(engine: str, model: str) -> str:
+        return f"{engine or 'sentence_transformers'}:{model}"
+
+    @staticmethod
+    def get_digest(prefix: Optional[str], text: str) -> bytes:
+        return hashlib.sha256(f"{prefix or ''}\x00{text}".encode()).digest()
+
+    def _remember(self, key: tuple, vector: np.ndarray):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get_many(self, namespace: str, digests: list[bytes]) -> list:
+        """Cached vectors of `digests`, None where they aren't cached."""
+        vectors = [None] * len(digests)
+        missing = []
+
+        with self._lock:
+            for idx, digest in enumerate(digests):
+                vector = self._entries.get((namespace, digest))
+                if vector is not None:
+                    self._entries.move_to_end((namespace, digest))
+                    vectors[idx] = vector
+                else:
+                    missing.append(idx)
+
+            if missing and self.path:
+                found = {}
+                unique = list(dict.fromkeys(digests[idx] for idx in missing))
+                # Stay under SQLite's limit of bound parameters
+                for start in range(0, len(unique), 500):
+                    batch = unique[start : start + 500]
+                    rows = self._get_db().execute(
+                        "SELECT digest, vector FROM embedding WHERE namespace = ? "
+                        f"AND digest IN ({','.join('?' * len(batch))})",
+                        [namespace, *batch],
+                    )
+                    for digest, vector in rows:
+                        found[digest] = np.frombuffer(vector, dtype=np.float16).astype(
+                            np.float32
+                        )
+
+                for digest, vector in found.items():
+                    if self.max_entries > 0:
+                        self._remember((namespace, digest), vector)
+                for idx in missing:
+                    vectors[idx] = found.get(digests[idx])
+                self.stats["disk_hits"] += sum(
+                    1 for idx in missing if vectors[idx] is not None
+                )
+
+            hits = sum(1 for vector in vectors if vector is not None)
+            self.stats["hits"] += hits
+            self.stats["misses"] += len(digests) - hits
+
+        return vectors
+
+    def set_many(self, namespace: str, items: dict[bytes, list[float]]):
+        if not items:
+            return
+
+        with self._lock:
+            vectors = {
+                digest: np.asarray(vector, dtype=np.float32)
+                for digest, vector in items.items()
+            }
+            if self.max_entries > 0:
+                for digest, vector in vectors.items():
+                    self._remember((namespace, digest), vector)
+
+            if self.path:
+                db = self._get_db()
+                db.executemany(
+                    "INSERT OR REPLACE INTO embedding (namespace, digest, vector) "
+                    "VALUES (?, ?, ?)",
+                    [
+                        (namespace, digest, vector.astype(np.float16).tobytes())
+                        for digest, vector in vectors.items()
+                    ],
+                )
+                db.commit()
+
+    def invalidate(self, namespace: Optional[str] = None):
+        """Drop the vectors of `namespace`, or all of them."""
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == namespace]:
+                    del self._entries[key]
+
+            if self.path:
+                db = self._get_db()
+                if namespace is None:
+                    db.execute("DELETE FROM embedding")
+                else:
+                    db.execute(
+                        "DELETE FROM embedding WHERE namespace = ?", (namespace,)
+                    )
+                db.commit()
+
+
+def get_cached_embedding_function(
+    embedding_function, cache: EmbeddingCache, engine: str, model: str
+):
+    """
+    Wrap an embedding function from `get_embedding_function` so only texts
+    missing from `cache` are sent to the engine. Lookups and writes of the disk
+    store run on a thread, as SQLite blocks.
+    """
+    namespace = cache.get_namespace(engine, model)
+
+    async def run(func, *args):
+        if cache.path:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    async def cached_embedding_function(query, prefix=None, user=None):
+        texts = query if isinstance(query, list) else [query]
+        digests = [cache.get_digest(prefix, text) for text in texts]
+        vectors = await run(cache.get_many, namespace, digests)
+
+        missing = list(
+            dict.fromkeys(
+                (digest, text)
+                for digest, text, vector in zip(digests, texts, vectors)
+                if vector is None
+            )
+        )
+        if missing:
+            missing_texts = [text for _, text in missing]
+            if isinstance(query, list):
+                embeddings = await embedding_function(
+                    missing_texts, prefix=prefix, user=user
+                )
+            else:
+                embeddings = [await embedding_function(query, prefix=prefix, user=user)]
+
+            if not isinstance(embeddings, list) or len(embeddings) != len(missing):
+                # Failed or partial result, nothing to cache
+                return embeddings if isinstance(query, list) else embeddings[0]
+
+            computed = {
+                digest: embedding
+                for (digest, _), embedding in zip(missing, embeddings)
+                if embedding is not None
+            }
+            await run(cache.set_many, namespace, computed)
+        else:
+            computed = {}
+
+        results = [
+            vector.tolist() if vector is not None else computed.get(digest)
+            for digest, vector in zip(digests, vectors)
+        ]
+        return results if isinstance(query, list) else results[0]
+
+    return cached_embedding_function
@@ -0,0 +1,228 @@
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.retrieval.models.base_reranker import BaseReranker
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class RerankingService:
+    """
+    Scores (query, document) pairs with a reranking model for the whole app.
+
+    Rerank calls made while a batch is open, e.g. by hybrid search over many
+    collections and generated queries, are collected for up to `max_wait`
+    seconds or `max_batch_size` pairs and scored in one call of the model. The
+    model runs on a dedicated thread so it doesn't block the event loop.
+    Scores are cached by query hash and chunk id, and a pair already waiting
+    in a batch isn't queued again.
+
+    Cross-encoders score every pair on its own, so pairs of different queries
+    share a forward pass. `BaseReranker` models take a single query per call,
+    so their batches are split by query. Rerankers with `pointwise = False`
+    (ColBERT normalizes scores over the documents of a call) are called once
+    per request, without batching or caching.
+    """
+
+    def __init__(
+        self,
+        reranker,
+        engine: str = "",
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+        cache_size: int = 10000,
+    ):
+        self.reranker = reranker
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.cache_size = cache_size
+
+        # (query digest, chunk id) -> score
+        self._scores: OrderedDict = OrderedDict()
+        # (query digest, chunk id) -> future of a pair waiting to be scored
+        self._inflight: dict = {}
+        self._pending: list = []
+        self._flush_handle = None
+        # Batches handed to `_score` that aren't done yet
+        self._scoring = 0
+        self._closed = False
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="reranker"
+        )
+        self.stats = {"batches": 0, "pairs_scored": 0, "cache_hits": 0}
+
+    @property
+    def pointwise(self) -> bool:
+        return getattr(self.reranker, "pointwise", True)
+
+    @staticmethod
+    def get_chunk_id(document) -> bytes:
+        # Chunks don't carry a stable id of their own, the content is one
+        return hashlib.sha256(document.page_content.encode()).digest()
+
+    def _predict(self, sentences: list[tuple[str, str]], user=None):
+        if self.engine == "external":
+            return self.reranker.predict(sentences, user=user)
+        return self.reranker.predict(sentences)
+
+    async def __call__(self, query: str, documents, user=None) -> Optional[list]:
+        return await self.rerank(query, documents, user=user)
+
+    async def rerank(self, query: str, documents, user=None) -> Optional[list]:
+        """Scores of `documents` for `query`, None if the reranker failed."""
+        loop = asyncio.get_running_loop()
+
+        if not self.pointwise:
+            scores = await loop.run_in_executor(
+                self._executor,
+                self._predict,
+                [(query, document.page_content) for document in documents],
+                user,
+            )
+            return scores.tolist() if hasattr(scores, "tolist") else scores
+
+        query_digest = hashlib.sha256(query.encode()).digest()
+        keys = [(query_digest, self.get_chunk_id(document)) for document in documents]
+        results = [
+            self._get_or_queue(loop, key, query, document.page_content, user)
+            for key, document in zip(keys, documents)
+        ]
+
+        while True:
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._pending and self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.max_wait, self._flush)
+
+            futures = [
+                result for result in results if isinstance(result, asyncio.Future)
+            ]
+            if futures:
+                # Unlike gather, wait doesn't cancel the futures shared with
+                # other requests when this request is cancelled
+                await asyncio.wait(futures)
+
+            cancelled = [
+                idx
+                for idx, result in enumerate(results)
+                if isinstance(result, asyncio.Future) and result.cancelled()
+            ]
+            if not cancelled:
+                break
+            # Pairs whose shared future was cancelled weren't scored yet
+            for idx in cancelled:
+                results[idx] = self._get_or_queue(
+                    loop, keys[idx], query, documents[idx].page_content, user
+                )
+
+        results = [
+            result.result() if isinstance(result, asyncio.Future) else result
+            for result in results
+        ]
+        return None if any(result is None for result in results) else results
+
+    def _get_or_queue(self, loop, key, query: str, text: str, user):
+        """The cached score of a pair, or the future of its pending score."""
+        if key in self._scores:
+            self._scores.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return self._scores[key]
+
+        future = self._inflight.get(key)
+        if future is None or future.cancelled():
+            future = loop.create_future()
+            self._inflight[key] = future
+            self._pending.append((key, query, text, user, future))
+        return future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        while self._pending:
+            batch = self._pending[: self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size :]
+            self._scoring += 1
+            asyncio.create_task(self._score(batch))
+
+    async def _score(self, batch: list):
+        try:
+            await self._score_groups(batch)
+        finally:
+            self._scoring -= 1
+            if self._closed and not self._scoring:
+                self._executor.shutdown(wait=False)
+
+    async def _score_groups(self, batch: list):
+        loop = asyncio.get_running_loop()
+
+        if isinstance(self.reranker, BaseReranker):
+            groups = {}
+            for item in batch:
+                _, query, _, user, _ = item
+                groups.setdefault((query, id(user)), []).append(item)
+            groups = list(groups.values())
+        else:
+            groups = [batch]
+
+        for idx, group in enumerate(groups):
+            try:
+                scores = await loop.run_in_executor(
+                    self._executor,
+                    self._predict,
+                    [(query, text) for _, query, text, _, _ in group],
+                    group[0][3],
+                )
+                self.stats["batches"] += 1
+
+                if scores is not None and len(scores) == len(group):
+                    scores = scores.tolist() if hasattr(scores, "tolist") else scores
+                    self.stats["pairs_scored"] += len(group)
+                else:
+                    log.warning("Reranker returned no scores for a batch")
+                    scores = [None] * len(group)
+
+                for (key, _, _, _, future), score in zip(group, scores):
+                    if score is not None:
+                        self._scores[key] = score
+                        self._scores.move_to_end(key)
+                    if not future.done():
+                        future.set_result(score)
+            except Exception as e:
+                log.exception(f"Error reranking a batch of {len(group)} pairs: {e}")
+                for _, _, _, _, future in group:
+                    if not future.done():
+                        future.set_exception(e)
+            except BaseException:
+                # The task itself was cancelled, e.g. on shutdown of the loop.
+                # Fail the pairs that weren't scored so callers don't hang.
+                error = RuntimeError("Reranking was cancelled")
+                for remaining in groups[idx:]:
+                    for key, _, _, _, future in remaining:
+                        self._inflight.pop(key, None)
+                        if not future.done():
+                            future.set_exception(error)
+                raise
+            finally:
+                for key, _, _, _, _ in group:
+                    self._inflight.pop(key, None)
+
+        while len(self._scores) > self.cache_size:
+            self._scores.popitem(last=False)
+
+    def shutdown(self):
+        """Stops the model thread once the batches already queued are scored."""
+        self._closed = True
+        if self._pending:
+            self._flush()
+        if not self._scoring:
+            self._executor.shutdown(wait=False)
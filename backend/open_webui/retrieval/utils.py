@@ -5,19 +5,26 @@ from typing import Awaitable, Optional, Union
 import requests
 import aiohttp
 import asyncio
-import hashlib
-from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import time
 import re
 
 from urllib.parse import quote
 from huggingface_hub import snapshot_download
-from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
 
 from open_webui.config import VECTOR_DB
-from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.vector.factory import (
+    VECTOR_DB_CLIENT,
+    VECTOR_DB_EXECUTOR,
+    BM25_INDEXES,
+)
+from open_webui.retrieval.bm25 import BM25Index, get_enriched_text
+from open_webui.retrieval.embedding_cache import (
+    EmbeddingCache,
+    get_cached_embedding_function,
+)
+from open_webui.retrieval.reranking import RerankingService
 
 
 from open_webui.models.users import UserModel
@@ -32,9 +39,6 @@ from open_webui.utils.access_control import has_access
 from open_webui.utils.headers import include_user_info_headers
 from open_webui.utils.misc import get_message_list
 
-from open_webui.retrieval.web.utils import get_web_loader
-from open_webui.retrieval.loaders.youtube import YoutubeLoader
-
 
 from open_webui.env import (
     SRC_LOG_LEVELS,
@@ -45,12 +49,30 @@ from open_webui.config import (
     RAG_EMBEDDING_QUERY_PREFIX,
     RAG_EMBEDDING_CONTENT_PREFIX,
     RAG_EMBEDDING_PREFIX_FIELD_NAME,
+    RAG_EMBEDDING_CACHE_SIZE,
+    ENABLE_RAG_EMBEDDING_DISK_CACHE,
+    RAG_EMBEDDING_CACHE_DIR,
+    RAG_RERANKING_BATCH_SIZE,
+    RAG_RERANKING_BATCH_WAIT,
+    RAG_RERANKING_CACHE_SIZE,
+    RAG_RESULT_FUSION,
+    RAG_RRF_K,
 )
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
+EMBEDDING_CACHE = EmbeddingCache(
+    max_entries=RAG_EMBEDDING_CACHE_SIZE,
+    path=(
+        os.path.join(RAG_EMBEDDING_CACHE_DIR, "embeddings.db")
+        if ENABLE_RAG_EMBEDDING_DISK_CACHE
+        else None
+    ),
+)
+
+
 from typing import Any
 
 from langchain_core.callbacks import CallbackManagerForRetrieverRun
@@ -64,12 +86,16 @@ def is_youtube_url(url: str) -> bool:
 
 def get_loader(request, url: str):
     if is_youtube_url(url):
+        from open_webui.retrieval.loaders.youtube import YoutubeLoader
+
         return YoutubeLoader(
             url,
             language=request.app.state.config.YOUTUBE_LOADER_LANGUAGE,
             proxy_url=request.app.state.config.YOUTUBE_LOADER_PROXY_URL,
         )
     else:
+        from open_webui.retrieval.web.utils import get_web_loader
+
         return get_web_loader(
             url,
             verify_ssl=request.app.state.config.ENABLE_WEB_LOADER_SSL_VERIFICATION,
@@ -132,6 +158,25 @@ class VectorSearchRetriever(BaseRetriever):
         return results
 
 
+class BM25IndexRetriever(BaseRetriever):
+    bm25_index: Any
+    top_k: int
+    enable_enriched_texts: bool = False
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        records = self.bm25_index.search(
+            query,
+            k=self.top_k,
+            field="enriched" if self.enable_enriched_texts else "text",
+        )
+        return [
+            Document(metadata=record["metadata"], page_content=record["text"])
+            for record in records
+        ]
+
+
 def query_doc(
     collection_name: str, query_embedding: list[float], k: int, user: UserModel = None
 ):
@@ -167,46 +212,25 @@ def get_doc(collection_name: str, user: UserModel = None):
 
 
 def get_enriched_texts(collection_result: GetResult) -> list[str]:
-    enriched_texts = []
-    for idx, text in enumerate(collection_result.documents[0]):
-        metadata = collection_result.metadatas[0][idx]
-        metadata_parts = [text]
-
-        # Add filename (repeat twice for extra weight in BM25 scoring)
-        if metadata.get("name"):
-            filename = metadata["name"]
-            filename_tokens = (
-                filename.replace("_", " ").replace("-", " ").replace(".", " ")
-            )
-            metadata_parts.append(
-                f"Filename: {filename} {filename_tokens} {filename_tokens}"
-            )
-
-        # Add title if available
-        if metadata.get("title"):
-            metadata_parts.append(f"Title: {metadata['title']}")
-
-        # Add document section headings if available (from markdown splitter)
-        if metadata.get("headings") and isinstance(metadata["headings"], list):
-            headings = " > ".join(str(h) for h in metadata["headings"])
-            metadata_parts.append(f"Section: {headings}")
-
-        # Add source URL/path if available
-        if metadata.get("source"):
-            metadata_parts.append(f"Source: {metadata['source']}")
-
-        # Add snippet for web search results
-        if metadata.get("snippet"):
-            metadata_parts.append(f"Snippet: {metadata['snippet']}")
+    return [
+        get_enriched_text(text, collection_result.metadatas[0][idx])
+        for idx, text in enumerate(collection_result.documents[0])
+    ]
 
-        enriched_texts.append(" ".join(metadata_parts))
 
-    return enriched_texts
+def get_bm25_index(
+    collection_name: str, collection_result: Optional[GetResult] = None
+) -> Optional[BM25Index]:
+    return BM25_INDEXES.get_or_build(
+        collection_name,
+        loader=lambda: collection_result
+        or VECTOR_DB_CLIENT.get(collection_name=collection_name),
+    )
 
 
 async def query_doc_with_hybrid_search(
     collection_name: str,
-    collection_result: GetResult,
+    collection_result: Optional[GetResult],
     query: str,
     embedding_function,
     k: int,
@@ -215,39 +239,67 @@ async def query_doc_with_hybrid_search(
     r: float,
     hybrid_bm25_weight: float,
     enable_enriched_texts: bool = False,
+    bm25_index: Optional[BM25Index] = None,
 ) -> dict:
+    # Only hybrid search needs these, and langchain.retrievers is slow to import
+    from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
+    from langchain_community.retrievers import BM25Retriever
+
     try:
-        # First check if collection_result has the required attributes
-        if (
-            not collection_result
-            or not hasattr(collection_result, "documents")
-            or not hasattr(collection_result, "metadatas")
-        ):
-            log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
-            return {"documents": [], "metadatas": [], "distances": []}
+        if BM25_INDEXES is not None:
+            if bm25_index is None:
+                bm25_index = await asyncio.to_thread(
+                    get_bm25_index, collection_name, collection_result
+                )
 
-        # Now safely check the documents content after confirming attributes exist
-        if (
-            not collection_result.documents
-            or len(collection_result.documents) == 0
-            or not collection_result.documents[0]
-        ):
-            log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
-            return {"documents": [], "metadatas": [], "distances": []}
+            if bm25_index is None or len(bm25_index) == 0:
+                log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
+                return {"documents": [], "metadatas": [], "distances": []}
 
-        log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
+            log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
 
-        bm25_texts = (
-            get_enriched_texts(collection_result)
-            if enable_enriched_texts
-            else collection_result.documents[0]
-        )
+            bm25_retriever = BM25IndexRetriever(
+                bm25_index=bm25_index,
+                top_k=k,
+                enable_enriched_texts=enable_enriched_texts,
+            )
+        else:
+            if collection_result is None:
+                collection_result = VECTOR_DB_CLIENT.get(
+                    collection_name=collection_name
+                )
 
-        bm25_retriever = BM25Retriever.from_texts(
-            texts=bm25_texts,
-            metadatas=collection_result.metadatas[0],
-        )
-        bm25_retriever.k = k
+            # First check if collection_result has the required attributes
+            if (
+                not collection_result
+                or not hasattr(collection_result, "documents")
+                or not hasattr(collection_result, "metadatas")
+            ):
+                log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
+                return {"documents": [], "metadatas": [], "distances": []}
+
+            # Now safely check the documents content after confirming attributes exist
+            if (
+                not collection_result.documents
+                or len(collection_result.documents) == 0
+                or not collection_result.documents[0]
+            ):
+                log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
+                return {"documents": [], "metadatas": [], "distances": []}
+
+            log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
+
+            bm25_texts = (
+                get_enriched_texts(collection_result)
+                if enable_enriched_texts
+                else collection_result.documents[0]
+            )
+
+            bm25_retriever = BM25Retriever.from_texts(
+                texts=bm25_texts,
+                metadatas=collection_result.metadatas[0],
+            )
+            bm25_retriever.k = k
 
         vector_search_retriever = VectorSearchRetriever(
             collection_name=collection_name,
@@ -335,9 +387,40 @@ def merge_get_results(get_results: list[dict]) -> dict:
     return result
 
 
-def merge_and_sort_query_results(query_results: list[dict], k: int) -> dict:
-    # Initialize lists to store combined data
-    combined = dict()  # To store documents with unique document hashes
+def get_top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` highest scores, highest first, lower index first on ties."""
+    if k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k < len(scores):
+        kth = scores[np.argpartition(scores, -k)[-k]]
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.arange(len(scores))
+
+    order = np.argsort(-scores[candidates], kind="stable")
+    return candidates[order[:k]]
+
+
+def merge_and_sort_query_results(
+    query_results: list[dict],
+    k: int,
+    fusion: str = RAG_RESULT_FUSION,
+    rrf_k: int = RAG_RRF_K,
+) -> dict:
+    """
+    Merge the results of several collections and queries into the `k` best
+    chunks, deduplicated by content.
+
+    With `fusion="max"` a chunk returned more than once is ranked by its best
+    distance. With `fusion="rrf"` chunks are ranked by reciprocal rank fusion,
+    the sum of 1 / (rrf_k + rank) over the result sets that returned them,
+    which doesn't depend on the scale of the distances of every collection.
+    The distance and metadata returned are the ones of the best match.
+    """
+    # Candidate chunks of every result set, and the index of their content
+    chunk_ids, distances, positions, documents, metadatas = [], [], [], [], []
+    chunks = {}
 
     for data in query_results:
         if (
@@ -347,38 +430,40 @@ def merge_and_sort_query_results(query_results: list[dict], k: int) -> dict:
         ):
             continue
 
-        distances = data["distances"][0]
-        documents = data["documents"][0]
-        metadatas = data["metadatas"][0]
-
-        for distance, document, metadata in zip(distances, documents, metadatas):
+        for position, (distance, document, metadata) in enumerate(
+            zip(data["distances"][0], data["documents"][0], data["metadatas"][0])
+        ):
             if isinstance(document, str):
-                doc_hash = hashlib.sha256(
-                    document.encode()
-                ).hexdigest()  # Compute a hash for uniqueness
-
-                if doc_hash not in combined.keys():
-                    combined[doc_hash] = (distance, document, metadata)
-                    continue  # if doc is new, no further comparison is needed
-
-                # if doc is alredy in, but new distance is better, update
-                if distance > combined[doc_hash][0]:
-                    combined[doc_hash] = (distance, document, metadata)
-
-    combined = list(combined.values())
-    # Sort the list based on distances
-    combined.sort(key=lambda x: x[0], reverse=True)
+                chunk_ids.append(chunks.setdefault(document, len(chunks)))
+                distances.append(distance)
+                positions.append(position)
+                documents.append(document)
+                metadatas.append(metadata)
+
+    chunk_ids = np.asarray(chunk_ids, dtype=np.intp)
+    scores = np.asarray(distances, dtype=np.float64)
+
+    # Best match of every chunk, the first one on ties
+    order = np.argsort(-scores, kind="stable")
+    _, first = np.unique(chunk_ids[order], return_index=True)
+    best = order[first]
+
+    if fusion == "rrf":
+        ranking = np.zeros(len(chunks))
+        np.add.at(
+            ranking,
+            chunk_ids,
+            1.0 / (rrf_k + 1 + np.asarray(positions, dtype=np.float64)),
+        )
+    else:
+        ranking = scores[best]
 
-    # Slice to keep only the top k elements
-    sorted_distances, sorted_documents, sorted_metadatas = (
-        zip(*combined[:k]) if combined else ([], [], [])
-    )
+    top = best[get_top_k(ranking, k)]
 
-    # Create and return the output dictionary
     return {
-        "distances": [list(sorted_distances)],
-        "documents": [list(sorted_documents)],
-        "metadatas": [list(sorted_metadatas)],
+        "distances": [[distances[idx] for idx in top]],
+        "documents": [[documents[idx] for idx in top]],
+        "metadatas": [[metadatas[idx] for idx in top]],
     }
 
 
@@ -408,10 +493,12 @@ async def query_collection(
     results = []
     error = False
 
-    def process_query_collection(collection_name, query_embedding):
+    async def process_query_collection(collection_name, query_embedding):
         try:
             if collection_name:
-                result = query_doc(
+                result = await VECTOR_DB_EXECUTOR.run(
+                    VECTOR_DB,
+                    query_doc,
                     collection_name=collection_name,
                     k=k,
                     query_embedding=query_embedding,
@@ -419,6 +506,9 @@ async def query_collection(
                 if result is not None:
                     return result.model_dump(), None
             return None, None
+        except asyncio.TimeoutError as e:
+            log.warning(f"Timed out querying the collection {collection_name}")
+            return None, e
         except Exception as e:
             log.exception(f"Error when querying the collection: {e}")
             return None, e
@@ -431,15 +521,13 @@ async def query_collection(
         f"query_collection: processing {len(queries)} queries across {len(collection_names)} collections"
     )
 
-    with ThreadPoolExecutor() as executor:
-        future_results = []
-        for query_embedding in query_embeddings:
-            for collection_name in collection_names:
-                result = executor.submit(
-                    process_query_collection, collection_name, query_embedding
-                )
-                future_results.append(result)
-        task_results = [future.result() for future in future_results]
+    task_results = await asyncio.gather(
+        *[
+            process_query_collection(collection_name, query_embedding)
+            for query_embedding in query_embeddings
+            for collection_name in collection_names
+        ]
+    )
 
     for result, err in task_results:
         if err is not None:
@@ -466,20 +554,41 @@ async def query_collection_with_hybrid_search(
 ) -> dict:
     results = []
     error = False
+
     # Fetch collection data once per collection sequentially
     # Avoid fetching the same data multiple times later
-    collection_results = {}
-    for collection_name in collection_names:
+    # With BM25 indexes enabled, only load (or build once) the index instead
+    async def fetch_collection(collection_name):
         try:
+            if BM25_INDEXES is not None:
+                return await VECTOR_DB_EXECUTOR.run(
+                    "bm25", get_bm25_index, collection_name
+                )
+
             log.debug(
                 f"query_collection_with_hybrid_search:VECTOR_DB_CLIENT.get:collection {collection_name}"
             )
-            collection_results[collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=collection_name
+            return await VECTOR_DB_EXECUTOR.run(
+                VECTOR_DB, VECTOR_DB_CLIENT.get, collection_name=collection_name
             )
+        except asyncio.TimeoutError:
+            log.warning(f"Timed out fetching collection {collection_name}")
+            return None
         except Exception as e:
             log.exception(f"Failed to fetch collection {collection_name}: {e}")
-            collection_results[collection_name] = None
+            return None
+
+    collection_results = dict(
+        zip(
+            collection_names,
+            await asyncio.gather(
+                *[
+                    fetch_collection(collection_name)
+                    for collection_name in collection_names
+                ]
+            ),
+        )
+    )
 
     log.info(
         f"Starting hybrid search for {len(queries)} queries in {len(collection_names)} collections..."
@@ -489,7 +598,16 @@ async def query_collection_with_hybrid_search(
         try:
             result = await query_doc_with_hybrid_search(
                 collection_name=collection_name,
-                collection_result=collection_results[collection_name],
+                collection_result=(
+                    collection_results[collection_name]
+                    if BM25_INDEXES is None
+                    else None
+                ),
+                bm25_index=(
+                    collection_results[collection_name]
+                    if BM25_INDEXES is not None
+                    else None
+                ),
                 query=query,
                 embedding_function=embedding_function,
                 k=k,
@@ -783,7 +901,26 @@ def get_embedding_function(
     embedding_batch_size,
     azure_api_version=None,
     enable_async=True,
+    cache=True,
 ) -> Awaitable:
+    if cache and EMBEDDING_CACHE.enabled:
+        return get_cached_embedding_function(
+            get_embedding_function(
+                embedding_engine,
+                embedding_model,
+                embedding_function,
+                url,
+                key,
+                embedding_batch_size,
+                azure_api_version=azure_api_version,
+                enable_async=enable_async,
+                cache=False,
+            ),
+            EMBEDDING_CACHE,
+            embedding_engine,
+            embedding_model,
+        )
+
     if embedding_engine == "":
         # Sentence transformers: CPU-bound sync operation
         async def async_embedding_function(query, prefix=None, user=None):
@@ -907,14 +1044,13 @@ async def generate_embeddings(
 def get_reranking_function(reranking_engine, reranking_model, reranking_function):
     if reranking_function is None:
         return None
-    if reranking_engine == "external":
-        return lambda query, documents, user=None: reranking_function.predict(
-            [(query, doc.page_content) for doc in documents], user=user
-        )
-    else:
-        return lambda query, documents, user=None: reranking_function.predict(
-            [(query, doc.page_content) for doc in documents]
-        )
+    return RerankingService(
+        reranking_function,
+        engine=reranking_engine,
+        max_batch_size=RAG_RERANKING_BATCH_SIZE,
+        max_wait=RAG_RERANKING_BATCH_WAIT,
+        cache_size=RAG_RERANKING_CACHE_SIZE,
+    )
 
 
 async def get_sources_from_items(
@@ -1235,6 +1371,7 @@ def get_model_path(model: str, update_model: bool = False):
         return model
 
 
+import inspect
 import operator
 from typing import Optional, Sequence
 
@@ -1282,6 +1419,8 @@ class RerankCompressor(BaseDocumentCompressor):
         scores = None
         if reranking:
             scores = self.reranking_function(query, documents)
+            if inspect.isawaitable(scores):
+                scores = await scores
         else:
             from sentence_transformers import util
 
@@ -1,7 +1,21 @@
 from open_webui.retrieval.vector.main import VectorDBBase
 from open_webui.retrieval.vector.type import VectorType
+from open_webui.retrieval.bm25 import BM25IndexStore, BM25IndexedVectorDB
+from open_webui.retrieval.vector.utils import VectorDBExecutor
+from open_webui.env import (
+    REDIS_URL,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
 from open_webui.config import (
     VECTOR_DB,
+    ENABLE_RAG_BM25_INDEX,
+    RAG_BM25_INDEX_DIR,
+    RAG_VECTOR_DB_MAX_WORKERS,
+    RAG_VECTOR_DB_QUERY_TIMEOUT,
     ENABLE_QDRANT_MULTITENANCY_MODE,
     ENABLE_MILVUS_MULTITENANCY_MODE,
 )
@@ -76,3 +90,27 @@ class Vector:
 
 
 VECTOR_DB_CLIENT = Vector.get_vector(VECTOR_DB)
+
+BM25_INDEXES = None
+if ENABLE_RAG_BM25_INDEX:
+    # Keeps the indexes of all replicas in sync with the shared vector DB
+    BM25_INDEXES = BM25IndexStore(
+        RAG_BM25_INDEX_DIR,
+        redis=(
+            get_redis_connection(
+                REDIS_URL,
+                get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+                REDIS_CLUSTER,
+                decode_responses=True,
+            )
+            if REDIS_URL
+            else None
+        ),
+        redis_key_prefix=REDIS_KEY_PREFIX,
+    )
+    VECTOR_DB_CLIENT = BM25IndexedVectorDB(VECTOR_DB_CLIENT, BM25_INDEXES)
+
+VECTOR_DB_EXECUTOR = VectorDBExecutor(
+    max_workers=RAG_VECTOR_DB_MAX_WORKERS,
+    timeout=RAG_VECTOR_DB_QUERY_TIMEOUT,
+)
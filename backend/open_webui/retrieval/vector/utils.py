@@ -1,4 +1,15 @@
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Callable, Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 KEYS_TO_EXCLUDE = ["content", "pages", "tables", "paragraphs", "sections", "figures"]
 
@@ -26,3 +37,53 @@ def process_metadata(
         ):
             metadata[key] = str(value)
     return metadata
+
+
+class VectorDBExecutor:
+    """
+    App-wide thread pools for the blocking calls of vector DB clients.
+
+    Every backend gets its own pool of `max_workers` threads, which also caps
+    how many calls run against it at once, so a slow backend can't take the
+    threads of another. Calls are awaited without blocking the event loop and
+    raise `asyncio.TimeoutError` after `timeout` seconds, including the time
+    spent waiting for a thread. A call that already started keeps its thread
+    until it returns.
+    """
+
+    def __init__(self, max_workers: int = 8, timeout: Optional[float] = None):
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+        self._executors: dict[str, ThreadPoolExecutor] = {}
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "timeouts": 0}
+
+    def _get_executor(self, backend: str) -> ThreadPoolExecutor:
+        with self._lock:
+            executor = self._executors.get(backend)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=f"vector_db_{backend}",
+                )
+                self._executors[backend] = executor
+            return executor
+
+    async def run(self, backend: str, fn: Callable, *args, **kwargs):
+        self.stats["calls"] += 1
+        future = asyncio.get_running_loop().run_in_executor(
+            self._get_executor(backend), functools.partial(fn, *args, **kwargs)
+        )
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise
+
+    def shutdown(self):
+        with self._lock:
+            executors = list(self._executors.values())
+            self._executors = {}
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -5,7 +5,6 @@ from urllib.parse import urlparse
 
 from pydantic import BaseModel
 
-from open_webui.retrieval.web.utils import resolve_hostname
 from open_webui.utils.misc import is_string_allowed
 
 
@@ -13,6 +12,8 @@ def get_filtered_results(results, filter_list):
     if not filter_list:
         return results
 
+    from open_webui.retrieval.web.utils import resolve_hostname
+
     filtered_results = []
 
     for result in results:
@@ -6,8 +6,6 @@ import uuid
 import html
 import base64
 from functools import lru_cache
-from pydub import AudioSegment
-from pydub.silence import split_on_silence
 from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
@@ -75,9 +73,6 @@ SPEECH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 #
 ##########################################
 
-from pydub import AudioSegment
-from pydub.utils import mediainfo
-
 
 def is_audio_conversion_required(file_path):
     """
@@ -89,6 +84,8 @@ def is_audio_conversion_required(file_path):
         log.error(f"File not found: {file_path}")
         return False
 
+    from pydub.utils import mediainfo
+
     try:
         info = mediainfo(file_path)
         codec_name = info.get("codec_name", "").lower()
@@ -111,6 +108,8 @@ def is_audio_conversion_required(file_path):
 
 def convert_audio_to_mp3(file_path):
     """Convert audio file to mp3 format."""
+    from pydub import AudioSegment
+
     try:
         output_path = os.path.splitext(file_path)[0] + ".mp3"
         audio = AudioSegment.from_file(file_path)
@@ -1084,6 +1083,8 @@ def transcribe(
 
 def compress_audio(file_path):
     if os.path.getsize(file_path) > MAX_FILE_SIZE:
+        from pydub import AudioSegment
+
         id = os.path.splitext(os.path.basename(file_path))[
             0
         ]  # Handles names with multiple dots
@@ -1110,6 +1111,8 @@ def split_audio(file_path, max_bytes, format="mp3", bitrate="32k"):
     if file_size <= max_bytes:
         return [file_path]  # Nothing to split
 
+    from pydub import AudioSegment
+
     audio = AudioSegment.from_file(file_path)
     duration_ms = len(audio)
     orig_size = file_size
@@ -1,5 +1,6 @@
 import json
 import logging
+import time
 from typing import Optional
 
 
@@ -90,32 +91,40 @@ async def get_channels(request: Request, user=Depends(get_verified_user)):
         )
 
     channels = Channels.get_channels_by_user_id(user.id)
-    channel_list = []
-    for channel in channels:
-        last_message = Messages.get_last_message_by_channel_id(channel.id)
-        last_message_at = last_message.created_at if last_message else None
+    channel_ids = [channel.id for channel in channels]
 
-        channel_member = Channels.get_member_by_channel_and_user_id(channel.id, user.id)
-        unread_count = (
-            Messages.get_unread_message_count(
-                channel.id, user.id, channel_member.last_read_at
-            )
-            if channel_member
-            else 0
-        )
+    last_message_at = Messages.get_last_message_at_by_channel_ids(channel_ids)
+    unread_counts = Messages.get_unread_message_counts(channel_ids, user.id)
+
+    dm_members = Channels.get_members_by_channel_ids(
+        [channel.id for channel in channels if channel.type == "dm"]
+    )
+    dm_user_ids = list(
+        {member.user_id for members in dm_members.values() for member in members}
+    )
+    dm_users = {
+        dm_user.id: dm_user
+        for dm_user in (Users.get_users_by_user_ids(dm_user_ids) if dm_user_ids else [])
+    }
+    # Consider user active if last_active_at within the last 3 minutes
+    three_minutes_ago = int(time.time()) - 180
 
+    channel_list = []
+    for channel in channels:
         user_ids = None
         users = None
         if channel.type == "dm":
-            user_ids = [
-                member.user_id
-                for member in Channels.get_members_by_channel_id(channel.id)
-            ]
+            user_ids = [member.user_id for member in dm_members[channel.id]]
             users = [
                 UserIdNameStatusResponse(
-                    **{**user.model_dump(), "is_active": Users.is_user_active(user.id)}
+                    **{
+                        **dm_users[user_id].model_dump(),
+                        "is_active": (dm_users[user_id].last_active_at or 0)
+                        >= three_minutes_ago,
+                    }
                 )
-                for user in Users.get_users_by_user_ids(user_ids)
+                for user_id in user_ids
+                if user_id in dm_users
             ]
 
         channel_list.append(
@@ -123,8 +132,8 @@ async def get_channels(request: Request, user=Depends(get_verified_user)):
                 **channel.model_dump(),
                 user_ids=user_ids,
                 users=users,
-                last_message_at=last_message_at,
-                unread_count=unread_count,
+                last_message_at=last_message_at.get(channel.id),
+                unread_count=unread_counts.get(channel.id, 0),
             )
         )
 
@@ -671,7 +680,12 @@ class MessageUserResponse(MessageResponse):
 
 @router.get("/{id}/messages", response_model=list[MessageUserResponse])
 async def get_channel_messages(
-    id: str, skip: int = 0, limit: int = 50, user=Depends(get_verified_user)
+    id: str,
+    skip: int = 0,
+    limit: int = 50,
+    before: Optional[str] = None,
+    before_created_at: Optional[int] = None,
+    user=Depends(get_verified_user),
 ):
     channel = Channels.get_channel_by_id(id)
     if not channel:
@@ -696,33 +710,13 @@ async def get_channel_messages(
             id, user.id
         )  # Ensure user is a member of the channel
 
-    message_list = Messages.get_messages_by_channel_id(id, skip, limit)
-    users = {}
-
-    messages = []
-    for message in message_list:
-        if message.user_id not in users:
-            user = Users.get_user_by_id(message.user_id)
-            users[message.user_id] = user
-
-        thread_replies = Messages.get_thread_replies_by_message_id(message.id)
-        latest_thread_reply_at = (
-            thread_replies[0].created_at if thread_replies else None
-        )
-
-        messages.append(
-            MessageUserResponse(
-                **{
-                    **message.model_dump(),
-                    "reply_count": len(thread_replies),
-                    "latest_reply_at": latest_thread_reply_at,
-                    "reactions": Messages.get_reactions_by_message_id(message.id),
-                    "user": UserNameResponse(**users[message.user_id].model_dump()),
-                }
-            )
-        )
-
-    return messages
+    # `before` and `before_created_at` are the id and creation time of the
+    # oldest message loaded so far, used instead of `skip` so messages sent
+    # meanwhile don't shift the pages
+    message_list = Messages.get_messages_by_channel_id(
+        id, skip, limit, before, before_created_at
+    )
+    return Messages.get_message_responses(message_list)
 
 
 ############################
@@ -760,25 +754,7 @@ async def get_pinned_channel_messages(
     limit = PAGE_ITEM_COUNT_PINNED
 
     message_list = Messages.get_pinned_messages_by_channel_id(id, skip, limit)
-    users = {}
-
-    messages = []
-    for message in message_list:
-        if message.user_id not in users:
-            user = Users.get_user_by_id(message.user_id)
-            users[message.user_id] = user
-
-        messages.append(
-            MessageWithReactionsResponse(
-                **{
-                    **message.model_dump(),
-                    "reactions": Messages.get_reactions_by_message_id(message.id),
-                    "user": UserNameResponse(**users[message.user_id].model_dump()),
-                }
-            )
-        )
-
-    return messages
+    return Messages.get_message_responses(message_list, include_replies=False)
 
 
 ############################
@@ -1078,7 +1054,7 @@ async def post_new_message(
 
     try:
         message, channel = await new_message_handler(request, id, form_data, user)
-        active_user_ids = get_user_ids_from_room(f"channel:{channel.id}")
+        active_user_ids = await get_user_ids_from_room(f"channel:{channel.id}")
 
         async def background_handler():
             await model_response_handler(request, channel, message, user)
@@ -1228,6 +1204,8 @@ async def get_channel_thread_messages(
     message_id: str,
     skip: int = 0,
     limit: int = 50,
+    before: Optional[str] = None,
+    before_created_at: Optional[int] = None,
     user=Depends(get_verified_user),
 ):
     channel = Channels.get_channel_by_id(id)
@@ -1249,28 +1227,10 @@ async def get_channel_thread_messages(
                 status_code=status.HTTP_403_FORBIDDEN, detail=ERROR_MESSAGES.DEFAULT()
             )
 
-    message_list = Messages.get_messages_by_parent_id(id, message_id, skip, limit)
-    users = {}
-
-    messages = []
-    for message in message_list:
-        if message.user_id not in users:
-            user = Users.get_user_by_id(message.user_id)
-            users[message.user_id] = user
-
-        messages.append(
-            MessageUserResponse(
-                **{
-                    **message.model_dump(),
-                    "reply_count": 0,
-                    "latest_reply_at": None,
-                    "reactions": Messages.get_reactions_by_message_id(message.id),
-                    "user": UserNameResponse(**users[message.user_id].model_dump()),
-                }
-            )
-        )
-
-    return messages
+    message_list = Messages.get_messages_by_parent_id(
+        id, message_id, skip, limit, before, before_created_at
+    )
+    return Messages.get_message_responses(message_list, include_replies=False)
 
 
 ############################
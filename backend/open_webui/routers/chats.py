@@ -174,11 +174,16 @@ def search_user_chats(
     limit = 60
     skip = (page - 1) * limit
 
+    chats = Chats.get_chats_by_user_id_and_search_text(
+        user.id, text, skip=skip, limit=limit
+    )
+    snippets = Chats.get_chat_snippets_by_user_id_and_search_text(
+        user.id, text, [chat.id for chat in chats]
+    )
+
     chat_list = [
-        ChatTitleIdResponse(**chat.model_dump())
-        for chat in Chats.get_chats_by_user_id_and_search_text(
-            user.id, text, skip=skip, limit=limit
-        )
+        ChatTitleIdResponse(**chat.model_dump(), snippet=snippets.get(chat.id))
+        for chat in chats
     ]
 
     # Delete tag if no chat is found
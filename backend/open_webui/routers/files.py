@@ -2,6 +2,7 @@ import logging
 import os
 import uuid
 import json
+import time
 from fnmatch import fnmatch
 from pathlib import Path
 from typing import Optional
@@ -24,18 +25,18 @@ from fastapi import (
 from fastapi.responses import FileResponse, StreamingResponse
 
 from open_webui.constants import ERROR_MESSAGES
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, FILE_PROCESSING_STATUS_POLL_INTERVAL
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
 
 from open_webui.models.users import Users
 from open_webui.models.files import (
+    FILE_STATUS_NOTIFIER,
     FileForm,
     FileModel,
     FileModelResponse,
     Files,
 )
 from open_webui.models.knowledge import Knowledges
-from open_webui.models.groups import Groups
 
 
 from open_webui.routers.knowledge import get_knowledge, get_knowledge_list
@@ -46,7 +47,7 @@ from open_webui.storage.provider import Storage
 
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
-from open_webui.utils.access_control import has_access
+from open_webui.utils.access_control import has_access, get_user_group_ids
 
 from pydantic import BaseModel
 
@@ -74,7 +75,7 @@ def has_access_to_file(
         )
 
     knowledge_bases = Knowledges.get_knowledges_by_file_id(file_id)
-    user_group_ids = {group.id for group in Groups.get_groups_by_member_id(user.id)}
+    user_group_ids = get_user_group_ids(user.id)
 
     for knowledge_base in knowledge_bases:
         if knowledge_base.user_id == user.id or has_access(
@@ -216,7 +217,7 @@ def upload_file_handler(
         id = str(uuid.uuid4())
         name = filename
         filename = f"{id}_{filename}"
-        contents, file_path = Storage.upload_file(
+        file_info, file_path = Storage.upload_file(
             file.file,
             filename,
             {
@@ -240,7 +241,7 @@ def upload_file_handler(
                     "meta": {
                         "name": name,
                         "content_type": file.content_type,
-                        "size": len(contents),
+                        "size": file_info["size"],
                         "data": file_metadata,
                     },
                 }
@@ -421,29 +422,42 @@ async def get_file_process_status(
         or has_access_to_file(id, "read", user)
     ):
         if stream:
-            MAX_FILE_PROCESSING_DURATION = 3600 * 2
+            MAX_FILE_PROCESSING_DURATION = 3600
 
             async def event_stream(file_item):
                 if file_item:
-                    for _ in range(MAX_FILE_PROCESSING_DURATION):
-                        file_item = Files.get_file_by_id(file_item.id)
-                        if file_item:
-                            data = file_item.model_dump().get("data", {})
-                            status = data.get("status")
-
-                            if status:
-                                event = {"status": status}
-                                if status == "failed":
-                                    event["error"] = data.get("error")
-
-                                yield f"data: {json.dumps(event)}\n\n"
-                                if status in ("completed", "failed"):
+                    deadline = time.monotonic() + MAX_FILE_PROCESSING_DURATION
+
+                    # Subscribe before reading the file so no update is missed
+                    with FILE_STATUS_NOTIFIER.subscribe(file_item.id) as updated:
+                        while time.monotonic() < deadline:
+                            updated.clear()
+                            file_item = Files.get_file_by_id(file_item.id)
+                            if file_item:
+                                data = file_item.model_dump().get("data", {})
+                                status = data.get("status")
+
+                                if status:
+                                    event = {"status": status}
+                                    if status == "failed":
+                                        event["error"] = data.get("error")
+
+                                    yield f"data: {json.dumps(event)}\n\n"
+                                    if status in ("completed", "failed"):
+                                        break
+                                else:
+                                    # Legacy
                                     break
-                            else:
-                                # Legacy
-                                break
 
-                        await asyncio.sleep(0.5)
+                            # Wait for the status to change, reading it again
+                            # periodically in case a notification was missed
+                            try:
+                                await asyncio.wait_for(
+                                    updated.wait(),
+                                    timeout=FILE_PROCESSING_STATUS_POLL_INTERVAL,
+                                )
+                            except asyncio.TimeoutError:
+                                pass
                 else:
                     yield f"data: {json.dumps({'status': 'not_found'})}\n\n"
 
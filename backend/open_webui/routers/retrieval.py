@@ -25,11 +25,8 @@ from fastapi import (
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-import tiktoken
 
 
-from langchain.text_splitter import RecursiveCharacterTextSplitter, TokenTextSplitter
-from langchain_text_splitters import MarkdownHeaderTextSplitter
 from langchain_core.documents import Document
 
 from open_webui.models.files import FileModel, FileUpdateForm, Files
@@ -40,38 +37,12 @@ from open_webui.storage.provider import Storage
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
 
 # Document loaders
-from open_webui.retrieval.loaders.main import Loader
-from open_webui.retrieval.loaders.youtube import YoutubeLoader
 
 # Web search engines
 from open_webui.retrieval.web.main import SearchResult
-from open_webui.retrieval.web.utils import get_web_loader
-from open_webui.retrieval.web.ollama import search_ollama_cloud
-from open_webui.retrieval.web.perplexity_search import search_perplexity_search
-from open_webui.retrieval.web.brave import search_brave
-from open_webui.retrieval.web.kagi import search_kagi
-from open_webui.retrieval.web.mojeek import search_mojeek
-from open_webui.retrieval.web.bocha import search_bocha
-from open_webui.retrieval.web.duckduckgo import search_duckduckgo
-from open_webui.retrieval.web.google_pse import search_google_pse
-from open_webui.retrieval.web.jina_search import search_jina
-from open_webui.retrieval.web.searchapi import search_searchapi
-from open_webui.retrieval.web.serpapi import search_serpapi
-from open_webui.retrieval.web.searxng import search_searxng
-from open_webui.retrieval.web.yacy import search_yacy
-from open_webui.retrieval.web.serper import search_serper
-from open_webui.retrieval.web.serply import search_serply
-from open_webui.retrieval.web.serpstack import search_serpstack
-from open_webui.retrieval.web.tavily import search_tavily
-from open_webui.retrieval.web.bing import search_bing
-from open_webui.retrieval.web.azure import search_azure
-from open_webui.retrieval.web.exa import search_exa
-from open_webui.retrieval.web.perplexity import search_perplexity
-from open_webui.retrieval.web.sougou import search_sougou
-from open_webui.retrieval.web.firecrawl import search_firecrawl
-from open_webui.retrieval.web.external import search_external
 
 from open_webui.retrieval.utils import (
+    EMBEDDING_CACHE,
     get_content_from_url,
     get_embedding_function,
     get_reranking_function,
@@ -325,6 +296,20 @@ async def update_embedding_config(
         f"Updating embedding model: {request.app.state.config.RAG_EMBEDDING_MODEL} to {form_data.RAG_EMBEDDING_MODEL}"
     )
     unload_embedding_model(request)
+
+    # Vectors of the previous model, or of a model updated under the same name,
+    # must not be served from the cache. The disk store is cleared on a thread
+    for engine, model in (
+        (
+            request.app.state.config.RAG_EMBEDDING_ENGINE,
+            request.app.state.config.RAG_EMBEDDING_MODEL,
+        ),
+        (form_data.RAG_EMBEDDING_ENGINE, form_data.RAG_EMBEDDING_MODEL),
+    ):
+        await asyncio.to_thread(
+            EMBEDDING_CACHE.invalidate, EMBEDDING_CACHE.get_namespace(engine, model)
+        )
+
     try:
         request.app.state.config.RAG_EMBEDDING_ENGINE = form_data.RAG_EMBEDDING_ENGINE
         request.app.state.config.RAG_EMBEDDING_MODEL = form_data.RAG_EMBEDDING_MODEL
@@ -887,6 +872,8 @@ async def update_rag_config(
     if request.app.state.config.RAG_RERANKING_ENGINE == "":
         # Unloading the internal reranker and clear VRAM memory
         request.app.state.rf = None
+        if request.app.state.RERANKING_FUNCTION:
+            request.app.state.RERANKING_FUNCTION.shutdown()
         request.app.state.RERANKING_FUNCTION = None
         import gc
 
@@ -936,6 +923,8 @@ async def update_rag_config(
                     request.app.state.config.RAG_EXTERNAL_RERANKER_API_KEY,
                 )
 
+                if request.app.state.RERANKING_FUNCTION:
+                    request.app.state.RERANKING_FUNCTION.shutdown()
                 request.app.state.RERANKING_FUNCTION = get_reranking_function(
                     request.app.state.config.RAG_RERANKING_ENGINE,
                     request.app.state.config.RAG_RERANKING_MODEL,
@@ -1275,6 +1264,8 @@ def save_docs_to_vector_db(
 
     if split:
         if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
+            from langchain_text_splitters import RecursiveCharacterTextSplitter
+
             text_splitter = RecursiveCharacterTextSplitter(
                 chunk_size=request.app.state.config.CHUNK_SIZE,
                 chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
@@ -1286,6 +1277,9 @@ def save_docs_to_vector_db(
                 f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
             )
 
+            import tiktoken
+            from langchain_text_splitters import TokenTextSplitter
+
             tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
             text_splitter = TokenTextSplitter(
                 encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
@@ -1296,6 +1290,10 @@ def save_docs_to_vector_db(
             docs = text_splitter.split_documents(docs)
         elif request.app.state.config.TEXT_SPLITTER == "markdown_header":
             log.info("Using markdown header text splitter")
+            from langchain_text_splitters import (
+                MarkdownHeaderTextSplitter,
+                RecursiveCharacterTextSplitter,
+            )
 
             # Define headers to split on - covering most common markdown header levels
             headers_to_split_on = [
@@ -1528,6 +1526,9 @@ def process_file(
                 file_path = file.path
                 if file_path:
                     file_path = Storage.get_file(file_path)
+
+                    from open_webui.retrieval.loaders.main import Loader
+
                     loader = Loader(
                         engine=request.app.state.config.CONTENT_EXTRACTION_ENGINE,
                         user=user,
@@ -1788,6 +1789,8 @@ def search_web(
 
     # TODO: add playwright to search the web
     if engine == "ollama_cloud":
+        from open_webui.retrieval.web.ollama import search_ollama_cloud
+
         return search_ollama_cloud(
             "https://ollama.com",
             request.app.state.config.OLLAMA_CLOUD_WEB_SEARCH_API_KEY,
@@ -1797,6 +1800,10 @@ def search_web(
         )
     elif engine == "perplexity_search":
         if request.app.state.config.PERPLEXITY_API_KEY:
+            from open_webui.retrieval.web.perplexity_search import (
+                search_perplexity_search,
+            )
+
             return search_perplexity_search(
                 request.app.state.config.PERPLEXITY_API_KEY,
                 query,
@@ -1809,6 +1816,8 @@ def search_web(
             raise Exception("No PERPLEXITY_API_KEY found in environment variables")
     elif engine == "searxng":
         if request.app.state.config.SEARXNG_QUERY_URL:
+            from open_webui.retrieval.web.searxng import search_searxng
+
             return search_searxng(
                 request.app.state.config.SEARXNG_QUERY_URL,
                 query,
@@ -1819,6 +1828,8 @@ def search_web(
             raise Exception("No SEARXNG_QUERY_URL found in environment variables")
     elif engine == "yacy":
         if request.app.state.config.YACY_QUERY_URL:
+            from open_webui.retrieval.web.yacy import search_yacy
+
             return search_yacy(
                 request.app.state.config.YACY_QUERY_URL,
                 request.app.state.config.YACY_USERNAME,
@@ -1834,6 +1845,8 @@ def search_web(
             request.app.state.config.GOOGLE_PSE_API_KEY
             and request.app.state.config.GOOGLE_PSE_ENGINE_ID
         ):
+            from open_webui.retrieval.web.google_pse import search_google_pse
+
             return search_google_pse(
                 request.app.state.config.GOOGLE_PSE_API_KEY,
                 request.app.state.config.GOOGLE_PSE_ENGINE_ID,
@@ -1848,6 +1861,8 @@ def search_web(
             )
     elif engine == "brave":
         if request.app.state.config.BRAVE_SEARCH_API_KEY:
+            from open_webui.retrieval.web.brave import search_brave
+
             return search_brave(
                 request.app.state.config.BRAVE_SEARCH_API_KEY,
                 query,
@@ -1858,6 +1873,8 @@ def search_web(
             raise Exception("No BRAVE_SEARCH_API_KEY found in environment variables")
     elif engine == "kagi":
         if request.app.state.config.KAGI_SEARCH_API_KEY:
+            from open_webui.retrieval.web.kagi import search_kagi
+
             return search_kagi(
                 request.app.state.config.KAGI_SEARCH_API_KEY,
                 query,
@@ -1868,6 +1885,8 @@ def search_web(
             raise Exception("No KAGI_SEARCH_API_KEY found in environment variables")
     elif engine == "mojeek":
         if request.app.state.config.MOJEEK_SEARCH_API_KEY:
+            from open_webui.retrieval.web.mojeek import search_mojeek
+
             return search_mojeek(
                 request.app.state.config.MOJEEK_SEARCH_API_KEY,
                 query,
@@ -1878,6 +1897,8 @@ def search_web(
             raise Exception("No MOJEEK_SEARCH_API_KEY found in environment variables")
     elif engine == "bocha":
         if request.app.state.config.BOCHA_SEARCH_API_KEY:
+            from open_webui.retrieval.web.bocha import search_bocha
+
             return search_bocha(
                 request.app.state.config.BOCHA_SEARCH_API_KEY,
                 query,
@@ -1888,6 +1909,8 @@ def search_web(
             raise Exception("No BOCHA_SEARCH_API_KEY found in environment variables")
     elif engine == "serpstack":
         if request.app.state.config.SERPSTACK_API_KEY:
+            from open_webui.retrieval.web.serpstack import search_serpstack
+
             return search_serpstack(
                 request.app.state.config.SERPSTACK_API_KEY,
                 query,
@@ -1899,6 +1922,8 @@ def search_web(
             raise Exception("No SERPSTACK_API_KEY found in environment variables")
     elif engine == "serper":
         if request.app.state.config.SERPER_API_KEY:
+            from open_webui.retrieval.web.serper import search_serper
+
             return search_serper(
                 request.app.state.config.SERPER_API_KEY,
                 query,
@@ -1909,6 +1934,8 @@ def search_web(
             raise Exception("No SERPER_API_KEY found in environment variables")
     elif engine == "serply":
         if request.app.state.config.SERPLY_API_KEY:
+            from open_webui.retrieval.web.serply import search_serply
+
             return search_serply(
                 request.app.state.config.SERPLY_API_KEY,
                 query,
@@ -1918,6 +1945,8 @@ def search_web(
         else:
             raise Exception("No SERPLY_API_KEY found in environment variables")
     elif engine == "duckduckgo":
+        from open_webui.retrieval.web.duckduckgo import search_duckduckgo
+
         return search_duckduckgo(
             query,
             request.app.state.config.WEB_SEARCH_RESULT_COUNT,
@@ -1926,6 +1955,8 @@ def search_web(
         )
     elif engine == "tavily":
         if request.app.state.config.TAVILY_API_KEY:
+            from open_webui.retrieval.web.tavily import search_tavily
+
             return search_tavily(
                 request.app.state.config.TAVILY_API_KEY,
                 query,
@@ -1936,6 +1967,8 @@ def search_web(
             raise Exception("No TAVILY_API_KEY found in environment variables")
     elif engine == "exa":
         if request.app.state.config.EXA_API_KEY:
+            from open_webui.retrieval.web.exa import search_exa
+
             return search_exa(
                 request.app.state.config.EXA_API_KEY,
                 query,
@@ -1946,6 +1979,8 @@ def search_web(
             raise Exception("No EXA_API_KEY found in environment variables")
     elif engine == "searchapi":
         if request.app.state.config.SEARCHAPI_API_KEY:
+            from open_webui.retrieval.web.searchapi import search_searchapi
+
             return search_searchapi(
                 request.app.state.config.SEARCHAPI_API_KEY,
                 request.app.state.config.SEARCHAPI_ENGINE,
@@ -1957,6 +1992,8 @@ def search_web(
             raise Exception("No SEARCHAPI_API_KEY found in environment variables")
     elif engine == "serpapi":
         if request.app.state.config.SERPAPI_API_KEY:
+            from open_webui.retrieval.web.serpapi import search_serpapi
+
             return search_serpapi(
                 request.app.state.config.SERPAPI_API_KEY,
                 request.app.state.config.SERPAPI_ENGINE,
@@ -1967,12 +2004,16 @@ def search_web(
         else:
             raise Exception("No SERPAPI_API_KEY found in environment variables")
     elif engine == "jina":
+        from open_webui.retrieval.web.jina_search import search_jina
+
         return search_jina(
             request.app.state.config.JINA_API_KEY,
             query,
             request.app.state.config.WEB_SEARCH_RESULT_COUNT,
         )
     elif engine == "bing":
+        from open_webui.retrieval.web.bing import search_bing
+
         return search_bing(
             request.app.state.config.BING_SEARCH_V7_SUBSCRIPTION_KEY,
             request.app.state.config.BING_SEARCH_V7_ENDPOINT,
@@ -1987,6 +2028,8 @@ def search_web(
             and request.app.state.config.AZURE_AI_SEARCH_ENDPOINT
             and request.app.state.config.AZURE_AI_SEARCH_INDEX_NAME
         ):
+            from open_webui.retrieval.web.azure import search_azure
+
             return search_azure(
                 request.app.state.config.AZURE_AI_SEARCH_API_KEY,
                 request.app.state.config.AZURE_AI_SEARCH_ENDPOINT,
@@ -2000,6 +2043,8 @@ def search_web(
                 "AZURE_AI_SEARCH_API_KEY, AZURE_AI_SEARCH_ENDPOINT, and AZURE_AI_SEARCH_INDEX_NAME are required for Azure AI Search"
             )
     elif engine == "exa":
+        from open_webui.retrieval.web.exa import search_exa
+
         return search_exa(
             request.app.state.config.EXA_API_KEY,
             query,
@@ -2007,6 +2052,8 @@ def search_web(
             request.app.state.config.WEB_SEARCH_DOMAIN_FILTER_LIST,
         )
     elif engine == "perplexity":
+        from open_webui.retrieval.web.perplexity import search_perplexity
+
         return search_perplexity(
             request.app.state.config.PERPLEXITY_API_KEY,
             query,
@@ -2020,6 +2067,8 @@ def search_web(
             request.app.state.config.SOUGOU_API_SID
             and request.app.state.config.SOUGOU_API_SK
         ):
+            from open_webui.retrieval.web.sougou import search_sougou
+
             return search_sougou(
                 request.app.state.config.SOUGOU_API_SID,
                 request.app.state.config.SOUGOU_API_SK,
@@ -2032,6 +2081,8 @@ def search_web(
                 "No SOUGOU_API_SID or SOUGOU_API_SK found in environment variables"
             )
     elif engine == "firecrawl":
+        from open_webui.retrieval.web.firecrawl import search_firecrawl
+
         return search_firecrawl(
             request.app.state.config.FIRECRAWL_API_BASE_URL,
             request.app.state.config.FIRECRAWL_API_KEY,
@@ -2040,6 +2091,8 @@ def search_web(
             request.app.state.config.WEB_SEARCH_DOMAIN_FILTER_LIST,
         )
     elif engine == "external":
+        from open_webui.retrieval.web.external import search_external
+
         return search_external(
             request,
             request.app.state.config.EXTERNAL_WEB_SEARCH_URL,
@@ -2123,6 +2176,8 @@ async def process_web_search(
                 if hasattr(result, "snippet") and result.snippet is not None
             ]
         else:
+            from open_webui.retrieval.web.utils import get_web_loader
+
             loader = get_web_loader(
                 urls,
                 verify_ssl=request.app.state.config.ENABLE_WEB_LOADER_SSL_VERIFICATION,
@@ -2207,13 +2262,9 @@ async def query_doc_handler(
         if request.app.state.config.ENABLE_RAG_HYBRID_SEARCH and (
             form_data.hybrid is None or form_data.hybrid
         ):
-            collection_results = {}
-            collection_results[form_data.collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=form_data.collection_name
-            )
             return await query_doc_with_hybrid_search(
                 collection_name=form_data.collection_name,
-                collection_result=collection_results[form_data.collection_name],
+                collection_result=None,
                 query=form_data.query,
                 embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
                     query, prefix=prefix, user=user
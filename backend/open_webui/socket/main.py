@@ -7,7 +7,6 @@ import sys
 import time
 from typing import Dict, Set
 from redis import asyncio as aioredis
-import pycrdt as Y
 
 from open_webui.models.users import Users, UserNameResponse
 from open_webui.models.channels import Channels
@@ -29,6 +28,7 @@ from open_webui.env import (
     WEBSOCKET_REDIS_URL,
     WEBSOCKET_REDIS_CLUSTER,
     WEBSOCKET_REDIS_LOCK_TIMEOUT,
+    WEBSOCKET_SESSION_POOL_CACHE_TTL,
     WEBSOCKET_SENTINEL_PORT,
     WEBSOCKET_SENTINEL_HOSTS,
     REDIS_KEY_PREFIX,
@@ -37,9 +37,19 @@ from open_webui.env import (
     WEBSOCKET_SERVER_PING_INTERVAL,
     WEBSOCKET_SERVER_LOGGING,
     WEBSOCKET_SERVER_ENGINEIO_LOGGING,
+    ENABLE_CHAT_MESSAGE_WRITE_BUFFER,
+    CHAT_MESSAGE_WRITE_BUFFER_INTERVAL,
+    CHAT_MESSAGE_WRITE_BUFFER_MAX_EVENTS,
+    YDOC_COMPACT_THRESHOLD,
 )
 from open_webui.utils.auth import decode_token
-from open_webui.socket.utils import RedisDict, RedisLock, YdocManager
+from open_webui.socket.utils import (
+    RedisDict,
+    RedisLock,
+    UsageTracker,
+    YdocManager,
+    MessageWriteBuffer,
+)
 from open_webui.tasks import create_task, stop_item_tasks
 from open_webui.utils.redis import get_redis_connection
 from open_webui.utils.access_control import has_access, get_users_with_access
@@ -57,6 +67,7 @@ log.setLevel(SRC_LOG_LEVELS["SOCKET"])
 
 
 REDIS = None
+BINARY_REDIS = None
 
 # Configure CORS for Socket.IO
 SOCKETIO_CORS_ORIGINS = "*" if CORS_ALLOW_ORIGIN == ["*"] else CORS_ALLOW_ORIGIN
@@ -114,6 +125,16 @@ if WEBSOCKET_MANAGER == "redis":
         redis_cluster=WEBSOCKET_REDIS_CLUSTER,
         async_mode=True,
     )
+    # Yjs updates are stored as raw bytes
+    BINARY_REDIS = get_redis_connection(
+        redis_url=WEBSOCKET_REDIS_URL,
+        redis_sentinels=get_sentinels_from_env(
+            WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT
+        ),
+        redis_cluster=WEBSOCKET_REDIS_CLUSTER,
+        async_mode=True,
+        decode_responses=False,
+    )
 
     redis_sentinels = get_sentinels_from_env(
         WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT
@@ -131,6 +152,7 @@ if WEBSOCKET_MANAGER == "redis":
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
         redis_cluster=WEBSOCKET_REDIS_CLUSTER,
+        cache_ttl=WEBSOCKET_SESSION_POOL_CACHE_TTL,
     )
     USER_POOL = RedisDict(
         f"{REDIS_KEY_PREFIX}:user_pool",
@@ -138,13 +160,6 @@ if WEBSOCKET_MANAGER == "redis":
         redis_sentinels=redis_sentinels,
         redis_cluster=WEBSOCKET_REDIS_CLUSTER,
     )
-    USAGE_POOL = RedisDict(
-        f"{REDIS_KEY_PREFIX}:usage_pool",
-        redis_url=WEBSOCKET_REDIS_URL,
-        redis_sentinels=redis_sentinels,
-        redis_cluster=WEBSOCKET_REDIS_CLUSTER,
-    )
-
     clean_up_lock = RedisLock(
         redis_url=WEBSOCKET_REDIS_URL,
         lock_name=f"{REDIS_KEY_PREFIX}:usage_cleanup_lock",
@@ -160,17 +175,103 @@ else:
 
     SESSION_POOL = {}
     USER_POOL = {}
-    USAGE_POOL = {}
 
     aquire_func = release_func = renew_func = lambda: True
 
 
+USAGE_TRACKER = UsageTracker(
+    redis=REDIS,
+    redis_key_prefix=f"{REDIS_KEY_PREFIX}:usage",
+    timeout=TIMEOUT_DURATION,
+)
+
 YDOC_MANAGER = YdocManager(
     redis=REDIS,
     redis_key_prefix=f"{REDIS_KEY_PREFIX}:ydoc:documents",
+    binary_redis=BINARY_REDIS,
+    compact_threshold=YDOC_COMPACT_THRESHOLD,
+)
+
+
+async def apply_message_events(chat_id: str, message_id: str, events: list[dict]):
+    """
+    Apply a batch of message/replace/embeds/files/source events to a chat message
+    with a single read and a single write of the chat.
+    """
+    message = Chats.get_message_by_id_and_message_id(chat_id, message_id)
+    if message is None:
+        return
+
+    content = None
+    embeds = []
+    files = []
+    sources = []
+
+    for event_data in events:
+        event_type = event_data.get("type")
+        data = event_data.get("data", {})
+
+        if event_type == "message":
+            if content is None:
+                if not message:
+                    continue
+                content = message.get("content", "")
+            content += data.get("content", "")
+        elif event_type == "replace":
+            content = data.get("content", "")
+        elif event_type == "embeds":
+            # Newer embeds go first
+            embeds = data.get("embeds", []) + embeds
+        elif event_type == "files":
+            # Newer files go first
+            files = data.get("files", []) + files
+        elif event_type in ["source", "citation"]:
+            sources.append(data)
+
+    update = {}
+    if content is not None:
+        update["content"] = content
+    if embeds:
+        update["embeds"] = embeds + message.get("embeds", [])
+    if files:
+        update["files"] = files + message.get("files", [])
+    if sources:
+        update["sources"] = message.get("sources", []) + sources
+
+    if update:
+        Chats.upsert_message_by_id_and_message_id(chat_id, message_id, update)
+
+
+MESSAGE_WRITE_BUFFER = MessageWriteBuffer(
+    flush_handler=apply_message_events,
+    redis=REDIS,
+    redis_key_prefix=f"{REDIS_KEY_PREFIX}:chat:message_buffer",
+    interval=CHAT_MESSAGE_WRITE_BUFFER_INTERVAL,
+    max_events=CHAT_MESSAGE_WRITE_BUFFER_MAX_EVENTS,
 )
 
 
+async def periodic_message_write_buffer_flush():
+    if not ENABLE_CHAT_MESSAGE_WRITE_BUFFER:
+        return
+
+    while True:
+        try:
+            await MESSAGE_WRITE_BUFFER.flush_due()
+        except Exception as e:
+            log.error(f"Error flushing message write buffer: {e}")
+        await asyncio.sleep(MESSAGE_WRITE_BUFFER.interval)
+
+
+async def flush_message_write_buffer(request_info):
+    """Write any buffered events for the request's message to the database."""
+    chat_id = request_info.get("chat_id")
+    message_id = request_info.get("message_id")
+
+    if chat_id and message_id and ENABLE_CHAT_MESSAGE_WRITE_BUFFER:
+        await MESSAGE_WRITE_BUFFER.flush(chat_id, message_id)
+
+
 async def periodic_usage_pool_cleanup():
     max_retries = 2
     retry_delay = random.uniform(
@@ -198,26 +299,7 @@ async def periodic_usage_pool_cleanup():
                 log.error(f"Unable to renew cleanup lock. Exiting usage pool cleanup.")
                 raise Exception("Unable to renew usage pool cleanup lock.")
 
-            now = int(time.time())
-            send_usage = False
-            for model_id, connections in list(USAGE_POOL.items()):
-                # Creating a list of sids to remove if they have timed out
-                expired_sids = [
-                    sid
-                    for sid, details in connections.items()
-                    if now - details["updated_at"] > TIMEOUT_DURATION
-                ]
-
-                for sid in expired_sids:
-                    del connections[sid]
-
-                if not connections:
-                    log.debug(f"Cleaning up model {model_id} from usage pool")
-                    del USAGE_POOL[model_id]
-                else:
-                    USAGE_POOL[model_id] = connections
-
-                send_usage = True
+            await USAGE_TRACKER.expire()
             await asyncio.sleep(TIMEOUT_DURATION)
     finally:
         release_func()
@@ -229,10 +311,9 @@ app = socketio.ASGIApp(
 )
 
 
-def get_models_in_use():
+async def get_models_in_use():
     # List models that are currently in use
-    models_in_use = list(USAGE_POOL.keys())
-    return models_in_use
+    return await USAGE_TRACKER.get_models_in_use()
 
 
 def get_active_user_ids():
@@ -248,7 +329,7 @@ def get_user_id_from_session_pool(sid):
 
 
 def get_session_ids_from_room(room):
-    """Get all session IDs from a specific room."""
+    """Get all session IDs from a room or a list of rooms."""
     active_session_ids = sio.manager.get_participants(
         namespace="/",
         room=room,
@@ -256,11 +337,20 @@ def get_session_ids_from_room(room):
     return [session_id[0] for session_id in active_session_ids]
 
 
-def get_user_ids_from_room(room):
+async def get_session_users(session_ids: list[str]) -> list[dict]:
+    """Get the users of the sessions still in the pool, in one Redis round trip."""
+    if isinstance(SESSION_POOL, RedisDict):
+        users = await SESSION_POOL.async_mget(session_ids)
+    else:
+        users = [SESSION_POOL.get(session_id) for session_id in session_ids]
+    return [user for user in users if user]
+
+
+async def get_user_ids_from_room(room):
     active_session_ids = get_session_ids_from_room(room)
 
     active_user_ids = list(
-        set([SESSION_POOL.get(session_id)["id"] for session_id in active_session_ids])
+        set([user["id"] for user in await get_session_users(active_session_ids)])
     )
     return active_user_ids
 
@@ -275,8 +365,11 @@ async def emit_to_users(event: str, data: dict, user_ids: list[str]):
         user_ids (list[str]): The target users' IDs.
     """
     try:
-        for user_id in user_ids:
-            await sio.emit(event, data, room=f"user:{user_id}")
+        if user_ids:
+            # A single emit to all the rooms, published once with Redis
+            await sio.emit(
+                event, data, room=[f"user:{user_id}" for user_id in user_ids]
+            )
     except Exception as e:
         log.debug(f"Failed to emit event {event} to users {user_ids}: {e}")
 
@@ -289,10 +382,12 @@ async def enter_room_for_users(room: str, user_ids: list[str]):
         user_ids (list[str]): The target user's IDs.
     """
     try:
-        for user_id in user_ids:
-            session_ids = get_session_ids_from_room(f"user:{user_id}")
-            for sid in session_ids:
-                await sio.enter_room(sid, room)
+        if not user_ids:
+            return
+        for sid in get_session_ids_from_room(
+            [f"user:{user_id}" for user_id in user_ids]
+        ):
+            await sio.enter_room(sid, room)
     except Exception as e:
         log.debug(f"Failed to make users {user_ids} join room {room}: {e}")
 
@@ -300,15 +395,8 @@ async def enter_room_for_users(room: str, user_ids: list[str]):
 @sio.on("usage")
 async def usage(sid, data):
     if sid in SESSION_POOL:
-        model_id = data["model"]
         # Record the timestamp for the last update
-        current_time = int(time.time())
-
-        # Store the new usage data and task
-        USAGE_POOL[model_id] = {
-            **(USAGE_POOL[model_id] if model_id in USAGE_POOL else {}),
-            sid: {"updated_at": current_time},
-        }
+        await USAGE_TRACKER.touch(data["model"], sid)
 
 
 @sio.event
@@ -496,19 +584,15 @@ async def ydoc_document_join(sid, data):
 
         active_session_ids = get_session_ids_from_room(f"doc_{document_id}")
 
-        # Get the Yjs document state
-        ydoc = Y.Doc()
-        updates = await YDOC_MANAGER.get_updates(document_id)
-        for update in updates:
-            ydoc.apply_update(bytes(update))
-
-        # Encode the entire document state as an update
-        state_update = ydoc.get_update()
+        # Send the document state, or only what a rejoining client is missing
+        state_update = await YDOC_MANAGER.get_state_update(
+            document_id, data.get("state_vector")
+        )
         await sio.emit(
             "ydoc:document:state",
             {
                 "document_id": document_id,
-                "state": list(state_update),  # Convert bytes to list for JSON
+                "state": state_update,
                 "sessions": active_session_ids,
             },
             room=sid,
@@ -572,20 +656,15 @@ async def yjs_document_state(sid, data):
             log.warning(f"Document {document_id} not found")
             return
 
-        # Get the Yjs document state
-        ydoc = Y.Doc()
-        updates = await YDOC_MANAGER.get_updates(document_id)
-        for update in updates:
-            ydoc.apply_update(bytes(update))
-
-        # Encode the entire document state as an update
-        state_update = ydoc.get_update()
+        state_update = await YDOC_MANAGER.get_state_update(
+            document_id, data.get("state_vector")
+        )
 
         await sio.emit(
             "ydoc:document:state",
             {
                 "document_id": document_id,
-                "state": list(state_update),  # Convert bytes to list for JSON
+                "state": state_update,
                 "sessions": active_session_ids,
             },
             room=sid,
@@ -611,7 +690,7 @@ async def yjs_document_update(sid, data):
 
         await YDOC_MANAGER.append_to_updates(
             document_id=document_id,
-            update=update,  # Convert list of bytes to bytes
+            update=update,
         )
 
         # Broadcast update to all other users in the document
@@ -732,87 +811,28 @@ def get_event_emitter(request_info, update_db=True):
                     event_data.get("data", {}),
                 )
 
-            if "type" in event_data and event_data["type"] == "message":
-                message = Chats.get_message_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                )
-
-                if message:
-                    content = message.get("content", "")
-                    content += event_data.get("data", {}).get("content", "")
-
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                        request_info["chat_id"],
-                        request_info["message_id"],
-                        {
-                            "content": content,
-                        },
-                    )
-
-            if "type" in event_data and event_data["type"] == "replace":
-                content = event_data.get("data", {}).get("content", "")
-
-                Chats.upsert_message_to_chat_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                    {
-                        "content": content,
-                    },
-                )
-
-            if "type" in event_data and event_data["type"] == "embeds":
-                message = Chats.get_message_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                )
-
-                embeds = event_data.get("data", {}).get("embeds", [])
-                embeds.extend(message.get("embeds", []))
-
-                Chats.upsert_message_to_chat_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                    {
-                        "embeds": embeds,
-                    },
-                )
-
-            if "type" in event_data and event_data["type"] == "files":
-                message = Chats.get_message_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                )
-
-                files = event_data.get("data", {}).get("files", [])
-                files.extend(message.get("files", []))
+            if event_data.get("type") in [
+                "message",
+                "replace",
+                "embeds",
+                "files",
+            ] or (
+                event_data.get("type") in ["source", "citation"]
+                and event_data.get("data", {}).get("type") is None
+            ):
+                if ENABLE_CHAT_MESSAGE_WRITE_BUFFER:
+                    await MESSAGE_WRITE_BUFFER.append(chat_id, message_id, event_data)
+                else:
+                    await apply_message_events(chat_id, message_id, [event_data])
 
-                Chats.upsert_message_to_chat_by_id_and_message_id(
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                    {
-                        "files": files,
-                    },
+            if ENABLE_CHAT_MESSAGE_WRITE_BUFFER and (
+                event_data.get("type") == "chat:tasks:cancel"
+                or (
+                    event_data.get("type") == "chat:completion"
+                    and event_data.get("data", {}).get("done")
                 )
-
-            if event_data.get("type") in ["source", "citation"]:
-                data = event_data.get("data", {})
-                if data.get("type") == None:
-                    message = Chats.get_message_by_id_and_message_id(
-                        request_info["chat_id"],
-                        request_info["message_id"],
-                    )
-
-                    sources = message.get("sources", [])
-                    sources.append(data)
-
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                        request_info["chat_id"],
-                        request_info["message_id"],
-                        {
-                            "sources": sources,
-                        },
-                    )
+            ):
+                await MESSAGE_WRITE_BUFFER.flush(chat_id, message_id)
 
     if (
         "user_id" in request_info
@@ -1,10 +1,18 @@
+import asyncio
 import json
+import logging
+import time
 import uuid
+import weakref
+from collections import OrderedDict
 from open_webui.utils.redis import get_redis_connection
-from open_webui.env import REDIS_KEY_PREFIX
-from typing import Optional, List, Tuple
+from open_webui.env import REDIS_KEY_PREFIX, SRC_LOG_LEVELS
+from typing import Awaitable, Callable, Optional, List, Tuple
 import pycrdt as Y
 
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["SOCKET"])
+
 
 class RedisLock:
     def __init__(
@@ -47,7 +55,29 @@ class RedisLock:
 
 
 class RedisDict:
-    def __init__(self, name, redis_url, redis_sentinels=[], redis_cluster=False):
+    """
+    A dict stored in a Redis hash, values are JSON encoded.
+
+    `mget`, `set_many` and `delete_many` read or write many keys in one round
+    trip, and the `async_` methods do the same through an asyncio connection so
+    they don't block the event loop.
+
+    With `cache_ttl`, values read or written by this process are kept locally
+    for that many seconds. Only use it for values that don't change once set,
+    as writes from other processes aren't seen until the entry expires.
+    """
+
+    # Keys per HMGET, large rooms are split into several commands
+    MGET_BATCH_SIZE = 1000
+
+    def __init__(
+        self,
+        name,
+        redis_url,
+        redis_sentinels=[],
+        redis_cluster=False,
+        cache_ttl: float = 0,
+    ):
         self.name = name
         self.redis = get_redis_connection(
             redis_url,
@@ -55,23 +85,56 @@ class RedisDict:
             redis_cluster=redis_cluster,
             decode_responses=True,
         )
+        self.async_redis = get_redis_connection(
+            redis_url,
+            redis_sentinels,
+            redis_cluster=redis_cluster,
+            async_mode=True,
+            decode_responses=True,
+        )
+        self.cache_ttl = cache_ttl
+        # key -> (expires_at, value)
+        self._cache = {}
+
+    def _cache_get(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._cache.pop(key, None)
+            return None
+        return entry
+
+    def _cache_set(self, key, value):
+        if self.cache_ttl:
+            self._cache[key] = (time.monotonic() + self.cache_ttl, value)
 
     def __setitem__(self, key, value):
         serialized_value = json.dumps(value)
         self.redis.hset(self.name, key, serialized_value)
+        self._cache_set(key, value)
 
     def __getitem__(self, key):
+        entry = self._cache_get(key)
+        if entry is not None:
+            return entry[1]
+
         value = self.redis.hget(self.name, key)
         if value is None:
             raise KeyError(key)
-        return json.loads(value)
+        value = json.loads(value)
+        self._cache_set(key, value)
+        return value
 
     def __delitem__(self, key):
+        self._cache.pop(key, None)
         result = self.redis.hdel(self.name, key)
         if result == 0:
             raise KeyError(key)
 
     def __contains__(self, key):
+        if self._cache_get(key) is not None:
+            return True
         return self.redis.hexists(self.name, key)
 
     def __len__(self):
@@ -94,6 +157,9 @@ class RedisDict:
             pipe.hset(self.name, mapping={k: json.dumps(v) for k, v in mapping.items()})
 
         pipe.execute()
+        self._cache.clear()
+        for k, v in mapping.items():
+            self._cache_set(k, v)
 
     def get(self, key, default=None):
         try:
@@ -101,15 +167,96 @@ class RedisDict:
         except KeyError:
             return default
 
+    def _get_missing(self, keys: list) -> Tuple[list, list]:
+        values = []
+        missing = []
+        for key in keys:
+            entry = self._cache_get(key)
+            values.append(entry[1] if entry is not None else None)
+            if entry is None:
+                missing.append(key)
+        return values, list(dict.fromkeys(missing))
+
+    def _merge_missing(self, keys, values, missing, results) -> list:
+        found = {}
+        for key, value in zip(missing, results):
+            if value is not None:
+                found[key] = json.loads(value)
+                self._cache_set(key, found[key])
+        return [
+            found.get(key) if value is None else value
+            for key, value in zip(keys, values)
+        ]
+
+    def mget(self, keys) -> list:
+        """Values of `keys` in one round trip, None for missing keys."""
+        keys = list(keys)
+        values, missing = self._get_missing(keys)
+        if not missing:
+            return values
+
+        pipe = self.redis.pipeline(transaction=False)
+        for idx in range(0, len(missing), self.MGET_BATCH_SIZE):
+            pipe.hmget(self.name, missing[idx : idx + self.MGET_BATCH_SIZE])
+        results = [value for batch in pipe.execute() for value in batch]
+        return self._merge_missing(keys, values, missing, results)
+
+    async def async_mget(self, keys) -> list:
+        keys = list(keys)
+        values, missing = self._get_missing(keys)
+        if not missing:
+            return values
+
+        pipe = self.async_redis.pipeline(transaction=False)
+        for idx in range(0, len(missing), self.MGET_BATCH_SIZE):
+            pipe.hmget(self.name, missing[idx : idx + self.MGET_BATCH_SIZE])
+        results = [value for batch in await pipe.execute() for value in batch]
+        return self._merge_missing(keys, values, missing, results)
+
+    async def async_get(self, key, default=None):
+        value = (await self.async_mget([key]))[0]
+        return default if value is None else value
+
+    def set_many(self, mapping: dict):
+        if mapping:
+            self.redis.hset(
+                self.name, mapping={k: json.dumps(v) for k, v in mapping.items()}
+            )
+            for k, v in mapping.items():
+                self._cache_set(k, v)
+
+    async def async_set_many(self, mapping: dict):
+        if mapping:
+            await self.async_redis.hset(
+                self.name, mapping={k: json.dumps(v) for k, v in mapping.items()}
+            )
+            for k, v in mapping.items():
+                self._cache_set(k, v)
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        for key in keys:
+            self._cache.pop(key, None)
+        if keys:
+            self.redis.hdel(self.name, *keys)
+
+    async def async_delete_many(self, keys):
+        keys = list(keys)
+        for key in keys:
+            self._cache.pop(key, None)
+        if keys:
+            await self.async_redis.hdel(self.name, *keys)
+
     def clear(self):
         self.redis.delete(self.name)
+        self._cache.clear()
 
     def update(self, other=None, **kwargs):
+        mapping = {}
         if other is not None:
-            for k, v in other.items() if hasattr(other, "items") else other:
-                self[k] = v
-        for k, v in kwargs.items():
-            self[k] = v
+            mapping.update(other.items() if hasattr(other, "items") else other)
+        mapping.update(kwargs)
+        self.set_many(mapping)
 
     def setdefault(self, key, default=None):
         if key not in self:
@@ -117,45 +264,236 @@ class RedisDict:
         return self[key]
 
 
+class UsageTracker:
+    """
+    Tracks which sessions use which model, from the "usage" heartbeats.
+
+    With Redis every model has a sorted set of session ids scored by the time
+    they were last seen, and one more sorted set scores the models themselves.
+    A heartbeat is two ZADDs, expiring sessions is a range delete per model and
+    the models in use are a range query on the model set, so nothing is decoded
+    or rewritten as the number of sessions grows.
+
+    The in-memory variant keeps the same entries in dicts ordered by last seen,
+    so expiry only pops the stale entries from the front.
+    """
+
+    def __init__(
+        self,
+        redis=None,
+        redis_key_prefix: str = f"{REDIS_KEY_PREFIX}:usage",
+        timeout: float = 3,
+    ):
+        self._redis = redis
+        self._redis_key_prefix = redis_key_prefix
+        self._redis_models_key = f"{redis_key_prefix}:models"
+        self.timeout = timeout
+
+        # model_id -> {sid: last seen}, each ordered by last seen
+        self._sessions: dict[str, OrderedDict] = {}
+        self._models: OrderedDict = OrderedDict()
+
+    def _get_redis_key(self, model_id: str) -> str:
+        return f"{self._redis_key_prefix}:model:{model_id}"
+
+    async def touch(self, model_id: str, sid: str, now: Optional[float] = None):
+        """Record that session `sid` is using `model_id`."""
+        now = time.time() if now is None else now
+
+        if self._redis:
+            pipe = self._redis.pipeline()
+            pipe.zadd(self._get_redis_key(model_id), {sid: now})
+            pipe.zadd(self._redis_models_key, {model_id: now})
+            await pipe.execute()
+        else:
+            sessions = self._sessions.setdefault(model_id, OrderedDict())
+            sessions[sid] = now
+            sessions.move_to_end(sid)
+            self._models[model_id] = now
+            self._models.move_to_end(model_id)
+
+    async def expire(self, now: Optional[float] = None):
+        """Remove the sessions and models not seen within the timeout."""
+        cutoff = (time.time() if now is None else now) - self.timeout
+
+        if self._redis:
+            model_ids = await self._redis.zrange(self._redis_models_key, 0, -1)
+            pipe = self._redis.pipeline()
+            for model_id in model_ids:
+                # Sorted sets left empty are removed by Redis
+                pipe.zremrangebyscore(
+                    self._get_redis_key(model_id), "-inf", f"({cutoff}"
+                )
+            pipe.zremrangebyscore(self._redis_models_key, "-inf", f"({cutoff}")
+            await pipe.execute()
+        else:
+            for model_id, sessions in list(self._sessions.items()):
+                while sessions and next(iter(sessions.values())) < cutoff:
+                    sessions.popitem(last=False)
+                if not sessions:
+                    del self._sessions[model_id]
+            while self._models and next(iter(self._models.values())) < cutoff:
+                model_id, _ = self._models.popitem(last=False)
+                log.debug(f"Cleaning up model {model_id} from usage pool")
+
+    async def get_models_in_use(self, now: Optional[float] = None) -> List[str]:
+        cutoff = (time.time() if now is None else now) - self.timeout
+
+        if self._redis:
+            return list(
+                await self._redis.zrangebyscore(self._redis_models_key, cutoff, "+inf")
+            )
+        return [
+            model_id
+            for model_id, last_seen in self._models.items()
+            if last_seen >= cutoff
+        ]
+
+    async def count_sessions(self, model_id: str, now: Optional[float] = None) -> int:
+        """Number of sessions using `model_id`."""
+        cutoff = (time.time() if now is None else now) - self.timeout
+
+        if self._redis:
+            return await self._redis.zcount(
+                self._get_redis_key(model_id), cutoff, "+inf"
+            )
+        return sum(
+            1
+            for last_seen in self._sessions.get(model_id, {}).values()
+            if last_seen >= cutoff
+        )
+
+
 class YdocManager:
+    """
+    Yjs documents shared by collaborating sessions.
+
+    Each document is a compacted snapshot, all updates merged into one, plus a
+    log of the updates received since. Once the log holds `compact_threshold`
+    updates, or when the state is read, the log is merged into the snapshot and
+    trimmed, so joining a long-lived document doesn't replay its whole history.
+
+    With Redis both are stored as raw bytes through `binary_redis`, a connection
+    without `decode_responses`. Applying an update twice is a no-op in Yjs, so
+    readers may see an update both in the snapshot and the log while another
+    worker compacts.
+    """
+
     def __init__(
         self,
         redis=None,
         redis_key_prefix: str = f"{REDIS_KEY_PREFIX}:ydoc:documents",
+        binary_redis=None,
+        compact_threshold: int = 100,
     ):
+        # document_id -> update log and merged snapshot
         self._updates = {}
+        self._snapshots = {}
         self._users = {}
         self._redis = redis
+        self._binary_redis = binary_redis
         self._redis_key_prefix = redis_key_prefix
+        self.compact_threshold = compact_threshold
+
+        self.stats = {"compactions": 0, "updates_compacted": 0}
+
+    def _get_redis_keys(self, document_id: str) -> Tuple[str, str]:
+        key = f"{self._redis_key_prefix}:{document_id}"
+        return f"{key}:snapshot", f"{key}:log"
 
     async def append_to_updates(self, document_id: str, update: bytes):
         document_id = document_id.replace(":", "_")
+        update = bytes(update)
+
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            await self._redis.rpush(redis_key, json.dumps(list(update)))
+            _, log_key = self._get_redis_keys(document_id)
+            count = await self._binary_redis.rpush(log_key, update)
         else:
             if document_id not in self._updates:
                 self._updates[document_id] = []
             self._updates[document_id].append(update)
+            count = len(self._updates[document_id])
 
-    async def get_updates(self, document_id: str) -> List[bytes]:
-        document_id = document_id.replace(":", "_")
+        if count >= self.compact_threshold:
+            await self._compact(document_id)
 
+    async def _read(self, document_id: str) -> Tuple[Optional[bytes], List[bytes]]:
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            updates = await self._redis.lrange(redis_key, 0, -1)
-            return [bytes(json.loads(update)) for update in updates]
+            snapshot_key, log_key = self._get_redis_keys(document_id)
+            pipe = self._binary_redis.pipeline()
+            pipe.get(snapshot_key)
+            pipe.lrange(log_key, 0, -1)
+            snapshot, updates = await pipe.execute()
+            return snapshot, updates
         else:
-            return self._updates.get(document_id, [])
+            return self._snapshots.get(document_id), list(
+                self._updates.get(document_id, [])
+            )
+
+    async def _compact(self, document_id: str) -> Optional[bytes]:
+        """
+        Merge the update log into the snapshot and trim it, returns the merged
+        state or None if there was nothing to compact.
+        """
+        if self._redis:
+            snapshot_key, log_key = self._get_redis_keys(document_id)
+            lock_key = f"{self._redis_key_prefix}:{document_id}:compact_lock"
+            # Only one worker may trim the log, others would drop new updates
+            if not await self._binary_redis.set(lock_key, b"1", nx=True, ex=30):
+                return None
+            try:
+                snapshot, updates = await self._read(document_id)
+                if not updates:
+                    return None
+                state = Y.merge_updates(*filter(None, [snapshot, *updates]))
+                # Set before trimming, readers in between only see updates twice
+                await self._binary_redis.set(snapshot_key, state)
+                await self._binary_redis.ltrim(log_key, len(updates), -1)
+            finally:
+                await self._binary_redis.delete(lock_key)
+        else:
+            snapshot, updates = await self._read(document_id)
+            if not updates:
+                return None
+            state = Y.merge_updates(*filter(None, [snapshot, *updates]))
+            self._snapshots[document_id] = state
+            self._updates[document_id] = []
+
+        self.stats["compactions"] += 1
+        self.stats["updates_compacted"] += len(updates)
+        return state
+
+    async def get_updates(self, document_id: str) -> List[bytes]:
+        document_id = document_id.replace(":", "_")
+
+        snapshot, updates = await self._read(document_id)
+        return list(filter(None, [snapshot, *updates]))
+
+    async def get_state_update(
+        self, document_id: str, state_vector: Optional[bytes] = None
+    ) -> bytes:
+        """
+        Return the document state as a single update, or only the changes
+        missing from `state_vector` when the client already has some state.
+        """
+        document_id = document_id.replace(":", "_")
+
+        state = await self._compact(document_id)
+        if state is None:
+            # Already compacted or being compacted by another worker
+            state = Y.merge_updates(*await self.get_updates(document_id))
+
+        if state_vector:
+            return Y.get_update(state, bytes(state_vector))
+        return state
 
     async def document_exists(self, document_id: str) -> bool:
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            return await self._redis.exists(redis_key) > 0
+            return await self._redis.exists(*self._get_redis_keys(document_id)) > 0
         else:
-            return document_id in self._updates
+            return document_id in self._updates or document_id in self._snapshots
 
     async def get_users(self, document_id: str) -> List[str]:
         document_id = document_id.replace(":", "_")
@@ -212,12 +550,220 @@ class YdocManager:
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            await self._redis.delete(redis_key)
+            await self._redis.delete(*self._get_redis_keys(document_id))
             redis_users_key = f"{self._redis_key_prefix}:{document_id}:users"
             await self._redis.delete(redis_users_key)
         else:
-            if document_id in self._updates:
-                del self._updates[document_id]
+            self._updates.pop(document_id, None)
+            self._snapshots.pop(document_id, None)
             if document_id in self._users:
                 del self._users[document_id]
+
+
+class MessageWriteBuffer:
+    """
+    Write-behind buffer for per-message chat events.
+
+    Events are queued per (chat_id, message_id) and handed to `flush_handler` in
+    one batch, either once `max_events` are pending, once the oldest pending event
+    is older than `interval` seconds (see `flush_due`), or on an explicit `flush`.
+
+    With Redis the queue lives in Redis until it is written: a flush moves the
+    events to a processing list that is only deleted after the write, so events
+    of a flush that failed or of a worker that died mid-write are flushed again
+    before the events appended since. Buffers left behind by a worker that died
+    are picked up by `flush_due` on any other worker. The in-memory variant
+    loses at most one interval of events on a hard crash and is drained by
+    `flush_all` on shutdown. Events whose flush failed are retried by the next
+    flush, in front of the events appended since.
+    """
+
+    def __init__(
+        self,
+        flush_handler: Callable[[str, str, list[dict]], Awaitable[None]],
+        redis=None,
+        redis_key_prefix: str = f"{REDIS_KEY_PREFIX}:chat:message_buffer",
+        interval: float = 1.0,
+        max_events: int = 64,
+    ):
+        self._flush_handler = flush_handler
+        self._redis = redis
+        self._redis_key_prefix = redis_key_prefix
+        self._redis_pending_key = f"{redis_key_prefix}:pending"
+        self._redis_processing_key = f"{redis_key_prefix}:processing"
+        self.interval = interval
+        self.max_events = max_events
+
+        # (chat_id, message_id) -> {"ops": [...], "since": timestamp}
+        self._buffers = {}
+        # Keys this worker has written to Redis and not flushed yet
+        self._local_keys = set()
+        self._locks = weakref.WeakValueDictionary()
+
+        self.stats = {
+            "events": 0,
+            "flushes": 0,
+            "writes_saved": 0,
+            "recovered": 0,
+        }
+
+    def _get_redis_key(self, chat_id: str, message_id: str) -> str:
+        # The hash tag keeps the processing list in the same cluster slot
+        return f"{self._redis_key_prefix}:{{{chat_id}:{message_id}}}"
+
+    def _get_lock(self, key: tuple) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+        return lock
+
+    async def append(self, chat_id: str, message_id: str, op: dict):
+        key = (chat_id, message_id)
+        self.stats["events"] += 1
+
+        if self._redis:
+            redis_key = self._get_redis_key(chat_id, message_id)
+            pipe = self._redis.pipeline()
+            pipe.rpush(redis_key, json.dumps(op))
+            pipe.zadd(
+                self._redis_pending_key,
+                {json.dumps([chat_id, message_id]): time.time()},
+                nx=True,
+            )
+            count, _ = await pipe.execute()
+            self._local_keys.add(key)
+        else:
+            if key not in self._buffers:
+                self._buffers[key] = {"ops": [], "since": time.time()}
+            self._buffers[key]["ops"].append(op)
+            count = len(self._buffers[key]["ops"])
+
+        if count >= self.max_events:
+            await self.flush(chat_id, message_id)
+
+    async def _pop(
+        self, chat_id: str, message_id: str
+    ) -> tuple[list[dict], float, bool]:
+        """
+        Take the pending ops and the time of the oldest one, and whether more
+        ops are pending behind them. In Redis the ops are moved to a processing
+        list until `_ack`, ops left there by an earlier flush are taken first.
+        """
+        key = (chat_id, message_id)
+        if self._redis:
+            redis_key = self._get_redis_key(chat_id, message_id)
+            processing_key = f"{redis_key}:processing"
+            member = json.dumps([chat_id, message_id])
+
+            pipe = self._redis.pipeline()
+            pipe.lrange(processing_key, 0, -1)
+            pipe.zscore(self._redis_processing_key, member)
+            pipe.zscore(self._redis_pending_key, member)
+            ops, processing_since, since = await pipe.execute()
+            if ops:
+                return (
+                    [json.loads(op) for op in ops],
+                    processing_since or time.time(),
+                    since is not None,
+                )
+            if since is None:
+                return [], time.time(), False
+
+            pipe = self._redis.pipeline()
+            pipe.rename(redis_key, processing_key)
+            pipe.zrem(self._redis_pending_key, member)
+            pipe.zadd(self._redis_processing_key, {member: since})
+            pipe.lrange(processing_key, 0, -1)
+            renamed, _, _, ops = await pipe.execute(raise_on_error=False)
+            self._local_keys.discard(key)
+            if isinstance(renamed, Exception):
+                # Taken by another worker meanwhile
+                return [], time.time(), False
+            return [json.loads(op) for op in ops], since, False
+        else:
+            buffer = self._buffers.pop(key, None)
+            if not buffer:
+                return [], time.time(), False
+            return buffer["ops"], buffer["since"], False
+
+    async def _ack(self, chat_id: str, message_id: str):
+        """Drop the ops taken by `_pop` once they were written."""
+        if self._redis:
+            pipe = self._redis.pipeline()
+            pipe.delete(f"{self._get_redis_key(chat_id, message_id)}:processing")
+            pipe.zrem(self._redis_processing_key, json.dumps([chat_id, message_id]))
+            await pipe.execute()
+
+    async def _requeue(self, chat_id: str, message_id: str, ops: list, since: float):
+        """Put back ops that failed to flush, before any appended meanwhile."""
+        key = (chat_id, message_id)
+        if self._redis:
+            # Still in the processing list, retried by this worker's next flush
+            self._local_keys.add(key)
+        else:
+            buffer = self._buffers.get(key)
+            self._buffers[key] = {
+                "ops": ops + (buffer["ops"] if buffer else []),
+                "since": since,
+            }
+
+    async def flush(self, chat_id: str, message_id: str):
+        async with self._get_lock((chat_id, message_id)):
+            more = True
+            while more:
+                ops, since, more = await self._pop(chat_id, message_id)
+                if not ops:
+                    return
+                try:
+                    await self._flush_handler(chat_id, message_id, ops)
+                except Exception as e:
+                    log.exception(
+                        f"Error flushing message buffer for {chat_id}/{message_id}, "
+                        f"retrying later: {e}"
+                    )
+                    await self._requeue(chat_id, message_id, ops, since)
+                    return
+                await self._ack(chat_id, message_id)
+                self.stats["flushes"] += 1
+                self.stats["writes_saved"] += len(ops) - 1
+
+    async def _get_pending(self, due: float) -> List[Tuple[Tuple[str, str], float]]:
+        if self._redis:
+            pending = {}
+            for redis_key in (self._redis_processing_key, self._redis_pending_key):
+                members = await self._redis.zrangebyscore(
+                    redis_key, 0, due, withscores=True
+                )
+                for member, since in members:
+                    key = tuple(json.loads(member))
+                    pending[key] = min(since, pending.get(key, since))
+            return list(pending.items())
+        else:
+            return [
+                (key, buffer["since"])
+                for key, buffer in list(self._buffers.items())
+                if buffer["since"] <= due
+            ]
+
+    async def flush_due(self):
+        """Flush every buffer whose oldest event is older than the interval."""
+        now = time.time()
+        for (chat_id, message_id), since in await self._get_pending(
+            now - self.interval
+        ):
+            if self._redis and (chat_id, message_id) not in self._local_keys:
+                # Owned by another worker, only take it over once it looks abandoned
+                if now - since < self.interval * 10:
+                    continue
+                self.stats["recovered"] += 1
+            await self.flush(chat_id, message_id)
+
+    async def flush_all(self):
+        if self._redis:
+            keys = list(self._local_keys)
+        else:
+            keys = list(self._buffers.keys())
+
+        for chat_id, message_id in keys:
+            await self.flush(chat_id, message_id)
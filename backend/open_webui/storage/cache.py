@@ -0,0 +1,259 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class StorageFileCache:
+    """
+    Read-through cache of objects downloaded from cloud storage.
+
+    Downloaded objects stay in the upload directory and are indexed by object
+    key in `path`, together with the ETag (or GCS generation) they were
+    downloaded with. An object is only downloaded again when its ETag changed
+    or its entry was evicted. Entries are evicted least recently used first
+    once `max_size` bytes are exceeded, or when unused for `ttl` seconds.
+
+    Paths handed out are pinned for `pin_duration` seconds, so they are not
+    evicted before the caller opened them; files that are already open stay
+    readable after eviction. Objects larger than `max_size` are not cached.
+
+    Concurrent requests for the same key, from threads or worker processes on
+    this host, wait for a single download.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_size: int,
+        ttl: float,
+        enabled: bool = True,
+        pin_duration: float = 60,
+    ):
+        self.path = Path(path)
+        self.max_size = max_size
+        self.ttl = ttl
+        self.enabled = enabled
+        self.pin_duration = pin_duration
+
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+        self._lock = threading.Lock()
+        # Entry name -> [lock, number of threads holding or waiting for it]
+        self._key_locks: dict[str, list] = {}
+
+        if self.enabled:
+            self.path.mkdir(parents=True, exist_ok=True)
+
+    def _get_entry_name(self, key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @contextmanager
+    def _lock_entry(self, name: str, blocking: bool = True):
+        with self._lock:
+            key_lock = self._key_locks.setdefault(name, [threading.Lock(), 0])
+            key_lock[1] += 1
+
+        try:
+            if not key_lock[0].acquire(blocking):
+                yield False
+                return
+            try:
+                # Lock files are never removed, processes that opened a removed
+                # one would lock a different file than the others
+                with open(self.path / f"{name}.lock", "a") as lock_file:
+                    if fcntl:
+                        try:
+                            fcntl.flock(
+                                lock_file,
+                                (
+                                    fcntl.LOCK_EX
+                                    if blocking
+                                    else fcntl.LOCK_EX | fcntl.LOCK_NB
+                                ),
+                            )
+                        except BlockingIOError:
+                            yield False
+                            return
+                    try:
+                        yield True
+                    finally:
+                        if fcntl:
+                            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            finally:
+                key_lock[0].release()
+        finally:
+            with self._lock:
+                key_lock[1] -= 1
+                if not key_lock[1]:
+                    del self._key_locks[name]
+
+    def _read_entry(self, name: str) -> Optional[dict]:
+        try:
+            with open(self.path / f"{name}.json") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_entry(self, name: str, entry: dict):
+        tmp_path = self.path / f"{name}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self.path / f"{name}.json")
+
+    def _remove_entry(self, name: str, entry: Optional[dict]):
+        if entry:
+            try:
+                os.remove(entry["path"])
+            except FileNotFoundError:
+                pass
+        try:
+            os.remove(self.path / f"{name}.json")
+        except FileNotFoundError:
+            pass
+
+    def _is_valid(self, entry: Optional[dict], local_path: str, etag: str) -> bool:
+        if not entry or entry["path"] != local_path or entry["etag"] != etag:
+            return False
+        try:
+            return os.path.getsize(local_path) == entry["size"]
+        except OSError:
+            return False
+
+    def get_file(
+        self,
+        key: str,
+        local_path: str,
+        etag: Optional[str],
+        download: Callable[[str], None],
+    ) -> str:
+        """
+        Return `local_path` holding the object `key` at version `etag`, calling
+        `download(path)` to fetch it into `path` on a cache miss.
+        """
+        if not self.enabled or not etag:
+            download(local_path)
+            return local_path
+
+        local_path = str(local_path)
+        name = self._get_entry_name(key)
+        with self._lock_entry(name):
+            entry = self._read_entry(name)
+            if self._is_valid(entry, local_path, etag):
+                self.stats["hits"] += 1
+                # The entry's mtime is its last access time for eviction
+                os.utime(self.path / f"{name}.json")
+                return local_path
+
+            self.stats["misses"] += 1
+            tmp_path = f"{local_path}.{uuid.uuid4().hex}.tmp"
+            try:
+                download(tmp_path)
+                os.replace(tmp_path, local_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+            size = os.path.getsize(local_path)
+            if size > self.max_size:
+                # Would evict everything else, including itself
+                self._remove_entry(name, None)
+                return local_path
+
+            self._write_entry(
+                name,
+                {"key": key, "path": local_path, "etag": etag, "size": size},
+            )
+
+        self.evict()
+        return local_path
+
+    def put(self, key: str, local_path: str, etag: Optional[str]):
+        """Register a file that was just uploaded from `local_path`."""
+        if not self.enabled or not etag:
+            return
+
+        local_path = str(local_path)
+        name = self._get_entry_name(key)
+        with self._lock_entry(name):
+            size = os.path.getsize(local_path)
+            if size > self.max_size:
+                self._remove_entry(name, None)
+                return
+
+            self._write_entry(
+                name,
+                {"key": key, "path": local_path, "etag": etag, "size": size},
+            )
+        self.evict()
+
+    def delete(self, key: str):
+        if not self.enabled:
+            return
+
+        name = self._get_entry_name(key)
+        with self._lock_entry(name):
+            self._remove_entry(name, None)
+
+    def clear(self):
+        if not self.enabled:
+            return
+
+        for entry_path in self.path.glob("*.json"):
+            self._delete_entry(entry_path, remove_file=False)
+
+    def _delete_entry(self, entry_path: Path, remove_file: bool = True) -> bool:
+        """Remove the entry stored at `entry_path`, unless it is in use."""
+        name = entry_path.stem
+        with self._lock_entry(name, blocking=False) as locked:
+            if not locked:
+                return False
+            entry = self._read_entry(name)
+            self._remove_entry(name, entry if remove_file else None)
+            return True
+
+    def evict(self):
+        """
+        Evict expired entries, then the least recently used over `max_size`.
+        Entries accessed in the last `pin_duration` seconds are kept.
+        """
+        entries = []
+        for entry_path in self.path.glob("*.json"):
+            entry = self._read_entry(entry_path.stem)
+            try:
+                accessed_at = entry_path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if entry:
+                entries.append((accessed_at, entry["size"], entry_path))
+
+        entries.sort()
+        total_size = sum(size for _, size, _ in entries)
+        now = time.time()
+
+        for accessed_at, size, entry_path in entries:
+            expired = self.ttl > 0 and now - accessed_at > self.ttl
+            if not expired and total_size <= self.max_size:
+                break
+            if now - accessed_at < self.pin_duration:
+                # Later entries were accessed even more recently
+                break
+            if self._delete_entry(entry_path):
+                total_size -= size
+                self.stats["evictions"] += 1
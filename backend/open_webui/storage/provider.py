@@ -3,8 +3,11 @@ import shutil
 import json
 import logging
 import re
+import base64
+import hashlib
+import uuid
 from abc import ABC, abstractmethod
-from typing import BinaryIO, Tuple, Dict
+from typing import Any, BinaryIO, Optional, Tuple, Dict
 
 import boto3
 from botocore.config import Config
@@ -26,19 +29,112 @@ from open_webui.config import (
     AZURE_STORAGE_KEY,
     STORAGE_PROVIDER,
     UPLOAD_DIR,
+    ENABLE_STORAGE_CACHE,
+    STORAGE_CACHE_DIR,
+    STORAGE_CACHE_MAX_SIZE,
+    STORAGE_CACHE_TTL,
 )
 from google.cloud import storage
 from google.cloud.exceptions import GoogleCloudError, NotFound
 from open_webui.constants import ERROR_MESSAGES
 from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
+from azure.storage.blob import BlobBlock, BlobServiceClient
+from azure.core import MatchConditions
 from azure.core.exceptions import ResourceNotFoundError
 from open_webui.env import SRC_LOG_LEVELS
+from open_webui.storage.cache import StorageFileCache
 
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
+STORAGE_CACHE = StorageFileCache(
+    STORAGE_CACHE_DIR,
+    max_size=STORAGE_CACHE_MAX_SIZE,
+    ttl=STORAGE_CACHE_TTL,
+    enabled=ENABLE_STORAGE_CACHE and STORAGE_PROVIDER != "local",
+)
+
+# Uploads are streamed in chunks of this size; S3 parts must be at least 5 MiB
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class UploadWriter(ABC):
+    """
+    Uploads a file to cloud storage chunk by chunk while it is being written
+    locally. Files that fit into a single chunk are uploaded in one request.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.etag = None
+        self._started = False
+
+    def write(self, chunk: bytes):
+        self.buffer += chunk
+        if len(self.buffer) >= UPLOAD_CHUNK_SIZE:
+            self._upload_part(bytes(self.buffer))
+            self._started = True
+            self.buffer = bytearray()
+
+    def close(self):
+        if not self._started:
+            self.etag = self._upload(bytes(self.buffer))
+        else:
+            if self.buffer:
+                self._upload_part(bytes(self.buffer))
+            self.etag = self._complete()
+        self.buffer = bytearray()
+
+    def abort(self):
+        pass
+
+    @abstractmethod
+    def _upload(self, data: bytes) -> Optional[str]:
+        """Upload a file consisting of a single chunk and return its ETag."""
+
+    @abstractmethod
+    def _upload_part(self, data: bytes):
+        pass
+
+    @abstractmethod
+    def _complete(self) -> Optional[str]:
+        """Finish a multipart upload and return its ETag."""
+
+
+def write_file(
+    file: BinaryIO, file_path: str, writer: Optional[UploadWriter] = None
+) -> Dict[str, Any]:
+    """
+    Stream `file` to `file_path`, and to `writer` if given, without holding
+    more than one chunk in memory. Returns the size and SHA-256 of the file.
+    """
+    chunk = file.read(UPLOAD_CHUNK_SIZE)
+    if not chunk:
+        raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+
+    sha256 = hashlib.sha256()
+    size = 0
+    try:
+        with open(file_path, "wb") as f:
+            while chunk:
+                f.write(chunk)
+                sha256.update(chunk)
+                size += len(chunk)
+                if writer:
+                    writer.write(chunk)
+                chunk = file.read(UPLOAD_CHUNK_SIZE)
+        if writer:
+            writer.close()
+    except Exception:
+        if writer:
+            writer.abort()
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+
+    return {"size": size, "sha256": sha256.hexdigest()}
+
 
 class StorageProvider(ABC):
     @abstractmethod
@@ -48,7 +144,8 @@ class StorageProvider(ABC):
     @abstractmethod
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[Dict[str, Any], str]:
+        """Store `file`, returning its size and SHA-256 and its storage path."""
         pass
 
     @abstractmethod
@@ -63,15 +160,14 @@ class StorageProvider(ABC):
 class LocalStorageProvider(StorageProvider):
     @staticmethod
     def upload_file(
-        file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
-        contents = file.read()
-        if not contents:
-            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+        file: BinaryIO,
+        filename: str,
+        tags: Dict[str, str],
+        writer: Optional[UploadWriter] = None,
+    ) -> Tuple[Dict[str, Any], str]:
         file_path = f"{UPLOAD_DIR}/{filename}"
-        with open(file_path, "wb") as f:
-            f.write(contents)
-        return contents, file_path
+        file_info = write_file(file, file_path, writer)
+        return file_info, file_path
 
     @staticmethod
     def get_file(file_path: str) -> str:
@@ -105,6 +201,55 @@ class LocalStorageProvider(StorageProvider):
             log.warning(f"Directory {UPLOAD_DIR} not found in local storage.")
 
 
+class S3UploadWriter(UploadWriter):
+    def __init__(self, s3_client, bucket_name: str, s3_key: str):
+        super().__init__()
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.s3_key = s3_key
+
+        self.upload_id = None
+        self.parts = []
+
+    def _upload(self, data: bytes) -> str:
+        return self.s3_client.put_object(
+            Bucket=self.bucket_name, Key=self.s3_key, Body=data
+        )["ETag"]
+
+    def _upload_part(self, data: bytes):
+        if self.upload_id is None:
+            self.upload_id = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket_name, Key=self.s3_key
+            )["UploadId"]
+
+        part_number = len(self.parts) + 1
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket_name,
+            Key=self.s3_key,
+            UploadId=self.upload_id,
+            PartNumber=part_number,
+            Body=data,
+        )
+        self.parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+
+    def _complete(self) -> str:
+        return self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=self.s3_key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": self.parts},
+        )["ETag"]
+
+    def abort(self):
+        if self.upload_id is not None:
+            try:
+                self.s3_client.abort_multipart_upload(
+                    Bucket=self.bucket_name, Key=self.s3_key, UploadId=self.upload_id
+                )
+            except ClientError as e:
+                log.warning(f"Failed to abort multipart upload {self.s3_key}: {e}")
+
+
 class S3StorageProvider(StorageProvider):
     def __init__(self):
         config = Config(
@@ -139,6 +284,7 @@ class S3StorageProvider(StorageProvider):
 
         self.bucket_name = S3_BUCKET_NAME
         self.key_prefix = S3_KEY_PREFIX if S3_KEY_PREFIX else ""
+        self.cache = STORAGE_CACHE
 
     @staticmethod
     def sanitize_tag_value(s: str) -> str:
@@ -147,12 +293,14 @@ class S3StorageProvider(StorageProvider):
 
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[Dict[str, Any], str]:
         """Handles uploading of the file to S3 storage."""
-        _, file_path = LocalStorageProvider.upload_file(file, filename, tags)
         s3_key = os.path.join(self.key_prefix, filename)
         try:
-            self.s3_client.upload_file(file_path, self.bucket_name, s3_key)
+            writer = S3UploadWriter(self.s3_client, self.bucket_name, s3_key)
+            file_info, file_path = LocalStorageProvider.upload_file(
+                file, filename, tags, writer
+            )
             if S3_ENABLE_TAGGING and tags:
                 sanitized_tags = {
                     self.sanitize_tag_value(k): self.sanitize_tag_value(v)
@@ -168,10 +316,8 @@ class S3StorageProvider(StorageProvider):
                     Key=s3_key,
                     Tagging=tagging,
                 )
-            return (
-                open(file_path, "rb").read(),
-                f"s3://{self.bucket_name}/{s3_key}",
-            )
+            self.cache.put(f"s3://{self.bucket_name}/{s3_key}", file_path, writer.etag)
+            return file_info, f"s3://{self.bucket_name}/{s3_key}"
         except ClientError as e:
             raise RuntimeError(f"Error uploading file to S3: {e}")
 
@@ -179,9 +325,14 @@ class S3StorageProvider(StorageProvider):
         """Handles downloading of the file from S3 storage."""
         try:
             s3_key = self._extract_s3_key(file_path)
-            local_file_path = self._get_local_file_path(s3_key)
-            self.s3_client.download_file(self.bucket_name, s3_key, local_file_path)
-            return local_file_path
+            return self.cache.get_file(
+                f"s3://{self.bucket_name}/{s3_key}",
+                self._get_local_file_path(s3_key),
+                self._get_etag(s3_key),
+                lambda local_file_path: self.s3_client.download_file(
+                    self.bucket_name, s3_key, local_file_path
+                ),
+            )
         except ClientError as e:
             raise RuntimeError(f"Error downloading file from S3: {e}")
 
@@ -190,6 +341,7 @@ class S3StorageProvider(StorageProvider):
         try:
             s3_key = self._extract_s3_key(file_path)
             self.s3_client.delete_object(Bucket=self.bucket_name, Key=s3_key)
+            self.cache.delete(f"s3://{self.bucket_name}/{s3_key}")
         except ClientError as e:
             raise RuntimeError(f"Error deleting file from S3: {e}")
 
@@ -214,6 +366,7 @@ class S3StorageProvider(StorageProvider):
 
         # Always delete from local storage
         LocalStorageProvider.delete_all_files()
+        self.cache.clear()
 
     # The s3 key is the name assigned to an object. It excludes the bucket name, but includes the internal path and the file name.
     def _extract_s3_key(self, full_file_path: str) -> str:
@@ -222,6 +375,33 @@ class S3StorageProvider(StorageProvider):
     def _get_local_file_path(self, s3_key: str) -> str:
         return f"{UPLOAD_DIR}/{s3_key.split('/')[-1]}"
 
+    def _get_etag(self, s3_key: str) -> str:
+        return self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)["ETag"]
+
+
+class GCSUploadWriter(UploadWriter):
+    def __init__(self, blob):
+        super().__init__()
+        self.blob = blob
+        self.blob_writer = None
+
+    def _upload(self, data: bytes) -> str:
+        self.blob.upload_from_string(data)
+        return str(self.blob.generation)
+
+    def _upload_part(self, data: bytes):
+        if self.blob_writer is None:
+            # Resumable upload, sent in chunks as they are written
+            self.blob_writer = self.blob.open(
+                "wb", chunk_size=UPLOAD_CHUNK_SIZE, ignore_flush=True
+            )
+        self.blob_writer.write(data)
+
+    def _complete(self) -> str:
+        self.blob_writer.close()
+        self.blob.reload()
+        return str(self.blob.generation)
+
 
 class GCSStorageProvider(StorageProvider):
     def __init__(self):
@@ -237,16 +417,21 @@ class GCSStorageProvider(StorageProvider):
             # if running on a Compute Engine instance, credentials would be from Google Metadata server
             self.gcs_client = storage.Client()
         self.bucket = self.gcs_client.bucket(GCS_BUCKET_NAME)
+        self.cache = STORAGE_CACHE
 
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[Dict[str, Any], str]:
         """Handles uploading of the file to GCS storage."""
-        contents, file_path = LocalStorageProvider.upload_file(file, filename, tags)
         try:
-            blob = self.bucket.blob(filename)
-            blob.upload_from_filename(file_path)
-            return contents, "gs://" + self.bucket_name + "/" + filename
+            writer = GCSUploadWriter(self.bucket.blob(filename))
+            file_info, file_path = LocalStorageProvider.upload_file(
+                file, filename, tags, writer
+            )
+            self.cache.put(
+                f"gs://{self.bucket_name}/{filename}", file_path, writer.etag
+            )
+            return file_info, "gs://" + self.bucket_name + "/" + filename
         except GoogleCloudError as e:
             raise RuntimeError(f"Error uploading file to GCS: {e}")
 
@@ -254,11 +439,17 @@ class GCSStorageProvider(StorageProvider):
         """Handles downloading of the file from GCS storage."""
         try:
             filename = file_path.removeprefix("gs://").split("/")[1]
-            local_file_path = f"{UPLOAD_DIR}/{filename}"
             blob = self.bucket.get_blob(filename)
-            blob.download_to_filename(local_file_path)
 
-            return local_file_path
+            return self.cache.get_file(
+                f"gs://{self.bucket_name}/{filename}",
+                f"{UPLOAD_DIR}/{filename}",
+                str(blob.generation),
+                # Only download the generation that was validated
+                lambda local_file_path: blob.download_to_filename(
+                    local_file_path, if_generation_match=blob.generation
+                ),
+            )
         except NotFound as e:
             raise RuntimeError(f"Error downloading file from GCS: {e}")
 
@@ -268,6 +459,7 @@ class GCSStorageProvider(StorageProvider):
             filename = file_path.removeprefix("gs://").split("/")[1]
             blob = self.bucket.get_blob(filename)
             blob.delete()
+            self.cache.delete(f"gs://{self.bucket_name}/{filename}")
         except NotFound as e:
             raise RuntimeError(f"Error deleting file from GCS: {e}")
 
@@ -287,6 +479,26 @@ class GCSStorageProvider(StorageProvider):
 
         # Always delete from local storage
         LocalStorageProvider.delete_all_files()
+        self.cache.clear()
+
+
+class AzureUploadWriter(UploadWriter):
+    def __init__(self, blob_client):
+        super().__init__()
+        self.blob_client = blob_client
+        self.block_list = []
+
+    def _upload(self, data: bytes) -> str:
+        return self.blob_client.upload_blob(data, overwrite=True)["etag"]
+
+    def _upload_part(self, data: bytes):
+        block_id = base64.b64encode(uuid.uuid4().hex.encode()).decode()
+        self.blob_client.stage_block(block_id, data)
+        self.block_list.append(BlobBlock(block_id=block_id))
+
+    def _complete(self) -> str:
+        # Uncommitted blocks of aborted uploads are garbage collected by Azure
+        return self.blob_client.commit_block_list(self.block_list)["etag"]
 
 
 class AzureStorageProvider(StorageProvider):
@@ -309,16 +521,26 @@ class AzureStorageProvider(StorageProvider):
         self.container_client = self.blob_service_client.get_container_client(
             self.container_name
         )
+        self.cache = STORAGE_CACHE
 
     def upload_file(
         self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+    ) -> Tuple[Dict[str, Any], str]:
         """Handles uploading of the file to Azure Blob Storage."""
-        contents, file_path = LocalStorageProvider.upload_file(file, filename, tags)
         try:
             blob_client = self.container_client.get_blob_client(filename)
-            blob_client.upload_blob(contents, overwrite=True)
-            return contents, f"{self.endpoint}/{self.container_name}/{filename}"
+            writer = AzureUploadWriter(blob_client)
+            file_info, file_path = LocalStorageProvider.upload_file(
+                file, filename, tags, writer
+            )
+            self.cache.put(
+                f"{self.endpoint}/{self.container_name}/{filename}",
+                file_path,
+                writer.etag,
+            )
+            return file_info, f"{self.endpoint}/{self.container_name}/{filename}"
+        except ValueError:
+            raise
         except Exception as e:
             raise RuntimeError(f"Error uploading file to Azure Blob Storage: {e}")
 
@@ -326,11 +548,22 @@ class AzureStorageProvider(StorageProvider):
         """Handles downloading of the file from Azure Blob Storage."""
         try:
             filename = file_path.split("/")[-1]
-            local_file_path = f"{UPLOAD_DIR}/{filename}"
             blob_client = self.container_client.get_blob_client(filename)
-            with open(local_file_path, "wb") as download_file:
-                download_file.write(blob_client.download_blob().readall())
-            return local_file_path
+            etag = blob_client.get_blob_properties().etag
+
+            def download(local_file_path: str):
+                with open(local_file_path, "wb") as download_file:
+                    # Only download the version that was validated
+                    blob_client.download_blob(
+                        etag=etag, match_condition=MatchConditions.IfNotModified
+                    ).readinto(download_file)
+
+            return self.cache.get_file(
+                f"{self.endpoint}/{self.container_name}/{filename}",
+                f"{UPLOAD_DIR}/{filename}",
+                etag,
+                download,
+            )
         except ResourceNotFoundError as e:
             raise RuntimeError(f"Error downloading file from Azure Blob Storage: {e}")
 
@@ -340,6 +573,7 @@ class AzureStorageProvider(StorageProvider):
             filename = file_path.split("/")[-1]
             blob_client = self.container_client.get_blob_client(filename)
             blob_client.delete_blob()
+            self.cache.delete(f"{self.endpoint}/{self.container_name}/{filename}")
         except ResourceNotFoundError as e:
             raise RuntimeError(f"Error deleting file from Azure Blob Storage: {e}")
 
@@ -357,6 +591,7 @@ class AzureStorageProvider(StorageProvider):
 
         # Always delete from local storage
         LocalStorageProvider.delete_all_files()
+        self.cache.clear()
 
 
 def get_storage_provider(storage_provider: str):
@@ -1,5 +1,9 @@
 # tasks.py
 import asyncio
+import bisect
+import itertools
+from contextlib import asynccontextmanager
+from enum import IntEnum
 from typing import Dict
 from uuid import uuid4
 import json
@@ -8,7 +12,14 @@ from redis.asyncio import Redis
 from fastapi import Request
 from typing import Dict, List, Optional
 
-from open_webui.env import SRC_LOG_LEVELS, REDIS_KEY_PREFIX
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    REDIS_KEY_PREFIX,
+    TASKS_BACKGROUND_QUEUE_SIZE,
+    TASKS_BACKGROUND_QUEUE_TIMEOUT,
+    TASKS_MODEL_CONCURRENCY_LIMIT,
+    TASKS_USER_CONCURRENCY_LIMIT,
+)
 
 
 log = logging.getLogger(__name__)
@@ -22,6 +33,176 @@ item_tasks = {}
 REDIS_TASKS_KEY = f"{REDIS_KEY_PREFIX}:tasks"
 REDIS_ITEM_TASKS_KEY = f"{REDIS_KEY_PREFIX}:tasks:item"
 REDIS_PUBSUB_CHANNEL = f"{REDIS_KEY_PREFIX}:tasks:commands"
+REDIS_TASK_QUEUE_KEY = f"{REDIS_KEY_PREFIX}:tasks:queue"
+
+# Identifies the queue depths reported by this worker
+WORKER_ID = str(uuid4())
+TASK_QUEUE_REPORT_INTERVAL = 5
+
+
+class TaskPriority(IntEnum):
+    INTERACTIVE = 0
+    # Title, tag and follow-up generation
+    BACKGROUND = 1
+
+
+class TaskAdmission:
+    """
+    Limits the chat tasks running at once per model and per user.
+
+    Tasks over a limit wait in a queue ordered by priority, where interactive
+    completions get free slots before background generation of the same model
+    or user. Background tasks are shed when `background_queue_size` of them
+    are already waiting or they waited longer than `background_timeout`
+    seconds.
+    """
+
+    def __init__(
+        self,
+        model_limit: int = 0,
+        user_limit: int = 0,
+        background_queue_size: int = 100,
+        background_timeout: float = 30,
+    ):
+        self.model_limit = model_limit
+        self.user_limit = user_limit
+        self.background_queue_size = background_queue_size
+        self.background_timeout = background_timeout
+
+        self.running_by_model: Dict[str, int] = {}
+        self.running_by_user: Dict[str, int] = {}
+        # Sorted [priority, seq, model_id, user_id, future] entries
+        self._waiters: list = []
+        self._seq = itertools.count()
+        self.stats = {"admitted": 0, "queued": 0, "shed": 0}
+
+    @property
+    def running(self) -> int:
+        return sum(self.running_by_model.values())
+
+    def queue_depths(self) -> Dict[str, int]:
+        depths = {priority.name.lower(): 0 for priority in TaskPriority}
+        for priority, *_ in self._waiters:
+            depths[TaskPriority(priority).name.lower()] += 1
+        return depths
+
+    def _has_capacity(self, model_id: str, user_id: str) -> bool:
+        return (
+            not self.model_limit
+            or self.running_by_model.get(model_id, 0) < self.model_limit
+        ) and (
+            not self.user_limit
+            or self.running_by_user.get(user_id, 0) < self.user_limit
+        )
+
+    def _start(self, model_id: str, user_id: str):
+        self.running_by_model[model_id] = self.running_by_model.get(model_id, 0) + 1
+        self.running_by_user[user_id] = self.running_by_user.get(user_id, 0) + 1
+        self.stats["admitted"] += 1
+
+    def _competes(self, model_id: str, user_id: str, waiting: list) -> bool:
+        """Whether a task would take a slot of a limit `waiting` tasks need."""
+        return any(
+            (self.model_limit and waiter_model_id == model_id)
+            or (self.user_limit and waiter_user_id == user_id)
+            for waiter_model_id, waiter_user_id in waiting
+        )
+
+    def _admit_waiters(self):
+        # (model_id, user_id) of interactive tasks that keep waiting
+        interactive_waiting = []
+        for waiter in list(self._waiters):
+            priority, _, model_id, user_id, future = waiter
+            if future.done():
+                # Cancelled, removed by its task
+                continue
+            if priority == TaskPriority.BACKGROUND and self._competes(
+                model_id, user_id, interactive_waiting
+            ):
+                continue
+            if self._has_capacity(model_id, user_id):
+                self._waiters.remove(waiter)
+                self._start(model_id, user_id)
+                future.set_result(True)
+            elif priority == TaskPriority.INTERACTIVE:
+                interactive_waiting.append((model_id, user_id))
+
+    async def acquire(
+        self, model_id: str, user_id: str, priority: TaskPriority
+    ) -> bool:
+        """Wait for a slot, returns False if the task was shed."""
+        interactive_waiting = [
+            (waiter_model_id, waiter_user_id)
+            for waiter_priority, _, waiter_model_id, waiter_user_id, future in (
+                self._waiters
+            )
+            if waiter_priority == TaskPriority.INTERACTIVE and not future.done()
+        ]
+        if self._has_capacity(model_id, user_id) and not (
+            priority == TaskPriority.BACKGROUND
+            and self._competes(model_id, user_id, interactive_waiting)
+        ):
+            self._start(model_id, user_id)
+            return True
+
+        if (
+            priority == TaskPriority.BACKGROUND
+            and self.queue_depths()["background"] >= self.background_queue_size
+        ):
+            self.stats["shed"] += 1
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = [priority, next(self._seq), model_id, user_id, future]
+        bisect.insort(self._waiters, waiter, key=lambda waiter: waiter[:2])
+        self.stats["queued"] += 1
+
+        try:
+            if priority == TaskPriority.BACKGROUND and self.background_timeout:
+                return await asyncio.wait_for(
+                    asyncio.shield(future), self.background_timeout
+                )
+            return await future
+        except asyncio.TimeoutError:
+            if future.done():
+                return True
+            self._waiters.remove(waiter)
+            self.stats["shed"] += 1
+            return False
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted while being cancelled, pass the slot on
+                self.release(model_id, user_id)
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, model_id: str, user_id: str):
+        for running, key in (
+            (self.running_by_model, model_id),
+            (self.running_by_user, user_id),
+        ):
+            running[key] -= 1
+            if running[key] <= 0:
+                del running[key]
+        self._admit_waiters()
+
+    @asynccontextmanager
+    async def admit(self, model_id: str, user_id: str, priority: TaskPriority):
+        admitted = await self.acquire(model_id, user_id, priority)
+        try:
+            yield admitted
+        finally:
+            if admitted:
+                self.release(model_id, user_id)
+
+
+TASK_ADMISSION = TaskAdmission(
+    model_limit=TASKS_MODEL_CONCURRENCY_LIMIT,
+    user_limit=TASKS_USER_CONCURRENCY_LIMIT,
+    background_queue_size=TASKS_BACKGROUND_QUEUE_SIZE,
+    background_timeout=TASKS_BACKGROUND_QUEUE_TIMEOUT,
+)
 
 
 async def redis_task_command_listener(app):
@@ -94,10 +275,38 @@ async def cleanup_task(redis, task_id: str, id=None):
             item_tasks.pop(id, None)
 
 
-async def create_task(redis, coroutine, id=None):
+async def run_admitted_task(
+    coroutine, model_id: str, user_id: str, priority: TaskPriority
+):
+    """
+    Run `coroutine` once `TASK_ADMISSION` grants it a slot, returns None
+    without running it if it was shed.
+    """
+    async with TASK_ADMISSION.admit(model_id, user_id, priority) as admitted:
+        if not admitted:
+            coroutine.close()
+            log.info(f"Shed {priority.name.lower()} task for model {model_id}")
+            return None
+        return await coroutine
+
+
+async def create_task(
+    redis,
+    coroutine,
+    id=None,
+    model_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    priority: TaskPriority = TaskPriority.INTERACTIVE,
+):
     """
     Create a new asyncio task and add it to the global task dictionary.
+
+    Tasks given a model or user id run under the admission limits of
+    `TASK_ADMISSION` with `priority`.
     """
+    if model_id is not None or user_id is not None:
+        coroutine = run_admitted_task(coroutine, model_id, user_id, priority)
+
     task_id = str(uuid4())  # Generate a unique ID for the task
     task = asyncio.create_task(coroutine)  # Create the task
 
@@ -128,6 +337,43 @@ async def list_tasks(redis):
     return list(tasks.keys())
 
 
+async def redis_report_task_queue(redis: Redis):
+    """Periodically store the queue depths of this worker for `list_task_queue`."""
+    key = f"{REDIS_TASK_QUEUE_KEY}:{WORKER_ID}"
+    while True:
+        try:
+            await redis.hset(
+                key,
+                mapping={
+                    **TASK_ADMISSION.queue_depths(),
+                    "running": TASK_ADMISSION.running,
+                },
+            )
+            # Expire the depths of workers that stopped reporting
+            await redis.expire(key, TASK_QUEUE_REPORT_INTERVAL * 3)
+        except Exception as e:
+            log.debug(f"Failed to report task queue: {e}")
+        await asyncio.sleep(TASK_QUEUE_REPORT_INTERVAL)
+
+
+async def list_task_queue(redis) -> Dict[str, int]:
+    """
+    Return the number of waiting tasks per priority and of running tasks, for
+    all workers when Redis is used.
+    """
+    if not redis:
+        return {**TASK_ADMISSION.queue_depths(), "running": TASK_ADMISSION.running}
+
+    totals = {priority.name.lower(): 0 for priority in TaskPriority}
+    totals["running"] = 0
+    async for key in redis.scan_iter(match=f"{REDIS_TASK_QUEUE_KEY}:*"):
+        for name, value in (await redis.hgetall(key)).items():
+            name = name.decode() if isinstance(name, bytes) else name
+            if name in totals:
+                totals[name] += int(value)
+    return totals
+
+
 async def list_task_ids_by_item_id(redis, id):
     """
     List all tasks associated with a specific ID.
@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+
+from open_webui.storage.cache import StorageFileCache
+
+
+class FakeObjectStore:
+    def __init__(self):
+        self.objects = {}
+        self.downloads = 0
+
+    def downloader(self, key, delay=0):
+        def download(path):
+            self.downloads += 1
+            time.sleep(delay)
+            with open(path, "wb") as f:
+                f.write(self.objects[key][1])
+
+        return download
+
+    def etag(self, key):
+        return self.objects[key][0]
+
+
+def get_file(cache, store, upload_dir, key, delay=0):
+    return cache.get_file(
+        f"s3://bucket/{key}",
+        str(upload_dir / key),
+        store.etag(key),
+        store.downloader(key, delay),
+    )
+
+
+class TestStorageFileCache:
+    """Test the local read-through cache for cloud storage downloads"""
+
+    def test_downloads_once_until_etag_changes(self, tmp_path):
+        cache = StorageFileCache(tmp_path / "cache", max_size=1024, ttl=0)
+        store = FakeObjectStore()
+        store.objects["a.txt"] = ("v1", b"first")
+
+        for _ in range(3):
+            path = get_file(cache, store, tmp_path, "a.txt")
+            assert open(path, "rb").read() == b"first"
+        assert store.downloads == 1
+        assert cache.stats["hits"] == 2
+
+        store.objects["a.txt"] = ("v2", b"second")
+        assert open(get_file(cache, store, tmp_path, "a.txt"), "rb").read() == b"second"
+        assert store.downloads == 2
+
+        # Files removed from the upload dir are downloaded again
+        os.remove(path)
+        get_file(cache, store, tmp_path, "a.txt")
+        assert store.downloads == 3
+
+    def test_uploaded_files_are_not_downloaded(self, tmp_path):
+        cache = StorageFileCache(tmp_path / "cache", max_size=1024, ttl=0)
+        store = FakeObjectStore()
+        store.objects["a.txt"] = ("v1", b"uploaded")
+        (tmp_path / "a.txt").write_bytes(b"uploaded")
+
+        cache.put("s3://bucket/a.txt", str(tmp_path / "a.txt"), "v1")
+        get_file(cache, store, tmp_path, "a.txt")
+        assert store.downloads == 0
+
+    def test_least_recently_used_files_are_evicted(self, tmp_path):
+        cache = StorageFileCache(tmp_path / "cache", max_size=10, ttl=0, pin_duration=0)
+        store = FakeObjectStore()
+        for key in ("a", "b", "c"):
+            store.objects[key] = ("v1", b"12345")
+
+        get_file(cache, store, tmp_path, "a")
+        time.sleep(0.01)
+        get_file(cache, store, tmp_path, "b")
+        time.sleep(0.01)
+        get_file(cache, store, tmp_path, "a")
+        time.sleep(0.01)
+        get_file(cache, store, tmp_path, "c")
+
+        assert (tmp_path / "a").exists()
+        assert not (tmp_path / "b").exists()
+        assert (tmp_path / "c").exists()
+        assert cache.stats["evictions"] == 1
+
+        # Lock files outlive their entries, in-process locks don't
+        assert len(list((tmp_path / "cache").glob("*.json"))) == 2
+        assert len(list((tmp_path / "cache").glob("*.lock"))) == 3
+        assert cache._key_locks == {}
+
+    def test_recently_fetched_files_are_not_evicted(self, tmp_path):
+        cache = StorageFileCache(tmp_path / "cache", max_size=10, ttl=0)
+        store = FakeObjectStore()
+        for key in ("a", "b", "c"):
+            store.objects[key] = ("v1", b"12345")
+
+        paths = [get_file(cache, store, tmp_path, key) for key in ("a", "b", "c")]
+        assert all(os.path.exists(path) for path in paths)
+        assert cache.stats["evictions"] == 0
+
+        # Evicted once they are no longer pinned
+        for entry_path in (tmp_path / "cache").glob("*.json"):
+            os.utime(entry_path, (time.time() - 120, time.time() - 120))
+        cache.evict()
+        assert cache.stats["evictions"] == 1
+
+    def test_large_files_are_not_cached(self, tmp_path):
+        cache = StorageFileCache(tmp_path / "cache", max_size=10, ttl=0)
+        store = FakeObjectStore()
+        store.objects["large"] = ("v1", b"0123456789abcdef")
+        store.objects["small"] = ("v1", b"small")
+
+        get_file(cache, store, tmp_path, "small")
+        path = get_file(cache, store, tmp_path, "large")
+        assert open(path, "rb").read() == b"0123456789abcdef"
+        assert (tmp_path / "small").exists()
+
+        get_file(cache, store, tmp_path, "large")
+        assert store.downloads == 3
+        assert cache.stats["evictions"] == 0
+
+    def test_expired_files_are_evicted(self, tmp_path):
+        cache = StorageFileCache(tmp_path / "cache", max_size=1024, ttl=60)
+        store = FakeObjectStore()
+        store.objects["a"] = ("v1", b"a")
+        store.objects["b"] = ("v1", b"b")
+
+        get_file(cache, store, tmp_path, "a")
+        entry_path = next((tmp_path / "cache").glob("*.json"))
+        os.utime(entry_path, (time.time() - 120, time.time() - 120))
+
+        get_file(cache, store, tmp_path, "b")
+        assert not (tmp_path / "a").exists()
+        assert (tmp_path / "b").exists()
+
+    def test_concurrent_requests_share_one_download(self, tmp_path):
+        cache = StorageFileCache(tmp_path / "cache", max_size=1024, ttl=0)
+        store = FakeObjectStore()
+        store.objects["a"] = ("v1", b"a")
+
+        threads = [
+            threading.Thread(
+                target=get_file,
+                args=(cache, store, tmp_path, "a"),
+                kwargs={"delay": 0.1},
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert store.downloads == 1
+        assert cache.stats == {"hits": 4, "misses": 1, "evictions": 0}
+        assert cache._key_locks == {}
@@ -1,3 +1,4 @@
+import hashlib
 import io
 import os
 import boto3
@@ -66,10 +67,12 @@ class TestLocalStorageProvider:
 
     def test_upload_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        contents, file_path = self.Storage.upload_file(self.file_bytesio, self.filename)
+        file_info, file_path = self.Storage.upload_file(
+            self.file_bytesio, self.filename
+        )
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert file_info["size"] == len(self.file_content)
         assert file_path == str(upload_dir / self.filename)
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
@@ -97,6 +100,76 @@ class TestLocalStorageProvider:
         assert not (upload_dir / self.filename_extra).exists()
 
 
+class TestUploadWriter:
+    file_content = b"0123456789"
+
+    def get_s3_client(self):
+        s3_client = MagicMock()
+        s3_client.put_object.return_value = {"ETag": "single"}
+        s3_client.create_multipart_upload.return_value = {"UploadId": "upload"}
+        s3_client.upload_part.side_effect = lambda **kwargs: {
+            "ETag": f"part-{kwargs['PartNumber']}"
+        }
+        s3_client.complete_multipart_upload.return_value = {"ETag": "multipart"}
+        return s3_client
+
+    def test_write_file_streams_chunks(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(provider, "UPLOAD_CHUNK_SIZE", 4)
+        s3_client = self.get_s3_client()
+        writer = provider.S3UploadWriter(s3_client, "my-bucket", "test.txt")
+
+        file_info = provider.write_file(
+            io.BytesIO(self.file_content), str(tmp_path / "test.txt"), writer
+        )
+        assert file_info == {
+            "size": len(self.file_content),
+            "sha256": hashlib.sha256(self.file_content).hexdigest(),
+        }
+        assert (tmp_path / "test.txt").read_bytes() == self.file_content
+        assert [
+            call.kwargs["Body"] for call in s3_client.upload_part.call_args_list
+        ] == [b"0123", b"4567", b"89"]
+        s3_client.complete_multipart_upload.assert_called_once_with(
+            Bucket="my-bucket",
+            Key="test.txt",
+            UploadId="upload",
+            MultipartUpload={
+                "Parts": [
+                    {"ETag": "part-1", "PartNumber": 1},
+                    {"ETag": "part-2", "PartNumber": 2},
+                    {"ETag": "part-3", "PartNumber": 3},
+                ]
+            },
+        )
+        assert writer.etag == "multipart"
+
+    def test_small_files_are_uploaded_at_once(self, tmp_path):
+        s3_client = self.get_s3_client()
+        writer = provider.S3UploadWriter(s3_client, "my-bucket", "test.txt")
+
+        provider.write_file(
+            io.BytesIO(self.file_content), str(tmp_path / "test.txt"), writer
+        )
+        s3_client.put_object.assert_called_once_with(
+            Bucket="my-bucket", Key="test.txt", Body=self.file_content
+        )
+        s3_client.create_multipart_upload.assert_not_called()
+        assert writer.etag == "single"
+
+    def test_failed_uploads_are_aborted(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(provider, "UPLOAD_CHUNK_SIZE", 4)
+        s3_client = self.get_s3_client()
+        s3_client.complete_multipart_upload.side_effect = Exception("Upload failed")
+        writer = provider.S3UploadWriter(s3_client, "my-bucket", "test.txt")
+
+        with pytest.raises(Exception, match="Upload failed"):
+            provider.write_file(
+                io.BytesIO(self.file_content), str(tmp_path / "test.txt"), writer
+            )
+        s3_client.abort_multipart_upload.assert_called_once()
+        assert not (tmp_path / "test.txt").exists()
+
+
 @mock_aws
 class TestS3StorageProvider:
 
@@ -116,7 +189,7 @@ class TestS3StorageProvider:
         with pytest.raises(Exception):
             self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
-        contents, s3_file_path = self.Storage.upload_file(
+        file_info, s3_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         object = self.s3_client.Object(self.Storage.bucket_name, self.filename)
@@ -124,7 +197,7 @@ class TestS3StorageProvider:
         # local checks
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert file_info["size"] == len(self.file_content)
         assert s3_file_path == "s3://" + self.Storage.bucket_name + "/" + self.filename
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
@@ -132,7 +205,7 @@ class TestS3StorageProvider:
     def test_get_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
-        contents, s3_file_path = self.Storage.upload_file(
+        file_info, s3_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         file_path = self.Storage.get_file(s3_file_path)
@@ -142,7 +215,7 @@ class TestS3StorageProvider:
     def test_delete_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
-        contents, s3_file_path = self.Storage.upload_file(
+        file_info, s3_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         assert (upload_dir / self.filename).exists()
@@ -229,7 +302,7 @@ class TestGCSStorageProvider:
         with pytest.raises(Exception):
             self.Storage.bucket = monkeypatch(self.Storage, "bucket", None)
             self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
-        contents, gcs_file_path = self.Storage.upload_file(
+        file_info, gcs_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         object = self.Storage.bucket.get_blob(self.filename)
@@ -237,7 +310,7 @@ class TestGCSStorageProvider:
         # local checks
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert file_info["size"] == len(self.file_content)
         assert gcs_file_path == "gs://" + self.Storage.bucket_name + "/" + self.filename
         # test error if file is empty
         with pytest.raises(ValueError):
@@ -245,7 +318,7 @@ class TestGCSStorageProvider:
 
     def test_get_file(self, monkeypatch, tmp_path, setup):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        contents, gcs_file_path = self.Storage.upload_file(
+        file_info, gcs_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         file_path = self.Storage.get_file(gcs_file_path)
@@ -254,7 +327,7 @@ class TestGCSStorageProvider:
 
     def test_delete_file(self, monkeypatch, tmp_path, setup):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        contents, gcs_file_path = self.Storage.upload_file(
+        file_info, gcs_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         # ensure that local directory has the uploaded file as well
@@ -348,7 +421,7 @@ class TestAzureStorageProvider:
         # Reset side effect and create container
         self.Storage.container_client.get_blob_client.side_effect = None
         self.Storage.create_container()
-        contents, azure_file_path = self.Storage.upload_file(
+        file_info, azure_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
 
@@ -357,7 +430,7 @@ class TestAzureStorageProvider:
         self.Storage.container_client.get_blob_client().upload_blob.assert_called_once_with(
             self.file_content, overwrite=True
         )
-        assert contents == self.file_content
+        assert file_info["size"] == len(self.file_content)
         assert (
             azure_file_path
             == f"https://myaccount.blob.core.windows.net/{self.Storage.container_name}/{self.filename}"
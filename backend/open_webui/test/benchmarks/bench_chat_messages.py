@@ -0,0 +1,80 @@
+"""
+Benchmark of single-message chat updates.
+
+Creates chats with 2000 messages in a temporary SQLite database and measures
+`Chats.upsert_message_by_id_and_message_id`, as done for every streamed update
+with ENABLE_REALTIME_CHAT_SAVE, with messages stored in the chat JSON and in
+the chat_message table. Reading the whole chat back is measured as well.
+
+Usage: python -m open_webui.test.benchmarks.bench_chat_messages
+"""
+
+import importlib
+import os
+import tempfile
+import time
+
+DATA_DIR = tempfile.mkdtemp()
+os.environ["DATA_DIR"] = DATA_DIR
+os.environ["DATABASE_URL"] = f"sqlite:///{DATA_DIR}/webui.db"
+
+# Importing the config runs the migrations
+importlib.import_module("open_webui.config")
+
+from open_webui.models import chats
+from open_webui.models.chats import ChatForm, Chats
+
+MESSAGES = 2000
+UPDATES = 200
+READS = 20
+
+
+def make_chat():
+    messages = {}
+    for idx in range(MESSAGES):
+        messages[f"m{idx}"] = {
+            "id": f"m{idx}",
+            "parentId": f"m{idx - 1}" if idx else None,
+            "childrenIds": [f"m{idx + 1}"],
+            "role": "user" if idx % 2 == 0 else "assistant",
+            "content": f"Message {idx}. " + "Lorem ipsum dolor sit amet. " * 20,
+            "timestamp": idx,
+        }
+    return {
+        "title": "Benchmark",
+        "history": {"messages": messages, "currentId": f"m{MESSAGES - 1}"},
+        "messages": list(messages.values()),
+    }
+
+
+def bench(name, enabled):
+    chats.ENABLE_CHAT_MESSAGE_TABLE = enabled
+    chat_id = Chats.insert_new_chat("user", ChatForm(chat=make_chat())).id
+
+    content = ""
+    start = time.perf_counter()
+    for idx in range(UPDATES):
+        content += f"token{idx} "
+        Chats.upsert_message_by_id_and_message_id(
+            chat_id, "response", {"role": "assistant", "content": content}
+        )
+    update_ms = (time.perf_counter() - start) / UPDATES * 1000
+
+    start = time.perf_counter()
+    for _ in range(READS):
+        chat = Chats.get_chat_by_id(chat_id)
+    read_ms = (time.perf_counter() - start) / READS * 1000
+
+    assert len(chat.chat["history"]["messages"]) == MESSAGES + 1
+    assert chat.chat["history"]["messages"]["response"]["content"] == content
+    print(f"{name:<14} {update_ms:8.2f} ms/update  {read_ms:8.2f} ms/read")
+
+
+def main():
+    print(f"{MESSAGES} messages, {UPDATES} updates of one message")
+    bench("chat JSON", False)
+    bench("chat_message", True)
+
+
+if __name__ == "__main__":
+    main()
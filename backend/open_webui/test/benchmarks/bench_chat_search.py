@@ -0,0 +1,113 @@
+"""
+Benchmark of sidebar chat search.
+
+Creates 5000 chats of 20 messages for one user in a temporary SQLite database
+and compares the previous search, scanning the messages of every chat with
+JSON1 `json_each`, against `Chats.get_chats_by_user_id_and_search_text` using
+the chat_search full-text index.
+
+Usage: python -m open_webui.test.benchmarks.bench_chat_search
+"""
+
+import importlib
+import os
+import random
+import tempfile
+import time
+
+DATA_DIR = tempfile.mkdtemp()
+os.environ["DATA_DIR"] = DATA_DIR
+os.environ["DATABASE_URL"] = f"sqlite:///{DATA_DIR}/webui.db"
+
+# Importing the config runs the migrations
+importlib.import_module("open_webui.config")
+
+from open_webui.internal.db import get_db
+from open_webui.models.chats import Chat, ChatImportForm, Chats
+from sqlalchemy import or_, text
+
+CHATS = 5000
+MESSAGES = 20
+RUNS = 20
+VOCABULARY = 20000
+
+random.seed(0)
+WORDS = [
+    "".join(random.choices("abcdefghijklmnopqrstuvwxyz", k=random.randint(3, 9)))
+    for _ in range(VOCABULARY)
+]
+# A common word, two rare ones and one that is never used
+QUERIES = [WORDS[0], WORDS[1000], f"{WORDS[2000]} {WORDS[3000]}", "zzzzzzzzzz"]
+
+
+# Zipf-like word frequencies
+WEIGHTS = [1 / (rank + 1) for rank in range(VOCABULARY)]
+
+
+def setup():
+    forms = []
+    for idx in range(CHATS):
+        messages = {
+            f"m{m}": {
+                "id": f"m{m}",
+                "role": "user" if m % 2 == 0 else "assistant",
+                "content": " ".join(random.choices(WORDS, weights=WEIGHTS, k=60)),
+            }
+            for m in range(MESSAGES)
+        }
+        forms.append(
+            ChatImportForm(
+                chat={
+                    "title": f"Chat {idx}",
+                    "history": {"messages": messages, "currentId": "m0"},
+                    "messages": list(messages.values()),
+                }
+            )
+        )
+    for idx in range(0, CHATS, 500):
+        Chats.import_chats("user", forms[idx : idx + 500])
+
+
+def json_scan(search_text):
+    with get_db() as db:
+        return (
+            db.query(Chat)
+            .filter(Chat.user_id == "user", Chat.archived == False)
+            .filter(
+                or_(
+                    Chat.title.ilike(f"%{search_text}%"),
+                    text(
+                        "EXISTS (SELECT 1 FROM json_each(Chat.chat, '$.messages') "
+                        "AS message WHERE LOWER(message.value->>'content') "
+                        "LIKE '%' || :content_key || '%')"
+                    ),
+                ).params(content_key=search_text)
+            )
+            .order_by(Chat.updated_at.desc())
+            .limit(60)
+            .all()
+        )
+
+
+def full_text(search_text):
+    return Chats.get_chats_by_user_id_and_search_text("user", search_text)
+
+
+def bench(name, search):
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        for query in QUERIES:
+            search(query)
+    ms = (time.perf_counter() - start) / (RUNS * len(QUERIES)) * 1000
+    print(f"{name:<12} {ms:8.2f} ms/search")
+
+
+def main():
+    setup()
+    print(f"{CHATS} chats of {MESSAGES} messages")
+    bench("json_each", json_scan)
+    bench("full-text", full_text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark of streamed content serialization in `process_chat_response`.
+
+Replays a synthetic 10k-chunk response (reasoning, text, tool calls, text) and
+compares re-serializing every block per chunk with `ContentBlocksSerializer`,
+including the bytes sent per event in full-content and `content_delta` mode.
+
+Usage: python -m open_webui.test.benchmarks.bench_content_blocks
+"""
+
+import json
+import time
+
+from open_webui.utils.content_blocks import (
+    ContentBlocksSerializer,
+    serialize_content_blocks,
+)
+
+CHUNKS = 10_000
+TOKEN = "lorem "
+
+
+def generate_stream():
+    """Yield the content blocks after each chunk, mutated like the middleware does."""
+    content_blocks = [{"type": "text", "content": ""}]
+
+    phases = [
+        ("reasoning", CHUNKS * 2 // 10),
+        ("text", CHUNKS * 3 // 10),
+        ("tool_calls", CHUNKS * 1 // 10),
+        ("text", CHUNKS * 4 // 10),
+    ]
+
+    for phase, count in phases:
+        if phase == "reasoning":
+            block = {
+                "type": "reasoning",
+                "start_tag": "<think>",
+                "end_tag": "</think>",
+                "attributes": {"type": "reasoning_content"},
+                "content": "",
+                "started_at": time.time(),
+            }
+            content_blocks.append(block)
+            for i in range(count):
+                block["content"] += TOKEN + ("\n" if i % 20 == 0 else "")
+                yield content_blocks
+            block["ended_at"] = block["started_at"] + 3
+            block["duration"] = 3
+        elif phase == "text":
+            content_blocks.append({"type": "text", "content": ""})
+            for _ in range(count):
+                content_blocks[-1]["content"] += TOKEN
+                yield content_blocks
+            content_blocks[-1]["content"] = content_blocks[-1]["content"].strip()
+        elif phase == "tool_calls":
+            tool_calls = [
+                {
+                    "id": f"call_{i}",
+                    "function": {"name": "search", "arguments": ""},
+                }
+                for i in range(3)
+            ]
+            block = {"type": "tool_calls", "content": tool_calls}
+            content_blocks.append(block)
+            for i in range(count):
+                tool_calls[i % 3]["function"]["arguments"] += '{"q": 1}'
+                yield content_blocks
+            block["results"] = [
+                {"tool_call_id": tool_call["id"], "content": "result " * 200}
+                for tool_call in tool_calls
+            ]
+            yield content_blocks
+
+
+def run(label, serialize):
+    elapsed = 0.0
+    sent = 0
+    for content_blocks in generate_stream():
+        start = time.perf_counter()
+        data = serialize(content_blocks)
+        elapsed += time.perf_counter() - start
+        sent += len(json.dumps(data))
+    print(f"{label:<28} {elapsed * 1000:>10.1f} ms {sent / 1024 / 1024:>10.2f} MiB")
+    return elapsed
+
+
+def main():
+    print(f"{'mode':<28} {'serialize':>13} {'socket bytes':>14}")
+
+    baseline = run(
+        "full re-serialize",
+        lambda content_blocks: {"content": serialize_content_blocks(content_blocks)},
+    )
+
+    serializer = ContentBlocksSerializer()
+    incremental = run(
+        "incremental",
+        lambda content_blocks: {"content": serializer.serialize(content_blocks)},
+    )
+
+    serializer = ContentBlocksSerializer()
+    run(
+        "incremental + content_delta",
+        lambda content_blocks: serializer.get_content_delta(
+            serializer.serialize(content_blocks)
+        ),
+    )
+
+    print(f"speedup: {baseline / incremental:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
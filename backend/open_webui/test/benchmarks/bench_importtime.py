@@ -0,0 +1,100 @@
+"""
+Import time profile of a worker's startup.
+
+Imports IMPORTTIME_MODULE (`open_webui.main` by default) in a fresh
+interpreter with `python -X importtime` and reports the total import time,
+the top-level packages that took the longest and the heavy dependencies that
+were imported eagerly. Those are loaded on first use or when their feature is
+enabled, so any of them showing up here is a startup regression.
+
+Exits with status 1 when a heavy dependency is imported or, with
+IMPORTTIME_BUDGET_MS set, when the total import time exceeds it.
+
+Usage: python -m open_webui.test.benchmarks.bench_importtime
+"""
+
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+MODULE = os.environ.get("IMPORTTIME_MODULE", "open_webui.main")
+BUDGET_MS = float(os.environ.get("IMPORTTIME_BUDGET_MS", "0"))
+TOP = 15
+
+# Dependencies only needed by RAG, audio or a specific loader or backend
+HEAVY_MODULES = [
+    "sentence_transformers",
+    "torch",
+    "transformers",
+    "tiktoken",
+    "pydub",
+    "langchain.retrievers",
+    "langchain_community.document_loaders",
+    "langchain_text_splitters",
+    "playwright",
+    "open_webui.retrieval.loaders.main",
+    "open_webui.retrieval.web.utils",
+]
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def get_import_times(module):
+    """
+    (self us, cumulative us, depth, name) of every module `module` imports,
+    and the names of the modules loaded afterwards.
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import sys, {module}; print('\\n'.join(sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr.splitlines()[-1], file=sys.stderr)
+        sys.exit(result.returncode)
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append(
+                (int(self_us), int(cumulative_us), (len(indent) - 1) // 2, name)
+            )
+    return entries, set(result.stdout.splitlines())
+
+
+def main():
+    entries, loaded = get_import_times(MODULE)
+
+    total_ms = sum(cumulative for _, cumulative, depth, _ in entries if depth == 0)
+    total_ms /= 1000
+
+    packages = defaultdict(int)
+    for self_us, _, _, name in entries:
+        packages[name.split(".")[0]] += self_us
+
+    print(f"import {MODULE}: {total_ms:.0f} ms, {len(entries)} modules")
+    print()
+    print(f"{'package':<32} {'ms':>8}")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:TOP]:
+        print(f"{package:<32} {self_us / 1000:8.1f}")
+
+    eager = [module for module in HEAVY_MODULES if module in loaded]
+    print()
+    print(f"heavy modules imported eagerly: {', '.join(eager) or 'none'}")
+
+    if eager or (BUDGET_MS and total_ms > BUDGET_MS):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark of merging query results of several collections and queries.
+
+Merges 10, 100 and 1000 result sets of 20 chunks each, drawn from a pool of
+chunks so a third of the candidates are duplicates, into the top 10. Compares
+the previous implementation, which hashed every chunk with SHA-256 and sorted
+all of them, against `merge_and_sort_query_results` with both fusion modes.
+
+Usage: python -m open_webui.test.benchmarks.bench_merge_results
+"""
+
+import hashlib
+import random
+import time
+
+from open_webui.retrieval.utils import merge_and_sort_query_results
+
+RESULT_SETS = [10, 100, 1000]
+CHUNKS_PER_SET = 20
+K = 10
+RUNS = 20
+
+
+def merge_and_sort_query_results_sha256(query_results: list[dict], k: int) -> dict:
+    combined = dict()
+
+    for data in query_results:
+        if (
+            len(data.get("distances", [])) == 0
+            or len(data.get("documents", [])) == 0
+            or len(data.get("metadatas", [])) == 0
+        ):
+            continue
+
+        distances = data["distances"][0]
+        documents = data["documents"][0]
+        metadatas = data["metadatas"][0]
+
+        for distance, document, metadata in zip(distances, documents, metadatas):
+            if isinstance(document, str):
+                doc_hash = hashlib.sha256(document.encode()).hexdigest()
+
+                if doc_hash not in combined.keys():
+                    combined[doc_hash] = (distance, document, metadata)
+                    continue
+
+                if distance > combined[doc_hash][0]:
+                    combined[doc_hash] = (distance, document, metadata)
+
+    combined = list(combined.values())
+    combined.sort(key=lambda x: x[0], reverse=True)
+
+    sorted_distances, sorted_documents, sorted_metadatas = (
+        zip(*combined[:k]) if combined else ([], [], [])
+    )
+
+    return {
+        "distances": [list(sorted_distances)],
+        "documents": [list(sorted_documents)],
+        "metadatas": [list(sorted_metadatas)],
+    }
+
+
+def get_query_results(result_sets):
+    random.seed(0)
+    pool = [
+        f"chunk {idx} " + "lorem ipsum dolor sit amet " * 40
+        for idx in range(result_sets * CHUNKS_PER_SET * 2 // 3)
+    ]
+
+    query_results = []
+    for _ in range(result_sets):
+        documents = random.sample(pool, CHUNKS_PER_SET)
+        distances = sorted((random.random() for _ in documents), reverse=True)
+        query_results.append(
+            {
+                "distances": [distances],
+                "documents": [documents],
+                "metadatas": [[{"source": document[:10]} for document in documents]],
+            }
+        )
+    return query_results
+
+
+def bench(fn, query_results):
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        result = fn(query_results)
+    return (time.perf_counter() - start) / RUNS * 1000, result
+
+
+def main():
+    print(f"{'result sets':>11} {'sha256 ms':>10} {'max ms':>8} {'rrf ms':>8}")
+    for result_sets in RESULT_SETS:
+        query_results = get_query_results(result_sets)
+
+        previous, expected = bench(
+            lambda results: merge_and_sort_query_results_sha256(results, k=K),
+            query_results,
+        )
+        merged, result = bench(
+            lambda results: merge_and_sort_query_results(results, k=K, fusion="max"),
+            query_results,
+        )
+        fused, _ = bench(
+            lambda results: merge_and_sort_query_results(results, k=K, fusion="rrf"),
+            query_results,
+        )
+        assert result == expected
+
+        print(f"{result_sets:>11} {previous:10.2f} {merged:8.2f} {fused:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark of model access filtering for `/api/models`.
+
+Creates 1000 workspace models shared with random subsets of 50 groups in a
+temporary SQLite database and compares filtering them for a user in 10 of the
+groups with one `Models.get_model_by_id` query per model against the batched
+`get_filtered_models`.
+
+Usage: python -m open_webui.test.benchmarks.bench_model_access
+"""
+
+import os
+import random
+import tempfile
+import time
+
+DATA_DIR = tempfile.mkdtemp()
+os.environ["DATA_DIR"] = DATA_DIR
+os.environ["DATABASE_URL"] = f"sqlite:///{DATA_DIR}/webui.db"
+
+from open_webui.internal.db import get_db
+from open_webui.models.groups import Group, GroupMember, Groups
+from open_webui.models.models import Model, Models
+from open_webui.models.users import UserModel
+from open_webui.utils.models import get_filtered_models
+
+MODELS = 1000
+GROUPS = 50
+USER_GROUPS = 10
+RUNS = 5
+
+
+def setup():
+    random.seed(0)
+    group_ids = [f"group-{idx}" for idx in range(GROUPS)]
+    now = int(time.time())
+
+    with get_db() as db:
+        for group_id in group_ids:
+            db.add(
+                Group(
+                    id=group_id,
+                    user_id="admin",
+                    name=group_id,
+                    description="",
+                    created_at=now,
+                    updated_at=now,
+                )
+            )
+        for group_id in random.sample(group_ids, USER_GROUPS):
+            db.add(
+                GroupMember(
+                    id=f"member-{group_id}",
+                    group_id=group_id,
+                    user_id="user",
+                    created_at=now,
+                    updated_at=now,
+                )
+            )
+        for idx in range(MODELS):
+            db.add(
+                Model(
+                    id=f"model-{idx}",
+                    user_id="admin",
+                    base_model_id="base",
+                    name=f"model-{idx}",
+                    meta={},
+                    params={},
+                    access_control={
+                        "read": {
+                            "group_ids": random.sample(group_ids, 3),
+                            "user_ids": [],
+                        },
+                        "write": {"group_ids": [], "user_ids": []},
+                    },
+                    is_active=True,
+                    created_at=now,
+                    updated_at=now,
+                )
+            )
+        db.commit()
+
+    return [{"id": f"model-{idx}", "name": f"model-{idx}"} for idx in range(MODELS)]
+
+
+def get_filtered_models_per_model(models, user):
+    """The previous implementation: one query per model and list scans."""
+    user_group_ids = {group.id for group in Groups.get_groups_by_member_id(user.id)}
+    filtered_models = []
+    for model in models:
+        model_info = Models.get_model_by_id(model["id"])
+        if model_info:
+            permitted = model_info.access_control["read"]
+            if (
+                user.id == model_info.user_id
+                or user.id in permitted["user_ids"]
+                or any(
+                    group_id in permitted["group_ids"] for group_id in user_group_ids
+                )
+            ):
+                filtered_models.append(model)
+    return filtered_models
+
+
+def bench(name, fn, models, user):
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        result = fn(models, user)
+    elapsed = (time.perf_counter() - start) / RUNS
+    print(f"{name:<12} {elapsed * 1000:9.1f} ms/request  {len(result)} models")
+    return result
+
+
+def main():
+    models = setup()
+    user = UserModel(
+        id="user",
+        name="user",
+        email="user@example.com",
+        role="user",
+        profile_image_url="",
+        last_active_at=0,
+        updated_at=0,
+        created_at=0,
+    )
+
+    print(f"{MODELS} models x {GROUPS} groups, user in {USER_GROUPS} groups")
+    previous = bench("per-model", get_filtered_models_per_model, models, user)
+    batched = bench("batched", get_filtered_models, models, user)
+    assert previous == batched
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Microbenchmark of the per-chunk overhead of stream filters.
+
+Creates 3 filter functions with valves and user valves in a temporary SQLite
+database and runs 2000 stream chunks through them, comparing the previous
+`process_filter_functions`, which read the valves, user valves and handler
+signature of every filter on every chunk, against a `FilterPipeline`
+prepared once for the response.
+
+Usage: python -m open_webui.test.benchmarks.bench_stream_filters
+"""
+
+import asyncio
+import inspect
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+DATA_DIR = tempfile.mkdtemp()
+os.environ["DATA_DIR"] = DATA_DIR
+os.environ["DATABASE_URL"] = f"sqlite:///{DATA_DIR}/webui.db"
+
+from open_webui.models.functions import FunctionForm, FunctionMeta, Functions
+from open_webui.models.users import Users
+from open_webui.utils.filter import FilterPipeline, get_function_module
+
+FILTERS = 3
+CHUNKS = 2000
+
+CONTENT = """
+from pydantic import BaseModel
+
+
+class Filter:
+    class Valves(BaseModel):
+        priority: int = 0
+        replace: str = ""
+
+    class UserValves(BaseModel):
+        enabled: bool = True
+
+    def __init__(self):
+        self.valves = self.Valves()
+
+    def stream(self, event, __user__):
+        return event
+"""
+
+
+async def process_filter_functions_per_chunk(
+    request, filter_functions, filter_type, form_data, extra_params
+):
+    for function in filter_functions:
+        filter_id = function.id
+        function_module = get_function_module(
+            request, filter_id, load_from_db=(filter_type != "stream")
+        )
+        handler = getattr(function_module, filter_type, None)
+        if not handler:
+            continue
+
+        if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
+            valves = Functions.get_function_valves_by_id(filter_id)
+            function_module.valves = function_module.Valves(
+                **(valves if valves else {})
+            )
+
+        sig = inspect.signature(handler)
+        params = {"event": form_data} | {
+            k: v
+            for k, v in {**extra_params, "__id__": filter_id}.items()
+            if k in sig.parameters
+        }
+        if "__user__" in sig.parameters and hasattr(function_module, "UserValves"):
+            params["__user__"]["valves"] = function_module.UserValves(
+                **Functions.get_user_valves_by_id_and_user_id(
+                    filter_id, params["__user__"]["id"]
+                )
+            )
+
+        if inspect.iscoroutinefunction(handler):
+            form_data = await handler(**params)
+        else:
+            form_data = handler(**params)
+
+    return form_data, {}
+
+
+def setup():
+    user = Users.insert_new_user("user", "user", "user@example.com", role="user")
+
+    filter_functions = []
+    for idx in range(FILTERS):
+        function_id = f"filter_{idx}"
+        Functions.insert_new_function(
+            "user",
+            "filter",
+            FunctionForm(
+                id=function_id,
+                name=function_id,
+                content=CONTENT,
+                meta=FunctionMeta(description=""),
+            ),
+        )
+        Functions.update_function_valves_by_id(function_id, {"priority": idx})
+        Functions.update_user_valves_by_id_and_user_id(
+            function_id, "user", {"enabled": True}
+        )
+        filter_functions.append(Functions.get_function_by_id(function_id))
+
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace()))
+    # Stream filters use the modules the inlet loaded
+    for function in filter_functions:
+        get_function_module(request, function.id)
+
+    return request, filter_functions, {"__user__": user.model_dump()}
+
+
+async def bench(name, run):
+    start = time.perf_counter()
+    for idx in range(CHUNKS):
+        await run({"choices": [{"delta": {"content": f"token {idx}"}}]})
+    elapsed = (time.perf_counter() - start) / CHUNKS
+    print(f"{name:<12} {elapsed * 1e6:9.1f} us/chunk")
+
+
+async def main():
+    request, filter_functions, extra_params = setup()
+
+    print(f"{FILTERS} stream filters, {CHUNKS} chunks")
+    await bench(
+        "per-chunk",
+        lambda event: process_filter_functions_per_chunk(
+            request, filter_functions, "stream", event, extra_params
+        ),
+    )
+    pipeline = FilterPipeline(request, filter_functions, "stream")
+    await bench("pipeline", lambda event: pipeline(event, extra_params))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
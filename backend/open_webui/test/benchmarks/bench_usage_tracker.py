@@ -0,0 +1,120 @@
+"""
+Load test of the "usage" heartbeat tracking.
+
+Simulates 10000 connected sessions spread over 50 models sending a heartbeat
+each round, with a cleanup sweep after every round in which 5% of the sessions
+went away. Compares the previous USAGE_POOL, a dict of JSON-style
+`{sid: {"updated_at": ...}}` values per model rewritten on every heartbeat and
+sweep, against `UsageTracker`.
+
+Runs in memory by default. Set REDIS_URL to run both against Redis (the
+previous pool through `RedisDict`), keys are written under a random prefix
+and removed afterwards.
+
+Usage: python -m open_webui.test.benchmarks.bench_usage_tracker
+"""
+
+import asyncio
+import os
+import random
+import time
+import uuid
+
+from open_webui.socket.utils import RedisDict, UsageTracker
+from open_webui.utils.redis import get_redis_connection
+
+SESSIONS = 10000
+MODELS = 50
+ROUNDS = 5
+TIMEOUT = 3
+REDIS_URL = os.environ.get("REDIS_URL", "")
+PREFIX = f"bench:{uuid.uuid4()}"
+
+
+def get_heartbeats(now):
+    random.seed(0)
+    model_ids = [f"model-{idx}" for idx in range(MODELS)]
+    sessions = [(f"sid-{idx}", random.choice(model_ids)) for idx in range(SESSIONS)]
+
+    for round in range(ROUNDS):
+        # Sessions that disconnected stop sending heartbeats and expire
+        alive = sessions[: int(SESSIONS * (1 - 0.05 * round))]
+        yield now + round * TIMEOUT, alive
+
+
+async def bench_usage_pool(usage_pool, now):
+    # The heartbeat and cleanup of the previous socket/main.py
+    for current_time, sessions in get_heartbeats(now):
+        for sid, model_id in sessions:
+            usage_pool[model_id] = {
+                **(usage_pool[model_id] if model_id in usage_pool else {}),
+                sid: {"updated_at": current_time},
+            }
+
+        for model_id, connections in list(usage_pool.items()):
+            expired_sids = [
+                sid
+                for sid, details in connections.items()
+                if current_time - details["updated_at"] > TIMEOUT
+            ]
+            for sid in expired_sids:
+                del connections[sid]
+            if not connections:
+                del usage_pool[model_id]
+            else:
+                usage_pool[model_id] = connections
+
+    return sorted(usage_pool.keys())
+
+
+async def bench_usage_tracker(tracker, now):
+    for current_time, sessions in get_heartbeats(now):
+        for sid, model_id in sessions:
+            await tracker.touch(model_id, sid, now=current_time)
+        await tracker.expire(now=current_time)
+
+    return sorted(await tracker.get_models_in_use(now=current_time))
+
+
+async def bench(name, run):
+    start = time.perf_counter()
+    models_in_use = await run
+    elapsed = time.perf_counter() - start
+    heartbeats = sum(len(sessions) for _, sessions in get_heartbeats(0))
+    print(
+        f"{name:<14} {elapsed * 1000:9.1f} ms total "
+        f"{elapsed / heartbeats * 1e6:8.2f} us/heartbeat "
+        f"({len(models_in_use)} models in use)"
+    )
+
+
+async def main():
+    now = time.time()
+    print(f"{SESSIONS} sessions on {MODELS} models, {ROUNDS} heartbeat rounds")
+
+    if REDIS_URL:
+        usage_pool = RedisDict(f"{PREFIX}:usage_pool", redis_url=REDIS_URL)
+        redis = get_redis_connection(
+            REDIS_URL, None, decode_responses=True, async_mode=True
+        )
+        tracker = UsageTracker(
+            redis=redis, redis_key_prefix=f"{PREFIX}:usage", timeout=TIMEOUT
+        )
+    else:
+        usage_pool = {}
+        redis = None
+        tracker = UsageTracker(timeout=TIMEOUT)
+
+    try:
+        await bench("usage_pool", bench_usage_pool(usage_pool, now))
+        await bench("usage_tracker", bench_usage_tracker(tracker, now))
+    finally:
+        if redis:
+            usage_pool.clear()
+            keys = [key async for key in redis.scan_iter(f"{PREFIX}:*")]
+            if keys:
+                await redis.delete(*keys)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
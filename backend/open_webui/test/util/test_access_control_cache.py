@@ -0,0 +1,72 @@
+from unittest.mock import patch
+
+from open_webui.models.groups import GroupModel, Groups
+from open_webui.utils.access_control import (
+    USER_ACCESS_CACHE,
+    get_permissions,
+    get_user_group_ids,
+    has_access,
+)
+
+
+def make_group(group_id, permissions=None):
+    return GroupModel(
+        id=group_id,
+        user_id="admin",
+        name=group_id,
+        description="",
+        permissions=permissions,
+        user_ids=["user"],
+        created_at=0,
+        updated_at=0,
+    )
+
+
+def patch_groups(*groups):
+    return patch.object(Groups, "get_groups_by_member_id", return_value=list(groups))
+
+
+class TestUserAccessCache:
+    """Test the per-user group membership and permission cache"""
+
+    def setup_method(self):
+        USER_ACCESS_CACHE.clear()
+
+    def test_group_ids_are_cached(self):
+        with patch_groups(make_group("a"), make_group("b")) as get_groups:
+            for _ in range(10):
+                assert get_user_group_ids("user") == {"a", "b"}
+                assert has_access(
+                    "user", "read", {"read": {"group_ids": ["b"], "user_ids": []}}
+                )
+            get_groups.assert_called_once_with("user")
+
+        # Callers get their own copy
+        get_user_group_ids("user").add("c")
+        assert get_user_group_ids("user") == {"a", "b"}
+
+    def test_group_changes_invalidate(self):
+        with patch_groups(make_group("a")):
+            assert get_user_group_ids("user") == {"a"}
+
+        Groups.version.bump()
+
+        with patch_groups(make_group("b")) as get_groups:
+            assert get_user_group_ids("user") == {"b"}
+            get_groups.assert_called_once()
+
+    def test_permissions_follow_default_permissions(self):
+        defaults = {"chat": {"delete": False, "edit": False}}
+        group = make_group("a", permissions={"chat": {"delete": True}})
+
+        with patch_groups(group) as get_groups:
+            permissions = get_permissions("user", defaults)
+            assert permissions == {"chat": {"delete": True, "edit": False}}
+            assert get_permissions("user", defaults) is permissions
+
+            # Config updates replace the defaults object
+            defaults = {"chat": {"delete": False, "edit": True}}
+            assert get_permissions("user", defaults) == {
+                "chat": {"delete": True, "edit": True}
+            }
+            get_groups.assert_called_once()
@@ -0,0 +1,99 @@
+import json
+from unittest.mock import MagicMock, patch
+
+from open_webui.config import AppConfig, PersistentConfig
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.calls = 0
+        self.published = []
+        self.handlers = {}
+
+    def get(self, key):
+        self.calls += 1
+        return self.store.get(key)
+
+    def set(self, key, value):
+        self.store[key] = value
+
+    def incr(self, key):
+        self.store[key] = str(int(self.store.get(key, 0)) + 1)
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+        for handler in self.handlers.get(channel, []):
+            handler({"channel": channel, "data": message})
+
+    def pipeline(self):
+        redis = self
+        pipe = MagicMock()
+        keys = []
+        pipe.get.side_effect = keys.append
+        pipe.execute.side_effect = lambda: (
+            setattr(redis, "calls", redis.calls + 1),
+            [redis.store.get(key) for key in keys],
+        )[1]
+        return pipe
+
+    def pubsub(self, **kwargs):
+        pubsub = MagicMock()
+        pubsub.subscribe.side_effect = lambda **handlers: [
+            self.handlers.setdefault(channel, []).append(handler)
+            for channel, handler in handlers.items()
+        ]
+        return pubsub
+
+
+def get_config(redis):
+    with patch("open_webui.config.get_redis_connection", return_value=redis):
+        config = AppConfig(redis_url="redis://localhost", redis_key_prefix="test")
+
+    with patch("open_webui.config.get_config_value", return_value=None):
+        config.TEST_VALUE = PersistentConfig("TEST_VALUE", "test.value", "default")
+        config.OTHER_VALUE = PersistentConfig("OTHER_VALUE", "test.other", 1)
+    return config
+
+
+class TestAppConfig:
+    """Test the Redis synced config snapshot"""
+
+    def test_reads_are_served_locally(self):
+        redis = FakeRedis()
+        redis.store["test:config:TEST_VALUE"] = json.dumps("from redis")
+        config = get_config(redis)
+
+        for _ in range(100):
+            assert config.TEST_VALUE == "from redis"
+            assert config.OTHER_VALUE == 1
+
+        # One version check and one pipelined read of all keys
+        assert redis.calls == 2
+
+    def test_updates_from_other_workers_are_picked_up(self):
+        redis = FakeRedis()
+        config = get_config(redis)
+        other_config = get_config(redis)
+        assert config.TEST_VALUE == "default"
+        assert other_config.TEST_VALUE == "default"
+
+        with patch.object(PersistentConfig, "save"):
+            other_config.TEST_VALUE = "updated"
+
+        assert redis.store["test:config:_version"] == "1"
+        assert ("test:config:_updates", "TEST_VALUE") in redis.published
+        assert config.TEST_VALUE == "updated"
+
+    def test_missed_updates_are_picked_up_after_interval(self):
+        redis = FakeRedis()
+        config = get_config(redis)
+        assert config.TEST_VALUE == "default"
+
+        # Update without announcing it on the pub/sub channel
+        redis.store["test:config:TEST_VALUE"] = json.dumps("updated")
+        redis.incr("test:config:_version")
+        assert config.TEST_VALUE == "default"
+
+        config._redis_version.sync_interval = 0
+        assert config.TEST_VALUE == "updated"
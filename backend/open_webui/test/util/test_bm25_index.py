@@ -0,0 +1,211 @@
+from unittest.mock import MagicMock
+
+from open_webui.retrieval.bm25 import (
+    MAX_SEGMENTS,
+    BM25IndexedVectorDB,
+    BM25IndexStore,
+)
+from open_webui.retrieval.vector.main import GetResult
+
+
+def make_items(*texts, prefix="doc", metadata=None):
+    return [
+        {
+            "id": f"{prefix}-{idx}",
+            "text": text,
+            "vector": [0.0],
+            "metadata": {"file_id": prefix, **(metadata or {})},
+        }
+        for idx, text in enumerate(texts)
+    ]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def incr(self, key):
+        self.store[key] = str(int(self.store.get(key, 0)) + 1)
+        return int(self.store[key])
+
+    def pipeline(self, transaction=True):
+        redis = self
+        results = []
+
+        class Pipeline:
+            def get(self, key):
+                results.append(redis.get(key))
+
+            def incr(self, key):
+                results.append(redis.incr(key))
+
+            def execute(self):
+                return results
+
+        return Pipeline()
+
+
+class FakeVectorDB:
+    def __init__(self):
+        self.collections = {}
+
+    def has_collection(self, collection_name):
+        return collection_name in self.collections
+
+    def insert(self, collection_name, items):
+        collection = self.collections.setdefault(collection_name, {})
+        collection.update({item["id"]: item for item in items})
+
+    def delete(self, collection_name, ids=None, filter=None):
+        collection = self.collections.get(collection_name, {})
+        for id in ids:
+            collection.pop(id, None)
+
+    def delete_collection(self, collection_name):
+        self.collections.pop(collection_name, None)
+
+    def get(self, collection_name):
+        if collection_name not in self.collections:
+            return None
+        items = list(self.collections[collection_name].values())
+        return GetResult(
+            ids=[[item["id"] for item in items]],
+            documents=[[item["text"] for item in items]],
+            metadatas=[[item["metadata"] for item in items]],
+        )
+
+
+def search_ids(index, query, k=10, field="text"):
+    return [record["id"] for record in index.search(query, k=k, field=field)]
+
+
+class TestBM25Index:
+    """Test the persistent BM25 index"""
+
+    def test_build_and_search(self, tmp_path):
+        store = BM25IndexStore(tmp_path)
+        result = GetResult(
+            ids=[["a", "b", "c"]],
+            documents=[
+                [
+                    "The quick brown fox",
+                    "Fox den: the fox and the fox cubs",
+                    "Nothing relevant here",
+                ]
+            ],
+            metadatas=[[{}, {}, {"name": "fox_report.pdf"}]],
+        )
+        loader = MagicMock(return_value=result)
+
+        index = store.get_or_build("collection", loader)
+        assert search_ids(index, "fox") == ["b", "a"]
+        assert search_ids(index, "fox", k=1) == ["b"]
+        assert search_ids(index, "report", field="enriched") == ["c"]
+        assert search_ids(index, "missing") == []
+
+        # The index is persisted and only built once
+        index = BM25IndexStore(tmp_path).get_or_build("collection", loader)
+        assert search_ids(index, "fox") == ["b", "a"]
+        loader.assert_called_once()
+
+    def test_missing_collection(self, tmp_path):
+        store = BM25IndexStore(tmp_path)
+        assert store.get_or_build("collection", lambda: None) is None
+        assert not store.get_index("collection").exists()
+
+    def test_add_upsert_and_delete(self, tmp_path):
+        store = BM25IndexStore(tmp_path)
+        store.add("collection", make_items("alpha", "beta"), create=True)
+        store.add("collection", make_items("alpha gamma", prefix="other"))
+        index = store.get_index("collection")
+        assert len(index) == 3
+        assert sorted(search_ids(index, "alpha")) == ["doc-0", "other-0"]
+
+        # Re-adding an id replaces the previous document
+        store.add("collection", make_items("delta", prefix="other"))
+        assert search_ids(index, "alpha") == ["doc-0"]
+        assert search_ids(index, "delta") == ["other-0"]
+
+        store.delete("collection", ids=["doc-0"])
+        assert search_ids(index, "alpha") == []
+
+        store.delete("collection", filter={"file_id": "other"})
+        assert search_ids(index, "delta") == []
+        assert len(index) == 1
+
+        # Operator filters cannot be applied to the index, so it is dropped
+        store.delete("collection", filter={"file_id": {"$in": ["doc"]}})
+        assert not index.exists()
+
+    def test_segments_are_compacted(self, tmp_path):
+        store = BM25IndexStore(tmp_path)
+        store.add("collection", make_items("seed"), create=True)
+        for idx in range(MAX_SEGMENTS * 2):
+            store.add("collection", make_items(f"term{idx} common", prefix=f"f{idx}"))
+
+        index = store.get_index("collection")
+        manifest = index._read_manifest()
+        assert len(manifest["segments"]) <= MAX_SEGMENTS
+        assert len(list(index.path.glob("segment-*"))) == len(manifest["segments"])
+        assert len(index) == MAX_SEGMENTS * 2 + 1
+        assert len(search_ids(index, "common", k=100)) == MAX_SEGMENTS * 2
+        assert search_ids(index, "term3") == ["f3-0"]
+
+    def test_vector_db_writes_update_index(self, tmp_path):
+        client = MagicMock()
+        client.has_collection.return_value = False
+        store = BM25IndexStore(tmp_path)
+        vector_db = BM25IndexedVectorDB(client, store)
+
+        vector_db.insert(collection_name="collection", items=make_items("alpha"))
+        client.insert.assert_called_once()
+        assert search_ids(store.get_index("collection"), "alpha") == ["doc-0"]
+
+        # Existing collections without an index are left to be built lazily
+        client.has_collection.return_value = True
+        vector_db.insert(collection_name="existing", items=make_items("alpha"))
+        assert not store.get_index("existing").exists()
+
+        vector_db.delete(collection_name="collection", ids=["doc-0"])
+        client.delete.assert_called_once()
+        assert search_ids(store.get_index("collection"), "alpha") == []
+
+        vector_db.delete_collection(collection_name="collection")
+        assert not store.get_index("collection").exists()
+
+    def test_writes_of_other_hosts_are_picked_up(self, tmp_path):
+        client = FakeVectorDB()
+        redis = FakeRedis()
+        stores = [
+            BM25IndexStore(tmp_path / host, redis=redis) for host in ("one", "two")
+        ]
+        hosts = [BM25IndexedVectorDB(client, store) for store in stores]
+
+        def search(store, query):
+            index = store.get_or_build("collection", lambda: client.get("collection"))
+            return sorted(search_ids(index, query)) if index else None
+
+        hosts[0].insert(collection_name="collection", items=make_items("alpha"))
+        assert search(stores[0], "alpha") == ["doc-0"]
+        assert search(stores[1], "alpha") == ["doc-0"]
+
+        # Writes through one host are applied to its index and outdate the others
+        hosts[1].insert(
+            collection_name="collection", items=make_items("alpha", prefix="new")
+        )
+        assert stores[1].get_index("collection").version == stores[1].get_version(
+            "collection"
+        )
+        assert search(stores[0], "alpha") == ["doc-0", "new-0"]
+        assert search(stores[1], "alpha") == ["doc-0", "new-0"]
+
+        hosts[0].delete(collection_name="collection", ids=["doc-0"])
+        assert search(stores[1], "alpha") == ["new-0"]
+        assert search(stores[0], "alpha") == ["new-0"]
+
+        hosts[1].delete_collection(collection_name="collection")
+        assert search(stores[0], "alpha") is None
+        assert not stores[0].get_index("collection").exists()
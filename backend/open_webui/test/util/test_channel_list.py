@@ -0,0 +1,129 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from open_webui.models import channels, messages
+from open_webui.models.channels import (
+    Channel,
+    ChannelMember,
+    Channels,
+    CreateChannelForm,
+)
+from open_webui.models.messages import Message, MessageForm, MessageReaction, Messages
+
+
+@pytest.fixture(params=[False, True], ids=["counted", "counter"])
+def db(request, monkeypatch):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    for table in (Channel, ChannelMember, Message, MessageReaction):
+        table.__table__.create(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    @contextmanager
+    def get_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    for module in (channels, messages):
+        monkeypatch.setattr(module, "get_db", get_db)
+        monkeypatch.setattr(module, "ENABLE_CHANNEL_UNREAD_COUNTER", request.param)
+    return get_db
+
+
+def create_channel(name, type, user_id, user_ids):
+    return Channels.insert_new_channel(
+        CreateChannelForm(name=name, type=type, user_ids=user_ids), user_id
+    ).id
+
+
+def send(channel_id, user_id, content="hello", parent_id=None):
+    return Messages.insert_new_message(
+        MessageForm(content=content, parent_id=parent_id), channel_id, user_id
+    )
+
+
+class TestChannelList:
+    """Test the set-based queries behind the channel list"""
+
+    def test_unread_counts(self, db):
+        first = create_channel("first", "group", "alice", ["bob"])
+        second = create_channel("second", "dm", "alice", ["carol"])
+        empty = create_channel("empty", "group", "alice", [])
+
+        message = send(first, "bob")
+        send(first, "bob", parent_id=message.id)  # replies are not counted
+        send(first, "bob")
+        send(first, "alice")
+        send(second, "carol")
+
+        channel_ids = [first, second, empty, "unknown"]
+        assert Messages.get_unread_message_counts(channel_ids, "alice") == {
+            first: 2,
+            second: 1,
+            empty: 0,
+        }
+        assert Messages.get_unread_message_counts(channel_ids, "bob") == {first: 1}
+
+        Channels.update_member_last_read_at(first, "alice")
+        assert Messages.get_unread_message_counts([first], "alice") == {first: 0}
+
+        latest = send(first, "bob")
+        assert Messages.get_unread_message_counts([first], "alice") == {first: 1}
+
+        Messages.delete_message_by_id(latest.id)
+        assert Messages.get_unread_message_counts([first], "alice") == {first: 0}
+
+        # Matches counting the messages of each channel
+        for channel_id in channel_ids[:3]:
+            member = Channels.get_member_by_channel_and_user_id(channel_id, "alice")
+            assert Messages.get_unread_message_counts([channel_id], "alice")[
+                channel_id
+            ] == Messages.get_unread_message_count(
+                channel_id, "alice", member.last_read_at
+            )
+
+    def test_stale_counters_are_cleared(self, db, monkeypatch):
+        def set_counter_enabled(enabled):
+            for module in (channels, messages):
+                monkeypatch.setattr(module, "ENABLE_CHANNEL_UNREAD_COUNTER", enabled)
+
+        set_counter_enabled(True)
+        channel_id = create_channel("first", "group", "alice", ["bob"])
+        send(channel_id, "bob")
+
+        # Counters aren't maintained while the flag is unset
+        set_counter_enabled(False)
+        send(channel_id, "bob")
+        assert Channels.clear_unread_counters() == 2
+        assert Channels.clear_unread_counters() == 0
+
+        set_counter_enabled(True)
+        assert Messages.get_unread_message_counts([channel_id], "alice") == {
+            channel_id: 2
+        }
+
+    def test_last_message_at_and_members(self, db):
+        first = create_channel("first", "group", "alice", ["bob"])
+        second = create_channel("second", "dm", "alice", ["carol"])
+
+        send(first, "bob")
+        last_message = send(first, "alice")
+
+        assert Messages.get_last_message_at_by_channel_ids([first, second]) == {
+            first: last_message.created_at
+        }
+        members = Channels.get_members_by_channel_ids([first, second])
+        assert sorted(member.user_id for member in members[first]) == ["alice", "bob"]
+        assert sorted(member.user_id for member in members[second]) == [
+            "alice",
+            "carol",
+        ]
+        assert Channels.get_members_by_channel_ids([]) == {}
@@ -0,0 +1,143 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from open_webui.models import channels, messages, users
+from open_webui.models.channels import Channel, ChannelMember
+from open_webui.models.messages import Message, MessageForm, MessageReaction, Messages
+from open_webui.models.users import User, Users
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    for table in (Channel, ChannelMember, Message, MessageReaction, User):
+        table.__table__.create(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    @contextmanager
+    def get_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    for module in (channels, messages, users):
+        monkeypatch.setattr(module, "get_db", get_db)
+
+    statements = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    for user_id in ("alice", "bob"):
+        Users.insert_new_user(user_id, user_id.title(), f"{user_id}@example.com")
+    return statements
+
+
+def send(user_id, content, parent_id=None, reply_to_id=None):
+    return Messages.insert_new_message(
+        MessageForm(content=content, parent_id=parent_id, reply_to_id=reply_to_id),
+        "channel",
+        user_id,
+    )
+
+
+def get_page(limit=50, before=None, before_created_at=None):
+    return Messages.get_message_responses(
+        Messages.get_messages_by_channel_id(
+            "channel", 0, limit, before, before_created_at
+        )
+    )
+
+
+class TestChannelMessages:
+    """Test hydrating pages of channel messages in bulk"""
+
+    def test_page_is_hydrated_in_a_fixed_number_of_queries(self, queries):
+        first = send("alice", "first")
+        send("bob", "reply", parent_id=first.id)
+        latest_reply = send("alice", "another reply", parent_id=first.id)
+        second = send("bob", "second", reply_to_id=first.id)
+        Messages.add_reaction_to_message(second.id, "alice", "+1")
+        Messages.add_reaction_to_message(second.id, "bob", "+1")
+        Messages.add_reaction_to_message(first.id, "bob", "eyes")
+
+        queries.clear()
+        page = get_page()
+        page_queries = len(queries)
+
+        assert [message.content for message in page] == ["second", "first"]
+        assert page[0].user.name == "Bob"
+        assert page[0].reply_to_message.content == "first"
+        assert page[0].reply_to_message.user.name == "Alice"
+        assert [(r.name, r.count, r.users) for r in page[0].reactions] == [
+            ("+1", 2, [{"id": "alice", "name": "Alice"}, {"id": "bob", "name": "Bob"}])
+        ]
+        assert page[0].reply_count == 0
+        assert page[1].reply_count == 2
+        assert page[1].latest_reply_at == latest_reply.created_at
+        assert [reaction.name for reaction in page[1].reactions] == ["eyes"]
+
+        # Matches reading each message on its own
+        for message in page:
+            expected = Messages.get_message_by_id(message.id)
+            assert message.reply_count == expected.reply_count
+            assert message.latest_reply_at == expected.latest_reply_at
+            assert message.reactions == expected.reactions
+
+        for idx in range(20):
+            message = send("alice", f"message {idx}", reply_to_id=first.id)
+            Messages.add_reaction_to_message(message.id, "bob", "+1")
+        queries.clear()
+        assert len(get_page()) == 22
+        assert len(queries) == page_queries
+
+    def test_keyset_pagination(self, queries):
+        sent = [send("alice", f"message {idx}") for idx in range(7)]
+
+        pages = []
+        before = None
+        while page := get_page(limit=3, before=before):
+            pages.append([message.content for message in page])
+            before = page[-1].id
+
+        assert pages == [
+            ["message 6", "message 5", "message 4"],
+            ["message 3", "message 2", "message 1"],
+            ["message 0"],
+        ]
+
+        # Messages sent meanwhile don't shift the next page
+        send("bob", "new")
+        assert [message.id for message in get_page(limit=2, before=sent[4].id)] == [
+            sent[3].id,
+            sent[2].id,
+        ]
+
+    def test_keyset_pagination_after_cursor_was_deleted(self, queries):
+        sent = [send("alice", f"message {idx}") for idx in range(5)]
+        page = get_page(limit=2)
+        cursor = page[-1]
+        Messages.delete_message_by_id(cursor.id)
+
+        assert [
+            message.content
+            for message in get_page(
+                limit=2, before=cursor.id, before_created_at=cursor.created_at
+            )
+        ] == ["message 2", "message 1"]
+
+        # Without its creation time, an unknown cursor falls back to `skip`
+        assert [message.id for message in get_page(limit=2, before=cursor.id)] == [
+            sent[4].id,
+            sent[2].id,
+        ]
@@ -0,0 +1,144 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from open_webui.models import chats
+from open_webui.models.chats import Chat, ChatForm, ChatMessage, Chats, ChatSearch
+
+
+def make_chat(count):
+    messages = {
+        f"m{idx}": {
+            "id": f"m{idx}",
+            "parentId": f"m{idx - 1}" if idx else None,
+            "role": "user" if idx % 2 == 0 else "assistant",
+            "content": f"message {idx}",
+        }
+        for idx in range(count)
+    }
+    return {
+        "title": "Test",
+        "history": {"messages": messages, "currentId": f"m{count - 1}"},
+        "messages": list(messages.values()),
+    }
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    for table in (Chat, ChatMessage, ChatSearch):
+        table.__table__.create(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    @contextmanager
+    def get_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    monkeypatch.setattr(chats, "get_db", get_db)
+    monkeypatch.setattr(chats, "ENABLE_CHAT_MESSAGE_TABLE", True)
+    return get_db
+
+
+def get_stored(db, chat_id):
+    with db() as session:
+        chat = session.get(Chat, chat_id).chat
+        rows = {
+            row.id: row.message
+            for row in session.query(ChatMessage).filter_by(chat_id=chat_id)
+        }
+    return chat, rows
+
+
+class TestChatMessageTable:
+    """Test storing chat messages as chat_message rows"""
+
+    def test_messages_are_stored_as_rows(self, db):
+        chat = make_chat(3)
+        chat_id = Chats.insert_new_chat("user", ChatForm(chat=chat)).id
+
+        stored_chat, rows = get_stored(db, chat_id)
+        assert stored_chat["history"]["messages"] == {}
+        assert rows == chat["history"]["messages"]
+        assert Chats.get_chat_by_id(chat_id).chat == chat
+
+        message = Chats.upsert_message_by_id_and_message_id(
+            chat_id, "m3", {"role": "assistant", "content": "new"}
+        )
+        assert message == {"role": "assistant", "content": "new"}
+        Chats.upsert_message_by_id_and_message_id(chat_id, "m1", {"content": "edit"})
+
+        stored_chat, rows = get_stored(db, chat_id)
+        assert stored_chat["history"] == {"messages": {}, "currentId": "m1"}
+        assert rows["m1"]["content"] == "edit"
+        assert rows["m1"]["role"] == "assistant"
+        assert len(rows) == 4
+
+        Chats.add_message_status_to_chat_by_id_and_message_id(
+            chat_id, "m1", {"done": True}
+        )
+        assert Chats.add_message_files_by_id_and_message_id(
+            chat_id, "m1", [{"id": "file"}]
+        ) == [{"id": "file"}]
+        message = Chats.get_message_by_id_and_message_id(chat_id, "m1")
+        assert message["statusHistory"] == [{"done": True}]
+        assert message["files"] == [{"id": "file"}]
+
+        # Full updates only keep the messages that are part of the chat
+        Chats.update_chat_by_id(chat_id, make_chat(2))
+        assert Chats.get_chat_by_id(chat_id).chat == make_chat(2)
+        assert len(get_stored(db, chat_id)[1]) == 2
+
+        assert Chats.delete_chat_by_id(chat_id)
+        with db() as session:
+            assert session.query(ChatMessage).count() == 0
+
+    def test_existing_chats_are_moved_on_write(self, db, monkeypatch):
+        monkeypatch.setattr(chats, "ENABLE_CHAT_MESSAGE_TABLE", False)
+        chat = make_chat(3)
+        chat_id = Chats.insert_new_chat("user", ChatForm(chat=chat)).id
+        assert get_stored(db, chat_id) == (chat, {})
+
+        monkeypatch.setattr(chats, "ENABLE_CHAT_MESSAGE_TABLE", True)
+        assert Chats.get_chat_by_id(chat_id).chat == chat
+
+        Chats.upsert_message_by_id_and_message_id(chat_id, "m2", {"content": "edit"})
+        stored_chat, rows = get_stored(db, chat_id)
+        assert stored_chat["history"]["messages"] == {}
+        assert len(rows) == 3
+        assert rows["m2"]["content"] == "edit"
+
+    def test_rows_are_folded_back_when_disabled(self, db, monkeypatch):
+        chat = make_chat(3)
+        chat_id = Chats.insert_new_chat("user", ChatForm(chat=chat)).id
+        with db() as session:
+            session.add(ChatMessage(chat_id="deleted", id="m0", message={}))
+            session.commit()
+
+        monkeypatch.setattr(chats, "ENABLE_CHAT_MESSAGE_TABLE", False)
+        assert Chats.fold_message_rows() == 2
+        assert Chats.fold_message_rows() == 0
+        stored_chat, rows = get_stored(db, chat_id)
+        assert (stored_chat, rows) == (chat, {})
+        with db() as session:
+            assert session.query(ChatMessage).count() == 0
+
+        Chats.upsert_message_by_id_and_message_id(chat_id, "m2", {"content": "edit"})
+        stored_chat, rows = get_stored(db, chat_id)
+        assert rows == {}
+        assert stored_chat["history"]["messages"]["m2"]["content"] == "edit"
+        assert len(stored_chat["history"]["messages"]) == 3
+
+        Chats.upsert_message_by_id_and_message_id(chat_id, "m3", {"content": "new"})
+        stored_chat, _ = get_stored(db, chat_id)
+        assert stored_chat["history"]["messages"]["m3"] == {"content": "new"}
+        assert stored_chat["history"]["currentId"] == "m3"
+        assert Chats.get_chat_by_id(chat_id).chat == stored_chat
@@ -0,0 +1,105 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from open_webui.models import chats
+from open_webui.models.chats import Chat, ChatForm, ChatMessage, Chats, ChatSearch
+
+
+def make_chat(title, *contents):
+    messages = {
+        f"m{idx}": {"id": f"m{idx}", "role": "user", "content": content}
+        for idx, content in enumerate(contents)
+    }
+    return {
+        "title": title,
+        "history": {"messages": messages, "currentId": f"m{len(contents) - 1}"},
+        "messages": list(messages.values()),
+    }
+
+
+@pytest.fixture(params=[False, True], ids=["chat_json", "chat_message"])
+def db(request, monkeypatch):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    for table in (Chat, ChatMessage, ChatSearch):
+        table.__table__.create(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    @contextmanager
+    def get_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    monkeypatch.setattr(chats, "get_db", get_db)
+    monkeypatch.setattr(chats, "ENABLE_CHAT_MESSAGE_TABLE", request.param)
+    return get_db
+
+
+def search(text, user_id="user"):
+    return [
+        chat.title for chat in Chats.get_chats_by_user_id_and_search_text(user_id, text)
+    ]
+
+
+class TestChatSearch:
+    """Test searching chats with the full-text index"""
+
+    def test_search_follows_chat_updates(self, db):
+        chat_id = Chats.insert_new_chat(
+            "user", ChatForm(chat=make_chat("Travel", "Packing list for Lisbon"))
+        ).id
+        Chats.insert_new_chat(
+            "other", ChatForm(chat=make_chat("Lisbon", "Lisbon trip"))
+        )
+
+        assert search("lisb") == ["Travel"]
+        assert search("trav") == ["Travel"]
+        assert search("packing porto") == []
+
+        Chats.update_chat_by_id(chat_id, make_chat("Trip", "Packing list for Porto"))
+        assert search("lisbon") == []
+        assert search("trav") == []
+        assert search("packing porto") == ["Trip"]
+
+        Chats.upsert_message_by_id_and_message_id(
+            chat_id, "m1", {"role": "assistant", "content": "Pack a raincoat"}
+        )
+        assert search("raincoat") == ["Trip"]
+        Chats.upsert_message_by_id_and_message_id(
+            chat_id, "m1", {"content": "Pack sunscreen"}
+        )
+        assert search("raincoat") == []
+        assert search("sunscreen") == ["Trip"]
+
+        assert Chats.delete_chat_by_id(chat_id)
+        assert search("sunscreen") == []
+        with db() as session:
+            assert session.query(ChatSearch).filter_by(chat_id=chat_id).count() == 0
+
+    def test_results_are_ranked_and_filtered(self, db):
+        Chats.insert_new_chat(
+            "user", ChatForm(chat=make_chat("Notes", "a quick mention of python"))
+        )
+        pinned = Chats.insert_new_chat(
+            "user",
+            ChatForm(chat=make_chat("Python", "python python python", "python")),
+        )
+        Chats.toggle_chat_pinned_by_id(pinned.id)
+
+        assert search("python") == ["Python", "Notes"]
+        assert search("python pinned:true") == ["Python"]
+        assert search("python pinned:false") == ["Notes"]
+        assert search('"python" tag:none') == ["Python", "Notes"]
+
+        snippets = Chats.get_chat_snippets_by_user_id_and_search_text(
+            "user", "quick pinned:false", [chat.id for chat in Chats.get_chats()]
+        )
+        assert list(snippets.values()) == ["a **quick** mention of python"]
@@ -0,0 +1,97 @@
+from open_webui.utils.content_blocks import (
+    ContentBlocksSerializer,
+    serialize_content_blocks,
+)
+
+
+def apply_content_data(content: str, data: dict) -> str:
+    """Mirror of the frontend handling of `content`/`content_delta` events."""
+    if "content_delta" not in data:
+        return data["content"]
+
+    if "content_offset" in data:
+        # content_offset is measured in UTF-16 code units like String.slice
+        prefix = content.encode("utf-16-le")[: data["content_offset"] * 2]
+        content = prefix.decode("utf-16-le")
+    return content + data["content_delta"]
+
+
+def stream_content_blocks():
+    content_blocks = [{"type": "text", "content": "Hello 👋"}]
+    yield content_blocks
+
+    reasoning_block = {
+        "type": "reasoning",
+        "start_tag": "<think>",
+        "end_tag": "</think>",
+        "attributes": {"type": "reasoning_content"},
+        "content": "",
+        "started_at": 0,
+    }
+    content_blocks.append(reasoning_block)
+    for token in ["Let ", "me\n", "think ", "🤔"]:
+        reasoning_block["content"] += token
+        yield content_blocks
+
+    reasoning_block["ended_at"] = 2
+    reasoning_block["duration"] = 2
+    content_blocks.append({"type": "text", "content": ""})
+    for token in ["The ", "answer ", "is ", "```"]:
+        content_blocks[-1]["content"] += token
+        yield content_blocks
+
+    tool_calls = [{"id": "call_1", "function": {"name": "search", "arguments": ""}}]
+    content_blocks.append({"type": "tool_calls", "content": tool_calls})
+    yield content_blocks
+
+    content_blocks[-1]["results"] = [{"tool_call_id": "call_1", "content": "found"}]
+    content_blocks.append({"type": "text", "content": ""})
+    yield content_blocks
+
+    content_blocks[-1]["content"] += "Done."
+    yield content_blocks
+
+    # Blocks popped from the end must not be served from the cache
+    content_blocks.pop()
+    content_blocks.pop()
+    yield content_blocks
+
+
+def test_serializer_matches_full_serialization():
+    serializer = ContentBlocksSerializer()
+
+    for content_blocks in stream_content_blocks():
+        assert serializer.serialize(content_blocks) == serialize_content_blocks(
+            content_blocks
+        )
+
+
+def test_serializer_detects_mutated_closed_block():
+    serializer = ContentBlocksSerializer()
+    content_blocks = [
+        {"type": "text", "content": "first"},
+        {"type": "text", "content": "second"},
+    ]
+    serializer.serialize(content_blocks)
+
+    content_blocks[0]["content"] = "changed first"
+    assert serializer.serialize(content_blocks) == "changed first\nsecond"
+
+
+def test_content_delta_reconstructs_content():
+    serializer = ContentBlocksSerializer()
+    client_content = ""
+    sent = 0
+
+    for content_blocks in stream_content_blocks():
+        content = serializer.serialize(content_blocks)
+        data = serializer.get_content_delta(content)
+        sent += len(data.get("content", data.get("content_delta", "")))
+
+        client_content = apply_content_data(client_content, data)
+        assert client_content == content
+
+    assert sent < sum(
+        len(serialize_content_blocks(content_blocks))
+        for content_blocks in stream_content_blocks()
+    )
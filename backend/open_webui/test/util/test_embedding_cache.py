@@ -0,0 +1,134 @@
+import threading
+
+import pytest
+
+from open_webui.retrieval.embedding_cache import (
+    EmbeddingCache,
+    get_cached_embedding_function,
+)
+
+
+def make_embedding_function():
+    calls = []
+
+    async def embedding_function(query, prefix=None, user=None):
+        calls.append(query)
+        if isinstance(query, list):
+            return [[float(len(text)), 0.5] for text in query]
+        return [float(len(query)), 0.5]
+
+    return embedding_function, calls
+
+
+class TestEmbeddingCache:
+    """Test caching embeddings by engine, model, prefix and text"""
+
+    @pytest.mark.asyncio
+    async def test_only_missing_texts_are_embedded(self):
+        embedding_function, calls = make_embedding_function()
+        cache = EmbeddingCache(max_entries=100)
+        cached = get_cached_embedding_function(
+            embedding_function, cache, "openai", "text-embedding-3-small"
+        )
+
+        assert await cached(["a", "bb", "a"], prefix="passage: ") == [
+            [1.0, 0.5],
+            [2.0, 0.5],
+            [1.0, 0.5],
+        ]
+        assert await cached(["bb", "ccc"], prefix="passage: ") == [
+            [2.0, 0.5],
+            [3.0, 0.5],
+        ]
+        assert await cached("ccc", prefix="passage: ") == [3.0, 0.5]
+        # The prefix is part of the key
+        assert await cached("ccc", prefix="query: ") == [3.0, 0.5]
+
+        assert calls == [["a", "bb"], ["ccc"], "ccc"]
+        assert cache.stats["hits"] == 2
+        assert cache.stats["misses"] == 5
+
+        # Another model doesn't share vectors
+        other = get_cached_embedding_function(
+            embedding_function, cache, "openai", "text-embedding-3-large"
+        )
+        await other("ccc", prefix="query: ")
+        assert len(calls) == 4
+
+    @pytest.mark.asyncio
+    async def test_failed_embeddings_are_not_cached(self):
+        calls = []
+
+        async def embedding_function(query, prefix=None, user=None):
+            calls.append(query)
+            return None
+
+        cache = EmbeddingCache(max_entries=100)
+        cached = get_cached_embedding_function(embedding_function, cache, "", "model")
+
+        assert await cached(["a"]) is None
+        assert await cached("a") is None
+        assert await cached("a") is None
+        assert len(calls) == 3
+
+    def test_lru_eviction_and_invalidation(self):
+        cache = EmbeddingCache(max_entries=2)
+        digests = [cache.get_digest(None, text) for text in ("a", "b", "c")]
+
+        cache.set_many("ns", {digests[0]: [1.0], digests[1]: [2.0]})
+        cache.get_many("ns", [digests[0]])
+        cache.set_many("ns", {digests[2]: [3.0]})
+
+        assert [v is not None for v in cache.get_many("ns", digests)] == [
+            True,
+            False,
+            True,
+        ]
+        assert cache.stats["evictions"] == 1
+
+        cache.invalidate("other")
+        assert cache.get_many("ns", [digests[2]])[0] is not None
+        cache.invalidate("ns")
+        assert cache.get_many("ns", [digests[2]]) == [None]
+
+    def test_disk_store(self, tmp_path):
+        path = str(tmp_path / "embeddings.db")
+        digest = EmbeddingCache.get_digest(None, "a")
+
+        cache = EmbeddingCache(max_entries=0, path=path)
+        cache.set_many("ns", {digest: [0.1, -2.5, 1000.0]})
+
+        # A new process reads the float16 vectors back
+        cache = EmbeddingCache(max_entries=10, path=path)
+        (vector,) = cache.get_many("ns", [digest])
+        assert vector.tolist() == pytest.approx([0.1, -2.5, 1000.0], rel=1e-3)
+        assert cache.stats["disk_hits"] == 1
+
+        cache.get_many("ns", [digest])
+        assert cache.stats["disk_hits"] == 1
+        assert cache.stats["hits"] == 2
+
+        cache.invalidate()
+        assert EmbeddingCache(path=path).get_many("ns", [digest]) == [None]
+
+    @pytest.mark.asyncio
+    async def test_disk_store_is_used_off_the_event_loop(self, tmp_path, monkeypatch):
+        embedding_function, calls = make_embedding_function()
+        cache = EmbeddingCache(max_entries=0, path=str(tmp_path / "embeddings.db"))
+        cached = get_cached_embedding_function(embedding_function, cache, "", "model")
+
+        threads = []
+        for name in ("get_many", "set_many"):
+            method = getattr(cache, name)
+            monkeypatch.setattr(
+                cache,
+                name,
+                lambda *args, method=method: threads.append(threading.current_thread())
+                or method(*args),
+            )
+
+        assert await cached(["a", "bb"]) == [[1.0, 0.5], [2.0, 0.5]]
+        assert await cached(["a", "bb"]) == [[1.0, 0.5], [2.0, 0.5]]
+        assert len(calls) == 1
+        assert len(threads) == 3
+        assert threading.current_thread() not in threads
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from open_webui.models import files
+from open_webui.models.files import File, FileForm, Files
+from open_webui.utils.redis import RedisNotifier
+
+
+class FakeRedis:
+    def __init__(self):
+        self.published = []
+        self.handlers = {}
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+        for handler in self.handlers.get(channel, []):
+            handler({"channel": channel, "data": message})
+
+    def pubsub(self, **kwargs):
+        pubsub = MagicMock()
+        pubsub.subscribe.side_effect = lambda **handlers: [
+            self.handlers.setdefault(channel, []).append(handler)
+            for channel, handler in handlers.items()
+        ]
+        return pubsub
+
+
+async def is_set(event, timeout=1.0):
+    try:
+        await asyncio.wait_for(event.wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+
+class TestRedisNotifier:
+    """Test waking up waiters of a key from any thread and worker"""
+
+    @pytest.mark.asyncio
+    async def test_waiters_are_woken_from_other_threads(self):
+        notifier = RedisNotifier(None, "test")
+
+        with (
+            notifier.subscribe("file") as updated,
+            notifier.subscribe("other") as other_updated,
+        ):
+            thread = threading.Thread(target=notifier.notify, args=("file",))
+            thread.start()
+            thread.join()
+
+            assert await is_set(updated)
+            assert not await is_set(other_updated, timeout=0.05)
+
+        assert notifier._waiters == {}
+
+    @pytest.mark.asyncio
+    async def test_other_workers_are_notified(self):
+        redis = FakeRedis()
+        notifier = RedisNotifier(redis, "test")
+        other_notifier = RedisNotifier(redis, "test")
+
+        with (
+            notifier.subscribe("file") as updated,
+            other_notifier.subscribe("file") as other_updated,
+        ):
+            other_notifier.notify("file")
+            assert await is_set(updated)
+            assert await is_set(other_updated)
+
+            # Messages of a worker are not handled by itself again
+            other_updated.clear()
+            other_notifier._handle_message({"data": redis.published[-1][1]})
+            assert not await is_set(other_updated, timeout=0.05)
+
+
+class TestFileStatusNotifications:
+    """Test notifying file processing status changes"""
+
+    def test_status_updates_are_notified(self, monkeypatch):
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        File.__table__.create(engine)
+        Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+        @contextmanager
+        def get_db():
+            session = Session()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        notified = []
+        monkeypatch.setattr(files, "get_db", get_db)
+        monkeypatch.setattr(
+            files, "FILE_STATUS_NOTIFIER", MagicMock(notify=notified.append)
+        )
+
+        Files.insert_new_file(
+            "user", FileForm(id="file", filename="file.txt", path="file.txt")
+        )
+        Files.update_file_data_by_id("file", {"status": "pending"})
+        Files.update_file_data_by_id("file", {"content": "text"})
+        Files.update_file_data_by_id("file", {"status": "completed"})
+
+        assert notified == ["file", "file"]
+        assert Files.get_file_by_id("file").data == {
+            "status": "completed",
+            "content": "text",
+        }
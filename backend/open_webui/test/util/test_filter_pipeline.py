@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+import pytest
+from pydantic import BaseModel
+
+from open_webui.utils import filter as filter_utils
+from open_webui.utils import plugin as plugin_utils
+from open_webui.utils.filter import FilterPipeline
+from open_webui.utils.plugin import PluginRegistry
+
+
+class FakeFunctions:
+    def __init__(self, valves, user_valves):
+        self.valves = valves
+        self.user_valves = user_valves
+        self.queries = 0
+
+    def get_functions(self, include_valves=False):
+        self.queries += 1
+        return [
+            SimpleNamespace(id=id, valves=valves) for id, valves in self.valves.items()
+        ]
+
+    def get_user_valves_by_id_and_user_id(self, id, user_id):
+        self.queries += 1
+        return self.user_valves[(id, user_id)]
+
+
+class SuffixFilter:
+    class Valves(BaseModel):
+        suffix: str = ""
+
+    class UserValves(BaseModel):
+        upper: bool = False
+
+    def __init__(self):
+        self.valves = self.Valves()
+
+    def stream(self, event, __user__):
+        text = event["text"] + self.valves.suffix
+        return {"text": text.upper() if __user__["valves"].upper else text}
+
+
+class CountingFilter:
+    def __init__(self):
+        self.events = 0
+
+    async def stream(self, event):
+        self.events += 1
+        return event
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    functions = FakeFunctions(
+        valves={"suffix": {"suffix": "!"}},
+        user_valves={("suffix", "user-1"): {"upper": True}},
+    )
+    modules = {"suffix": SuffixFilter(), "counting": CountingFilter()}
+    registry = PluginRegistry()
+    monkeypatch.setattr(plugin_utils, "Functions", functions)
+    monkeypatch.setattr(filter_utils, "Functions", functions)
+    monkeypatch.setattr(filter_utils, "PLUGIN_REGISTRY", registry)
+    monkeypatch.setattr(
+        filter_utils,
+        "get_function_module",
+        lambda request, function_id, load_from_db=True: modules[function_id],
+    )
+
+    pipeline = FilterPipeline(
+        None,
+        [SimpleNamespace(id="counting"), None, SimpleNamespace(id="suffix")],
+        "stream",
+    )
+    return pipeline, functions, registry, modules
+
+
+class TestFilterPipeline:
+    """Test stream filters prepared once per request"""
+
+    @pytest.mark.asyncio
+    async def test_valves_are_read_once(self, pipeline):
+        pipeline, functions, _, modules = pipeline
+
+        for idx in range(100):
+            event, _ = await pipeline(
+                {"text": f"chunk {idx}"}, {"__user__": {"id": "user-1"}}
+            )
+
+        assert event == {"text": "CHUNK 99!"}
+        assert modules["counting"].events == 100
+        # The functions with their valves and the user valves of one filter
+        assert functions.queries == 2
+
+    @pytest.mark.asyncio
+    async def test_valve_updates_are_picked_up(self, pipeline):
+        pipeline, functions, registry, _ = pipeline
+        extra_params = {"__user__": {"id": "user-1"}}
+
+        assert await pipeline({"text": "a"}, extra_params) == ({"text": "A!"}, {})
+
+        functions.valves["suffix"] = {"suffix": "?"}
+        functions.user_valves[("suffix", "user-1")] = {"upper": False}
+        assert await pipeline({"text": "a"}, extra_params) == ({"text": "A!"}, {})
+
+        registry.bump("suffix")
+        assert await pipeline({"text": "a"}, extra_params) == ({"text": "a?"}, {})
+        assert functions.queries == 4
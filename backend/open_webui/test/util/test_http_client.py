@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from open_webui.utils.http_client import UpstreamSessionPool
+
+
+@pytest_asyncio.fixture
+async def server():
+    async def handler(request):
+        await asyncio.sleep(float(request.query.get("delay", 0)))
+        response = web.json_response({"ok": True, "cookies": dict(request.cookies)})
+        if "user" in request.query:
+            response.set_cookie("upstream_session", request.query["user"])
+        return response
+
+    async def stream(request):
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for chunk in (b"first", b"second"):
+            await response.write(chunk)
+            await asyncio.sleep(0.1)
+        return response
+
+    app = web.Application()
+    app.router.add_get("/models", handler)
+    app.router.add_get("/stream", stream)
+    async with TestServer(app) as server:
+        yield server
+
+
+class TestUpstreamSessionPool:
+    """Test the shared upstream sessions of OpenAI and Ollama connections"""
+
+    @pytest.mark.asyncio
+    async def test_connections_are_reused(self, server):
+        pool = UpstreamSessionPool()
+        url = str(server.make_url("/models"))
+
+        for _ in range(5):
+            session = pool.get_session("openai", 0, url)
+            async with session.get(url) as response:
+                assert (await response.json())["ok"]
+
+        assert pool.get_session("openai", 0, url) is session
+        assert pool.get_session("ollama", 0, url) is not session
+        assert pool.stats[("openai", 0)]["connections_created"] == 1
+        assert pool.stats[("openai", 0)]["connections_reused"] == 4
+
+        await pool.close()
+        assert session.closed
+
+    @pytest.mark.asyncio
+    async def test_cookies_are_not_shared(self, server):
+        pool = UpstreamSessionPool()
+        url = server.make_url("/models")
+        session = pool.get_session("openai", 0, str(url))
+
+        async with session.get(url.with_query(user="alice")) as response:
+            assert "upstream_session" in response.cookies
+        async with session.get(url, cookies={"token": "bob"}) as response:
+            assert (await response.json())["cookies"] == {"token": "bob"}
+
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_sessions_follow_connection_changes(self):
+        pool = UpstreamSessionPool()
+        session = pool.get_session("openai", 0, "http://one:8080/v1/models")
+
+        assert pool.get_session("openai", 0, "http://one:8080/v1/chat") is session
+        assert pool.get_session("openai", 0, "http://two:8080/v1/chat") is not session
+
+        # The replaced session is closed as it is idle
+        await asyncio.sleep(0)
+        assert session.closed
+        assert not pool._retired
+
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_replaced_sessions_are_closed_after_streams(self, server):
+        pool = UpstreamSessionPool()
+        url = str(server.make_url("/stream"))
+        session = pool.get_session("openai", 0, url)
+        response = await session.get(url)
+
+        pool.get_session("openai", 0, "http://other:8080/v1/chat")
+        await asyncio.sleep(0)
+        assert not session.closed
+
+        assert await response.read() == b"firstsecond"
+        await asyncio.sleep(0)
+        assert session.closed
+        assert not pool._retired
+
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_replaced_sessions_wait_for_all_responses(self, server):
+        pool = UpstreamSessionPool()
+        url = str(server.make_url("/stream"))
+        session = pool.get_session("openai", 0, url)
+        responses = [await session.get(url) for _ in range(2)]
+
+        pool.get_session("openai", 0, "http://other:8080/v1/chat")
+        responses[0].release()
+        await asyncio.sleep(0)
+        assert not session.closed
+
+        responses[1].close()
+        await asyncio.sleep(0)
+        assert session.closed
+
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_connections_are_limited_per_host(self, server):
+        pool = UpstreamSessionPool(limit_per_host=2)
+        url = str(server.make_url("/models").with_query(delay="0.1"))
+        session = pool.get_session("ollama", 0, url)
+
+        async def request():
+            async with session.get(url) as response:
+                return await response.json()
+
+        await asyncio.gather(*[request() for _ in range(4)])
+
+        stats = pool.stats[("ollama", 0)]
+        assert stats["connections_created"] == 2
+        assert stats["connections_queued"] == 2
+        await pool.close()
@@ -0,0 +1,39 @@
+import subprocess
+import sys
+
+import pytest
+
+
+def get_loaded_modules(module):
+    """Modules loaded after importing `module` in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print('\\n'.join(sys.modules))"],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    return set(result.stdout.splitlines())
+
+
+class TestLazyImports:
+    """Test heavy dependencies aren't imported at startup"""
+
+    @pytest.mark.parametrize(
+        "module, heavy_modules",
+        [
+            ("open_webui.routers.audio", ["pydub"]),
+            (
+                "open_webui.routers.retrieval",
+                [
+                    "tiktoken",
+                    "langchain.retrievers",
+                    "open_webui.retrieval.loaders.main",
+                    "open_webui.retrieval.web.utils",
+                ],
+            ),
+        ],
+    )
+    def test_heavy_modules_load_on_first_use(self, module, heavy_modules):
+        loaded = get_loaded_modules(module)
+        assert module in loaded
+        assert [name for name in heavy_modules if name in loaded] == []
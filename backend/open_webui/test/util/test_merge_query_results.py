@@ -0,0 +1,64 @@
+import numpy as np
+
+from open_webui.retrieval.utils import get_top_k, merge_and_sort_query_results
+
+
+def make_result(*chunks):
+    return {
+        "distances": [[distance for distance, _ in chunks]],
+        "documents": [[document for _, document in chunks]],
+        "metadatas": [[{"source": document} for _, document in chunks]],
+    }
+
+
+class TestMergeQueryResults:
+    """Test merging the results of several collections and queries"""
+
+    def test_duplicates_keep_their_best_match(self):
+        first = make_result((0.9, "a"), (0.5, "b"), (0.4, "c"))
+        second = make_result((0.95, "b"), (0.6, "d"), (0.99, None))
+        second["metadatas"][0][0] = {"source": "b", "collection": "second"}
+
+        result = merge_and_sort_query_results([first, {}, second], k=3, fusion="max")
+
+        assert result["documents"] == [["b", "a", "d"]]
+        assert result["distances"] == [[0.95, 0.9, 0.6]]
+        assert result["metadatas"][0][0] == {"source": "b", "collection": "second"}
+
+    def test_ties_keep_the_first_match(self):
+        first = make_result((0.5, "a"), (0.5, "b"))
+        second = make_result((0.5, "c"), (0.5, "a"))
+        second["metadatas"][0][1] = {"source": "a", "collection": "second"}
+
+        result = merge_and_sort_query_results([first, second], k=2, fusion="max")
+
+        assert result["documents"] == [["a", "b"]]
+        assert result["metadatas"][0][0] == {"source": "a"}
+
+    def test_reciprocal_rank_fusion(self):
+        # Distances of the second collection are on another scale
+        first = make_result((0.9, "a"), (0.8, "b"), (0.7, "c"))
+        second = make_result((12.0, "c"), (11.0, "d"), (10.0, "b"))
+
+        result = merge_and_sort_query_results(
+            [first, second], k=3, fusion="rrf", rrf_k=60
+        )
+
+        # c: 1/63 + 1/61, b: 1/62 + 1/63, a: 1/61, d: 1/62
+        assert result["documents"] == [["c", "b", "a"]]
+        assert result["distances"] == [[12.0, 10.0, 0.9]]
+
+    def test_empty_results(self):
+        assert merge_and_sort_query_results([], k=3) == {
+            "distances": [[]],
+            "documents": [[]],
+            "metadatas": [[]],
+        }
+
+    def test_top_k(self):
+        scores = np.array([0.1, 0.7, 0.3, 0.7, 0.9, 0.3])
+
+        assert get_top_k(scores, 3).tolist() == [4, 1, 3]
+        assert get_top_k(scores, 5).tolist() == [4, 1, 3, 2, 5]
+        assert get_top_k(scores, 10).tolist() == [4, 1, 3, 2, 5, 0]
+        assert get_top_k(scores, 0).tolist() == []
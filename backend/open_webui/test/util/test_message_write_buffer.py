@@ -0,0 +1,307 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock
+
+from open_webui.socket import main as socket_main
+from open_webui.socket.utils import MessageWriteBuffer
+
+
+class FakeRedis:
+    def __init__(self):
+        self.lists = {}
+        self.zsets = {}
+
+    def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+        return len(self.lists[key])
+
+    def lrange(self, key, start, end):
+        return list(self.lists.get(key, []))
+
+    def delete(self, key):
+        return int(self.lists.pop(key, None) is not None)
+
+    def rename(self, src, dst):
+        if src not in self.lists:
+            raise Exception("no such key")
+        self.lists[dst] = self.lists.pop(src)
+        return True
+
+    def zadd(self, key, mapping, nx=False):
+        zset = self.zsets.setdefault(key, {})
+        for member, score in mapping.items():
+            if not (nx and member in zset):
+                zset[member] = score
+
+    def zscore(self, key, member):
+        return self.zsets.get(key, {}).get(member)
+
+    def zrem(self, key, member):
+        return int(self.zsets.get(key, {}).pop(member, None) is not None)
+
+    async def zrangebyscore(self, key, min, max, withscores=False):
+        return [
+            (member, score)
+            for member, score in self.zsets.get(key, {}).items()
+            if min <= score <= max
+        ]
+
+    def pipeline(self):
+        redis = self
+        calls = []
+
+        class Pipeline:
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: calls.append(
+                    (getattr(redis, name), args, kwargs)
+                )
+
+            async def execute(self, raise_on_error=True):
+                results = []
+                for method, args, kwargs in calls:
+                    try:
+                        results.append(method(*args, **kwargs))
+                    except Exception as e:
+                        if raise_on_error:
+                            raise
+                        results.append(e)
+                return results
+
+        return Pipeline()
+
+
+class FakeChats:
+    def __init__(self, message):
+        self.message = message
+        self.writes = 0
+
+    def get_message_by_id_and_message_id(self, chat_id, message_id):
+        return dict(self.message) if self.message is not None else None
+
+    def upsert_message_by_id_and_message_id(self, chat_id, message_id, update):
+        self.writes += 1
+        self.message = {**self.message, **update}
+
+
+def message_event(content):
+    return {"type": "message", "data": {"content": content}}
+
+
+class TestMessageWriteBuffer:
+    """Test coalescing of chat message events"""
+
+    @pytest.mark.asyncio
+    async def test_flush_coalesces_events(self):
+        handler = AsyncMock()
+        buffer = MessageWriteBuffer(flush_handler=handler, max_events=100)
+
+        for i in range(5):
+            await buffer.append(
+                "chat", "message", {"type": "message", "data": {"content": str(i)}}
+            )
+
+        handler.assert_not_called()
+
+        await buffer.flush("chat", "message")
+
+        handler.assert_awaited_once()
+        chat_id, message_id, ops = handler.call_args.args
+        assert (chat_id, message_id) == ("chat", "message")
+        assert [op["data"]["content"] for op in ops] == ["0", "1", "2", "3", "4"]
+        assert buffer.stats["flushes"] == 1
+        assert buffer.stats["writes_saved"] == 4
+
+    @pytest.mark.asyncio
+    async def test_flush_on_max_events(self):
+        handler = AsyncMock()
+        buffer = MessageWriteBuffer(flush_handler=handler, max_events=3)
+
+        for _ in range(7):
+            await buffer.append("chat", "message", {"type": "message", "data": {}})
+
+        assert handler.await_count == 2
+
+        await buffer.flush_all()
+        assert handler.await_count == 3
+        assert len(handler.call_args.args[2]) == 1
+
+    @pytest.mark.asyncio
+    async def test_flush_due_respects_interval(self):
+        handler = AsyncMock()
+        buffer = MessageWriteBuffer(flush_handler=handler, interval=60)
+
+        await buffer.append("chat", "message", {"type": "message", "data": {}})
+        await buffer.flush_due()
+        handler.assert_not_called()
+
+        buffer.interval = 0
+        await buffer.flush_due()
+        handler.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_flush_empty_buffer(self):
+        handler = AsyncMock()
+        buffer = MessageWriteBuffer(flush_handler=handler)
+
+        await buffer.flush("chat", "message")
+        handler.assert_not_called()
+        assert buffer.stats["flushes"] == 0
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("redis", [False, True], ids=["memory", "redis"])
+    async def test_failed_flush_is_retried(self, redis):
+        handler = AsyncMock(side_effect=[Exception("database is locked"), None, None])
+        buffer = MessageWriteBuffer(
+            flush_handler=handler, redis=FakeRedis() if redis else None
+        )
+
+        await buffer.append("chat", "message", message_event("a"))
+        await buffer.append("chat", "message", message_event("b"))
+        await buffer.flush("chat", "message")
+        assert buffer.stats["flushes"] == 0
+
+        # Events appended meanwhile are flushed after the ones that failed
+        await buffer.append("chat", "message", message_event("c"))
+        await buffer.flush_all()
+
+        flushed = [
+            op["data"]["content"]
+            for call in handler.call_args_list[1:]
+            for op in call.args[2]
+        ]
+        assert flushed == ["a", "b", "c"]
+        assert buffer.stats["flushes"] == handler.await_count - 1
+
+        await buffer.flush_all()
+        assert len(handler.call_args_list[1:]) == buffer.stats["flushes"]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("redis", [False, True], ids=["memory", "redis"])
+    async def test_failed_flush_keeps_its_age(self, redis):
+        handler = AsyncMock(side_effect=Exception("database is locked"))
+        buffer = MessageWriteBuffer(
+            flush_handler=handler, redis=FakeRedis() if redis else None
+        )
+
+        await buffer.append("chat", "message", message_event("a"))
+        pending = await buffer._get_pending(float("inf"))
+        await buffer.flush("chat", "message")
+        await buffer.append("chat", "message", message_event("b"))
+
+        # Retried by the next periodic flush rather than an interval later
+        assert await buffer._get_pending(float("inf")) == pending
+
+    @pytest.mark.asyncio
+    async def test_events_of_a_dead_worker_are_recovered(self):
+        redis = FakeRedis()
+        writing = asyncio.Event()
+
+        async def hang(chat_id, message_id, ops):
+            writing.set()
+            await asyncio.Event().wait()
+
+        buffer = MessageWriteBuffer(flush_handler=hang, redis=redis)
+        await buffer.append("chat", "message", message_event("a"))
+        await buffer.append("chat", "message", message_event("b"))
+
+        # The worker dies while the events are being written
+        flush = asyncio.create_task(buffer.flush("chat", "message"))
+        await writing.wait()
+        flush.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flush
+
+        handler = AsyncMock()
+        other_buffer = MessageWriteBuffer(flush_handler=handler, redis=redis)
+        other_buffer.interval = 0
+        await other_buffer.flush_due()
+
+        handler.assert_awaited_once()
+        ops = handler.call_args.args[2]
+        assert [op["data"]["content"] for op in ops] == ["a", "b"]
+        assert other_buffer.stats["recovered"] == 1
+        assert await other_buffer._get_pending(float("inf")) == []
+        assert redis.lists == {}
+
+    @pytest.mark.asyncio
+    async def test_periodic_flush(self, monkeypatch):
+        handler = AsyncMock()
+        buffer = MessageWriteBuffer(flush_handler=handler, interval=0.01)
+        monkeypatch.setattr(socket_main, "MESSAGE_WRITE_BUFFER", buffer)
+        monkeypatch.setattr(socket_main, "ENABLE_CHAT_MESSAGE_WRITE_BUFFER", True)
+
+        await buffer.append("chat", "message", message_event("a"))
+        task = asyncio.create_task(socket_main.periodic_message_write_buffer_flush())
+        try:
+            for _ in range(100):
+                if handler.await_count:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+
+        handler.assert_awaited_once()
+        assert buffer._buffers == {}
+
+
+class TestApplyMessageEvents:
+    """Test merging buffered events into a single chat message write"""
+
+    @pytest.mark.asyncio
+    async def test_events_are_merged(self, monkeypatch):
+        chats = FakeChats(
+            {
+                "content": "Hello",
+                "embeds": ["old embed"],
+                "files": [{"id": "old"}],
+                "sources": [{"name": "old"}],
+            }
+        )
+        monkeypatch.setattr(socket_main, "Chats", chats)
+
+        await socket_main.apply_message_events(
+            "chat",
+            "message",
+            [
+                message_event(","),
+                {"type": "embeds", "data": {"embeds": ["first"]}},
+                message_event(" world"),
+                {"type": "files", "data": {"files": [{"id": "new"}]}},
+                {"type": "source", "data": {"name": "new"}},
+                {"type": "embeds", "data": {"embeds": ["second"]}},
+                {"type": "citation", "data": {"name": "newer"}},
+            ],
+        )
+
+        assert chats.writes == 1
+        assert chats.message == {
+            "content": "Hello, world",
+            "embeds": ["second", "first", "old embed"],
+            "files": [{"id": "new"}, {"id": "old"}],
+            "sources": [{"name": "old"}, {"name": "new"}, {"name": "newer"}],
+        }
+
+    @pytest.mark.asyncio
+    async def test_replace_discards_earlier_content(self, monkeypatch):
+        chats = FakeChats({"content": "draft"})
+        monkeypatch.setattr(socket_main, "Chats", chats)
+
+        await socket_main.apply_message_events(
+            "chat",
+            "message",
+            [
+                message_event(" more"),
+                {"type": "replace", "data": {"content": "Final"}},
+                message_event(" answer"),
+            ],
+        )
+        assert chats.message == {"content": "Final answer"}
+
+    @pytest.mark.asyncio
+    async def test_missing_messages_are_skipped(self, monkeypatch):
+        chats = FakeChats(None)
+        monkeypatch.setattr(socket_main, "Chats", chats)
+
+        await socket_main.apply_message_events("chat", "message", [message_event("a")])
+        assert chats.writes == 0
@@ -0,0 +1,128 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from open_webui.utils import plugin as plugin_utils
+from open_webui.utils.filter import get_sorted_filter_ids
+from open_webui.utils.plugin import PluginRegistry, get_function_module_from_cache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.handlers = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def incr(self, key):
+        self.store[key] = str(int(self.store.get(key, 0)) + 1)
+
+    def publish(self, channel, message):
+        for handler in self.handlers.get(channel, []):
+            handler({"channel": channel, "data": message})
+
+    def pubsub(self, **kwargs):
+        pubsub = MagicMock()
+        pubsub.subscribe.side_effect = lambda **handlers: [
+            self.handlers.setdefault(channel, []).append(handler)
+            for channel, handler in handlers.items()
+        ]
+        return pubsub
+
+
+class FakeFunctions:
+    def __init__(self, functions):
+        self.functions = functions
+        self.queries = 0
+
+    def get_functions(self, include_valves=False):
+        self.queries += 1
+        return list(self.functions.values())
+
+
+def make_function(id, content="", valves=None, is_global=False):
+    return SimpleNamespace(
+        id=id,
+        type="filter",
+        content=content,
+        valves=valves,
+        is_active=True,
+        is_global=is_global,
+    )
+
+
+def get_registry(redis):
+    with patch("open_webui.utils.plugin.get_redis_connection", return_value=redis):
+        return PluginRegistry(redis_url="redis://localhost", redis_key_prefix="test")
+
+
+@pytest.fixture
+def functions(monkeypatch):
+    functions = FakeFunctions(
+        {
+            "first": make_function("first", valves={"priority": 2}, is_global=True),
+            "second": make_function("second", valves={"priority": 1}, is_global=True),
+            "third": make_function("third"),
+        }
+    )
+    monkeypatch.setattr(plugin_utils, "Functions", functions)
+    return functions
+
+
+class TestPluginRegistry:
+    """Test the snapshot of functions and tools shared by requests"""
+
+    def test_functions_are_read_once(self, functions, monkeypatch):
+        registry = PluginRegistry()
+        monkeypatch.setattr(plugin_utils, "PLUGIN_REGISTRY", registry)
+        monkeypatch.setattr("open_webui.utils.filter.PLUGIN_REGISTRY", registry)
+        state = SimpleNamespace(
+            FUNCTIONS={id: object() for id in functions.functions},
+            FUNCTION_CONTENTS={id: "" for id in functions.functions},
+        )
+        request = SimpleNamespace(app=SimpleNamespace(state=state))
+
+        for _ in range(100):
+            assert get_sorted_filter_ids(request, {}) == ["second", "first"]
+            assert registry.get_function("third").valves is None
+
+        assert functions.queries == 1
+
+    def test_updates_from_other_workers_are_picked_up(self, functions):
+        redis = FakeRedis()
+        registry = get_registry(redis)
+        other_registry = get_registry(redis)
+        assert registry.get_function("first").valves == {"priority": 2}
+        assert other_registry.get_function("first").valves == {"priority": 2}
+        assert functions.queries == 2
+
+        functions.functions["first"] = make_function("first", valves={"priority": 0})
+        registry.bump("first")
+
+        assert other_registry.get_function("first").valves == {"priority": 0}
+        assert registry.get_function("first").valves == {"priority": 0}
+        assert functions.queries == 4
+
+    def test_modules_are_reloaded_when_content_changes(self, functions, monkeypatch):
+        registry = PluginRegistry()
+        monkeypatch.setattr(plugin_utils, "PLUGIN_REGISTRY", registry)
+        loads = []
+        monkeypatch.setattr(
+            plugin_utils,
+            "load_function_module_by_id",
+            lambda id, content: (loads.append(content) or object(), "filter", {}),
+        )
+        request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace()))
+
+        module, _, _ = get_function_module_from_cache(request, "first")
+        for _ in range(10):
+            assert get_function_module_from_cache(request, "first")[0] is module
+
+        functions.functions["first"] = make_function("first", content="# updated")
+        registry.bump("first")
+
+        assert get_function_module_from_cache(request, "first")[0] is not module
+        assert loads == ["", "# updated"]
+        assert functions.queries == 2
@@ -0,0 +1,91 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from open_webui.socket.utils import RedisDict
+
+
+def make_redis_dict(stored, **kwargs):
+    """A RedisDict on mocked connections holding `stored` in its hash."""
+
+    def hmget(name, keys):
+        return [stored.get(key) for key in keys]
+
+    def make_pipeline(async_mode):
+        pipe = MagicMock()
+        batches = []
+        pipe.hmget.side_effect = lambda name, keys: batches.append(hmget(name, keys))
+        if async_mode:
+            pipe.execute = AsyncMock(side_effect=lambda: list(batches))
+        else:
+            pipe.execute.side_effect = lambda: list(batches)
+        return pipe
+
+    sync_redis = MagicMock()
+    sync_redis.pipeline.side_effect = lambda **kwargs: make_pipeline(False)
+    sync_redis.hget.side_effect = lambda name, key: stored.get(key)
+    async_redis = MagicMock()
+    async_redis.pipeline.side_effect = lambda **kwargs: make_pipeline(True)
+    async_redis.hset = AsyncMock()
+
+    with patch(
+        "open_webui.socket.utils.get_redis_connection",
+        side_effect=lambda *args, async_mode=False, **kwargs: (
+            async_redis if async_mode else sync_redis
+        ),
+    ):
+        return RedisDict("pool", redis_url="redis://localhost", **kwargs)
+
+
+class TestRedisDict:
+    """Test bulk reads, writes and the local cache of RedisDict"""
+
+    def test_mget_batches_keys(self):
+        stored = {f"sid-{idx}": json.dumps({"id": f"user-{idx}"}) for idx in range(5)}
+        pool = make_redis_dict(stored)
+        pool.MGET_BATCH_SIZE = 2
+
+        values = pool.mget(["sid-0", "sid-4", "missing", "sid-2", "sid-3"])
+
+        assert values == [
+            {"id": "user-0"},
+            {"id": "user-4"},
+            None,
+            {"id": "user-2"},
+            {"id": "user-3"},
+        ]
+        # One round trip of 3 HMGETs
+        assert pool.redis.pipeline.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_async_mget_uses_cache(self):
+        stored = {"sid-1": json.dumps({"id": "user-1"})}
+        pool = make_redis_dict(stored, cache_ttl=60)
+
+        assert await pool.async_mget(["sid-1", "sid-2"]) == [{"id": "user-1"}, None]
+        await pool.async_set_many({"sid-2": {"id": "user-2"}})
+        del stored["sid-1"]
+
+        # Served locally, missing keys aren't cached
+        assert await pool.async_mget(["sid-1", "sid-2"]) == [
+            {"id": "user-1"},
+            {"id": "user-2"},
+        ]
+        assert pool.get("sid-1") == {"id": "user-1"}
+        assert await pool.async_get("sid-3", "default") == "default"
+        assert pool.async_redis.pipeline.call_count == 2
+
+        pool.delete_many(["sid-1"])
+        assert pool.get("sid-1") is None
+
+    def test_cache_expires(self):
+        stored = {"sid-1": json.dumps({"id": "user-1"})}
+        pool = make_redis_dict(stored, cache_ttl=60)
+
+        assert pool["sid-1"] == {"id": "user-1"}
+        stored["sid-1"] = json.dumps({"id": "user-2"})
+        assert pool["sid-1"] == {"id": "user-1"}
+
+        with patch("time.monotonic", return_value=10**9):
+            assert pool["sid-1"] == {"id": "user-2"}
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import threading
+
+import pytest
+from langchain_core.documents import Document
+
+from open_webui.retrieval.models.base_reranker import BaseReranker
+from open_webui.retrieval.reranking import RerankingService
+
+
+class CrossEncoder:
+    def __init__(self):
+        self.calls = []
+        self.threads = set()
+
+    def predict(self, sentences):
+        self.calls.append(list(sentences))
+        self.threads.add(threading.current_thread().name)
+        return [float(len(query) + len(text)) for query, text in sentences]
+
+
+class SingleQueryReranker(BaseReranker):
+    def __init__(self, pointwise=True):
+        self.calls = []
+        self.pointwise = pointwise
+
+    def predict(self, sentences):
+        assert len({query for query, _ in sentences}) == 1
+        self.calls.append(list(sentences))
+        return [float(len(text)) for _, text in sentences]
+
+
+def make_documents(*texts):
+    return [Document(page_content=text) for text in texts]
+
+
+class TestRerankingService:
+    """Test batching and score caching of reranking calls"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_a_batch(self):
+        reranker = CrossEncoder()
+        service = RerankingService(reranker, max_wait=0.01)
+
+        scores = await asyncio.gather(
+            service("q", make_documents("a", "bb")),
+            service("q", make_documents("bb", "ccc")),
+            service("qq", make_documents("a")),
+        )
+
+        assert scores == [[2.0, 3.0], [3.0, 4.0], [3.0]]
+        # Duplicate pairs are scored once, off the event loop
+        assert reranker.calls == [[("q", "a"), ("q", "bb"), ("q", "ccc"), ("qq", "a")]]
+        assert reranker.threads == {"reranker_0"}
+
+        # Scores are cached across calls
+        assert await service("q", make_documents("ccc", "a")) == [4.0, 2.0]
+        assert len(reranker.calls) == 1
+        assert service.stats == {"batches": 1, "pairs_scored": 4, "cache_hits": 2}
+        service.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_batches_are_bounded_and_split_by_query(self):
+        reranker = SingleQueryReranker()
+        service = RerankingService(reranker, max_batch_size=3, max_wait=0.01)
+
+        await asyncio.gather(
+            service("q1", make_documents("a", "b")),
+            service("q2", make_documents("a", "b", "c")),
+        )
+
+        # Batches of 3 pairs, one query per call
+        assert sorted((call[0][0], len(call)) for call in reranker.calls) == [
+            ("q1", 2),
+            ("q2", 1),
+            ("q2", 2),
+        ]
+        service.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_set_dependent_scores_are_not_cached(self):
+        reranker = SingleQueryReranker(pointwise=False)
+        service = RerankingService(reranker)
+
+        assert await service("q", make_documents("a", "bb")) == [1.0, 2.0]
+        assert await service("q", make_documents("a", "bb")) == [1.0, 2.0]
+        assert len(reranker.calls) == 2
+        service.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_failed_batches_are_not_cached(self):
+        class FailingReranker:
+            calls = 0
+
+            def predict(self, sentences):
+                self.calls += 1
+                return None
+
+        reranker = FailingReranker()
+        service = RerankingService(reranker, max_wait=0)
+
+        assert await service("q", make_documents("a")) is None
+        assert await service("q", make_documents("a")) is None
+        assert reranker.calls == 2
+        service.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_calls_dont_fail_others(self):
+        reranker = CrossEncoder()
+        service = RerankingService(reranker, max_wait=0.01)
+
+        first = asyncio.create_task(service("q", make_documents("a", "bb")))
+        second = asyncio.create_task(service("q", make_documents("a")))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == [2.0]
+        assert first.cancelled()
+
+        # Shared futures cancelled anyway are scored again
+        future = asyncio.get_running_loop().create_future()
+        key = (hashlib.sha256(b"q").digest(), hashlib.sha256(b"c").digest())
+        service._inflight[key] = future
+        future.cancel()
+        assert await service("q", make_documents("c")) == [2.0]
+        service.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_queued_batches_are_scored_after_shutdown(self):
+        reranker = CrossEncoder()
+        service = RerankingService(reranker, max_batch_size=1, max_wait=0.01)
+
+        first = asyncio.create_task(service("q", make_documents("a")))
+        second = asyncio.create_task(service("q", make_documents("bb")))
+        third = asyncio.create_task(service("q", make_documents("ccc")))
+        await asyncio.sleep(0)
+        service.shutdown()
+
+        results = await asyncio.wait_for(asyncio.gather(first, second, third), 1)
+        assert results == [[2.0], [3.0], [4.0]]
+        await asyncio.sleep(0)
+        assert service._executor._shutdown
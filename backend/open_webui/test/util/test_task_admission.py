@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from open_webui.tasks import TaskAdmission, TaskPriority
+
+INTERACTIVE = TaskPriority.INTERACTIVE
+BACKGROUND = TaskPriority.BACKGROUND
+
+
+async def wait_queued(admission, count):
+    while sum(admission.queue_depths().values()) < count:
+        await asyncio.sleep(0)
+
+
+class TestTaskAdmission:
+    """Test admission control and priority queueing of chat tasks"""
+
+    @pytest.mark.asyncio
+    async def test_tasks_wait_for_model_and_user_limits(self):
+        admission = TaskAdmission(model_limit=1, user_limit=2)
+
+        assert await admission.acquire("llama", "alice", INTERACTIVE)
+        # Other models and users are not limited by "llama"
+        assert await admission.acquire("qwen", "alice", INTERACTIVE)
+        assert await admission.acquire("mistral", "bob", INTERACTIVE)
+
+        waiting = asyncio.create_task(admission.acquire("llama", "bob", INTERACTIVE))
+        await wait_queued(admission, 1)
+        assert not waiting.done()
+        assert admission.running_by_user == {"alice": 2, "bob": 1}
+
+        admission.release("llama", "alice")
+        assert await waiting
+        assert admission.running_by_model == {"qwen": 1, "mistral": 1, "llama": 1}
+        assert admission.stats == {"admitted": 4, "queued": 1, "shed": 0}
+
+    @pytest.mark.asyncio
+    async def test_interactive_tasks_are_admitted_first(self):
+        admission = TaskAdmission(model_limit=1)
+        admitted = []
+
+        async def run(name, priority):
+            async with admission.admit("llama", name, priority):
+                admitted.append(name)
+
+        assert await admission.acquire("llama", "alice", INTERACTIVE)
+        runs = [
+            asyncio.create_task(run("title", BACKGROUND)),
+            asyncio.create_task(run("tags", BACKGROUND)),
+            asyncio.create_task(run("chat", INTERACTIVE)),
+        ]
+        await wait_queued(admission, 3)
+        assert admission.queue_depths() == {"interactive": 1, "background": 2}
+
+        admission.release("llama", "alice")
+        await asyncio.gather(*runs)
+        assert admitted == ["chat", "title", "tags"]
+        assert admission.running == 0
+
+    @pytest.mark.asyncio
+    async def test_interactive_tasks_only_hold_back_their_limits(self):
+        admission = TaskAdmission(model_limit=1)
+        assert await admission.acquire("llama", "alice", INTERACTIVE)
+
+        waiting = asyncio.create_task(admission.acquire("llama", "bob", INTERACTIVE))
+        await wait_queued(admission, 1)
+
+        # Background tasks of other models don't compete with the waiting task
+        assert await admission.acquire("qwen", "carol", BACKGROUND)
+        title = asyncio.create_task(admission.acquire("llama", "carol", BACKGROUND))
+        tags = asyncio.create_task(admission.acquire("mistral", "carol", BACKGROUND))
+        assert await tags
+        await wait_queued(admission, 2)
+
+        admission.release("llama", "alice")
+        assert await waiting
+        assert not title.done()
+        admission.release("llama", "bob")
+        assert await title
+
+    @pytest.mark.asyncio
+    async def test_background_tasks_are_shed(self):
+        admission = TaskAdmission(
+            model_limit=1, background_queue_size=1, background_timeout=0.05
+        )
+        assert await admission.acquire("llama", "alice", INTERACTIVE)
+
+        waiting = asyncio.create_task(admission.acquire("llama", "bob", BACKGROUND))
+        await wait_queued(admission, 1)
+        # The queue is full
+        assert not await admission.acquire("llama", "carol", BACKGROUND)
+        # Waited too long
+        assert not await waiting
+
+        assert admission.queue_depths() == {"interactive": 0, "background": 0}
+        assert admission.stats["shed"] == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_tasks_leave_the_queue(self):
+        admission = TaskAdmission(model_limit=1)
+        assert await admission.acquire("llama", "alice", INTERACTIVE)
+
+        cancelled = asyncio.create_task(admission.acquire("llama", "bob", INTERACTIVE))
+        waiting = asyncio.create_task(admission.acquire("llama", "carol", INTERACTIVE))
+        await wait_queued(admission, 2)
+
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+
+        admission.release("llama", "alice")
+        assert await waiting
+        assert admission.running_by_user == {"carol": 1}
+        assert admission.queue_depths() == {"interactive": 0, "background": 0}
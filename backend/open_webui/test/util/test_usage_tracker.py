@@ -0,0 +1,44 @@
+import pytest
+
+from open_webui.socket.utils import UsageTracker
+
+
+class TestUsageTracker:
+    """Test tracking the models in use from session heartbeats"""
+
+    @pytest.mark.asyncio
+    async def test_sessions_expire_after_timeout(self):
+        tracker = UsageTracker(timeout=3)
+
+        await tracker.touch("llama", "sid-1", now=100)
+        await tracker.touch("qwen", "sid-2", now=100)
+        await tracker.touch("llama", "sid-3", now=101)
+
+        assert sorted(await tracker.get_models_in_use(now=102)) == ["llama", "qwen"]
+        assert await tracker.count_sessions("llama", now=102) == 2
+
+        # sid-1 keeps sending heartbeats, sid-2 and sid-3 went away
+        await tracker.touch("llama", "sid-1", now=103)
+        assert await tracker.get_models_in_use(now=104) == ["llama"]
+        assert await tracker.count_sessions("llama", now=104) == 2
+
+        await tracker.expire(now=105)
+        assert tracker._sessions == {"llama": {"sid-1": 103}}
+        assert list(tracker._models) == ["llama"]
+        assert await tracker.count_sessions("llama", now=105) == 1
+
+        await tracker.expire(now=107)
+        assert tracker._sessions == {}
+        assert await tracker.get_models_in_use(now=107) == []
+        assert await tracker.count_sessions("qwen", now=107) == 0
+
+    @pytest.mark.asyncio
+    async def test_session_switching_models(self):
+        tracker = UsageTracker(timeout=3)
+
+        await tracker.touch("llama", "sid-1", now=100)
+        await tracker.touch("qwen", "sid-1", now=102)
+        await tracker.expire(now=104)
+
+        assert await tracker.get_models_in_use(now=104) == ["qwen"]
+        assert await tracker.count_sessions("llama", now=104) == 0
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from open_webui.retrieval.vector.utils import VectorDBExecutor
+
+
+class TestVectorDBExecutor:
+    """Test the shared executor for blocking vector DB calls"""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_capped_per_backend(self):
+        executor = VectorDBExecutor(max_workers=2)
+        running = {"chroma": 0, "pgvector": 0}
+        peak = {"chroma": 0, "pgvector": 0}
+        lock = threading.Lock()
+
+        def query(backend):
+            with lock:
+                running[backend] += 1
+                peak[backend] = max(peak[backend], running[backend])
+            time.sleep(0.02)
+            with lock:
+                running[backend] -= 1
+            return backend
+
+        results = await asyncio.gather(
+            *[
+                executor.run(backend, query, backend)
+                for backend in ("chroma", "pgvector")
+                for _ in range(6)
+            ]
+        )
+        executor.shutdown()
+
+        assert results == ["chroma"] * 6 + ["pgvector"] * 6
+        assert peak == {"chroma": 2, "pgvector": 2}
+        assert executor.stats == {"calls": 12, "timeouts": 0}
+
+    @pytest.mark.asyncio
+    async def test_slow_call_times_out_without_blocking(self):
+        executor = VectorDBExecutor(max_workers=1, timeout=0.05)
+        release = threading.Event()
+
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while not release.is_set():
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticker = asyncio.create_task(tick())
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run("chroma", release.wait, 5)
+
+        # The event loop kept running while the call was waiting
+        assert ticks > 3
+        assert executor.stats["timeouts"] == 1
+
+        # Other backends don't wait for the stuck thread
+        assert await executor.run("qdrant", lambda: "ok") == "ok"
+
+        release.set()
+        await ticker
+        executor.shutdown()
@@ -0,0 +1,70 @@
+import pycrdt as Y
+import pytest
+
+from open_webui.socket.utils import YdocManager
+
+
+def make_updates(count):
+    doc = Y.Doc()
+    text = doc.get("text", type=Y.Text)
+    updates = []
+    doc.observe(lambda event: updates.append(event.update))
+    for idx in range(count):
+        text += f"{idx} "
+    return doc, updates
+
+
+def get_text(*updates):
+    doc = Y.Doc()
+    for update in updates:
+        doc.apply_update(update)
+    return str(doc.get("text", type=Y.Text))
+
+
+class TestYdocManager:
+    """Test compaction and state sync of collaborative documents"""
+
+    @pytest.mark.asyncio
+    async def test_updates_are_compacted(self):
+        manager = YdocManager(compact_threshold=10)
+        doc, updates = make_updates(25)
+
+        for update in updates:
+            await manager.append_to_updates("note:1", list(update))
+
+        # Compacted twice, the snapshot and 5 updates are left
+        assert len(await manager.get_updates("note:1")) == 6
+        assert manager.stats == {"compactions": 2, "updates_compacted": 20}
+
+        state = await manager.get_state_update("note:1")
+        assert await manager.get_updates("note:1") == [state]
+        assert get_text(state) == str(doc.get("text", type=Y.Text))
+
+    @pytest.mark.asyncio
+    async def test_state_vector_sync(self):
+        manager = YdocManager()
+        doc, updates = make_updates(20)
+        for update in updates:
+            await manager.append_to_updates("note:1", update)
+
+        # A client that saw the first half rejoins
+        client = Y.Doc()
+        for update in updates[:10]:
+            client.apply_update(update)
+
+        diff = await manager.get_state_update("note:1", list(client.get_state()))
+        assert len(diff) < len(await manager.get_state_update("note:1"))
+
+        client.apply_update(diff)
+        assert str(client.get("text", type=Y.Text)) == get_text(*updates)
+
+        # Nothing is missing
+        diff = await manager.get_state_update("note:1", client.get_state())
+        assert diff == b"\x00\x00"
+
+    @pytest.mark.asyncio
+    async def test_empty_document(self):
+        manager = YdocManager()
+
+        assert await manager.get_state_update("note:1") == b"\x00\x00"
+        assert not await manager.document_exists("note:1")
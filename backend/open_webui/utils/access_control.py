@@ -1,10 +1,69 @@
 from typing import Optional, Set, Union, List, Dict, Any
 from open_webui.models.users import Users, UserModel
-from open_webui.models.groups import Groups
+from open_webui.models.groups import Groups, GroupModel
 
 
 from open_webui.config import DEFAULT_USER_PERMISSIONS
+from open_webui.env import USER_ACCESS_CACHE_SIZE, USER_ACCESS_CACHE_TTL
 import json
+import time
+
+
+class UserAccessCache:
+    """
+    Per-user group memberships and resolved permissions.
+
+    Entries are dropped whenever `Groups.version` changes, which is bumped on
+    every membership or group permission change (across workers with Redis),
+    and expire after `ttl` seconds in any case.
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+
+        self._version = None
+        self._entries: dict[str, dict] = {}
+
+    def clear(self):
+        self._entries = {}
+
+    def get_entry(self, user_id: str) -> dict:
+        version = Groups.version.get()
+        if version != self._version:
+            self._entries = {}
+            self._version = version
+
+        now = time.monotonic()
+        entry = self._entries.get(user_id)
+        if entry is None or now - entry["created_at"] > self.ttl:
+            groups = Groups.get_groups_by_member_id(user_id)
+            entry = {
+                "created_at": now,
+                "groups": groups,
+                "group_ids": {group.id for group in groups},
+                "permissions": None,
+            }
+
+            # Don't cache what was loaded while the groups were changing
+            if self.ttl > 0 and version == self._version:
+                if len(self._entries) >= self.maxsize:
+                    self._entries.pop(next(iter(self._entries)), None)
+                self._entries[user_id] = entry
+        return entry
+
+
+USER_ACCESS_CACHE = UserAccessCache(
+    ttl=USER_ACCESS_CACHE_TTL, maxsize=USER_ACCESS_CACHE_SIZE
+)
+
+
+def get_user_groups(user_id: str) -> list[GroupModel]:
+    return USER_ACCESS_CACHE.get_entry(user_id)["groups"]
+
+
+def get_user_group_ids(user_id: str) -> set[str]:
+    return set(USER_ACCESS_CACHE.get_entry(user_id)["group_ids"])
 
 
 def fill_missing_permissions(
@@ -33,7 +92,16 @@ def get_permissions(
     Get all permissions for a user by combining the permissions of all groups the user is a member of.
     If a permission is defined in multiple groups, the most permissive value is used (True > False).
     Permissions are nested in a dict with the permission key as the key and a boolean as the value.
+
+    The result is cached until the user's groups or `default_permissions` change
+    and must not be modified.
     """
+    entry = USER_ACCESS_CACHE.get_entry(user_id)
+
+    # default_permissions is replaced, not mutated, when the config is updated
+    cached = entry["permissions"]
+    if cached is not None and cached[0] is default_permissions:
+        return cached[1]
 
     def combine_permissions(
         permissions: Dict[str, Any], group_permissions: Dict[str, Any]
@@ -53,7 +121,7 @@ def get_permissions(
                     )  # Use the most permissive value (True > False)
         return permissions
 
-    user_groups = Groups.get_groups_by_member_id(user_id)
+    user_groups = entry["groups"]
 
     # Deep copy default permissions to avoid modifying the original dict
     permissions = json.loads(json.dumps(default_permissions))
@@ -65,6 +133,7 @@ def get_permissions(
     # Ensure all fields from default_permissions are present and filled in
     permissions = fill_missing_permissions(permissions, default_permissions)
 
+    entry["permissions"] = (default_permissions, permissions)
     return permissions
 
 
@@ -92,7 +161,7 @@ def has_permission(
     permission_hierarchy = permission_key.split(".")
 
     # Retrieve user group permissions
-    user_groups = Groups.get_groups_by_member_id(user_id)
+    user_groups = get_user_groups(user_id)
 
     for group in user_groups:
         if get_permission(group.permissions or {}, permission_hierarchy):
@@ -135,8 +204,7 @@ def has_access(
             return True
 
     if user_group_ids is None:
-        user_groups = Groups.get_groups_by_member_id(user_id)
-        user_group_ids = {group.id for group in user_groups}
+        user_group_ids = get_user_group_ids(user_id)
 
     permitted_ids = get_permitted_group_and_user_ids(type, access_control)
     if permitted_ids is None:
@@ -145,8 +213,8 @@ def has_access(
     permitted_group_ids = permitted_ids.get("group_ids", [])
     permitted_user_ids = permitted_ids.get("user_ids", [])
 
-    return user_id in permitted_user_ids or any(
-        group_id in permitted_group_ids for group_id in user_group_ids
+    return user_id in permitted_user_ids or not set(permitted_group_ids).isdisjoint(
+        user_group_ids
     )
 
 
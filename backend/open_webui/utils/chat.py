@@ -43,6 +43,7 @@ from open_webui.models.models import Models
 
 
 from open_webui.utils.plugin import (
+    PLUGIN_REGISTRY,
     load_function_module_by_id,
     get_function_module_from_cache,
 )
@@ -477,7 +478,7 @@ async def chat_completed(request: Request, form_data: dict, user: Any):
 
     try:
         filter_functions = [
-            Functions.get_function_by_id(filter_id)
+            PLUGIN_REGISTRY.get_function(filter_id)
             for filter_id in get_sorted_filter_ids(
                 request, model, metadata.get("filter_ids", [])
             )
@@ -0,0 +1,255 @@
+import html
+import json
+
+
+def split_content_and_whitespace(content):
+    content_stripped = content.rstrip()
+    original_whitespace = (
+        content[len(content_stripped) :] if len(content) > len(content_stripped) else ""
+    )
+    return content_stripped, original_whitespace
+
+
+def is_opening_code_block(content):
+    backtick_segments = content.split("```")
+    # Even number of segments means the last backticks are opening a new block
+    return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
+
+
+def serialize_content_block(block: dict, content: str = "", raw: bool = False) -> str:
+    """
+    Append the rendering of a single content block to the already serialized
+    `content` and return the result.
+    """
+    if block["type"] == "text":
+        block_content = block["content"].strip()
+        if block_content:
+            content = f"{content}{block_content}\n"
+    elif block["type"] == "tool_calls":
+        attributes = block.get("attributes", {})
+
+        tool_calls = block.get("content", [])
+        results = block.get("results", [])
+
+        if content and not content.endswith("\n"):
+            content += "\n"
+
+        if results:
+
+            tool_calls_display_content = ""
+            for tool_call in tool_calls:
+
+                tool_call_id = tool_call.get("id", "")
+                tool_name = tool_call.get("function", {}).get("name", "")
+                tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                tool_result = None
+                tool_result_files = None
+                for result in results:
+                    if tool_call_id == result.get("tool_call_id", ""):
+                        tool_result = result.get("content", None)
+                        tool_result_files = result.get("files", None)
+                        break
+
+                if tool_result is not None:
+                    tool_result_embeds = result.get("embeds", "")
+                    tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result, ensure_ascii=False))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}" embeds="{html.escape(json.dumps(tool_result_embeds))}">\n<summary>Tool Executed</summary>\n</details>\n'
+                else:
+                    tool_calls_display_content = f'{tool_calls_display_content}<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
+
+            if not raw:
+                content = f"{content}{tool_calls_display_content}"
+        else:
+            tool_calls_display_content = ""
+
+            for tool_call in tool_calls:
+                tool_call_id = tool_call.get("id", "")
+                tool_name = tool_call.get("function", {}).get("name", "")
+                tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>\n'
+
+            if not raw:
+                content = f"{content}{tool_calls_display_content}"
+
+    elif block["type"] == "reasoning":
+        reasoning_display_content = html.escape(
+            "\n".join(
+                (f"> {line}" if not line.startswith(">") else line)
+                for line in block["content"].splitlines()
+            )
+        )
+
+        reasoning_duration = block.get("duration", None)
+
+        start_tag = block.get("start_tag", "")
+        end_tag = block.get("end_tag", "")
+
+        if content and not content.endswith("\n"):
+            content += "\n"
+
+        if reasoning_duration is not None:
+            if raw:
+                content = f'{content}{start_tag}{block["content"]}{end_tag}\n'
+            else:
+                content = f'{content}<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
+        else:
+            if raw:
+                content = f'{content}{start_tag}{block["content"]}{end_tag}\n'
+            else:
+                content = f'{content}<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
+
+    elif block["type"] == "code_interpreter":
+        attributes = block.get("attributes", {})
+        output = block.get("output", None)
+        lang = attributes.get("lang", "")
+
+        content_stripped, original_whitespace = split_content_and_whitespace(content)
+        if is_opening_code_block(content_stripped):
+            # Remove trailing backticks that would open a new block
+            content = content_stripped.rstrip("`").rstrip() + original_whitespace
+        else:
+            # Keep content as is - either closing backticks or no backticks
+            content = content_stripped + original_whitespace
+
+        if content and not content.endswith("\n"):
+            content += "\n"
+
+        if output:
+            output = html.escape(json.dumps(output))
+
+            if raw:
+                content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
+            else:
+                content = f'{content}<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+        else:
+            if raw:
+                content = f'{content}<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
+            else:
+                content = f'{content}<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+
+    else:
+        block_content = str(block["content"]).strip()
+        if block_content:
+            content = f"{content}{block['type']}: {block_content}\n"
+
+    return content
+
+
+def serialize_content_blocks(content_blocks: list[dict], raw: bool = False) -> str:
+    content = ""
+
+    for block in content_blocks:
+        content = serialize_content_block(block, content, raw)
+
+    return content.strip()
+
+
+def get_content_block_signature(block: dict) -> tuple:
+    block_content = block.get("content")
+    return (
+        block["type"],
+        (
+            len(block_content)
+            if isinstance(block_content, (str, list))
+            else str(block_content)
+        ),
+        block.get("duration"),
+        len(block.get("results") or []),
+        block.get("output") is not None,
+    )
+
+
+class ContentBlocksSerializer:
+    """
+    Incremental equivalent of `serialize_content_blocks` for streaming responses.
+
+    While streaming, only the last content block is mutated; earlier blocks are
+    closed. The rendered prefix up to each closed block is cached, so each call
+    only renders the open tail instead of every block of the message.
+    """
+
+    def __init__(self):
+        # [(block, signature, content rendered up to and including block)]
+        self._cache = []
+        # Bumped whenever the cached prefix of closed blocks changes
+        self._version = 0
+        self._offsets = {}
+
+        self._content = None
+        self._last_content = None
+        self._last_version = None
+
+    def serialize(self, content_blocks: list[dict]) -> str:
+        closed_blocks = content_blocks[:-1]
+
+        cached = 0
+        for (block, signature, _), current in zip(self._cache, closed_blocks):
+            if block is not current or signature != get_content_block_signature(
+                current
+            ):
+                break
+            cached += 1
+
+        if cached < len(self._cache) or cached < len(closed_blocks):
+            del self._cache[cached:]
+            self._version += 1
+            self._offsets = {}
+
+        content = self._cache[-1][2] if self._cache else ""
+        for block in closed_blocks[cached:]:
+            content = serialize_content_block(block, content)
+            self._cache.append((block, get_content_block_signature(block), content))
+
+        if content_blocks:
+            content = serialize_content_block(content_blocks[-1], content)
+
+        self._content = content.strip()
+        return self._content
+
+    def _get_prefix_offset(self) -> tuple[int, int]:
+        """
+        Return the (code point, UTF-16) length of the stripped content that is
+        rendered from closed blocks only, or (0, 0) if there is none.
+        """
+        if "prefix" not in self._offsets:
+            prefix = self._cache[-1][2] if self._cache else ""
+            stripped = prefix.lstrip()
+            offset = len(stripped.rstrip()) if stripped.strip() else 0
+            self._offsets["prefix"] = (
+                offset,
+                len(stripped[:offset].encode("utf-16-le")) // 2,
+            )
+        return self._offsets["prefix"]
+
+    def get_content_delta(self, content: str) -> dict:
+        """
+        Return the smallest event payload that turns the previously returned
+        content into `content`:
+
+        - `{"content_delta": ...}` when text was only appended,
+        - `{"content_offset": ..., "content_delta": ...}` when only the open tail
+          block changed; the offset is in UTF-16 code units for `String.slice`,
+        - `{"content": ...}` otherwise.
+        """
+        last_content = self._last_content
+        last_version = self._last_version
+
+        self._last_content = content
+        self._last_version = self._version if content is self._content else None
+
+        if last_content is None:
+            return {"content": content}
+
+        if content.startswith(last_content):
+            return {"content_delta": content[len(last_content) :]}
+
+        if last_version is not None and last_version == self._last_version:
+            offset, utf16_offset = self._get_prefix_offset()
+            if 0 < offset <= min(len(content), len(last_content)):
+                return {
+                    "content_offset": utf16_offset,
+                    "content_delta": content[offset:],
+                }
+
+        return {"content": content}
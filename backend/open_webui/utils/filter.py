@@ -2,6 +2,7 @@ import inspect
 import logging
 
 from open_webui.utils.plugin import (
+    PLUGIN_REGISTRY,
     load_function_module_by_id,
     get_function_module_from_cache,
 )
@@ -23,20 +24,26 @@ def get_function_module(request, function_id, load_from_db=True):
 
 
 def get_sorted_filter_ids(request, model: dict, enabled_filter_ids: list = None):
+    functions = PLUGIN_REGISTRY.get_functions()
+
     def get_priority(function_id):
-        function = Functions.get_function_by_id(function_id)
+        function = functions.get(function_id)
         if function is not None:
-            valves = Functions.get_function_valves_by_id(function_id)
-            return valves.get("priority", 0) if valves else 0
+            return function.valves.get("priority", 0) if function.valves else 0
         return 0
 
-    filter_ids = [function.id for function in Functions.get_global_filter_functions()]
+    filter_ids = [
+        function.id
+        for function in functions.values()
+        if function.type == "filter" and function.is_active and function.is_global
+    ]
     if "info" in model and "meta" in model["info"]:
         filter_ids.extend(model["info"]["meta"].get("filterIds", []))
         filter_ids = list(set(filter_ids))
     active_filter_ids = [
         function.id
-        for function in Functions.get_functions_by_type("filter", active_only=True)
+        for function in functions.values()
+        if function.type == "filter" and function.is_active
     ]
 
     def get_active_status(filter_id):
@@ -57,80 +64,140 @@ def get_sorted_filter_ids(request, model: dict, enabled_filter_ids: list = None)
     return filter_ids
 
 
+class FilterPipeline:
+    """
+    The `filter_type` handlers of a chat's filters, prepared once per request.
+
+    Every filter's module and handler are resolved, the handler's signature is
+    inspected and the valves and user valves are read when the pipeline is
+    first run. Later runs, e.g. for every chunk of a streamed response, only
+    call the handlers. The pipeline is prepared again when a filter or its
+    valves are updated, see `PluginRegistry`.
+    """
+
+    def __init__(self, request, filter_functions, filter_type):
+        self.request = request
+        self.filter_functions = [function for function in filter_functions if function]
+        self.filter_type = filter_type
+
+        self._filters = []
+        self._version = None
+
+    def _prepare(self, user_id):
+        self._filters = []
+
+        for function in self.filter_functions:
+            filter_id = function.id
+            function_module = get_function_module(
+                self.request, filter_id, load_from_db=(self.filter_type != "stream")
+            )
+            # Prepare handler function
+            handler = getattr(function_module, self.filter_type, None)
+            if not handler:
+                continue
+
+            # Snapshot the valves of the function
+            valves = None
+            if hasattr(function_module, "valves") and hasattr(
+                function_module, "Valves"
+            ):
+                function = PLUGIN_REGISTRY.get_function(filter_id)
+                valves = function.valves if function else None
+                valves = function_module.Valves(**(valves if valves else {}))
+
+            parameters = inspect.signature(handler).parameters
+
+            # Snapshot the user valves
+            user_valves = None
+            if "__user__" in parameters and hasattr(function_module, "UserValves"):
+                try:
+                    user_valves = function_module.UserValves(
+                        **Functions.get_user_valves_by_id_and_user_id(
+                            filter_id, user_id
+                        )
+                    )
+                except Exception as e:
+                    log.exception(f"Failed to get user values: {e}")
+
+            self._filters.append(
+                (
+                    filter_id,
+                    function_module,
+                    handler,
+                    parameters,
+                    inspect.iscoroutinefunction(handler),
+                    valves,
+                    user_valves,
+                )
+            )
+
+        # Loading a module can update its function, take the version after
+        self._version = PLUGIN_REGISTRY.get_version()
+
+    async def __call__(self, form_data, extra_params):
+        if self._version is None or self._version != PLUGIN_REGISTRY.get_version():
+            self._prepare(extra_params.get("__user__", {}).get("id"))
+
+        skip_files = None
+
+        for (
+            filter_id,
+            function_module,
+            handler,
+            parameters,
+            is_coroutine,
+            valves,
+            user_valves,
+        ) in self._filters:
+            # Check if the function has a file_handler variable
+            if self.filter_type == "inlet" and hasattr(function_module, "file_handler"):
+                skip_files = function_module.file_handler
+
+            # Apply valves to the function
+            if valves is not None:
+                function_module.valves = valves
+
+            try:
+                # Prepare parameters
+                params = {"body": form_data}
+                if self.filter_type == "stream":
+                    params = {"event": form_data}
+
+                params = params | {
+                    k: v
+                    for k, v in {
+                        **extra_params,
+                        "__id__": filter_id,
+                    }.items()
+                    if k in parameters
+                }
+
+                # Handle user parameters
+                if user_valves is not None and "__user__" in params:
+                    params["__user__"]["valves"] = user_valves
+
+                # Execute handler
+                if is_coroutine:
+                    form_data = await handler(**params)
+                else:
+                    form_data = handler(**params)
+
+            except Exception as e:
+                log.debug(f"Error in {self.filter_type} handler {filter_id}: {e}")
+                raise e
+
+        # Handle file cleanup for inlet
+        if skip_files:
+            if "files" in form_data.get("metadata", {}):
+                del form_data["metadata"]["files"]
+            if "files" in form_data:
+                del form_data["files"]
+
+        return form_data, {}
+
+
 async def process_filter_functions(
     request, filter_functions, filter_type, form_data, extra_params
 ):
-    skip_files = None
-
-    for function in filter_functions:
-        filter = function
-        filter_id = function.id
-        if not filter:
-            continue
-
-        function_module = get_function_module(
-            request, filter_id, load_from_db=(filter_type != "stream")
-        )
-        # Prepare handler function
-        handler = getattr(function_module, filter_type, None)
-        if not handler:
-            continue
-
-        # Check if the function has a file_handler variable
-        if filter_type == "inlet" and hasattr(function_module, "file_handler"):
-            skip_files = function_module.file_handler
-
-        # Apply valves to the function
-        if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
-            valves = Functions.get_function_valves_by_id(filter_id)
-            function_module.valves = function_module.Valves(
-                **(valves if valves else {})
-            )
-
-        try:
-            # Prepare parameters
-            sig = inspect.signature(handler)
-
-            params = {"body": form_data}
-            if filter_type == "stream":
-                params = {"event": form_data}
-
-            params = params | {
-                k: v
-                for k, v in {
-                    **extra_params,
-                    "__id__": filter_id,
-                }.items()
-                if k in sig.parameters
-            }
-
-            # Handle user parameters
-            if "__user__" in sig.parameters:
-                if hasattr(function_module, "UserValves"):
-                    try:
-                        params["__user__"]["valves"] = function_module.UserValves(
-                            **Functions.get_user_valves_by_id_and_user_id(
-                                filter_id, params["__user__"]["id"]
-                            )
-                        )
-                    except Exception as e:
-                        log.exception(f"Failed to get user values: {e}")
-
-            # Execute handler
-            if inspect.iscoroutinefunction(handler):
-                form_data = await handler(**params)
-            else:
-                form_data = handler(**params)
-
-        except Exception as e:
-            log.debug(f"Error in {filter_type} handler {filter_id}: {e}")
-            raise e
-
-    # Handle file cleanup for inlet
-    if skip_files:
-        if "files" in form_data.get("metadata", {}):
-            del form_data["metadata"]["files"]
-        if "files" in form_data:
-            del form_data["files"]
-
-    return form_data, {}
+    pipeline = FilterPipeline(request, filter_functions, filter_type)
+    return await pipeline(form_data, extra_params)
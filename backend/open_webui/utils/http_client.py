@@ -0,0 +1,208 @@
+import asyncio
+import logging
+from typing import Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from open_webui.env import (
+    AIOHTTP_CLIENT_DNS_CACHE_TTL,
+    AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT,
+    AIOHTTP_CLIENT_POOL_LIMIT,
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class UpstreamSessionPool:
+    """
+    App-lifetime aiohttp sessions for the OpenAI and Ollama connections.
+
+    There is one session per connection, keyed by its kind ("openai" or
+    "ollama") and index in OPENAI_API_BASE_URLS / OLLAMA_BASE_URLS, so requests
+    to an upstream reuse its keep-alive connections instead of opening a new
+    TCP and TLS connection each time. Requests that aren't made for a configured
+    connection use a shared session of the kind (index None).
+
+    Sessions must not be closed by callers, only their responses are released.
+    They don't keep cookies, as they are shared by all users: cookies are
+    passed with each request instead.
+    """
+
+    def __init__(
+        self,
+        limit: int = 0,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 30,
+        dns_cache_ttl: Optional[int] = 300,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+
+        # (kind, idx) -> (origin, event loop, session, state)
+        self._sessions: dict[tuple, tuple] = {}
+        # Sessions replaced after a connection changed, closed once their
+        # responses are released
+        self._retired: set[aiohttp.ClientSession] = set()
+        self._close_tasks: set[asyncio.Future] = set()
+        # (kind, idx) -> connection counters
+        self.stats: dict[tuple, dict[str, int]] = {}
+
+    def _trace_config(self, stats: dict[str, int]) -> aiohttp.TraceConfig:
+        async def on_connection_create_end(session, ctx, params):
+            stats["connections_created"] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            stats["connections_reused"] += 1
+
+        async def on_connection_queued_start(session, ctx, params):
+            stats["connections_queued"] += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_connection_queued_start.append(on_connection_queued_start)
+        return trace_config
+
+    def _response_class(self, state: dict) -> type[aiohttp.ClientResponse]:
+        pool = self
+
+        class PooledResponse(aiohttp.ClientResponse):
+            # Counted from the response headers until the response is
+            # released, closed or read to the end
+            _counted = False
+
+            async def start(self, connection):
+                state["responses"] += 1
+                self._counted = True
+                try:
+                    return await super().start(connection)
+                except BaseException:
+                    self._done()
+                    raise
+
+            async def read(self) -> bytes:
+                body = await super().read()
+                self._done()
+                return body
+
+            def release(self):
+                result = super().release()
+                self._done()
+                return result
+
+            def close(self):
+                super().close()
+                self._done()
+
+            def _done(self):
+                if self._counted:
+                    self._counted = False
+                    state["responses"] -= 1
+                    if state["retired"] and not state["responses"]:
+                        pool._close_retired(state["session"])
+
+        return PooledResponse
+
+    def get_session(
+        self, kind: str, idx: Optional[int] = None, url: Optional[str] = None
+    ) -> aiohttp.ClientSession:
+        """
+        Return the session of connection `idx` of `kind` for a request to
+        `url`, creating it on first use or when the connection now points to
+        another host.
+        """
+        key = (kind, idx)
+        loop = asyncio.get_running_loop()
+
+        origin = None
+        if idx is not None and url:
+            parsed_url = urlparse(url)
+            origin = f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+        entry = self._sessions.get(key)
+        if entry is not None:
+            session_origin, session_loop, session, state = entry
+            if session_origin == origin and session_loop is loop and not session.closed:
+                return session
+            self._retire(state, session_loop)
+
+        stats = self.stats.setdefault(
+            key,
+            {
+                "connections_created": 0,
+                "connections_reused": 0,
+                "connections_queued": 0,
+            },
+        )
+        state = {"session": None, "responses": 0, "retired": False}
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+            ),
+            cookie_jar=aiohttp.DummyCookieJar(),
+            trust_env=True,
+            trace_configs=[self._trace_config(stats)],
+            response_class=self._response_class(state),
+        )
+        state["session"] = session
+        self._sessions[key] = (origin, loop, session, state)
+        log.debug(f"Created upstream session for {kind} connection {idx}: {origin}")
+        return session
+
+    def _retire(self, state: dict, loop: asyncio.AbstractEventLoop):
+        session = state["session"]
+        if session.closed or loop.is_closed():
+            # The connections of a closed loop are gone with it
+            return
+
+        state["retired"] = True
+        self._retired.add(session)
+        if state["responses"]:
+            # Responses still being streamed hold on to their connection, the
+            # last one to be released closes the session
+            return
+
+        if loop is asyncio.get_running_loop():
+            self._close_retired(session)
+        else:
+            loop.call_soon_threadsafe(self._close_retired, session)
+
+    def _close_retired(self, session: aiohttp.ClientSession):
+        self._retired.discard(session)
+        task = asyncio.ensure_future(self._close_session(session))
+        self._close_tasks.add(task)
+        task.add_done_callback(self._close_tasks.discard)
+
+    async def _close_session(self, session: aiohttp.ClientSession):
+        if session.closed:
+            return
+        try:
+            await session.close()
+        except Exception as e:
+            log.warning(f"Failed to close upstream session: {e}")
+
+    async def close(self):
+        sessions = [session for _, _, session, _ in self._sessions.values()]
+        sessions += self._retired
+        self._sessions = {}
+        self._retired = set()
+
+        for session in sessions:
+            await self._close_session(session)
+
+
+UPSTREAM_SESSIONS = UpstreamSessionPool(
+    limit=AIOHTTP_CLIENT_POOL_LIMIT,
+    limit_per_host=AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST,
+    keepalive_timeout=AIOHTTP_CLIENT_KEEPALIVE_TIMEOUT,
+    dns_cache_ttl=AIOHTTP_CLIENT_DNS_CACHE_TTL,
+)
@@ -73,6 +73,7 @@ def remove_open_webui_params(params: dict) -> dict:
     open_webui_params = {
         "stream_response": bool,
         "stream_delta_chunk_size": int,
+        "stream_content_delta": bool,
         "function_calling": str,
         "reasoning_tags": list,
         "system": str,
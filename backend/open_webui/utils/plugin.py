@@ -6,15 +6,116 @@ from importlib import util
 import types
 import tempfile
 import logging
-
-from open_webui.env import SRC_LOG_LEVELS, PIP_OPTIONS, PIP_PACKAGE_INDEX_OPTIONS
-from open_webui.models.functions import Functions
-from open_webui.models.tools import Tools
+from typing import Optional
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    PIP_OPTIONS,
+    PIP_PACKAGE_INDEX_OPTIONS,
+    REDIS_URL,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_CONFIG_SYNC_INTERVAL,
+)
+from open_webui.models.functions import Functions, FunctionWithValvesModel
+from open_webui.models.tools import Tools, ToolModel
+from open_webui.utils.redis import (
+    RedisVersion,
+    get_redis_connection,
+    get_sentinels_from_env,
+)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
 
+class PluginRegistry:
+    """
+    Functions and tools shared by all requests of a worker.
+
+    All functions are read with their valves in one query and tools are read
+    by id on first use, then served from memory. Every write through
+    `Functions` or `Tools` calls `bump()`, which bumps a `RedisVersion` so all
+    workers drop their snapshot on their next read. Without Redis, only the
+    local worker is invalidated.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        redis_sentinels: Optional[list] = [],
+        redis_cluster: Optional[bool] = False,
+        redis_key_prefix: str = "open-webui",
+        sync_interval: float = 5.0,
+    ):
+        redis = None
+        if redis_url:
+            redis = get_redis_connection(
+                redis_url,
+                redis_sentinels,
+                redis_cluster,
+                decode_responses=True,
+            )
+        self._redis_version = RedisVersion(
+            redis, f"{redis_key_prefix}:plugins", sync_interval
+        )
+
+        # Version the snapshots below were read at
+        self._version = None
+        self._functions: Optional[dict[str, FunctionWithValvesModel]] = None
+        self._tools: dict[str, Optional[ToolModel]] = {}
+        self._tool_valves: dict[str, Optional[dict]] = {}
+
+    def get_version(self):
+        version = self._redis_version.get()
+        if version != self._version:
+            self._functions = None
+            self._tools = {}
+            self._tool_valves = {}
+            self._version = version
+        return version
+
+    def bump(self, id: str = ""):
+        self._redis_version.bump(id)
+
+    def get_functions(self) -> dict[str, FunctionWithValvesModel]:
+        self.get_version()
+        functions = self._functions
+        if functions is None:
+            functions = {
+                function.id: function
+                for function in Functions.get_functions(include_valves=True)
+            }
+            self._functions = functions
+        return functions
+
+    def get_function(self, id: str) -> Optional[FunctionWithValvesModel]:
+        return self.get_functions().get(id)
+
+    def get_tool(self, id: str) -> Optional[ToolModel]:
+        self.get_version()
+        if id not in self._tools:
+            self._tools[id] = Tools.get_tool_by_id(id)
+        return self._tools[id]
+
+    def get_tool_valves(self, id: str) -> Optional[dict]:
+        self.get_version()
+        if id not in self._tool_valves:
+            self._tool_valves[id] = Tools.get_tool_valves_by_id(id)
+        return self._tool_valves[id]
+
+
+PLUGIN_REGISTRY = PluginRegistry(
+    redis_url=REDIS_URL,
+    redis_sentinels=get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+    redis_cluster=REDIS_CLUSTER,
+    redis_key_prefix=REDIS_KEY_PREFIX,
+    sync_interval=REDIS_CONFIG_SYNC_INTERVAL,
+)
+
+
 def extract_frontmatter(content):
     """
     Extract frontmatter as a dictionary from the provided content string.
@@ -167,99 +268,77 @@ def load_function_module_by_id(function_id: str, content: str | None = None):
 
 
 def get_tool_module_from_cache(request, tool_id, load_from_db=True):
-    if load_from_db:
-        # Always load from the database by default
-        tool = Tools.get_tool_by_id(tool_id)
-        if not tool:
-            raise Exception(f"Tool not found: {tool_id}")
-        content = tool.content
-
-        new_content = replace_imports(content)
-        if new_content != content:
-            content = new_content
-            # Update the tool content in the database
-            Tools.update_tool_by_id(tool_id, {"content": content})
-
-        if (
-            hasattr(request.app.state, "TOOL_CONTENTS")
-            and tool_id in request.app.state.TOOL_CONTENTS
-        ) and (
-            hasattr(request.app.state, "TOOLS") and tool_id in request.app.state.TOOLS
-        ):
-            if request.app.state.TOOL_CONTENTS[tool_id] == content:
-                return request.app.state.TOOLS[tool_id], None
-
-        tool_module, frontmatter = load_tool_module_by_id(tool_id, content)
-    else:
-        if hasattr(request.app.state, "TOOLS") and tool_id in request.app.state.TOOLS:
-            return request.app.state.TOOLS[tool_id], None
-
-        tool_module, frontmatter = load_tool_module_by_id(tool_id)
-
     if not hasattr(request.app.state, "TOOLS"):
         request.app.state.TOOLS = {}
 
     if not hasattr(request.app.state, "TOOL_CONTENTS"):
         request.app.state.TOOL_CONTENTS = {}
 
-    request.app.state.TOOLS[tool_id] = tool_module
-    request.app.state.TOOL_CONTENTS[tool_id] = content
+    if not load_from_db and tool_id in request.app.state.TOOLS:
+        return request.app.state.TOOLS[tool_id], None
 
-    return tool_module, frontmatter
+    # Compare against the content in the registry, which only reads the
+    # database again after a tool was updated
+    tool = PLUGIN_REGISTRY.get_tool(tool_id)
+    if not tool:
+        raise Exception(f"Tool not found: {tool_id}")
+    content = tool.content
 
+    if tool_id in request.app.state.TOOLS:
+        if request.app.state.TOOL_CONTENTS.get(tool_id) == content:
+            # Keep the registry's string so the next comparison is by identity
+            request.app.state.TOOL_CONTENTS[tool_id] = content
+            return request.app.state.TOOLS[tool_id], None
 
-def get_function_module_from_cache(request, function_id, load_from_db=True):
-    if load_from_db:
-        # Always load from the database by default
-        # This is useful for hooks like "inlet" or "outlet" where the content might change
-        # and we want to ensure the latest content is used.
+    new_content = replace_imports(content)
+    if new_content != content:
+        # Update the tool content in the database
+        Tools.update_tool_by_id(tool_id, {"content": new_content})
 
-        function = Functions.get_function_by_id(function_id)
-        if not function:
-            raise Exception(f"Function not found: {function_id}")
-        content = function.content
+    tool_module, frontmatter = load_tool_module_by_id(tool_id, new_content)
 
-        new_content = replace_imports(content)
-        if new_content != content:
-            content = new_content
-            # Update the function content in the database
-            Functions.update_function_by_id(function_id, {"content": content})
-
-        if (
-            hasattr(request.app.state, "FUNCTION_CONTENTS")
-            and function_id in request.app.state.FUNCTION_CONTENTS
-        ) and (
-            hasattr(request.app.state, "FUNCTIONS")
-            and function_id in request.app.state.FUNCTIONS
-        ):
-            if request.app.state.FUNCTION_CONTENTS[function_id] == content:
-                return request.app.state.FUNCTIONS[function_id], None, None
-
-        function_module, function_type, frontmatter = load_function_module_by_id(
-            function_id, content
-        )
-    else:
-        # Load from cache (e.g. "stream" hook)
-        # This is useful for performance reasons
+    request.app.state.TOOLS[tool_id] = tool_module
+    request.app.state.TOOL_CONTENTS[tool_id] = new_content
 
-        if (
-            hasattr(request.app.state, "FUNCTIONS")
-            and function_id in request.app.state.FUNCTIONS
-        ):
-            return request.app.state.FUNCTIONS[function_id], None, None
+    return tool_module, frontmatter
 
-        function_module, function_type, frontmatter = load_function_module_by_id(
-            function_id
-        )
 
+def get_function_module_from_cache(request, function_id, load_from_db=True):
     if not hasattr(request.app.state, "FUNCTIONS"):
         request.app.state.FUNCTIONS = {}
 
     if not hasattr(request.app.state, "FUNCTION_CONTENTS"):
         request.app.state.FUNCTION_CONTENTS = {}
 
+    if not load_from_db and function_id in request.app.state.FUNCTIONS:
+        # Load from cache (e.g. "stream" hook)
+        return request.app.state.FUNCTIONS[function_id], None, None
+
+    # Hooks like "inlet" or "outlet" use the latest content of the function.
+    # It is compared against the content in the registry, which only reads the
+    # database again after a function was updated.
+    function = PLUGIN_REGISTRY.get_function(function_id)
+    if not function:
+        raise Exception(f"Function not found: {function_id}")
+    content = function.content
+
+    if function_id in request.app.state.FUNCTIONS:
+        if request.app.state.FUNCTION_CONTENTS.get(function_id) == content:
+            # Keep the registry's string so the next comparison is by identity
+            request.app.state.FUNCTION_CONTENTS[function_id] = content
+            return request.app.state.FUNCTIONS[function_id], None, None
+
+    new_content = replace_imports(content)
+    if new_content != content:
+        # Update the function content in the database
+        Functions.update_function_by_id(function_id, {"content": new_content})
+
+    function_module, function_type, frontmatter = load_function_module_by_id(
+        function_id, new_content
+    )
+
     request.app.state.FUNCTIONS[function_id] = function_module
-    request.app.state.FUNCTION_CONTENTS[function_id] = content
+    request.app.state.FUNCTION_CONTENTS[function_id] = new_content
 
     return function_module, function_type, frontmatter
 
@@ -1,4 +1,9 @@
+import asyncio
 import inspect
+import threading
+import time
+import uuid
+from contextlib import contextmanager
 from urllib.parse import urlparse
 
 import logging
@@ -228,3 +233,161 @@ def get_sentinel_url_from_env(redis_url, sentinel_hosts_env, sentinel_port_env):
         f"{host}:{sentinel_port_env}" for host in sentinel_hosts_env.split(",")
     )
     return f"redis+sentinel://{auth_part}{hosts_part}/{redis_config['db']}/{redis_config['service']}"
+
+
+class RedisVersion:
+    """
+    Version counter of state shared by all workers, used to invalidate local
+    caches of that state.
+
+    `bump()` increments the counter in Redis and announces it on a pub/sub
+    channel. `get()` returns the last known version and only reads it from
+    Redis again after an announcement, or after `sync_interval` seconds in case
+    one was missed. Without Redis, the version is a local counter.
+    """
+
+    def __init__(self, redis, key: str, sync_interval: float):
+        self.redis = redis
+        self.version_key = f"{key}:_version"
+        self.channel = f"{key}:_updates"
+        self.sync_interval = sync_interval
+
+        self._version = None if redis else 0
+        self._synced = False
+        self._synced_at = 0.0
+        self._pubsub_thread = None
+
+    def invalidate(self, *args):
+        self._synced = False
+
+    def _subscribe(self):
+        def exception_handler(e, pubsub, thread):
+            log.warning(f"Subscription to {self.channel} failed, retrying: {e}")
+            self.invalidate()
+            time.sleep(self.sync_interval or 1)
+
+        try:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: self.invalidate})
+            self._pubsub_thread = pubsub.run_in_thread(
+                sleep_time=1.0, daemon=True, exception_handler=exception_handler
+            )
+        except Exception as e:
+            log.warning(f"Failed to subscribe to {self.channel}: {e}")
+
+    def get(self):
+        if not self.redis:
+            return self._version
+
+        now = time.monotonic()
+        if self._synced and now - self._synced_at < self.sync_interval:
+            return self._version
+
+        if self._pubsub_thread is None:
+            # Subscribe lazily so no thread is started before workers are forked
+            self._subscribe()
+
+        # Mark as synced before reading so announcements meanwhile are not lost
+        self._synced = True
+        self._synced_at = now
+
+        try:
+            self._version = self.redis.get(self.version_key) or "0"
+        except redis.exceptions.RedisError as e:
+            log.warning(f"Failed to get {self.version_key}: {e}")
+        return self._version
+
+    def bump(self, message: str = "") -> None:
+        if not self.redis:
+            self._version += 1
+            return
+
+        try:
+            self.redis.incr(self.version_key)
+            self.redis.publish(self.channel, message)
+        except redis.exceptions.RedisError as e:
+            log.warning(f"Failed to bump {self.version_key}: {e}")
+        self.invalidate()
+
+
+class RedisNotifier:
+    """
+    Wakes up coroutines waiting for updates of a key.
+
+    `notify()` can be called from any thread. It wakes up the waiters of this
+    worker directly and announces the key on a pub/sub channel for the other
+    workers. Without Redis, only the local worker is notified.
+    """
+
+    def __init__(self, redis, channel: str):
+        self.redis = redis
+        self.channel = channel
+
+        # Messages published by this worker are skipped, its waiters were
+        # already woken up
+        self._instance_id = str(uuid.uuid4())
+        self._waiters: dict[str, set] = {}
+        self._lock = threading.Lock()
+        self._pubsub_thread = None
+
+    def _wake(self, key: str):
+        with self._lock:
+            waiters = list(self._waiters.get(key, ()))
+
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The loop of the waiter was closed
+                pass
+
+    def _handle_message(self, message):
+        instance_id, _, key = message["data"].partition(":")
+        if instance_id != self._instance_id:
+            self._wake(key)
+
+    def _subscribe(self):
+        def exception_handler(e, pubsub, thread):
+            log.warning(f"Subscription to {self.channel} failed, retrying: {e}")
+            time.sleep(1)
+
+        try:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: self._handle_message})
+            self._pubsub_thread = pubsub.run_in_thread(
+                sleep_time=1.0, daemon=True, exception_handler=exception_handler
+            )
+        except Exception as e:
+            log.warning(f"Failed to subscribe to {self.channel}: {e}")
+
+    def notify(self, key: str) -> None:
+        self._wake(key)
+
+        if self.redis:
+            try:
+                self.redis.publish(self.channel, f"{self._instance_id}:{key}")
+            except redis.exceptions.RedisError as e:
+                log.warning(f"Failed to publish to {self.channel}: {e}")
+
+    @contextmanager
+    def subscribe(self, key: str):
+        """
+        An `asyncio.Event` of the running loop, set whenever `key` is notified
+        until the context exits. Clear it before reading the state it guards.
+        """
+        if self.redis and self._pubsub_thread is None:
+            # Subscribe lazily so no thread is started before workers are forked
+            self._subscribe()
+
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.setdefault(key, set()).add(waiter)
+
+        try:
+            yield waiter[1]
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(key)
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[key]
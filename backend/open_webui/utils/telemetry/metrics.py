@@ -8,8 +8,31 @@ Metrics collected:
 
 * http.server.requests (counter)
 * http.server.duration (histogram, milliseconds)
+* webui.chat.message_buffer.flushes (observable counter)
+* webui.chat.message_buffer.writes_saved (observable counter)
+* webui.storage.cache.hits (observable counter)
+* webui.storage.cache.misses (observable counter)
+* webui.storage.cache.evictions (observable counter)
+* webui.upstream.connections.created (observable counter)
+* webui.upstream.connections.reused (observable counter)
+* webui.upstream.connections.queued (observable counter)
+* webui.embedding_cache.hits (observable counter)
+* webui.embedding_cache.disk_hits (observable counter)
+* webui.embedding_cache.misses (observable counter)
+* webui.embedding_cache.evictions (observable counter)
+* webui.reranking.batches (observable counter)
+* webui.reranking.pairs_scored (observable counter)
+* webui.reranking.cache_hits (observable counter)
+* webui.vector_db.calls (observable counter)
+* webui.vector_db.timeouts (observable counter)
+* webui.tasks.admitted (observable counter)
+* webui.tasks.queued (observable counter)
+* webui.tasks.shed (observable counter)
+* webui.tasks.running (observable gauge)
+* webui.tasks.queue_depth (observable gauge)
 
-Attributes used: http.method, http.route, http.status_code
+Attributes used: http.method, http.route, http.status_code,
+upstream.kind, upstream.idx, task.priority
 
 If you wish to add more attributes (e.g. user-agent) you can, but beware of
 high-cardinality label sets.
@@ -46,6 +69,12 @@ from open_webui.env import (
     OTEL_METRICS_EXPORTER_OTLP_INSECURE,
 )
 from open_webui.models.users import Users
+from open_webui.retrieval.utils import EMBEDDING_CACHE
+from open_webui.retrieval.vector.factory import VECTOR_DB_EXECUTOR
+from open_webui.socket.main import MESSAGE_WRITE_BUFFER
+from open_webui.storage.provider import STORAGE_CACHE
+from open_webui.tasks import TASK_ADMISSION
+from open_webui.utils.http_client import UPSTREAM_SESSIONS
 
 _EXPORT_INTERVAL_MILLIS = 10_000  # 10 seconds
 
@@ -101,6 +130,37 @@ def _build_meter_provider(resource: Resource) -> MeterProvider:
         View(
             instrument_name="webui.users.active.today",
         ),
+        View(
+            instrument_name="webui.chat.message_buffer.flushes",
+        ),
+        View(
+            instrument_name="webui.chat.message_buffer.writes_saved",
+        ),
+        View(
+            instrument_name="webui.storage.cache.hits",
+        ),
+        View(
+            instrument_name="webui.storage.cache.misses",
+        ),
+        View(
+            instrument_name="webui.storage.cache.evictions",
+        ),
+        View(
+            instrument_name="webui.upstream.connections.*",
+            attribute_keys=["upstream.kind", "upstream.idx"],
+        ),
+        View(
+            instrument_name="webui.embedding_cache.*",
+        ),
+        View(
+            instrument_name="webui.reranking.*",
+        ),
+        View(
+            instrument_name="webui.vector_db.*",
+        ),
+        View(
+            instrument_name="webui.tasks.*",
+        ),
     ]
 
     provider = MeterProvider(
@@ -173,6 +233,190 @@ def setup_metrics(app: FastAPI, resource: Resource) -> None:
         callbacks=[observe_users_active_today],
     )
 
+    def observe_message_buffer_flushes(
+        options: metrics.CallbackOptions,
+    ) -> Sequence[metrics.Observation]:
+        return [metrics.Observation(value=MESSAGE_WRITE_BUFFER.stats["flushes"])]
+
+    def observe_message_buffer_writes_saved(
+        options: metrics.CallbackOptions,
+    ) -> Sequence[metrics.Observation]:
+        return [metrics.Observation(value=MESSAGE_WRITE_BUFFER.stats["writes_saved"])]
+
+    meter.create_observable_counter(
+        name="webui.chat.message_buffer.flushes",
+        description="Number of buffered chat message writes flushed to the database",
+        unit="1",
+        callbacks=[observe_message_buffer_flushes],
+    )
+
+    meter.create_observable_counter(
+        name="webui.chat.message_buffer.writes_saved",
+        description="Number of chat writes avoided by coalescing message events",
+        unit="1",
+        callbacks=[observe_message_buffer_writes_saved],
+    )
+
+    def observe_storage_cache(stat: str):
+        def observe(
+            options: metrics.CallbackOptions,
+        ) -> Sequence[metrics.Observation]:
+            return [metrics.Observation(value=STORAGE_CACHE.stats[stat])]
+
+        return observe
+
+    for stat, description in (
+        ("hits", "Number of storage downloads served from the local cache"),
+        ("misses", "Number of files downloaded from cloud storage"),
+        ("evictions", "Number of files evicted from the local storage cache"),
+    ):
+        meter.create_observable_counter(
+            name=f"webui.storage.cache.{stat}",
+            description=description,
+            unit="1",
+            callbacks=[observe_storage_cache(stat)],
+        )
+
+    def observe_upstream_connections(stat: str):
+        def observe(
+            options: metrics.CallbackOptions,
+        ) -> Sequence[metrics.Observation]:
+            return [
+                metrics.Observation(
+                    value=stats[f"connections_{stat}"],
+                    attributes={
+                        "upstream.kind": kind,
+                        "upstream.idx": str(idx) if idx is not None else "",
+                    },
+                )
+                for (kind, idx), stats in list(UPSTREAM_SESSIONS.stats.items())
+            ]
+
+        return observe
+
+    for stat, description in (
+        ("created", "Number of connections opened to OpenAI and Ollama upstreams"),
+        ("reused", "Number of upstream requests sent on a pooled connection"),
+        ("queued", "Number of upstream requests that waited for a free connection"),
+    ):
+        meter.create_observable_counter(
+            name=f"webui.upstream.connections.{stat}",
+            description=description,
+            unit="1",
+            callbacks=[observe_upstream_connections(stat)],
+        )
+
+    def observe_embedding_cache(stat: str):
+        def observe(
+            options: metrics.CallbackOptions,
+        ) -> Sequence[metrics.Observation]:
+            return [metrics.Observation(value=EMBEDDING_CACHE.stats[stat])]
+
+        return observe
+
+    for stat, description in (
+        ("hits", "Number of embeddings served from the cache"),
+        ("disk_hits", "Number of cached embeddings read from the disk store"),
+        ("misses", "Number of texts sent to the embedding engine"),
+        ("evictions", "Number of embeddings evicted from the in-memory cache"),
+    ):
+        meter.create_observable_counter(
+            name=f"webui.embedding_cache.{stat}",
+            description=description,
+            unit="1",
+            callbacks=[observe_embedding_cache(stat)],
+        )
+
+    def observe_reranking(stat: str):
+        def observe(
+            options: metrics.CallbackOptions,
+        ) -> Sequence[metrics.Observation]:
+            # The service is replaced when the reranking model changes
+            service = getattr(app.state, "RERANKING_FUNCTION", None)
+            if service is None:
+                return []
+            return [metrics.Observation(value=service.stats[stat])]
+
+        return observe
+
+    for stat, description in (
+        ("batches", "Number of reranking model calls"),
+        ("pairs_scored", "Number of (query, chunk) pairs scored by the reranker"),
+        ("cache_hits", "Number of reranking scores served from the cache"),
+    ):
+        meter.create_observable_counter(
+            name=f"webui.reranking.{stat}",
+            description=description,
+            unit="1",
+            callbacks=[observe_reranking(stat)],
+        )
+
+    def observe_vector_db(stat: str):
+        def observe(
+            options: metrics.CallbackOptions,
+        ) -> Sequence[metrics.Observation]:
+            return [metrics.Observation(value=VECTOR_DB_EXECUTOR.stats[stat])]
+
+        return observe
+
+    for stat, description in (
+        ("calls", "Number of vector DB calls run on the shared executor"),
+        ("timeouts", "Number of vector DB calls that timed out"),
+    ):
+        meter.create_observable_counter(
+            name=f"webui.vector_db.{stat}",
+            description=description,
+            unit="1",
+            callbacks=[observe_vector_db(stat)],
+        )
+
+    def observe_tasks(stat: str):
+        def observe(
+            options: metrics.CallbackOptions,
+        ) -> Sequence[metrics.Observation]:
+            return [metrics.Observation(value=TASK_ADMISSION.stats[stat])]
+
+        return observe
+
+    for stat, description in (
+        ("admitted", "Number of chat tasks started by admission control"),
+        ("queued", "Number of chat tasks that waited for a free slot"),
+        ("shed", "Number of background tasks dropped under load"),
+    ):
+        meter.create_observable_counter(
+            name=f"webui.tasks.{stat}",
+            description=description,
+            unit="1",
+            callbacks=[observe_tasks(stat)],
+        )
+
+    def observe_tasks_running(
+        options: metrics.CallbackOptions,
+    ) -> Sequence[metrics.Observation]:
+        return [metrics.Observation(value=TASK_ADMISSION.running)]
+
+    def observe_tasks_queue_depth(
+        options: metrics.CallbackOptions,
+    ) -> Sequence[metrics.Observation]:
+        return [
+            metrics.Observation(value=depth, attributes={"task.priority": priority})
+            for priority, depth in TASK_ADMISSION.queue_depths().items()
+        ]
+
+    meter.create_observable_gauge(
+        name="webui.tasks.running",
+        description="Number of admitted chat tasks running on this worker",
+        unit="1",
+        callbacks=[observe_tasks_running],
+    )
+
+    meter.create_observable_gauge(
+        name="webui.tasks.queue_depth",
+        description="Number of chat tasks waiting for admission on this worker",
+        unit="1",
+        callbacks=[observe_tasks_queue_depth],
+    )
+
     # FastAPI middleware
     @app.middleware("http")
     async def _metrics_middleware(request: Request, call_next):
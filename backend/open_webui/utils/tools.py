@@ -37,7 +37,7 @@ from langchain_core.utils.function_calling import (
 from open_webui.utils.misc import is_string_allowed
 from open_webui.models.tools import Tools
 from open_webui.models.users import UserModel
-from open_webui.utils.plugin import load_tool_module_by_id
+from open_webui.utils.plugin import PLUGIN_REGISTRY, get_tool_module_from_cache
 from open_webui.env import (
     SRC_LOG_LEVELS,
     AIOHTTP_CLIENT_TIMEOUT,
@@ -112,7 +112,7 @@ async def get_tools(
     tools_dict = {}
 
     for tool_id in tool_ids:
-        tool = Tools.get_tool_by_id(tool_id)
+        tool = PLUGIN_REGISTRY.get_tool(tool_id)
         if tool is None:
 
             if tool_id.startswith("server:"):
@@ -246,10 +246,7 @@ async def get_tools(
             else:
                 continue
         else:
-            module = request.app.state.TOOLS.get(tool_id, None)
-            if module is None:
-                module, _ = load_tool_module_by_id(tool_id)
-                request.app.state.TOOLS[tool_id] = module
+            module, _ = get_tool_module_from_cache(request, tool_id)
 
             __user__ = {
                 **extra_params["__user__"],
@@ -257,7 +254,7 @@ async def get_tools(
 
             # Set valves for the tool
             if hasattr(module, "valves") and hasattr(module, "Valves"):
-                valves = Tools.get_tool_valves_by_id(tool_id) or {}
+                valves = PLUGIN_REGISTRY.get_tool_valves(tool_id) or {}
                 module.valves = module.Valves(**valves)
             if hasattr(module, "UserValves"):
                 __user__["valves"] = module.UserValves(  # type: ignore
@@ -90,7 +90,9 @@ export class SocketIOCollaborationProvider {
 			document_id: this.documentId,
 			user_id: this.user?.id,
 			user_name: this.user?.name,
-			user_color: userColor
+			user_color: userColor,
+			// On reconnect only the updates missing from this state are sent back
+			state_vector: Array.from(Y.encodeStateVector(this.doc))
 		});
 
 		// Set user awareness info